@@ -35,15 +35,12 @@ class Move(_Command):
         super().__init__(player)
         self.pose = destination
 
-    def package_command(self):
-        x = self.pose.position.x
-        y = self.pose.position.y
-        theta = self.pose.orientation
-
-        player_idx = self.player.id
-        packed_command = protocol.create_speed_command(x, y, theta, player_idx)
+    def get_speed_command(self):
+        """ Retourne le tuple (x, y, theta, robot_idx) encodé par protocol.create_speed_command(s). """
+        return self.pose.position.x, self.pose.position.y, self.pose.orientation, self.player.id
 
-        return packed_command
+    def package_command(self):
+        return protocol.create_speed_command(*self.get_speed_command())
 
 
 class Kick(_Command):
@@ -61,8 +58,12 @@ class Stop(_Command):
     def __init__(self, player):
         super().__init__(player)
 
+    def get_speed_command(self):
+        """ Retourne le tuple (x, y, theta, robot_idx) encodé par protocol.create_speed_command(s). """
+        return 0, 0, 0, self.player.id
+
     def package_command(self):
-        return protocol.create_speed_command(0, 0, 0, self.player.id)
+        return protocol.create_speed_command(*self.get_speed_command())
 
 
 class ChargeKick(_Command):
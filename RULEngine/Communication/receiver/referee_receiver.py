@@ -1,5 +1,7 @@
 # Under MIT License, see LICENSE.txt
 
+from collections import deque
+
 from RULEngine.Communication.protobuf import referee_pb2 as ssl_referee
 from RULEngine.Communication.util.protobuf_packet_receiver import ProtobufPacketReceiver
 from config.config_service import ConfigService
@@ -12,3 +14,17 @@ class RefereeReceiver(ProtobufPacketReceiver):
         host = cfg.config_dict["COMMUNICATION"]["udp_address"]
         port = int(cfg.config_dict["COMMUNICATION"]["referee_port"])
         super(RefereeReceiver, self).__init__(host, port, ssl_referee.SSL_Referee)
+
+
+class ReplayRefereeReceiver(ProtobufPacketReceiver):
+    """ Remplace RefereeReceiver lors de la relecture d'un log: les datagrammes sont poussés par le lecteur du log. """
+
+    def __init__(self):
+        self.packet_list = deque(maxlen=100)
+        self.packet_type = ssl_referee.SSL_Referee
+
+    def push(self, data):
+        self._handle_datagram(data)
+
+    def stop(self):
+        pass
@@ -4,17 +4,52 @@
     serveur de vision.
 """
 
-from RULEngine.Communication.protobuf import messages_robocup_ssl_wrapper_pb2 as ssl_wrapper
-from RULEngine.Communication.util.protobuf_packet_receiver import ProtobufPacketReceiver
+from RULEngine.Communication.util.camera_ring_buffer import CameraRingBuffer
+from RULEngine.Communication.util.threaded_udp_server import UDPReaderThread
 from config.config_service import ConfigService
 
 
-class VisionReceiver(ProtobufPacketReceiver):
-    """ Initie le serveur de vision, semble superflue. """
-    # FIXME: est-ce réellement utile? la classe ne semble aucunement générique
+class VisionReceiver(object):
+    """
+        Reçoit les paquets de la vision dans un thread lecteur persistant et
+        conserve la frame la plus récente de chaque caméra.
+    """
 
-    def __init__(self):
+    def __init__(self, host=None, port=None):
+        """
+            :param host: adresse de la vision, lue dans la configuration par défaut
+            :param port: port de la vision, lu dans la configuration par défaut
+        """
         cfg = ConfigService()
-        host = cfg.config_dict["COMMUNICATION"]["udp_address"]
-        port = int(cfg.config_dict["COMMUNICATION"]["vision_port"])
-        super(VisionReceiver, self).__init__(host, port, ssl_wrapper.SSL_WrapperPacket)
+        if host is None:
+            host = cfg.config_dict["COMMUNICATION"]["udp_address"]
+        if port is None:
+            port = int(cfg.config_dict["COMMUNICATION"]["vision_port"])
+        self.camera_buffer = CameraRingBuffer()
+        self.new_frame_event = self.camera_buffer.new_frame_event
+        self.reader = UDPReaderThread(host, port, self.camera_buffer.push)
+
+    def pop_frames(self):
+        """ Retourne la nouvelle frame de chaque caméra depuis le dernier appel. """
+        return self.camera_buffer.snapshot()
+
+    def get_latest_frame(self):
+        """ Retourne sans erreur la dernière frame reçu. """
+        return self.camera_buffer.latest()
+
+    def stop(self):
+        self.reader.stop()
+
+
+class ReplayVisionReceiver(VisionReceiver):
+    """ Remplace VisionReceiver lors de la relecture d'un log: les datagrammes sont poussés par le lecteur du log. """
+
+    def __init__(self):
+        self.camera_buffer = CameraRingBuffer()
+        self.new_frame_event = self.camera_buffer.new_frame_event
+
+    def push(self, data):
+        self.camera_buffer.push(data)
+
+    def stop(self):
+        pass
@@ -5,11 +5,17 @@ from RULEngine.Communication.util.udp_socket import udp_socket
 
 
 class GrSimCommandSender(object):
-    """ Service qui envoie les commandes de mouvements aux robots. """
+    """
+        Service qui envoie les commandes de mouvements aux robots. Les
+        commandes d'une frame sont regroupées dans un seul paquet par équipe,
+        construit dans un message réutilisé d'une frame à l'autre.
+    """
 
-    def __init__(self, host, port):
+    def __init__(self, host, port, server=None):
         """ Constructeur """
-        self.server = udp_socket(host, port)
+        self.server = udp_socket(host, port) if server is None else server
+        # un paquet préalloué par équipe, indexé par isteamyellow
+        self._packets = {False: _create_packet(False), True: _create_packet(True)}
 
     def _send_packet(self, packet):
         """
@@ -25,20 +31,46 @@ class GrSimCommandSender(object):
 
             :param command: Command pour un robot
         """
-        packet = grSim_Packet.grSim_Packet()
-        packet.commands.isteamyellow = command.player.team.is_team_yellow()
-        packet.commands.timestamp = 0
-        grsim_command = packet.commands.robot_commands.add()
-        grsim_command.id = command.player.id
-        grsim_command.wheelsspeed = False
-        grsim_command.veltangent = command.pose.position.x
-        grsim_command.velnormal = command.pose.position.y
-        grsim_command.velangular = command.pose.orientation
-        grsim_command.spinner = True
-        grsim_command.kickspeedx = command.kick_speed
-        grsim_command.kickspeedz = 0
-
-        self._send_packet(packet)
+        self.send_commands([command])
+
+    def send_commands(self, commands):
+        """
+            Envoie toutes les commandes d'une frame, un seul paquet par équipe.
+
+            :param commands: Liste des Command des robots
+        """
+        commands_by_team = {}
+        for command in commands:
+            commands_by_team.setdefault(command.player.team.is_team_yellow(), []).append(command)
+
+        for is_team_yellow, team_commands in commands_by_team.items():
+            packet = self._packets[is_team_yellow]
+            robot_commands = packet.commands.robot_commands
+            del robot_commands[len(team_commands):]
+            while len(robot_commands) < len(team_commands):
+                _add_robot_command(robot_commands)
+            for grsim_command, command in zip(robot_commands, team_commands):
+                grsim_command.id = command.player.id
+                grsim_command.veltangent = command.pose.position.x
+                grsim_command.velnormal = command.pose.position.y
+                grsim_command.velangular = command.pose.orientation
+                grsim_command.kickspeedx = command.kick_speed
+            self._send_packet(packet)
 
     def stop(self):
-        pass
\ No newline at end of file
+        pass
+
+
+def _create_packet(is_team_yellow):
+    packet = grSim_Packet.grSim_Packet()
+    packet.commands.isteamyellow = is_team_yellow
+    packet.commands.timestamp = 0
+    return packet
+
+
+def _add_robot_command(robot_commands):
+    grsim_command = robot_commands.add()
+    grsim_command.wheelsspeed = False
+    grsim_command.spinner = True
+    grsim_command.kickspeedz = 0
+    return grsim_command
@@ -9,6 +9,7 @@ import serial
 from serial.tools import list_ports
 
 from RULEngine.Command.command import _Command, Move, Stop
+from RULEngine.Communication.util import serial_protocol as protocol
 from RULEngine.Game.Player import Player
 
 COMMUNICATION_SLEEP = 0.001
@@ -31,6 +32,9 @@ class SerialCommandSender(object):
         # HACK
         self.command_dict = {0: Stop(Player(None, 0)), 1: Stop(Player(None, 1)), 2: Stop(Player(None, 2)),
                              3: Stop(Player(None, 3)), 4: Stop(Player(None, 4)), 5: Stop(Player(None,5))}
+        # les commandes de mouvement de tous les robots, encodées dans un seul tampon refait seulement au changement
+        self.movement_buffer = b''
+        self.command_dict_changed = True
 
         self.terminate = threading.Event()
         self.comm_thread = threading.Thread(target=self.send_loop)
@@ -39,11 +43,11 @@ class SerialCommandSender(object):
     def send_loop(self):
         while not self.terminate.is_set():
             if time.time() - self.last_time > MOVE_COMMAND_SLEEP:
-                # print(self.command_dict)
-                for c in self.command_dict.values():
-                    packed_command = c.package_command()
-                    self.serial.write(packed_command)
-                    time.sleep(COMMUNICATION_SLEEP)
+                if self.command_dict_changed:
+                    self.command_dict_changed = False
+                    commands = list(self.command_dict.values())
+                    self.movement_buffer = protocol.create_speed_commands([c.get_speed_command() for c in commands])
+                self.serial.write(self.movement_buffer)
                 self.last_time = time.time()
             else:
                 time.sleep(COMMUNICATION_SLEEP)
@@ -64,6 +68,7 @@ class SerialCommandSender(object):
         # FIXME please
         if isinstance(command, Move) or isinstance(command, Stop):
             self.command_dict[command.player.id] = command
+            self.command_dict_changed = True
         else:
             self.command_queue.append(command)
 
@@ -0,0 +1,24 @@
+# Under MIT License, see LICENSE.txt
+
+
+class StubCommandSender(object):
+    """
+        Sender de commandes qui n'envoie rien. Utilisé quand la communication
+        est désactivée et lors de la relecture d'un log; compte les commandes
+        reçues et garde la dernière.
+    """
+
+    def __init__(self):
+        self.command_count = 0
+        self.last_command = None
+
+    def send_command(self, command):
+        self.command_count += 1
+        self.last_command = command
+
+    def send_commands(self, commands):
+        for command in commands:
+            self.send_command(command)
+
+    def stop(self):
+        pass
@@ -2,31 +2,98 @@
 
 import pickle
 
+import numpy as np
+
+from RULEngine.Communication.util.debug_protocol import DebugPacketEncoder, STATIC_COMMAND_TYPES
 from RULEngine.Communication.util.udp_socket import udp_socket
 from config.config_service import ConfigService
 
+PICKLE_PROTOCOL = "pickle"
+BINARY_PROTOCOL = "binary"
+
 
 class UIDebugCommandSender(object):
     """
         Définition du service capable d'envoyer des paquets de débogages au
         serveur et à l'interface de débogage. S'occupe de la sérialisation.
+
+        Deux protocoles sont possibles selon ui_debug_protocol dans la section
+        DEBUG de la configuration:
+            - pickle: un datagramme picklé par commande, les commandes
+              statiques (livres) sont renvoyées à chaque frame;
+            - binary: les commandes d'une frame sont regroupées dans quelques
+              datagrammes (voir debug_protocol), les commandes statiques sont
+              envoyées une fois puis après chaque poignée de main du UI-debug.
     """
-    def __init__(self):
+    def __init__(self, server=None, protocol=None):
         """ Constructeur """
         cfg = ConfigService()
-        host = cfg.config_dict["COMMUNICATION"]["ui_debug_address"]
-        port = int(cfg.config_dict["COMMUNICATION"]["ui_cmd_sender_port"])
-        self.server = udp_socket(host, port)
+        if server is None:
+            host = cfg.config_dict["COMMUNICATION"]["ui_debug_address"]
+            port = int(cfg.config_dict["COMMUNICATION"]["ui_cmd_sender_port"])
+            server = udp_socket(host, port)
+        if protocol is None:
+            protocol = cfg.config_dict["DEBUG"].get("ui_debug_protocol", PICKLE_PROTOCOL)
+        if protocol not in (PICKLE_PROTOCOL, BINARY_PROTOCOL):
+            raise ValueError("Protocole de débogage inconnu: {}".format(protocol))
+        self.server = server
+        self.protocol = protocol
+        self.encoder = DebugPacketEncoder()
+        self.datagrams_sent = 0
+        self.bytes_sent = 0
+        self._static_packets = {}
+        self._static_pending = False
+
+    def on_handshake(self):
+        """
+            Le UI-debug vient de se connecter: les commandes statiques et une
+            carte d'influence complète lui seront envoyées à la prochaine frame.
+        """
+        self._static_pending = True
+        self.encoder.reset()
 
     def _send_packet(self, p_packet):
         """ Envoi un seul paquet. """
+        self._send_datagram(pickle.dumps(_to_pickle_packet(p_packet)))
+
+    def _send_datagram(self, p_datagram):
         try:
-            self.server.send(pickle.dumps(p_packet))
+            self.server.send(p_datagram)
+            self.datagrams_sent += 1
+            self.bytes_sent += len(p_datagram)
         except ConnectionRefusedError:
             # FIXME: hack
             pass
 
     def send_command(self, p_packets):
         """ Reçoit une liste de paquets et les envoies. """
+        packets = self._filter_static_packets(p_packets)
+        if self.protocol == BINARY_PROTOCOL:
+            for datagram in self.encoder.encode(packets):
+                self._send_datagram(datagram)
+        else:
+            for packet in packets:
+                self._send_packet(packet)
+
+    def _filter_static_packets(self, p_packets):
+        packets = []
         for packet in p_packets:
-            self._send_packet(packet)
\ No newline at end of file
+            if packet['type'] in STATIC_COMMAND_TYPES:
+                if self._static_packets.get(packet['type']) != packet:
+                    self._static_packets[packet['type']] = packet
+                    self._static_pending = True
+            else:
+                packets.append(packet)
+
+        if self._static_pending or self.protocol == PICKLE_PROTOCOL:
+            packets = list(self._static_packets.values()) + packets
+            self._static_pending = False
+        return packets
+
+
+def _to_pickle_packet(p_packet):
+    """ L'ancien protocole attend les cartes d'influence en listes Python. """
+    data = p_packet['data']
+    if isinstance(data, dict) and isinstance(data.get('field_data'), np.ndarray):
+        p_packet = dict(p_packet, data=dict(data, field_data=data['field_data'].tolist()))
+    return p_packet
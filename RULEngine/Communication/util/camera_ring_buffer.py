@@ -0,0 +1,87 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Tampons circulaires par caméra pour les DetectionFrame de la vision.
+
+    Un seul thread écrit (le lecteur UDP) et un seul thread lit (la boucle de
+    jeu). L'écrivain décode dans une frame de travail puis l'échange avec la
+    case suivante du tampon de la caméra avant de publier son index: aucune
+    copie n'est faite et aucun verrou n'est nécessaire, la publication d'un
+    entier étant atomique en Python.
+"""
+
+import threading
+
+from RULEngine.Communication.util.ssl_detection_decoder import DetectionFrame, DecodeError
+
+MAX_CAMERAS = 8
+RING_SIZE = 8
+
+
+class CameraRingBuffer(object):
+    """
+        Conserve les dernières frames de chaque caméra. Une frame retournée par
+        snapshot() reste valide tant que la caméra n'a pas publié RING_SIZE - 1
+        nouvelles frames; un consommateur qui la garde plus longtemps doit la
+        copier.
+    """
+
+    def __init__(self, max_cameras=MAX_CAMERAS, ring_size=RING_SIZE):
+        self.ring_size = ring_size
+        self.rings = [[DetectionFrame() for _ in range(ring_size)] for _ in range(max_cameras)]
+        # index de la dernière frame publiée par caméra, -1 si aucune
+        self.heads = [-1] * max_cameras
+        self.frame_numbers = [-1] * max_cameras
+        self.last_camera = -1
+        self.dropped_frames = 0
+        self._read_frame_numbers = [-1] * max_cameras
+        self._scratch = DetectionFrame()
+        # levé à chaque publication, permet au consommateur de dormir en attendant la vision
+        self.new_frame_event = threading.Event()
+
+    def push(self, data):
+        """
+            Décode un paquet brut et le publie s'il est plus récent que la
+            dernière frame de sa caméra. Appelée par le thread lecteur.
+
+            :return: True si la frame a été publiée
+        """
+        scratch = self._scratch
+        try:
+            if not scratch.decode(data):
+                return False
+        except DecodeError:
+            self.dropped_frames += 1
+            return False
+        c_id = scratch.camera_id
+        if c_id >= len(self.rings) or scratch.frame_number <= self.frame_numbers[c_id]:
+            self.dropped_frames += 1
+            return False
+
+        next_head = (self.heads[c_id] + 1) % self.ring_size
+        ring = self.rings[c_id]
+        self._scratch = ring[next_head]
+        ring[next_head] = scratch
+        self.frame_numbers[c_id] = scratch.frame_number
+        self.heads[c_id] = next_head
+        self.last_camera = c_id
+        self.new_frame_event.set()
+        return True
+
+    def snapshot(self):
+        """ Retourne la frame la plus récente de chaque caméra ayant publié depuis le dernier appel. """
+        frames = []
+        for c_id, head in enumerate(self.heads):
+            if head < 0:
+                continue
+            frame = self.rings[c_id][head]
+            if frame.frame_number != self._read_frame_numbers[c_id]:
+                self._read_frame_numbers[c_id] = frame.frame_number
+                frames.append(frame)
+        return frames
+
+    def latest(self):
+        """ Retourne la dernière frame publiée, toutes caméras confondues, ou None. """
+        c_id = self.last_camera
+        if c_id < 0:
+            return None
+        return self.rings[c_id][self.heads[c_id]]
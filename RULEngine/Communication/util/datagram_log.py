@@ -0,0 +1,88 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Enregistrement binaire des datagrammes bruts de la vision et de l'arbitre.
+
+    Le fichier débute par un en-tête, suivi d'un enregistrement par datagramme:
+    l'heure de réception (double), la source (octet), la taille (uint32) puis
+    les octets reçus tels quels. Rejouer le log redonne exactement les mêmes
+    paquets, dans le même ordre.
+"""
+
+import struct
+import threading
+import time
+
+from RULEngine.Communication.util.threaded_udp_server import UDPReaderThread
+
+LOG_HEADER = b"ULAVAL-SSL-LOG\x00\x01"
+VISION = 0
+REFEREE = 1
+
+_record_header = struct.Struct("<dBI")
+
+
+class DatagramLogError(Exception):
+    """ Est levée si un fichier n'est pas un log de datagrammes valide. """
+    pass
+
+
+class DatagramLogWriter(object):
+    """ Écrit les datagrammes dans un log, peut être appelé de plusieurs threads. """
+
+    def __init__(self, file_name):
+        self.file = open(file_name, "wb")
+        self.file.write(LOG_HEADER)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def write(self, source, timestamp, data):
+        record = _record_header.pack(timestamp, source, len(data)) + bytes(data)
+        with self._lock:
+            self.file.write(record)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self.file.close()
+
+
+def read_datagram_log(file_name):
+    """
+        Lit un log de datagrammes.
+
+        :return: liste de tuples (heure de réception, source, octets)
+    """
+    with open(file_name, "rb") as log_file:
+        content = log_file.read()
+    if not content.startswith(LOG_HEADER):
+        raise DatagramLogError("{} n'est pas un log de datagrammes.".format(file_name))
+
+    records = []
+    pos = len(LOG_HEADER)
+    while pos < len(content):
+        if pos + _record_header.size > len(content):
+            raise DatagramLogError("Enregistrement tronqué à l'octet {}.".format(pos))
+        timestamp, source, length = _record_header.unpack_from(content, pos)
+        pos += _record_header.size
+        records.append((timestamp, source, content[pos:pos + length]))
+        pos += length
+    return records
+
+
+class DatagramRecorder(object):
+    """ Écoute la vision et l'arbitre et enregistre chaque datagramme avec son heure de réception. """
+
+    def __init__(self, file_name, host, vision_port, referee_port):
+        self.writer = DatagramLogWriter(file_name)
+        self.readers = [UDPReaderThread(host, vision_port, self._get_callback(VISION)),
+                        UDPReaderThread(host, referee_port, self._get_callback(REFEREE))]
+
+    def _get_callback(self, source):
+        def record(data):
+            self.writer.write(source, time.time(), data)
+        return record
+
+    def stop(self):
+        for reader in self.readers:
+            reader.stop()
+        self.writer.close()
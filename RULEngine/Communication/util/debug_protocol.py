@@ -0,0 +1,274 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Protocole binaire du canal de débogage vers le UI-debug. Toutes les commandes d'une frame sont regroupées dans un ou
+    quelques datagrammes au lieu d'un datagramme picklé par commande.
+
+    Datagramme: en-tête HEADER (magie, version, numéro de frame, index du datagramme, nombre de datagrammes de la
+    frame), puis une suite de commandes complètes. Chaque commande est son type (uint16), son lien et ses données
+    encodés par pack_value. Un datagramme se décode donc seul, même si un autre datagramme de la frame est perdu.
+
+    Les valeurs sont encodées avec une étiquette d'un octet suivie de leur contenu en little-endian, à la manière de
+    msgpack. Les tableaux numpy sont envoyés comme un tampon brut. Les cartes d'influence sont envoyées en int16, soit au
+    complet, soit comme les cases modifiées depuis la carte précédente.
+"""
+import struct
+
+import numpy as np
+
+from RULEngine.Debug.debug_command import SENDER_NAME
+from RULEngine.Util.Position import Position
+
+__author__ = 'RoboCupULaval'
+
+MAGIC = b'RU'
+PROTOCOL_VERSION = 1
+HEADER = struct.Struct('<2sBIHH')
+COMMAND_TYPE = struct.Struct('<H')
+MAX_DATAGRAM_SIZE = 8192
+
+BOOKS_COMMAND_TYPE = 1001
+ROBOT_STATUS_COMMAND_TYPE = 1002
+INFLUENCE_MAP_COMMAND_TYPE = 3007
+# commandes qui ne changent pas d'une frame à l'autre, renvoyées seulement après une poignée de main du UI-debug
+STATIC_COMMAND_TYPES = (BOOKS_COMMAND_TYPE,)
+# nombre de cartes d'influence envoyées en delta entre deux cartes complètes
+KEYFRAME_PERIOD = 10
+
+_INT = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+_LENGTH = struct.Struct('<I')
+_DTYPES = {'b': np.int8, 'B': np.uint8, 'h': np.int16, 'H': np.uint16, 'i': np.int32, 'I': np.uint32,
+           'q': np.int64, 'f': np.float32, 'd': np.float64, '?': np.bool_}
+
+
+class DebugProtocolError(Exception):
+    """ Est levée si une valeur ne peut pas être encodée ou si un datagramme est invalide. """
+    pass
+
+
+def pack_value(value, out: bytearray) -> None:
+    """
+        Ajoute l'encodage de value à la fin de out. Les types acceptés sont None, bool, int, float, str, bytes, list,
+        tuple, dict, les tableaux et scalaires numpy et Position, envoyée comme un tuple (x, y).
+    """
+    if value is None:
+        out += b'N'
+    elif value is True or value is False:
+        out += b'T' if value else b'F'
+    elif isinstance(value, (int, np.integer)):
+        out += b'i'
+        out += _INT.pack(int(value))
+    elif isinstance(value, (float, np.floating)):
+        out += b'd'
+        out += _FLOAT.pack(float(value))
+    elif isinstance(value, str):
+        encoded = value.encode('utf-8')
+        out += b's'
+        out += _LENGTH.pack(len(encoded))
+        out += encoded
+    elif isinstance(value, (bytes, bytearray)):
+        out += b'b'
+        out += _LENGTH.pack(len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out += b'l' if isinstance(value, list) else b't'
+        out += _LENGTH.pack(len(value))
+        for item in value:
+            pack_value(item, out)
+    elif isinstance(value, dict):
+        out += b'm'
+        out += _LENGTH.pack(len(value))
+        for key, item in value.items():
+            pack_value(key, out)
+            pack_value(item, out)
+    elif isinstance(value, np.ndarray):
+        if value.dtype.char not in _DTYPES:
+            raise DebugProtocolError("Type de tableau non supporté: {}".format(value.dtype))
+        out += b'a'
+        out += value.dtype.char.encode('ascii')
+        out += bytes((value.ndim,))
+        out += struct.pack('<{}I'.format(value.ndim), *value.shape)
+        out += np.ascontiguousarray(value, dtype=value.dtype.newbyteorder('<')).tobytes()
+    elif isinstance(value, np.bool_):
+        out += b'T' if value else b'F'
+    elif isinstance(value, Position):
+        pack_value((value.x, value.y), out)
+    else:
+        raise DebugProtocolError("Type non supporté par le protocole de débogage: {}".format(type(value).__name__))
+
+
+def unpack_value(data, offset=0):
+    """
+        Décode la valeur commençant à offset dans data.
+
+        :return: la valeur et l'offset suivant la valeur
+    """
+    tag = data[offset:offset + 1]
+    offset += 1
+    if tag == b'N':
+        return None, offset
+    if tag == b'T':
+        return True, offset
+    if tag == b'F':
+        return False, offset
+    if tag == b'i':
+        return _INT.unpack_from(data, offset)[0], offset + _INT.size
+    if tag == b'd':
+        return _FLOAT.unpack_from(data, offset)[0], offset + _FLOAT.size
+    if tag in (b's', b'b'):
+        length = _LENGTH.unpack_from(data, offset)[0]
+        offset += _LENGTH.size
+        raw = bytes(data[offset:offset + length])
+        return (raw.decode('utf-8') if tag == b's' else raw), offset + length
+    if tag in (b'l', b't'):
+        count = _LENGTH.unpack_from(data, offset)[0]
+        offset += _LENGTH.size
+        items = []
+        for _ in range(count):
+            item, offset = unpack_value(data, offset)
+            items.append(item)
+        return (items if tag == b'l' else tuple(items)), offset
+    if tag == b'm':
+        count = _LENGTH.unpack_from(data, offset)[0]
+        offset += _LENGTH.size
+        result = {}
+        for _ in range(count):
+            key, offset = unpack_value(data, offset)
+            result[key], offset = unpack_value(data, offset)
+        return result, offset
+    if tag == b'a':
+        dtype = np.dtype(_DTYPES[chr(data[offset])]).newbyteorder('<')
+        ndim = data[offset + 1]
+        shape = struct.unpack_from('<{}I'.format(ndim), data, offset + 2)
+        offset += 2 + 4 * ndim
+        size = int(np.prod(shape)) * dtype.itemsize
+        array = np.frombuffer(bytes(data[offset:offset + size]), dtype=dtype).reshape(shape)
+        return array.astype(dtype.newbyteorder('='), copy=False), offset + size
+    raise DebugProtocolError("Étiquette inconnue {!r} à l'offset {}".format(tag, offset - 1))
+
+
+class DebugPacketEncoder(object):
+    """
+        Encode les paquets de débogage d'une frame (dictionnaires de DebugCommand.get_packet_repr) en datagrammes.
+        Garde la dernière carte d'influence envoyée pour n'envoyer que les cases modifiées.
+    """
+    def __init__(self, max_datagram_size=MAX_DATAGRAM_SIZE, keyframe_period=KEYFRAME_PERIOD):
+        self.max_datagram_size = max_datagram_size
+        self.keyframe_period = keyframe_period
+        self.frame_number = 0
+        self._last_map = None
+        self._map_sequence = 0
+        self._maps_since_keyframe = 0
+
+    def reset(self):
+        """ Oublie la dernière carte d'influence, la prochaine est envoyée au complet. """
+        self._last_map = None
+
+    def encode(self, packets):
+        """
+            :param packets: la liste des paquets de la frame
+            :return: la liste des datagrammes à envoyer, vide s'il n'y a aucun paquet
+        """
+        commands = [self._encode_command(packet) for packet in packets]
+        if not commands:
+            return []
+
+        bodies = []
+        body = bytearray()
+        for command in commands:
+            if body and HEADER.size + len(body) + len(command) > self.max_datagram_size:
+                bodies.append(body)
+                body = bytearray()
+            body += command
+        bodies.append(body)
+
+        self.frame_number = (self.frame_number + 1) & 0xFFFFFFFF
+        return [HEADER.pack(MAGIC, PROTOCOL_VERSION, self.frame_number, index, len(bodies)) + bytes(body)
+                for index, body in enumerate(bodies)]
+
+    def _encode_command(self, packet):
+        data = packet['data']
+        if packet['type'] == INFLUENCE_MAP_COMMAND_TYPE:
+            data = self._encode_influence_map(data)
+        out = bytearray(COMMAND_TYPE.pack(packet['type']))
+        pack_value(packet['link'], out)
+        pack_value(data, out)
+        return out
+
+    def _encode_influence_map(self, data):
+        board = np.asarray(data['field_data'])
+        board = np.rint(board).astype(np.int16) if board.dtype.kind == 'f' else board.astype(np.int16)
+        data = dict(data)
+        del data['field_data']
+        self._map_sequence += 1
+        data['map_sequence'] = self._map_sequence
+
+        last_map = self._last_map
+        changed = None
+        if last_map is not None and last_map.shape == board.shape and \
+                self._maps_since_keyframe < self.keyframe_period:
+            changed = np.flatnonzero(board != last_map)
+            # chaque case modifiée coûte un index (4 octets) et une valeur (2 octets)
+            if len(changed) * 6 >= board.size * 2:
+                changed = None
+
+        if changed is None:
+            data['field_data'] = board
+            self._maps_since_keyframe = 0
+        else:
+            data['field_delta'] = {'base_sequence': self._map_sequence - 1,
+                                   'shape': board.shape,
+                                   'indices': changed.astype(np.uint32),
+                                   'values': board.ravel()[changed]}
+            self._maps_since_keyframe += 1
+        self._last_map = board
+        return data
+
+
+class DebugPacketDecoder(object):
+    """
+        Décode les datagrammes de DebugPacketEncoder en paquets semblables à ceux de l'ancien protocole pickle. Les
+        cartes d'influence en delta sont reconstruites à partir de la carte précédente; un delta dont la carte de base a
+        été perdue est ignoré jusqu'à la prochaine carte complète.
+    """
+    def __init__(self):
+        self.dropped_maps = 0
+        self._last_map = None
+        self._last_map_sequence = None
+
+    def decode(self, datagram):
+        """
+            :param datagram: un datagramme reçu
+            :return: la liste des paquets du datagramme
+        """
+        if len(datagram) < HEADER.size:
+            raise DebugProtocolError("Datagramme trop court")
+        magic, version, _, _, _ = HEADER.unpack_from(datagram)
+        if magic != MAGIC or version != PROTOCOL_VERSION:
+            raise DebugProtocolError("Datagramme d'un autre protocole")
+
+        packets = []
+        offset = HEADER.size
+        while offset < len(datagram):
+            command_type = COMMAND_TYPE.unpack_from(datagram, offset)[0]
+            link, offset = unpack_value(datagram, offset + COMMAND_TYPE.size)
+            data, offset = unpack_value(datagram, offset)
+            if command_type == INFLUENCE_MAP_COMMAND_TYPE:
+                data = self._decode_influence_map(data)
+                if data is None:
+                    continue
+            packets.append({'name': SENDER_NAME, 'version': "1.0", 'type': command_type, 'link': link, 'data': data})
+        return packets
+
+    def _decode_influence_map(self, data):
+        delta = data.pop('field_delta', None)
+        if delta is not None:
+            if self._last_map is None or delta['base_sequence'] != self._last_map_sequence:
+                self.dropped_maps += 1
+                return None
+            board = self._last_map.copy()
+            board.ravel()[delta['indices']] = delta['values']
+            data['field_data'] = board
+        self._last_map = data['field_data']
+        self._last_map_sequence = data['map_sequence']
+        return data
@@ -6,44 +6,39 @@
 """
 
 from collections import deque
-from socketserver import BaseRequestHandler
-
-import time
 
 from RULEngine.Communication.protobuf import messages_robocup_ssl_wrapper_pb2
-from RULEngine.Communication.util.threaded_udp_server import ThreadedUDPServer
+from RULEngine.Communication.util.threaded_udp_server import UDPReaderThread
 
 
 class ProtobufPacketReceiver(object):
     """
         Service qui implémente un serveur multicast UDP avec comme type de
         paquets ceux défini par la SSL en utilisant protobuf. Le serveur est
-        async.
+        async et lit le socket dans un seul thread persistant.
     """
 
     def __init__(self, host, port, packet_type):
         self.packet_list = deque(maxlen=100)
-        handler = self.get_udp_handler(self.packet_list, packet_type)
-        self.server = ThreadedUDPServer(host, port, handler)
-
-    def get_udp_handler(self, packet_list, packet_type):
-        class ThreadedUDPRequestHandler(BaseRequestHandler):
+        self.packet_type = packet_type
+        self.reader = UDPReaderThread(host, port, self._handle_datagram)
 
-            def handle(self):
-                data = self.request[0]
-                packet = packet_type()
-                packet.ParseFromString(data)
-                packet_list.append(packet)
-
-        return ThreadedUDPRequestHandler
+    def _handle_datagram(self, data):
+        packet = self.packet_type()
+        packet.ParseFromString(bytes(data))
+        self.packet_list.append(packet)
 
     # TODO change the typing here in case of refereeMGL 2017/02/24
     def pop_frames(self)->messages_robocup_ssl_wrapper_pb2:
-        """ Retourne une frame de la deque. """
-        new_list = list(self.packet_list)
+        """ Vide la deque et retourne ses frames, la plus récente en premier. """
+        # popleft est atomique: un paquet reçu pendant la vidange n'est jamais perdu
+        new_list = []
+        try:
+            while True:
+                new_list.append(self.packet_list.popleft())
+        except IndexError:
+            pass
         new_list.reverse()
-
-        self.packet_list.clear()
         return new_list
 
     # TODO change the typing here in case of referee MGL 2017/02/24
@@ -54,4 +49,5 @@ class ProtobufPacketReceiver(object):
         except IndexError:
             return None
 
-
+    def stop(self):
+        self.reader.stop()
@@ -1,5 +1,6 @@
 from RULEngine.Communication.sender.grsim_command_sender import GrSimCommandSender
 from RULEngine.Communication.sender.serial_command_sender import SerialCommandSender
+from RULEngine.Communication.sender.stub_command_sender import StubCommandSender
 from config.config_service import ConfigService
 
 
@@ -13,14 +14,7 @@ class RobotCommandSenderFactory(object):
         elif type_of_connection == "serial":
             return SerialCommandSender()
         elif type_of_connection == "disabled":
-            class FakeRobotCommandSender:
-                @staticmethod
-                def send_command(commands):
-                    pass
-                
-                def stop(self):
-                    pass
-            return FakeRobotCommandSender()
+            return StubCommandSender()
         else:
             raise TypeError("Tentative de création d'un RobotCommandSender de "
                             "mauvais type.")
@@ -22,6 +22,14 @@ STM32_ADDR_BROADCAST = 0xFF
 
 SERIAL_TIMEOUT = 0.1
 
+# Dispositions précompilées des paquets (l'embarqué STM32 est little-endian): entête de 5 octets
+# [version, destinataire, robot, commande, checksum] suivie de la charge utile.
+_HEADER_STRUCT = struct.Struct('<5B')
+_SPEED_COMMAND_STRUCT = struct.Struct('<5B3f')
+_REGISTER_COMMAND_STRUCT = struct.Struct('<7B')
+_CHECKSUM_INDEX = 4
+_PACKET_DELIMITER = b'\0'
+
 
 class DribblerStatus(Enum):
     DISABLED = 0
@@ -29,9 +37,25 @@ class DribblerStatus(Enum):
 
 
 def create_speed_command(x, y, theta, robot_idx):
-    velocity = [x, y, theta]
-    packet = _stm32_pack_cmd(_stm32_pack_payload(velocity), STM32_CMD_MOVEMENT_COMMAND, robot_idx=robot_idx)
-    return packet
+    return create_speed_commands([(x, y, theta, robot_idx)])
+
+
+def create_speed_commands(speeds):
+    """
+        Encode les commandes de vitesse de plusieurs robots dans un seul tampon contigu, prêt à être écrit sur le
+        port série en un appel. Les paquets bruts sont écrits dans un tampon préalloué avant l'encodage COBS.
+
+        :param speeds: Liste de tuples (x, y, theta, robot_idx)
+        :return: bytes, la concaténation des paquets encodés en COBS, chacun terminé par son délimiteur
+    """
+    size = _SPEED_COMMAND_STRUCT.size
+    raw_packets = bytearray(size * len(speeds))
+    encoded_packets = []
+    for offset, (x, y, theta, robot_idx) in zip(range(0, len(raw_packets), size), speeds):
+        _SPEED_COMMAND_STRUCT.pack_into(raw_packets, offset, STM32_PROTOCOL_VERSION, STM32_ADDR_BASE_STATION,
+                                        robot_idx, STM32_CMD_MOVEMENT_COMMAND, 0x00, x, y, theta)
+        encoded_packets.append(_stm32_finalize_packet(raw_packets[offset:offset + size]))
+    return b''.join(encoded_packets)
 
 
 def create_charge_command(robot_idx):
@@ -47,8 +71,9 @@ def create_dribbler_command(robot_idx, status):
 
 
 def _create_register_command(register, value, robot_idx):
-    payload = bytes([register, value])
-    return _stm32_pack_cmd(payload, STM32_CMD_SET_REGISTER, robot_idx)
+    packet = bytearray(_REGISTER_COMMAND_STRUCT.pack(STM32_PROTOCOL_VERSION, STM32_ADDR_BASE_STATION, robot_idx,
+                                                     STM32_CMD_SET_REGISTER, 0x00, register, value))
+    return _stm32_finalize_packet(packet)
 
 
 def ping_robot(serial):
@@ -89,26 +114,26 @@ def _stm32_pack_ping():
 
 
 def _stm32_pack_payload(data):
-    return struct.pack('%sf' % len(data), *data)
+    return struct.pack('<%sf' % len(data), *data)
 
 
 def _stm32_pack_cmd(payload, cmd=STM32_CMD_MOVEMENT_COMMAND, robot_idx=STM32_ADDR_BROADCAST):
     header = _stm32_generate_header(cmd, robot_idx)
 
-    packet = header
+    packet = bytearray(header)
 
     if payload:
         packet += payload
 
-    checksum = bytes([sum(packet) & 0xff])
-    packet = packet[:4] + checksum + packet[5:]
-    return cobs.encode(bytes(packet)) + b'\0'
+    return _stm32_finalize_packet(packet)
+
+
+def _stm32_finalize_packet(packet):
+    """ Inscrit le checksum dans l'entête (encore à zéro), encode en COBS et ajoute le délimiteur. """
+    packet[_CHECKSUM_INDEX] = sum(packet) & 0xff
+    return cobs.encode(packet) + _PACKET_DELIMITER
 
 
 def _stm32_generate_header(cmd=STM32_CMD_HEART_BEAT_REQUEST, robot_idx=STM32_ADDR_BROADCAST):
-    return bytes([STM32_PROTOCOL_VERSION,
-                  STM32_ADDR_BASE_STATION,
-                  robot_idx,
-                  cmd,
-                  0x00])
+    return _HEADER_STRUCT.pack(STM32_PROTOCOL_VERSION, STM32_ADDR_BASE_STATION, robot_idx, cmd, 0x00)
 
@@ -0,0 +1,243 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Décodeur rapide des paquets SSL_WrapperPacket de la vision.
+
+    Le protobuf vendu avec le projet est en pur Python et construit un objet par
+    balle et par robot. Ce module lit directement les octets du paquet et remplit
+    des tableaux structurés NumPy préalloués. Seule la partie *detection* du
+    paquet est décodée, la géométrie est ignorée.
+
+    Un DetectionFrame expose la même interface en lecture que le paquet protobuf
+    (HasField, detection, balls, robots_blue, robots_yellow, ...), ce qui permet de
+    l'utiliser partout où un SSL_WrapperPacket était attendu.
+"""
+
+import struct
+
+import numpy as np
+
+MAX_BALLS = 16
+MAX_ROBOTS = 16
+
+BALL_DTYPE = np.dtype([('confidence', np.float64),
+                       ('area', np.int64),
+                       ('x', np.float64),
+                       ('y', np.float64),
+                       ('z', np.float64),
+                       ('pixel_x', np.float64),
+                       ('pixel_y', np.float64)])
+
+ROBOT_DTYPE = np.dtype([('confidence', np.float64),
+                        ('robot_id', np.int64),
+                        ('x', np.float64),
+                        ('y', np.float64),
+                        ('orientation', np.float64),
+                        ('pixel_x', np.float64),
+                        ('pixel_y', np.float64),
+                        ('height', np.float64)])
+
+# Types de fil protobuf
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+_unpack_float = struct.Struct('<f').unpack_from
+_unpack_double = struct.Struct('<d').unpack_from
+
+# numéro de champ -> index dans le tuple de l'élément, pour SSL_DetectionBall et SSL_DetectionRobot
+_BALL_FIELDS = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5, 7: 6}
+_ROBOT_FIELDS = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5, 7: 6, 8: 7}
+
+
+class DecodeError(Exception):
+    """ Est levée si le paquet de vision est tronqué ou mal formé. """
+    pass
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip_field(data, pos, wire_type):
+    if wire_type == _VARINT:
+        _, pos = _read_varint(data, pos)
+    elif wire_type == _FIXED64:
+        pos += 8
+    elif wire_type == _LENGTH_DELIMITED:
+        length, pos = _read_varint(data, pos)
+        pos += length
+    elif wire_type == _FIXED32:
+        pos += 4
+    else:
+        raise DecodeError("Type de champ protobuf non supporté: {}".format(wire_type))
+    return pos
+
+
+def _decode_item(data, pos, end, fields, default):
+    """ Décode un SSL_DetectionBall ou un SSL_DetectionRobot en tuple, dans l'ordre du dtype. """
+    values = list(default)
+    while pos < end:
+        tag = data[pos]
+        if tag < 0x80:
+            pos += 1
+        else:
+            tag, pos = _read_varint(data, pos)
+        field_number = tag >> 3
+        wire_type = tag & 0x07
+        index = fields.get(field_number)
+        if index is None:
+            pos = _skip_field(data, pos, wire_type)
+        elif wire_type == _FIXED32:
+            values[index] = _unpack_float(data, pos)[0]
+            pos += 4
+        elif wire_type == _VARINT:
+            values[index], pos = _read_varint(data, pos)
+        else:
+            pos = _skip_field(data, pos, wire_type)
+    return tuple(values)
+
+
+_BALL_DEFAULT = (0.0, 0, 0.0, 0.0, 0.0, 0.0, 0.0)
+_ROBOT_DEFAULT = (0.0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+class DetectionFrame(object):
+    """
+        Frame de détection d'une caméra, stockée dans des tableaux préalloués.
+
+        Les tableaux sont réutilisés d'un décodage à l'autre: un consommateur qui
+        veut garder une frame doit en faire une copie avec copy().
+    """
+
+    def __init__(self, max_balls=MAX_BALLS, max_robots=MAX_ROBOTS):
+        self._balls = np.zeros(max_balls, dtype=BALL_DTYPE).view(np.recarray)
+        self._robots_blue = np.zeros(max_robots, dtype=ROBOT_DTYPE).view(np.recarray)
+        self._robots_yellow = np.zeros(max_robots, dtype=ROBOT_DTYPE).view(np.recarray)
+        self.n_balls = 0
+        self.n_robots_blue = 0
+        self.n_robots_yellow = 0
+        self.has_detection = False
+        self.frame_number = 0
+        self.t_capture = 0.0
+        self.t_sent = 0.0
+        self.camera_id = 0
+
+    # Interface compatible avec SSL_WrapperPacket / SSL_DetectionFrame
+    @property
+    def detection(self):
+        return self
+
+    def HasField(self, field_name):
+        return field_name == "detection" and self.has_detection
+
+    @property
+    def balls(self):
+        return self._balls[:self.n_balls]
+
+    @property
+    def robots_blue(self):
+        return self._robots_blue[:self.n_robots_blue]
+
+    @property
+    def robots_yellow(self):
+        return self._robots_yellow[:self.n_robots_yellow]
+
+    def ParseFromString(self, data):
+        self.decode(data)
+
+    def decode(self, data):
+        """
+            Décode un SSL_WrapperPacket sérialisé dans les tableaux de la frame.
+
+            :param data: les octets reçus de la vision
+            :return: True si le paquet contenait une détection
+        """
+        self.has_detection = False
+        self.n_balls = 0
+        self.n_robots_blue = 0
+        self.n_robots_yellow = 0
+        try:
+            pos = 0
+            end = len(data)
+            while pos < end:
+                tag, pos = _read_varint(data, pos)
+                if tag == 0x0a:  # detection, champ 1
+                    length, pos = _read_varint(data, pos)
+                    self._decode_detection(data, pos, pos + length)
+                    self.has_detection = True
+                    pos += length
+                else:
+                    pos = _skip_field(data, pos, tag & 0x07)
+        except (IndexError, struct.error) as err:
+            self.has_detection = False
+            raise DecodeError("Paquet de vision tronqué.") from err
+        return self.has_detection
+
+    def _decode_detection(self, data, pos, end):
+        balls = self._balls
+        robots_blue = self._robots_blue
+        robots_yellow = self._robots_yellow
+        while pos < end:
+            tag = data[pos]
+            pos += 1
+            if tag == 0x08:
+                self.frame_number, pos = _read_varint(data, pos)
+            elif tag == 0x11:
+                self.t_capture = _unpack_double(data, pos)[0]
+                pos += 8
+            elif tag == 0x19:
+                self.t_sent = _unpack_double(data, pos)[0]
+                pos += 8
+            elif tag == 0x20:
+                self.camera_id, pos = _read_varint(data, pos)
+            elif tag == 0x2a or tag == 0x32 or tag == 0x3a:
+                length, pos = _read_varint(data, pos)
+                item_end = pos + length
+                if tag == 0x2a:
+                    if self.n_balls < len(balls):
+                        balls[self.n_balls] = _decode_item(data, pos, item_end, _BALL_FIELDS, _BALL_DEFAULT)
+                        self.n_balls += 1
+                elif tag == 0x32:
+                    if self.n_robots_yellow < len(robots_yellow):
+                        robots_yellow[self.n_robots_yellow] = _decode_item(data, pos, item_end,
+                                                                           _ROBOT_FIELDS, _ROBOT_DEFAULT)
+                        self.n_robots_yellow += 1
+                else:
+                    if self.n_robots_blue < len(robots_blue):
+                        robots_blue[self.n_robots_blue] = _decode_item(data, pos, item_end,
+                                                                       _ROBOT_FIELDS, _ROBOT_DEFAULT)
+                        self.n_robots_blue += 1
+                pos = item_end
+            else:
+                if tag & 0x80:
+                    tag, pos = _read_varint(data, pos - 1)
+                pos = _skip_field(data, pos, tag & 0x07)
+
+    def copy_from(self, other):
+        """ Copie le contenu d'une autre frame sans réallouer les tableaux. """
+        self.has_detection = other.has_detection
+        self.frame_number = other.frame_number
+        self.t_capture = other.t_capture
+        self.t_sent = other.t_sent
+        self.camera_id = other.camera_id
+        self.n_balls = other.n_balls
+        self.n_robots_blue = other.n_robots_blue
+        self.n_robots_yellow = other.n_robots_yellow
+        self._balls[:self.n_balls] = other.balls
+        self._robots_blue[:self.n_robots_blue] = other.robots_blue
+        self._robots_yellow[:self.n_robots_yellow] = other.robots_yellow
+
+    def copy(self):
+        new_frame = DetectionFrame(len(self._balls), len(self._robots_blue))
+        new_frame.copy_from(self)
+        return new_frame
+
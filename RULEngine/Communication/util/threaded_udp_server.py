@@ -28,3 +28,56 @@ class ThreadedUDPServer(ThreadingMixIn, UDPServer):
         server_thread = threading.Thread(target=self.serve_forever)
         server_thread.daemon = True
         server_thread.start()
+
+
+class UDPReaderThread(threading.Thread):
+    """
+        Lit un socket UDP (multicast ou non) dans un unique thread persistant.
+
+        Contrairement à ThreadedUDPServer, aucun thread n'est créé par
+        datagramme: les paquets sont lus dans un tampon préalloué et passés au
+        callback sous forme de memoryview, valide seulement durant l'appel.
+        Une exception du callback ne fait perdre que son datagramme: elle est
+        comptée dans errors et affichée, puis la lecture continue.
+    """
+
+    BUFFER_SIZE = 65536
+
+    def __init__(self, host, port, callback, timeout=0.5):
+        super(UDPReaderThread, self).__init__(daemon=True)
+        self.callback = callback
+        self.stop_event = threading.Event()
+        self.errors = 0
+        self._buffer = bytearray(self.BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(('', port))
+        self.socket.settimeout(timeout)
+        if ip_address(host).is_multicast:
+            self.socket.setsockopt(socket.IPPROTO_IP,
+                                   socket.IP_ADD_MEMBERSHIP,
+                                   struct.pack("=4sl",
+                                               socket.inet_aton(host),
+                                               socket.INADDR_ANY))
+        self.start()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                nbytes = self.socket.recv_into(self._buffer)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                self.callback(self._view[:nbytes])
+            except Exception as error:
+                self.errors += 1
+                print("Datagramme rejeté sur le port {} ({}): {}".format(self.socket.getsockname()[1],
+                                                                         type(error).__name__, error))
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+        self.socket.close()
@@ -0,0 +1,184 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Envoi au UI-debug hors du thread de l'IA. L'IA ne fait que déposer une photo immuable de ce qu'elle veut montrer
+    (paquets de débogage, états du tracker, paquet de vision) dans une file bornée; la sérialisation et les appels
+    réseau se font dans le thread UIDebugWorker. Si le UI-debug ou le réseau n'arrivent pas à suivre, les éléments les
+    plus anciens sont abandonnés: la visualisation n'ajoute jamais de latence aux commandes des robots. Les frames
+    qui contiennent des commandes émises une seule fois (livres) ou seulement au changement (statut des robots), ainsi
+    que les poignées de main, ne sont jamais abandonnées: le UI-debug ne pourrait pas les récupérer.
+"""
+import threading
+from collections import deque
+
+from RULEngine.Communication.protobuf import messages_robocup_ssl_wrapper_pb2 as ssl_wrapper
+from RULEngine.Communication.util.debug_protocol import ROBOT_STATUS_COMMAND_TYPE, STATIC_COMMAND_TYPES
+from RULEngine.Util.constant import PLAYER_PER_TEAM
+
+__author__ = 'RoboCupULaval'
+
+UI_QUEUE_SIZE = 8
+WORKER_TIMEOUT = 0.1
+
+DEBUG_PACKETS = "debug_packets"
+TRACKER_STATES = "tracker_states"
+VISION_PACKET = "vision_packet"
+HANDSHAKE = "handshake"
+
+# commandes que le UI-debug ne reçoit qu'une fois ou qu'au changement, jamais abandonnées
+RELIABLE_COMMAND_TYPES = STATIC_COMMAND_TYPES + (ROBOT_STATUS_COMMAND_TYPE,)
+
+
+class DropOldestQueue(object):
+    """
+        File bornée entre threads; un ajout dans une file pleine abandonne l'élément abandonnable le plus ancien. Les
+        éléments ajoutés avec droppable=False ne sont jamais abandonnés, la file peut alors dépasser maxlen.
+    """
+
+    def __init__(self, maxlen=UI_QUEUE_SIZE):
+        self._items = deque()
+        self._condition = threading.Condition()
+        self.maxlen = maxlen
+        self.dropped = 0
+
+    def put(self, item, droppable=True):
+        with self._condition:
+            if len(self._items) >= self.maxlen:
+                self._drop_oldest()
+            self._items.append((item, droppable))
+            self._condition.notify()
+
+    def _drop_oldest(self):
+        for index, (_, droppable) in enumerate(self._items):
+            if droppable:
+                del self._items[index]
+                self.dropped += 1
+                return
+
+    def get(self, timeout=None):
+        """ Retourne l'élément le plus ancien, ou None si la file est restée vide jusqu'au timeout. """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._items, timeout):
+                return None
+            return self._items.popleft()[0]
+
+    def __len__(self):
+        return len(self._items)
+
+
+class UIDebugWorker(threading.Thread):
+    """
+        Thread qui sérialise et envoie tout le trafic destiné au UI-debug.
+
+        Les compteurs sent (par type d'élément), dropped (éléments abandonnés par la file) et errors (envois ou
+        sérialisations en échec, le thread continue) peuvent être lus en tout temps par get_counters.
+    """
+
+    def __init__(self, debug_sender=None, vision_sender=None, maxlen=UI_QUEUE_SIZE):
+        """
+            :param debug_sender: UIDebugCommandSender des commandes de débogage, ou None
+            :param vision_sender: UIDebugVisionSender de la vision redirigée, ou None
+            :param maxlen: nombre d'éléments en attente avant d'abandonner les plus anciens
+        """
+        super(UIDebugWorker, self).__init__(daemon=True)
+        self.debug_sender = debug_sender
+        self.vision_sender = vision_sender
+        self.queue = DropOldestQueue(maxlen)
+        self.stop_event = threading.Event()
+        self.sent = {DEBUG_PACKETS: 0, TRACKER_STATES: 0, VISION_PACKET: 0, HANDSHAKE: 0}
+        self.errors = 0
+        self.frame_number = 0
+
+    def send_debug_packets(self, packets):
+        """
+            Dépose les paquets de débogage d'une frame, la liste ne doit plus être modifiée par l'appelant. Une frame
+            qui contient une commande de RELIABLE_COMMAND_TYPES n'est jamais abandonnée.
+        """
+        if self.debug_sender is not None and packets:
+            reliable = any(packet['type'] in RELIABLE_COMMAND_TYPES for packet in packets)
+            self.queue.put((DEBUG_PACKETS, packets), droppable=not reliable)
+
+    def send_handshake(self):
+        """ Signale au thread que le UI-debug vient de se connecter (voir UIDebugCommandSender.on_handshake). """
+        if self.debug_sender is not None:
+            self.queue.put((HANDSHAKE, None), droppable=False)
+
+    def send_tracker_states(self, states):
+        """ Dépose une copie des états (N, 6) du tracker, envoyés au UI-debug comme un paquet de vision. """
+        if self.vision_sender is not None:
+            self.queue.put((TRACKER_STATES, states.copy()))
+
+    def send_vision_packet(self, packet):
+        """ Dépose un SSL_WrapperPacket qui ne sera plus modifié, sérialisé par le thread. """
+        if self.vision_sender is not None:
+            self.queue.put((VISION_PACKET, packet))
+
+    def get_counters(self):
+        return {"queued": len(self.queue),
+                "dropped": self.queue.dropped,
+                "errors": self.errors,
+                "sent": dict(self.sent)}
+
+    def stop(self):
+        self.stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            item = self.queue.get(WORKER_TIMEOUT)
+            if item is not None:
+                self.process(*item)
+
+    def process(self, kind, value):
+        """ Sérialise et envoie un élément de la file, appelée par le thread. """
+        try:
+            if kind == DEBUG_PACKETS:
+                self.debug_sender.send_command(value)
+            elif kind == HANDSHAKE:
+                self.debug_sender.on_handshake()
+            elif kind == TRACKER_STATES:
+                self.frame_number += 1
+                self.vision_sender.send_packet(build_vision_packet(value, self.frame_number).SerializeToString())
+            else:
+                self.vision_sender.send_packet(value.SerializeToString())
+            self.sent[kind] += 1
+        except OSError:
+            self.errors += 1
+        except Exception as error:
+            # une erreur de sérialisation ne doit pas arrêter le thread: la file ne serait plus jamais vidée
+            self.errors += 1
+            print("Envoi au UI-debug rejeté ({}): {}".format(type(error).__name__, error))
+
+
+def build_vision_packet(states, frame_number):
+    """ Construit un SSL_WrapperPacket à partir des états filtrés (N, 6) du tracker. """
+    pb_sslwrapper = ssl_wrapper.SSL_WrapperPacket()
+    pb_sslwrapper.detection.camera_id = 0
+    pb_sslwrapper.detection.t_sent = 0
+
+    ball_state = states[-1]
+    pck_ball = pb_sslwrapper.detection.balls.add()
+    pck_ball.x = ball_state[0]
+    pck_ball.y = ball_state[1]
+    pck_ball.z = 0
+    # required for the packet no use for us at this stage
+    pck_ball.confidence = 0.999
+    pck_ball.pixel_x = ball_state[0]
+    pck_ball.pixel_y = ball_state[1]
+
+    for robots, offset in ((pb_sslwrapper.detection.robots_blue, 0),
+                           (pb_sslwrapper.detection.robots_yellow, PLAYER_PER_TEAM)):
+        for player_id in range(PLAYER_PER_TEAM):
+            state = states[offset + player_id]
+            packet_robot = robots.add()
+            packet_robot.confidence = 0.999
+            packet_robot.robot_id = player_id
+            packet_robot.x = state[0]
+            packet_robot.y = state[1]
+            packet_robot.orientation = state[4]
+            packet_robot.pixel_x = 0.
+            packet_robot.pixel_y = 0.
+
+    pb_sslwrapper.detection.t_capture = 0
+    pb_sslwrapper.detection.frame_number = frame_number
+    return pb_sslwrapper
@@ -1,5 +1,9 @@
 # Under MIT License, see LICENSE.txt
 
+import time
+
+import numpy as np
+
 from RULEngine.Debug.debug_command import DebugCommand
 from RULEngine.Util.singleton import Singleton
 
@@ -48,6 +52,30 @@ DEFAULT_TEXT_COLOR = Color(0, 0, 0)
 DEFAULT_DEBUG_TIMEOUT = 1
 DEFAULT_PATH_TIMEOUT = 0
 
+# Catégories de commandes, chacune avec sa période d'envoi minimale par clé
+LOG = "log"
+PATH = "path"
+STATUS = "status"
+SHAPE = "shape"
+INFLUENCE_MAP = "influence_map"
+BOOKS = "books"
+# période spéciale: la commande n'est envoyée que si ses données ont changé
+ON_CHANGE = -1
+DEFAULT_CATEGORY_PERIODS = {LOG: 1,
+                            PATH: 0.1,
+                            STATUS: ON_CHANGE,
+                            SHAPE: 0,
+                            INFLUENCE_MAP: 0,
+                            BOOKS: 0}
+# catégories toujours envoyées, peu importe le budget de la frame
+UNBUDGETED_CATEGORIES = (BOOKS,)
+# estimation du nombre d'octets de débogage permis par frame
+DEFAULT_FRAME_BYTE_BUDGET = 32768
+COMMAND_BYTE_OVERHEAD = 32
+# l'historique des derniers envois est purgé des clés échues à cette période (s) et borné à ce nombre de clés
+HISTORY_PRUNE_PERIOD = 1
+MAX_HISTORY_SIZE = 1024
+
 
 def wrap_command(raw_command):
     command = DebugCommand(raw_command['type'], raw_command['link'], raw_command['data'])
@@ -56,25 +84,132 @@ def wrap_command(raw_command):
 
 
 class DebugInterface(metaclass=Singleton):
+    """
+        Point d'entrée de toutes les commandes de débogage de l'IA. Chaque commande appartient à une catégorie qui
+        peut être désactivée (la commande n'est alors même pas construite) et qui a une période minimale d'envoi par
+        clé. La clé d'une commande est son link, ou une clé propre à la méthode (id du robot, message du log). Une
+        commande dont la clé est déjà dans la frame remplace l'ancienne. Au-delà du budget d'octets de la frame, les
+        nouvelles commandes sont abandonnées et comptées dans dropped. L'historique des derniers envois par clé ne
+        garde que les clés dont la période n'est pas échue, et au plus MAX_HISTORY_SIZE clés.
+    """
 
     def __init__(self):
 
         self.debug_state = []
+        self.category_periods = dict(DEFAULT_CATEGORY_PERIODS)
+        self.disabled_categories = set()
+        self.frame_byte_budget = DEFAULT_FRAME_BYTE_BUDGET
+        self.dropped = {}
+        self.clock = time.monotonic
+        self._frame_bytes = 0
+        self._frame_keys = {}
+        self._command_sizes = []
+        self._last_sent = {}
+        self._next_prune = 0.
+
+    def is_enabled(self, category):
+        return category not in self.disabled_categories
+
+    def set_category_enabled(self, category, enabled):
+        if enabled:
+            self.disabled_categories.discard(category)
+        else:
+            self.disabled_categories.add(category)
+
+    def pop_commands(self):
+        """ Retourne les commandes de la frame et commence une nouvelle frame. """
+        commands = self.debug_state
+        self.debug_state = []
+        self._frame_bytes = 0
+        self._frame_keys.clear()
+        self._command_sizes = []
+        now = self.clock()
+        if now >= self._next_prune:
+            self._prune_history(now)
+            self._next_prune = now + HISTORY_PRUNE_PERIOD
+        return commands
+
+    def clear_history(self):
+        """ Oublie les dernières commandes envoyées, à appeler quand le UI-debug se (re)connecte. """
+        self._last_sent.clear()
+        self._next_prune = 0.
+
+    def _prune_history(self, now):
+        """ Retire les clés dont la période est échue, elles ne bloqueraient plus aucun envoi. """
+        expired = [key for key, (sent_time, _) in self._last_sent.items()
+                   if 0 < self.category_periods.get(key[0], 0) <= now - sent_time]
+        for key in expired:
+            del self._last_sent[key]
+
+    def _remember(self, key, category, command):
+        period = self.category_periods.get(category, 0)
+        if period == 0:
+            return
+        # réinsérée pour que l'ordre du dictionnaire soit celui des derniers envois
+        self._last_sent.pop(key, None)
+        self._last_sent[key] = (self.clock(), command.data if period == ON_CHANGE else None)
+        if len(self._last_sent) > MAX_HISTORY_SIZE:
+            del self._last_sent[next(iter(self._last_sent))]
+
+    def _add(self, command, category, key=None):
+        if key is None:
+            key = command.link
+        key = None if key is None else (category, command.type_, key)
+        size = COMMAND_BYTE_OVERHEAD + _estimate_size(command.data)
+
+        index = self._frame_keys.get(key) if key is not None else None
+        if index is not None:
+            if not self._is_within_budget(category, size - self._command_sizes[index]):
+                return
+            self._frame_bytes += size - self._command_sizes[index]
+            self.debug_state[index] = command
+            self._command_sizes[index] = size
+            self._remember(key, category, command)
+            return
+
+        if key is not None:
+            period = self.category_periods.get(category, 0)
+            last = self._last_sent.get(key)
+            if last is not None:
+                if period == ON_CHANGE and last[1] == command.data or 0 < period and self.clock() - last[0] < period:
+                    return
+        if not self._is_within_budget(category, size):
+            return
+
+        self._frame_bytes += size
+        if key is not None:
+            self._frame_keys[key] = len(self.debug_state)
+            self._remember(key, category, command)
+        self.debug_state.append(command)
+        self._command_sizes.append(size)
+
+    def _is_within_budget(self, category, added_size):
+        if category in UNBUDGETED_CATEGORIES or self._frame_bytes + added_size <= self.frame_byte_budget:
+            return True
+        self.dropped[category] = self.dropped.get(category, 0) + 1
+        return False
 
     def add_log(self, level, message):
+        if LOG in self.disabled_categories:
+            return
         log = DebugCommand(2, {'level': level, 'message': message})
-        self.debug_state.append(log)
+        self._add(log, LOG, (level, message))
 
-    def add_point(self, point, color=VIOLET, width=5, link=None, timeout=DEFAULT_DEBUG_TIMEOUT):
+    def add_point(self, point, color=VIOLET, width=5, link=None, timeout=DEFAULT_DEBUG_TIMEOUT, category=SHAPE):
+        if category in self.disabled_categories:
+            return
         int_point = int(point[0]), int(point[1])
         data = {'point': int_point,
                 'color': color.repr(),
                 'width': width,
                 'timeout': timeout}
         point = DebugCommand(3004, data, p_link=link)
-        self.debug_state.append(point)
+        self._add(point, category)
 
-    def add_multiple_points(self, points, color=VIOLET, width=5, link=None, timeout=DEFAULT_DEBUG_TIMEOUT):
+    def add_multiple_points(self, points, color=VIOLET, width=5, link=None, timeout=DEFAULT_DEBUG_TIMEOUT,
+                            category=SHAPE):
+        if category in self.disabled_categories:
+            return
         points_as_tuple = []
         for point in points:
             points_as_tuple.append((int(point[0]), int(point[1])))
@@ -84,35 +219,42 @@ class DebugInterface(metaclass=Singleton):
                 'width': width,
                 'timeout': timeout}
         point = DebugCommand(3005, data, p_link=link)
-        self.debug_state.append(point)
+        self._add(point, category)
 
-    def add_circle(self, center, radius):
+    def add_circle(self, center, radius, link=None, category=SHAPE):
+        if category in self.disabled_categories:
+            return
         data = {'center': center,
                 'radius': radius,
                 'color': CYAN.repr(),
                 'is_fill': True,
                 'timeout': 0}
-        circle = DebugCommand(3003, data)
-        self.debug_state.append(circle)
+        circle = DebugCommand(3003, data, p_link=link)
+        self._add(circle, category)
 
-    def add_line(self, start_point, end_point, timeout=DEFAULT_DEBUG_TIMEOUT):
+    def add_line(self, start_point, end_point, timeout=DEFAULT_DEBUG_TIMEOUT, link=None, category=SHAPE):
+        if category in self.disabled_categories:
+            return
         data = {'start': start_point,
                 'end': end_point,
                 'color': MAGENTA.repr(),
                 'timeout': timeout}
-        command = DebugCommand(3001, data)
-        self.debug_state.append(command)
+        command = DebugCommand(3001, data, p_link=link)
+        self._add(command, category)
 
-    def add_rectangle(self, top_left, bottom_right):
+    def add_rectangle(self, top_left, bottom_right, link=None, category=SHAPE):
+        if category in self.disabled_categories:
+            return
         data = {'top_left': top_left,
                 'bottom_right': bottom_right,
                 'color': YELLOW.repr(),
                 'is_fill': True}
-        command = DebugCommand(3006, data)
-        self.debug_state.append(command)
+        command = DebugCommand(3006, data, p_link=link)
+        self._add(command, category)
 
     def add_influence_map(self, influence_map):
-
+        if INFLUENCE_MAP in self.disabled_categories:
+            return
         data = {'field_data': influence_map,
                 'coldest_numb': -100,
                 'hottest_numb': 100,
@@ -120,20 +262,22 @@ class DebugInterface(metaclass=Singleton):
                 'hottest_color': (255, 0, 0),
                 'timeout': 2}
         command = DebugCommand(3007, data)
-        self.debug_state.append(command)
+        self._add(command, INFLUENCE_MAP, INFLUENCE_MAP)
 
-    def add_text(self, position, text, color=DEFAULT_TEXT_COLOR):
+    def add_text(self, position, text, color=DEFAULT_TEXT_COLOR, link=None, category=SHAPE):
+        if category in self.disabled_categories:
+            return
         data = {'position': position,
                 'text': text,
                 'size': DEFAULT_TEXT_SIZE,
                 'font': DEFAULT_TEXT_FONT,
                 'align': DEFAULT_TEXT_ALIGN,
-                'color': color,
+                'color': color.repr(),
                 'has_bold': False,
                 'has_italic': False,
                 'timeout': DEFAULT_DEBUG_TIMEOUT}
-        text = DebugCommand(3008, data)
-        self.debug_state.append(text)
+        text = DebugCommand(3008, data, p_link=link)
+        self._add(text, category)
 
     # todo see if that goes here could go in RobotCommandManager!
     def send_books(self, cmd_tactics_dict):
@@ -144,13 +288,26 @@ class DebugInterface(metaclass=Singleton):
                        'action': ['None']}
         """
         cmd = DebugCommand(1001, cmd_tactics_dict)
-        self.debug_state.append(cmd)
+        self._add(cmd, BOOKS, BOOKS)
 
     def send_robot_status(self, player_id, tactic, action, target="not implemented"):
+        if STATUS in self.disabled_categories:
+            return
         data = {'blue': {player_id: {'tactic': tactic,
                                      'action': action,
                                      'target': target}}}
         cmd = DebugCommand(1002, data)
-        self.debug_state.append(cmd)
+        self._add(cmd, STATUS, player_id)
 
 
+def _estimate_size(value):
+    """ Estimation grossière du nombre d'octets d'une valeur une fois sérialisée. """
+    if isinstance(value, dict):
+        return sum(_estimate_size(key) + _estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_size(item) for item in value)
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return 8
@@ -0,0 +1,135 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Mesure des temps d'exécution des étapes de la boucle de l'IA.
+
+    Chaque étape nommée (executor, pathfinding, âge de la vision...)
+    conserve ses dernières durées dans une fenêtre circulaire, ce qui permet de
+    calculer les percentiles p50/p95/p99 sur les dernières secondes de jeu.
+"""
+
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from RULEngine.Util.singleton import Singleton
+
+DEFAULT_WINDOW_SIZE = 512
+PERCENTILES = (50, 95, 99)
+NS_PER_MS = 1e6
+REPORT_FIELDS = ["name", "count", "p50", "p95", "p99", "max"]
+# étape du calcul du chemin d'un robot
+PATHFINDER_ROBOT_STAGE = "pathfinder robot {}"
+
+
+class LatencyHistogram(object):
+    """ Fenêtre circulaire des dernières durées mesurées, en nanosecondes. """
+
+    def __init__(self, window_size=DEFAULT_WINDOW_SIZE):
+        self.samples = np.zeros(window_size, dtype=np.int64)
+        self.count = 0
+
+    def record(self, duration_ns):
+        self.samples[self.count % len(self.samples)] = duration_ns
+        self.count += 1
+
+    def summary(self):
+        """ Retourne le nombre de mesures, les percentiles et le maximum de la fenêtre, en millisecondes. """
+        window = self.samples[:min(self.count, len(self.samples))]
+        summary = {"count": self.count}
+        if len(window):
+            for percentile, value in zip(PERCENTILES, np.percentile(window, PERCENTILES)):
+                summary["p{}".format(percentile)] = value / NS_PER_MS
+            summary["max"] = window.max() / NS_PER_MS
+        else:
+            summary.update({"p{}".format(percentile): 0.0 for percentile in PERCENTILES})
+            summary["max"] = 0.0
+        return summary
+
+
+class Profiler(metaclass=Singleton):
+
+    def __init__(self):
+        self.enabled = True
+        self.histograms = {}
+        self.report_period = 0
+        self.dump_file = None
+        self.last_report = time.monotonic()
+        self._lock = threading.Lock()
+
+    def configure(self, report_period, dump_file=None):
+        """
+            :param report_period: secondes entre deux rapports, 0 pour n'en faire aucun
+            :param dump_file: fichier .csv ou .json réécrit à chaque rapport, optionnel
+        """
+        self.report_period = report_period
+        self.dump_file = dump_file or None
+
+    def record(self, name, duration_ns):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram())
+        histogram.record(duration_ns)
+
+    @contextmanager
+    def measure(self, name):
+        """ Mesure la durée du bloc with avec perf_counter_ns. """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter_ns() - start)
+
+    def record_vision_age(self, t_capture, now=None):
+        """ Enregistre l'âge de la frame de vision au moment d'envoyer les commandes. """
+        if self.enabled and t_capture:
+            if now is None:
+                now = time.time()
+            self.record("vision_age", int((now - t_capture) * 1e9))
+
+    def get_report(self):
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def report_if_due(self, debug_interface):
+        """ Envoie le rapport au DebugInterface et l'écrit sur disque si la période est écoulée. """
+        now = time.monotonic()
+        if not self.report_period or now - self.last_report < self.report_period:
+            return False
+        self.last_report = now
+        report = self.get_report()
+        debug_interface.add_log(1, self.format_report(report))
+        if self.dump_file is not None:
+            self.dump(self.dump_file, report)
+        return True
+
+    @staticmethod
+    def format_report(report):
+        lines = ["{:<28} {:>7} {:>8} {:>8} {:>8} {:>8}".format(*REPORT_FIELDS)]
+        for name, summary in report.items():
+            lines.append("{:<28} {:>7} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f}".format(
+                name, summary["count"], summary["p50"], summary["p95"], summary["p99"], summary["max"]))
+        return "\n".join(lines)
+
+    def dump(self, file_name, report=None):
+        """ Écrit le rapport en JSON si le fichier finit par .json, sinon en CSV. Les durées sont en ms. """
+        if report is None:
+            report = self.get_report()
+        with open(file_name, "w", newline="") as dump_file:
+            if file_name.endswith(".json"):
+                json.dump(report, dump_file, indent=2)
+            else:
+                writer = csv.DictWriter(dump_file, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                for name, summary in report.items():
+                    writer.writerow(dict(summary, name=name))
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
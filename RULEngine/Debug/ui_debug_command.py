@@ -1,5 +1,6 @@
 # Under MIT License, see LICENSE.txt
 
+HANDSHAKE_COMMAND_TYPE = 5001
 STRATEGY_COMMAND_TYPE = 5002
 TACTIC_COMMAND_TYPE = 5003
 
@@ -11,6 +12,9 @@ class UIDebugCommand(object):
         self.data = raw_cmd['data']
         self.cmd_type = raw_cmd['type']
 
+    def is_handshake_cmd(self):
+        return self.cmd_type == HANDSHAKE_COMMAND_TYPE
+
     def is_strategy_cmd(self):
         return self.cmd_type == STRATEGY_COMMAND_TYPE
 
@@ -7,25 +7,30 @@
     frames de la vision. Cette boucle est la boucle principale et appel le
     prochain état du **Coach**.
 """
+import multiprocessing
 import signal
 import threading
 import time
 
 from RULEngine.Command.command import Stop, Dribbler
-from RULEngine.Communication.protobuf import \
-    messages_robocup_ssl_wrapper_pb2 as ssl_wrapper
 from RULEngine.Communication.receiver.referee_receiver import RefereeReceiver
 from RULEngine.Communication.receiver.uidebug_command_receiver import UIDebugCommandReceiver
 from RULEngine.Communication.receiver.vision_receiver import VisionReceiver
 from RULEngine.Communication.sender.uidebug_command_sender import UIDebugCommandSender
 from RULEngine.Communication.sender.uidebug_vision_sender import UIDebugVisionSender
 from RULEngine.Communication.util.robot_command_sender_factory import RobotCommandSenderFactory
+from RULEngine.Communication.util.ui_debug_worker import UIDebugWorker
 from RULEngine.Debug.debug_interface import DebugInterface
+from RULEngine.Debug.profiler import Profiler
+from RULEngine.Debug.ui_debug_command import UIDebugCommand
 from RULEngine.Game.Game import Game
 from RULEngine.Game.Referee import Referee
 from RULEngine.Util.constant import TeamColor
 from RULEngine.Util.game_world import GameWorld
 from RULEngine.Util.image_transformer.image_transformer_factory import ImageTransformerFactory
+from RULEngine.Util.loop_scheduler import LoopScheduler
+from RULEngine.Util.pipeline import LatestValueSlot, SharedStateSlot, TrackerStage, SlotConsumerThread, \
+    run_tracker_process, NONE, THREAD, PROCESS
 from RULEngine.Util.team_color_service import TeamColorService
 from config.config_service import ConfigService
 
@@ -41,32 +46,49 @@ class Framework(object):
          l'ia.
     """
 
-    def __init__(self):
+    def __init__(self, vision=None, referee_command_receiver=None, robot_command_sender=None):
         """ Constructeur de la classe, établis les propriétés de bases et
         construit les objets qui sont toujours necéssaire à son fonctionnement
         correct.
+
+        Les receivers et le sender peuvent être fournis pour remplacer ceux
+        créés selon la configuration, par exemple pour rejouer un log.
         """
         # config
         self.cfg = ConfigService()
 
-        # time
+        # time, l'horloge peut être remplacée lors de la relecture d'un log
+        self.clock = time.time
         self.last_frame_number = 0
         self.time_stamp = time.time()
         self.last_time = time.time()
         self.last_cmd_time = time.time()
-        self.last_loop = time.time()
 
         # thread
         self.ia_running_thread = None
         self.thread_terminate = threading.Event()
 
+        # pipeline
+        self.pipeline_mode = NONE
+        if self.cfg.config_dict["IMAGE"]["kalman"] == "true":
+            self.pipeline_mode = self.cfg.config_dict["GAME"]["pipeline"]
+        self.pipeline_context = multiprocessing.get_context("spawn")
+        self.pipeline_terminate = self.pipeline_context.Event()
+        self.pipeline_workers = []
+        self.tracker_states_slot = None
+        self.robot_commands_slot = LatestValueSlot()
+        self.last_states = None
+        self.last_t_capture = 0
+
         # Communication
-        self.robot_command_sender = None
-        self.vision = None
-        self.referee_command_receiver = None
+        self.robot_command_sender = robot_command_sender
+        self.vision = vision
+        self.referee_command_receiver = referee_command_receiver
         self.uidebug_command_sender = None
         self.uidebug_command_receiver = None
         self.uidebug_vision_sender = None
+        # tout le trafic vers le UI-debug passe par ce thread, jamais par celui de l'IA
+        self.ui_debug_worker = None
         # because this thing below is a callable! can be used without being set
         self.vision_redirection_routine = lambda *args: None
         self.vision_routine = self._normal_vision  # self._normal_vision # self._test_vision self._redirected_vision
@@ -76,6 +98,9 @@ class Framework(object):
         self.incoming_debug = []
         self.outgoing_debug = []
         self.debug = DebugInterface()
+        self.profiler = Profiler()
+        self.profiler.configure(float(self.cfg.config_dict["DEBUG"]["profiling_report_period"]),
+                                self.cfg.config_dict["DEBUG"]["profiling_dump_file"])
         self._init_communication()
 
         # Game elements
@@ -87,6 +112,17 @@ class Framework(object):
 
         self._create_game_world()
 
+        # scheduling de la boucle principale, en pipeline l'IA se réveille sur les états du tracker
+        if self.pipeline_mode == NONE:
+            wake_event = self.vision.new_frame_event
+        else:
+            self._create_tracker_states_slot()
+            wake_event = self.tracker_states_slot.new_value_event
+        self.scheduler = LoopScheduler(self.cfg.config_dict["GAME"]["scheduler"],
+                                       float(self.cfg.config_dict["GAME"]["ai_rate"]),
+                                       wake_event)
+        self.reported_missed_deadlines = 0
+
         # VISION
         self.image_transformer = ImageTransformerFactory.get_image_transformer()
 
@@ -94,13 +130,12 @@ class Framework(object):
         self.ia_coach_mainloop = None
         self.ia_coach_initializer = None
 
-        # for testing purposes
-        self.frame_number = 0
-
         self.debug.add_log(1, "Framework started in {} s".format(time.time() - self.time_stamp))
 
     def _choose_vision_routines(self):
-        if self.cfg.config_dict["IMAGE"]["kalman"] == "true":
+        if self.pipeline_mode != NONE:
+            self.vision_routine = self._pipelined_vision
+        elif self.cfg.config_dict["IMAGE"]["kalman"] == "true":
             self.vision_routine = self._kalman_vision
         else:
             self.vision_routine = self._redirected_vision
@@ -109,11 +144,14 @@ class Framework(object):
         # first make sure we are not already running
         if self.ia_running_thread is None:
             # where do we send the robots command (serial for bluetooth and rf)
-            self.robot_command_sender = RobotCommandSenderFactory.get_sender()
+            if self.robot_command_sender is None:
+                self.robot_command_sender = RobotCommandSenderFactory.get_sender()
             # Referee
-            self.referee_command_receiver = RefereeReceiver()
-            # Vision
-            self.vision = VisionReceiver()
+            if self.referee_command_receiver is None:
+                self.referee_command_receiver = RefereeReceiver()
+            # Vision, en mode processus c'est le processus de tracking qui la reçoit
+            if self.vision is None and self.pipeline_mode != PROCESS:
+                self.vision = VisionReceiver()
 
             # do we use the UIDebug?
             if self.cfg.config_dict["DEBUG"]["using_debug"] == "true":
@@ -122,7 +160,9 @@ class Framework(object):
                 # are we redirecting the vision to the uidebug!
                 if self.cfg.config_dict["COMMUNICATION"]["redirect"] == "true":
                     self.uidebug_vision_sender = UIDebugVisionSender()
-                    self.vision_redirection_routine = self.uidebug_vision_sender.send_packet
+                self.ui_debug_worker = UIDebugWorker(self.uidebug_command_sender, self.uidebug_vision_sender)
+                self.vision_redirection_routine = self.ui_debug_worker.send_vision_packet
+                self.ui_debug_worker.start()
 
         else:
             self.stop_game()
@@ -130,17 +170,40 @@ class Framework(object):
     def game_thread_main_loop(self):
         """ Fonction exécuté et agissant comme boucle principale. """
 
-        self._wait_for_first_frame()
+        if self.pipeline_mode == NONE:
+            self._wait_for_first_frame()
         print(self.vision_routine)
         # TODO: Faire arrêter quand l'arbitre signal la fin de la partie
         while not self.thread_terminate.is_set():
-            self.time_stamp = time.time()
-            self.vision_routine()
+            if self.scheduler.wait():
+                self.time_stamp = time.time()
+                self.vision_routine()
+                self._report_missed_deadlines()
+                self.profiler.report_if_due(self.debug)
+
+    def _report_missed_deadlines(self):
+        missed_deadlines = self.scheduler.missed_deadlines
+        if missed_deadlines != self.reported_missed_deadlines:
+            self.reported_missed_deadlines = missed_deadlines
+            self.debug.add_log(2, "Échéance de l'IA manquée de {:.1f} ms ({} au total)"
+                               .format(self.scheduler.last_overrun * 1000, missed_deadlines))
 
     def start_game(self, p_ia_coach_mainloop, p_ia_coach_initializer):
         """ Démarrage du moteur de l'IA initial, ajustement de l'équipe de l'ia
         et démarrage du/des thread/s"""
 
+        self.initialize_ai(p_ia_coach_mainloop, p_ia_coach_initializer)
+
+        if self.pipeline_mode != NONE:
+            self._start_pipeline()
+
+        signal.signal(signal.SIGINT, self._sigint_handler)
+        self.ia_running_thread = threading.Thread(target=self.game_thread_main_loop)
+        self.ia_running_thread.start()
+        self.ia_running_thread.join()
+
+    def initialize_ai(self, p_ia_coach_mainloop, p_ia_coach_initializer):
+        """ Couple l'IA au Framework et lui donne le GameWorld, sans démarrer la boucle principale. """
         # IA COUPLING
         self.ia_coach_mainloop = p_ia_coach_mainloop
         self.ia_coach_initializer = p_ia_coach_initializer
@@ -153,11 +216,6 @@ class Framework(object):
 
         self.ia_coach_initializer(self.game_world)
 
-        signal.signal(signal.SIGINT, self._sigint_handler)
-        self.ia_running_thread = threading.Thread(target=self.game_thread_main_loop)
-        self.ia_running_thread.start()
-        self.ia_running_thread.join()
-
     def _create_game_world(self):
         """
             Créé le GameWorld pour contenir les éléments d'une partie normale:
@@ -194,7 +252,14 @@ class Framework(object):
         return time_delta
 
     def _update_debug_info(self):
-        self.incoming_debug += self.uidebug_command_receiver.receive_command()
+        commands = list(self.uidebug_command_receiver.receive_command())
+        # à la connexion du UI-debug, il faut lui renvoyer les commandes statiques (livres, carte complète)
+        if self.ui_debug_worker is not None and \
+                any(UIDebugCommand(command).is_handshake_cmd() for command in commands):
+            # transmise par la file du thread d'envoi, seul à utiliser l'état de uidebug_command_sender
+            self.ui_debug_worker.send_handshake()
+            self.debug.clear_history()
+        self.incoming_debug += commands
 
     def _normal_vision(self):
         vision_frame = self._acquire_last_vision_frame()
@@ -204,10 +269,9 @@ class Framework(object):
             robot_commands = self.ia_coach_mainloop()
             # Communication
 
-            self._send_robot_commands(robot_commands)
+            self._send_robot_commands(robot_commands, vision_frame.detection.t_capture)
             self.game.set_command(robot_commands)
             self._send_debug_commands()
-        time.sleep(0)
 
     def _test_vision(self):
         vision_frame = self._acquire_last_vision_frame()
@@ -221,49 +285,97 @@ class Framework(object):
             robot_commands = self.ia_coach_mainloop()
             # Communication
 
-            self._send_robot_commands(robot_commands)
+            self._send_robot_commands(robot_commands, vision_frame.detection.t_capture)
             self.game.set_command(robot_commands)
             self._send_debug_commands()
-        time.sleep(0)
 
     def _kalman_vision(self):
         vision_frames = self.vision.pop_frames()
-        new_image_packet = self.image_transformer.update(vision_frames)
-        if time.time() - self.last_loop > 0.05:
-            time_delta = time.time() - self.last_time
-            self.game.update_kalman(new_image_packet, time_delta)
-            self._update_debug_info()
-            robot_commands = self.ia_coach_mainloop()
-            # Communication
+        observations, mask = self.image_transformer.update(vision_frames)
+        time_delta = self.clock() - self.last_time
+        self.game.update_kalman(observations, mask, time_delta)
+        self._update_debug_info()
+        robot_commands = self.ia_coach_mainloop()
+        # Communication
 
-            self._send_robot_commands(robot_commands)
-            self.game.set_command(robot_commands)
-            self._send_debug_commands()
-            self._send_new_vision_packet()
-            self.last_time = time.time()
-            self.last_loop = time.time()
-        time.sleep(0)
+        self._send_robot_commands(robot_commands, self.image_transformer.t_captures.max())
+        self.game.set_command(robot_commands)
+        self._send_debug_commands()
+        self._send_new_vision_packet(self.game.tracker.x)
+        self.last_time = self.clock()
+
+    def _pipelined_vision(self):
+        """ Étape IA du pipeline: consomme les derniers états du tracker et publie commandes et debug. """
+        tracker_output = self.tracker_states_slot.poll()
+        if tracker_output is not None:
+            self.last_states, self.last_t_capture = tracker_output
+        elif self.last_states is None:
+            # aucun état du tracker encore, la vision n'est pas arrivée
+            return
+        time_delta = self.clock() - self.last_time
+        self.last_time = self.clock()
+        self.game.apply_tracker_states(self.last_states, time_delta)
+        self._update_debug_info()
+        robot_commands = self.ia_coach_mainloop()
+
+        # Communication
+        self.robot_commands_slot.put((robot_commands, self.last_t_capture))
+        self.game.set_command(robot_commands)
+        self._send_debug_commands()
+        self._send_new_vision_packet(self.last_states)
+
+    def _create_tracker_states_slot(self):
+        if self.pipeline_mode == THREAD:
+            self.tracker_states_slot = LatestValueSlot()
+        elif self.pipeline_mode == PROCESS:
+            self.tracker_states_slot = SharedStateSlot(self.game.tracker.x.shape, self.pipeline_context)
+        else:
+            raise ValueError("Mode de pipeline inconnu: {}".format(self.pipeline_mode))
+
+    def _start_pipeline(self):
+        """ Démarre l'étape de tracking et les étapes d'envoi, l'étape IA est la boucle principale. """
+        self.pipeline_terminate.clear()
+        if self.pipeline_mode == THREAD:
+            tracker_stage = TrackerStage(self.vision, self.image_transformer, self.game.tracker,
+                                         self.tracker_states_slot, self.pipeline_terminate)
+            tracker_worker = threading.Thread(target=tracker_stage.run, daemon=True)
+        else:
+            tracker_worker = self.pipeline_context.Process(target=run_tracker_process,
+                                                           args=(self.cfg.config_dict["COMMUNICATION"]["udp_address"],
+                                                                 int(self.cfg.config_dict["COMMUNICATION"]["vision_port"]),
+                                                                 self.game.tracker.kalman_types,
+                                                                 self.game.tracker.ncameras,
+                                                                 self.tracker_states_slot,
+                                                                 self.pipeline_terminate),
+                                                           daemon=True)
+        self.pipeline_workers = [tracker_worker,
+                                 SlotConsumerThread(self.robot_commands_slot, self._send_pipelined_robot_commands,
+                                                    self.pipeline_terminate)]
+        for worker in self.pipeline_workers:
+            worker.start()
+
+    def _stop_pipeline(self):
+        self.pipeline_terminate.set()
+        for worker in self.pipeline_workers:
+            worker.join()
+        self.pipeline_workers = []
 
     def _redirected_vision(self):
         vision_frames = self.vision.pop_frames()
         new_image_packet = self.image_transformer.update(vision_frames)
 
-        if time.time() - self.last_loop > 0.05:
-            self.vision_redirection_routine(new_image_packet.SerializeToString())
-            time_delta = time.time() - self.last_time
-            self.game.update(new_image_packet, time_delta)
-            self.last_time = time.time()
-            self.last_frame_number = new_image_packet.detection.frame_number
-            self._update_debug_info()
-            robot_commands = self.ia_coach_mainloop()
+        self.vision_redirection_routine(new_image_packet)
+        time_delta = self.clock() - self.last_time
+        self.game.update(new_image_packet, time_delta)
+        self.last_time = self.clock()
+        self.last_frame_number = new_image_packet.detection.frame_number
+        self._update_debug_info()
+        robot_commands = self.ia_coach_mainloop()
 
-            # Communication
-            self._send_robot_commands(robot_commands)
-            self.game.set_command(robot_commands)
-            self._send_debug_commands()
-            self.last_loop = time.time()
-        else:
-            time.sleep(0)
+        # Communication
+        self._send_robot_commands(robot_commands, new_image_packet.detection.t_capture)
+        self.game.set_command(robot_commands)
+        self._send_debug_commands()
 
     def _acquire_last_vision_frame(self):
         return self.vision.get_latest_frame()
@@ -278,6 +390,9 @@ class Framework(object):
         self.thread_terminate.set()
         self.ia_running_thread.join()
         self.thread_terminate.clear()
+        self._stop_pipeline()
+        if self.ui_debug_worker is not None:
+            self.ui_debug_worker.stop()
         self.robot_command_sender.stop()
         try:
             team = self.game.friends
@@ -298,61 +413,39 @@ class Framework(object):
             time.sleep(0.01)
             print("En attente d'une image de la vision.")
 
-    def _send_robot_commands(self, commands):
-        """ Envoi les commades des robots au serveur. """
-        for command in commands:
-            self.robot_command_sender.send_command(command)
+    def _send_robot_commands(self, commands, t_capture=None):
+        """ Envoi les commades des robots au serveur, en un seul envoi si le sender le permet. """
+        send_commands = getattr(self.robot_command_sender, "send_commands", None)
+        if send_commands is not None:
+            send_commands(commands)
+        else:
+            for command in commands:
+                self.robot_command_sender.send_command(command)
+        self.profiler.record_vision_age(t_capture, self.clock())
+
+    def _send_pipelined_robot_commands(self, commands_and_t_capture):
+        """ Étape d'envoi des commandes du pipeline, tourne dans son propre thread. """
+        self._send_robot_commands(*commands_and_t_capture)
 
     def _send_debug_commands(self):
-        """ Envoie les commandes de debug au serveur. """
-        self.outgoing_debug = self.debug.debug_state
+        """ Passe les commandes de debug de l'itération au thread d'envoi du UI-debug. """
+        packet_represented_commands = self._pop_debug_packets()
+        if self.ui_debug_worker is not None:
+            self.ui_debug_worker.send_debug_packets(packet_represented_commands)
+
+    def _pop_debug_packets(self):
+        """ Vide les commandes de debug de l'itération et retourne leur représentation en paquets. """
+        self.outgoing_debug = self.debug.pop_commands()
         packet_represented_commands = [c.get_packet_repr() for c in self.outgoing_debug]
-        if self.uidebug_command_sender is not None:
-            self.uidebug_command_sender.send_command(packet_represented_commands)
 
         self.incoming_debug.clear()
-        self.outgoing_debug.clear()
+        return packet_represented_commands
 
     # for testing purposes
-    def _send_new_vision_packet(self):
-        pb_sslwrapper = ssl_wrapper.SSL_WrapperPacket()
-        pb_sslwrapper.detection.camera_id = 0
-        pb_sslwrapper.detection.t_sent = 0
-
-        pck_ball = pb_sslwrapper.detection.balls.add()
-        pck_ball.x = self.game.field.ball.position.x
-        pck_ball.y = self.game.field.ball.position.y
-        pck_ball.z = self.game.field.ball.position.z
-        # required for the packet no use for us at this stage
-        pck_ball.confidence = 0.999
-        pck_ball.pixel_x = self.game.field.ball.position.x
-        pck_ball.pixel_y = self.game.field.ball.position.y
-
-        for p in self.game.blue_team.players.values():
-            packet_robot = pb_sslwrapper.detection.robots_blue.add()
-            packet_robot.confidence = 0.999
-            packet_robot.robot_id = p.id
-            packet_robot.x = p.pose.position.x
-            packet_robot.y = p.pose.position.y
-            packet_robot.orientation = p.pose.orientation
-            packet_robot.pixel_x = 0.
-            packet_robot.pixel_y = 0.
-
-        for p in self.game.yellow_team.players.values():
-            packet_robot = pb_sslwrapper.detection.robots_yellow.add()
-            packet_robot.confidence = 0.999
-            packet_robot.robot_id = p.id
-            packet_robot.x = p.pose.position.x
-            packet_robot.y = p.pose.position.y
-            packet_robot.orientation = p.pose.orientation
-            packet_robot.pixel_x = 0.
-            packet_robot.pixel_y = 0.
-
-        self.frame_number += 1
-        pb_sslwrapper.detection.t_capture = 0
-        pb_sslwrapper.detection.frame_number = self.frame_number
-
-        self.vision_redirection_routine(pb_sslwrapper.SerializeToString())
+    def _send_new_vision_packet(self, states):
+        """ Renvoie au UI-debug les états filtrés (N, 6) du tracker, le paquet de vision est construit hors de l'IA. """
+        if self.ui_debug_worker is not None:
+            self.ui_debug_worker.send_tracker_states(states)
 
     def _sigint_handler(self, *args):
         self.stop_game()
@@ -1,21 +1,19 @@
 # Under MIT License, see LICENSE.txt
-from RULEngine.Util.tracking import Kalman
 from ..Util.Position import Position
 import math
 
 
 class Ball:
+    # modèle de la piste de la balle dans le BatchKalmanTracker du Game
     kalman_type = 'ball'
 
-    def __init__(self, ncameras=4):
+    def __init__(self):
         self._position = Position()
         self.velocity = Position()
-        self.kf = Kalman(Ball.kalman_type, ncameras)
 
-    def kalman_update(self, poses, delta):
-        ret = self.kf.filter(poses, None, delta)
-        self._position = Position(ret[0], ret[1])
-        self.velocity = Position(ret[2], ret[3])
+    def set_kalman_state(self, position, velocity):
+        self._position = position
+        self.velocity = velocity
 
     @property
     def position(self):
@@ -1,15 +1,19 @@
 # Under MIT License, see LICENSE.txt
-from typing import List
+
+import numpy as np
 
 from RULEngine.Communication.protobuf import messages_robocup_ssl_wrapper_pb2
+from RULEngine.Util.constant import PLAYER_PER_TEAM
 from RULEngine.Util.Pose import Pose
 from RULEngine.Util.Position import Position
 from RULEngine.Util.team_color_service import TeamColor
+from RULEngine.Util.tracking import BatchKalmanTracker
 
 from RULEngine.Game.Team import Team
 from RULEngine.Game.Ball import Ball
 from RULEngine.Game.Field import Field
 from RULEngine.Game.Referee import Referee
+from RULEngine.Game.WorldSnapshot import WorldSnapshot
 from config.config_service import ConfigService
 
 
@@ -26,7 +30,10 @@ class Game:
         self.enemies = None
         self.delta_t = None
         self.cmd = None
+        self.tracker = None
+        self.snapshot = None
         self._create_teams()
+        self._create_tracker()
 
     def set_command(self, cmd):
         for commands in cmd:
@@ -52,6 +59,15 @@ class Game:
         else:
             raise ValueError("Config file contains wrong colors!")
 
+    def _create_tracker(self, ncameras=4):
+        """
+            Crée le filtre de Kalman commun. Les pistes sont dans l'ordre: joueurs bleus,
+            joueurs jaunes, puis la balle.
+        """
+        kalman_types = [self.blue_team.kalman_type] * PLAYER_PER_TEAM + \
+                       [self.yellow_team.kalman_type] * PLAYER_PER_TEAM + [Ball.kalman_type]
+        self.tracker = BatchKalmanTracker(kalman_types, ncameras)
+
     def update_game_state(self, referee_command):
         # TODO: Réviser code, ça semble louche
         blue_team = referee_command.teams[0]
@@ -68,11 +84,11 @@ class Game:
         # print(delta)
         self._update_ball(vision_frame, delta)
         self._update_players(vision_frame, delta)
+        self.snapshot = WorldSnapshot.from_game(self, *self._get_visible_players(vision_frame))
 
-    def update_kalman(self, vision_frame: List, delta: float):
-        self.delta_t = delta
-        self.kalman_update_ball(vision_frame, delta)
-        self.kalman_update_players(vision_frame, delta)
+    def update_kalman(self, observations: np.ndarray, mask: np.ndarray, delta: float):
+        states = self.tracker.filter(observations, mask, delta)
+        self.apply_tracker_states(states, delta, mask.any(axis=1))
 
     def is_team_yellow(self):
         return self.our_team_color == TeamColor.YELLOW_TEAM
@@ -94,23 +110,33 @@ class Game:
         self._update_players_of_team(blue_team, self.blue_team, delta)
         self._update_players_of_team(yellow_team, self.yellow_team, delta)
 
-    def kalman_update_ball(self, vision_frame, delta):
-        kalman_list = []
-        for c in vision_frame:
-            kalman_list.append(c["ball"])
-        self.ball.kalman_update(kalman_list, delta)
-
-    def kalman_update_players(self, vision_frame, delta):
-        kalman_blue = [[] for i in range(0, 6)]
-        kalman_yellow = [[] for i in range(0, 6)]
-        for c in vision_frame:
-            for i in range(0, 6):
-                kalman_blue[i].append(c["blues"][i])
-                kalman_yellow[i].append(c["yellows"][i])
-
-        for i in range(0, 6):
-            self.blue_team.kalman_update(i, kalman_blue[i], delta)
-            self.yellow_team.kalman_update(i, kalman_yellow[i], delta)
+    def apply_tracker_states(self, states: np.ndarray, delta: float, visible: np.ndarray=None):
+        """
+            Met à jour les joueurs, la balle et la photo du monde à partir des états (N, 6) du tracker, dans l'ordre
+            des pistes. visible (N,) indique les pistes vues par une caméra, toutes par défaut.
+        """
+        self.delta_t = delta
+        for team, offset in ((self.blue_team, 0), (self.yellow_team, PLAYER_PER_TEAM)):
+            for i in range(PLAYER_PER_TEAM):
+                state = states[offset + i]
+                player = team.players[i]
+                player.pose = Pose(Position(state[0], state[1]), float(state[4]))
+                player.velocity = [state[2], state[3], state[5]]
+        ball_state = states[-1]
+        self.ball.set_kalman_state(Position(ball_state[0], ball_state[1]), Position(ball_state[2], ball_state[3]))
+        if visible is None:
+            visible = np.ones(states.shape[0], dtype=bool)
+        self.snapshot = WorldSnapshot.from_tracker_states(states, visible, self.friends is self.blue_team)
+
+    def _get_visible_players(self, vision_frame):
+        """ Retourne les masques (PLAYER_PER_TEAM,) des alliés et des ennemis détectés dans la frame. """
+        blue_visible = np.zeros(PLAYER_PER_TEAM, dtype=bool)
+        blue_visible[[robot.robot_id for robot in vision_frame.detection.robots_blue]] = True
+        yellow_visible = np.zeros(PLAYER_PER_TEAM, dtype=bool)
+        yellow_visible[[robot.robot_id for robot in vision_frame.detection.robots_yellow]] = True
+        if self.friends is self.blue_team:
+            return blue_visible, yellow_visible
+        return yellow_visible, blue_visible
 
     @staticmethod
     def _update_players_of_team(players, team, delta):
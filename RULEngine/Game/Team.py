@@ -8,9 +8,11 @@ from RULEngine.Util.team_color_service import TeamColor
 class Team:
     def __init__(self, team_color, kalman_type="friend"):
         assert kalman_type in ["friend", "enemy"]
+        # modèle des pistes de l'équipe dans le BatchKalmanTracker du Game
+        self.kalman_type = kalman_type
         self.players = {}
         for player_id in range(PLAYER_PER_TEAM):
-            self.players[player_id] = Player(self, player_id, kalman_type)
+            self.players[player_id] = Player(self, player_id)
         self.team_color = team_color
         self.score = 0
 
@@ -32,12 +34,6 @@ class Team:
         except KeyError as err:
             raise err
 
-    def kalman_update(self, player_id, pose_list, delta=0):
-        try:
-            self.players[player_id].kalman_update(pose_list, delta)
-        except KeyError as err:
-            raise err
-
     def update_player_command(self, player_id, cmd):
         try:
             self.players[player_id].set_command(cmd)
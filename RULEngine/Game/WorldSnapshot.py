@@ -0,0 +1,114 @@
+# Under MIT License, see LICENSE.txt
+
+import numpy as np
+
+from RULEngine.Util.constant import PLAYER_PER_TEAM
+
+
+class WorldSnapshot:
+    """
+        Photo du monde construite une seule fois par frame, après la mise à jour
+        des joueurs et de la balle. Les données sont dans des tableaux numpy
+        contigus en lecture seule, une rangée par joueur dans l'ordre des id:
+            - *_position (PLAYER_PER_TEAM, 2), *_orientation (PLAYER_PER_TEAM,)
+            - *_velocity (PLAYER_PER_TEAM, 3) avec (vx, vy, vtheta)
+            - *_visible (PLAYER_PER_TEAM,) vrai si le joueur était vu par la vision
+            - ball_position (2,), ball_velocity (2,)
+        Les matrices de distances sont calculées à la première demande puis
+        gardées pour le reste de la frame.
+    """
+
+    def __init__(self, friends_pose, friends_velocity, friends_visible,
+                 enemies_pose, enemies_velocity, enemies_visible, ball_position, ball_velocity):
+        """
+            :param friends_pose: tableau (PLAYER_PER_TEAM, 3) des (x, y, orientation) des alliés
+            :param friends_velocity: tableau (PLAYER_PER_TEAM, 3) des vitesses des alliés
+            :param friends_visible: tableau booléen (PLAYER_PER_TEAM,) de visibilité des alliés
+            :param enemies_pose: comme friends_pose, pour les ennemis
+            :param enemies_velocity: comme friends_velocity, pour les ennemis
+            :param enemies_visible: comme friends_visible, pour les ennemis
+            :param ball_position: (x, y) de la balle
+            :param ball_velocity: (vx, vy) de la balle
+        """
+        friends_pose = _read_only(friends_pose)
+        enemies_pose = _read_only(enemies_pose)
+        self.friends_position = _read_only(friends_pose[:, 0:2])
+        self.friends_orientation = _read_only(friends_pose[:, 2])
+        self.friends_velocity = _read_only(friends_velocity)
+        self.friends_visible = _read_only(friends_visible, dtype=bool)
+        self.enemies_position = _read_only(enemies_pose[:, 0:2])
+        self.enemies_orientation = _read_only(enemies_pose[:, 2])
+        self.enemies_velocity = _read_only(enemies_velocity)
+        self.enemies_visible = _read_only(enemies_visible, dtype=bool)
+        self.ball_position = _read_only(ball_position)
+        self.ball_velocity = _read_only(ball_velocity)
+        self._distances = {}
+
+    @staticmethod
+    def from_tracker_states(states, visible, friends_are_blue):
+        """
+            Construit la photo à partir des états (N, 6) du tracker, dans l'ordre
+            des pistes: joueurs bleus, joueurs jaunes, puis la balle.
+
+            :param visible: tableau booléen (N,) vrai si une caméra voyait la piste
+        """
+        blue = slice(0, PLAYER_PER_TEAM)
+        yellow = slice(PLAYER_PER_TEAM, 2 * PLAYER_PER_TEAM)
+        friends, enemies = (blue, yellow) if friends_are_blue else (yellow, blue)
+        return WorldSnapshot(states[friends][:, [0, 1, 4]], states[friends][:, [2, 3, 5]], visible[friends],
+                             states[enemies][:, [0, 1, 4]], states[enemies][:, [2, 3, 5]], visible[enemies],
+                             states[-1, 0:2], states[-1, 2:4])
+
+    @staticmethod
+    def from_game(game, friends_visible=None, enemies_visible=None):
+        """ Construit la photo à partir des objets Player et Ball du jeu, tous visibles par défaut. """
+        def team_arrays(team):
+            players = [team.players[player_id] for player_id in range(PLAYER_PER_TEAM)]
+            poses = [(player.pose.position.x, player.pose.position.y, player.pose.orientation) for player in players]
+            velocities = [tuple(player.velocity[0:3]) for player in players]
+            return np.array(poses, dtype=np.float64), np.array(velocities, dtype=np.float64)
+
+        friends_pose, friends_velocity = team_arrays(game.friends)
+        enemies_pose, enemies_velocity = team_arrays(game.enemies)
+        if friends_visible is None:
+            friends_visible = np.ones(PLAYER_PER_TEAM, dtype=bool)
+        if enemies_visible is None:
+            enemies_visible = np.ones(PLAYER_PER_TEAM, dtype=bool)
+        ball = game.ball
+        return WorldSnapshot(friends_pose, friends_velocity, friends_visible,
+                             enemies_pose, enemies_velocity, enemies_visible,
+                             (ball.position.x, ball.position.y), (ball.velocity.x, ball.velocity.y))
+
+    def get_friends_distances(self):
+        """ Matrice (PLAYER_PER_TEAM, PLAYER_PER_TEAM) des distances entre les alliés. """
+        return self._get_distances("friends", self.friends_position, self.friends_position)
+
+    def get_enemies_distances(self):
+        """ Matrice (PLAYER_PER_TEAM, PLAYER_PER_TEAM) des distances entre les ennemis. """
+        return self._get_distances("enemies", self.enemies_position, self.enemies_position)
+
+    def get_friends_to_enemies_distances(self):
+        """ Matrice des distances, une rangée par allié et une colonne par ennemi. """
+        return self._get_distances("friends_to_enemies", self.friends_position, self.enemies_position)
+
+    def get_friends_to_ball_distances(self):
+        """ Distance (PLAYER_PER_TEAM,) de chaque allié à la balle. """
+        return self._get_distances("friends_to_ball", self.friends_position, self.ball_position[np.newaxis, :])[:, 0]
+
+    def get_enemies_to_ball_distances(self):
+        """ Distance (PLAYER_PER_TEAM,) de chaque ennemi à la balle. """
+        return self._get_distances("enemies_to_ball", self.enemies_position, self.ball_position[np.newaxis, :])[:, 0]
+
+    def _get_distances(self, key, positions_a, positions_b):
+        distances = self._distances.get(key)
+        if distances is None:
+            delta = positions_a[:, np.newaxis, :] - positions_b[np.newaxis, :, :]
+            distances = _read_only(np.hypot(delta[..., 0], delta[..., 1]))
+            self._distances[key] = distances
+        return distances
+
+
+def _read_only(values, dtype=np.float64):
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
@@ -6,11 +6,11 @@ ORIENTATION_DELTA_TOLERANCE_MAGNITUDE = 1e4
 
 class Pose(object):
     """  Container of position and orientation """
-    def __init__(self, position=Position(), orientation=0.0):
-        assert(isinstance(position, Position)), 'position should be Position object.'
-        assert(isinstance(orientation, (int, float))), 'orientation should be int or float value.'
+    __slots__ = ('position', 'orientation')
 
-        self.position = position
+    def __init__(self, position=None, orientation=0.0):
+        # chaque Pose par défaut a sa propre Position, elle n'est pas partagée entre les instances
+        self.position = Position() if position is None else position
         self.orientation = orientation
         '''
         if self.orientation >= m.pi:
@@ -7,7 +7,14 @@ POSITION_DELTA_TOLERANCE_MAGNITUDE = 1e0
 
 
 class Position(object):
-    """ Vector with [x, y, z] """
+    """
+        Vector with [x, y, z]
+
+        Les attributs sont dans des __slots__ pour garder les objets petits et rapides à créer, les opérateurs créent
+        leur résultat sans repasser par les conversions du constructeur.
+    """
+    __slots__ = ('x', 'y', 'z', 'abs_tol', 'delta_t')
+
     def __init__(self, x=0., y=0., z=0., abs_tol=POSITION_DELTA_TOLERANCE_MAGNITUDE, delta_t=0.03):
         # assert(isinstance(x, (int, float))), 'x should be int or float.'
         # assert(isinstance(y, (int, float))), 'y should be int or float.'
@@ -40,12 +47,12 @@ class Position(object):
     # *** OPERATORS ***
     def __add__(self, other):
         """ Return self + other """
-        if not isinstance(other, (Position, int, float)):
-            return NotImplemented
+        if isinstance(other, Position):
+            return _new_position(self.x + other.x, self.y + other.y)
+        elif isinstance(other, (int, float)):
+            return _new_position(self.x + other, self.y + other)
         else:
-            new_x = self.x + (other.x if isinstance(other, Position) else other)
-            new_y = self.y + (other.y if isinstance(other, Position) else other)
-            return Position(new_x, new_y)
+            return NotImplemented
 
     def __sub__(self, other):
         """ Return self - other """
@@ -55,27 +62,21 @@ class Position(object):
         #     new_x = self.x - (other.x if isinstance(other, Position) else other)
         #     new_y = self.y - (other.y if isinstance(other, Position) else other)
         #     return Position(new_x, new_y)
-        new_x = self.x - other.x
-        new_y = self.y - other.y
-        return Position(new_x, new_y)
+        return _new_position(self.x - other.x, self.y - other.y)
 
     def __mul__(self, other):
         """ Return self * other """
         if not isinstance(other, (int, float)):
             raise NotImplementedError
         else:
-            new_x = self.x * other
-            new_y = self.y * other
-            return Position(new_x, new_y)
+            return _new_position(self.x * other, self.y * other)
 
     def __truediv__(self, other):
         """ Return self / other """
         if not isinstance(other, (int, float)):
             raise NotImplementedError
         else:
-            new_x = self.x / other
-            new_y = self.y / other
-            return Position(new_x, new_y)
+            return _new_position(self.x / other, self.y / other)
 
     def __eq__(self, other):
         """
@@ -95,3 +96,71 @@ class Position(object):
     def __repr__(self):
         """ Return str(self) """
         return "(x={}, y={}, z={})".format(self.x, self.y, self.z)
+
+
+class MutablePosition(Position):
+    """
+        Position modifiable sur place pour les boucles chaudes: les opérateurs +=, -=, *= et /= modifient l'objet au
+        lieu d'en créer un nouveau. Les opérateurs binaires retournent toujours des Position.
+    """
+    __slots__ = ()
+
+    def set(self, x, y, z=None):
+        """ Change les coordonnées sans créer d'objet et retourne self. """
+        self.x = x
+        self.y = y
+        if z is not None:
+            self.z = z
+        return self
+
+    def freeze(self):
+        """ Retourne une Position non modifiable sur place avec les mêmes coordonnées. """
+        return Position(self.x, self.y, self.z, self.abs_tol, self.delta_t)
+
+    def __iadd__(self, other):
+        """ self += other """
+        if isinstance(other, Position):
+            self.x += other.x
+            self.y += other.y
+        elif isinstance(other, (int, float)):
+            self.x += other
+            self.y += other
+        else:
+            return NotImplemented
+        return self
+
+    def __isub__(self, other):
+        """ self -= other """
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def __imul__(self, other):
+        """ self *= other """
+        if not isinstance(other, (int, float)):
+            raise NotImplementedError
+        self.x *= other
+        self.y *= other
+        return self
+
+    def __itruediv__(self, other):
+        """ self /= other """
+        if not isinstance(other, (int, float)):
+            raise NotImplementedError
+        self.x /= other
+        self.y /= other
+        return self
+
+
+_object_new = object.__new__
+
+
+def _new_position(x, y):
+    """ Crée une Position à partir de coordonnées déjà en float, sans les conversions de __init__. """
+    position = _object_new(Position)
+    position.x = x
+    position.y = y
+    position.z = 0.
+    position.abs_tol = POSITION_DELTA_TOLERANCE_MAGNITUDE
+    position.delta_t = 0.03
+    return position
@@ -26,28 +26,28 @@ def encode(in_bytes):
     An empty string is encoded to '\\x01'"""
     if isinstance(in_bytes, str):
         raise TypeError('Unicode-objects must be encoded as bytes first')
-    in_bytes_mv = _get_buffer_view(in_bytes)
+    if not isinstance(in_bytes, (bytes, bytearray)):
+        in_bytes = bytes(_get_buffer_view(in_bytes))
+    # the zero bytes are found by bytes.split, in C, instead of a loop over every byte
+    chunks = in_bytes.split(b'\x00')
+    out_parts = []
+    for chunk in chunks[:-1]:
+        _append_blocks(out_parts, chunk, True)
+    _append_blocks(out_parts, chunks[-1], False)
+    return b''.join(out_parts)
+
+
+def _append_blocks(out_parts, chunk, followed_by_zero):
+    """ Encode a run of non-zero bytes; the last block also stands for the zero that follows the run, if any. """
     final_zero = True
-    out_bytes = bytearray()
-    idx = 0
-    search_start_idx = 0
-    for in_char in in_bytes_mv:
-        if in_char == 0:
-            final_zero = True
-            out_bytes.append(idx - search_start_idx + 1)
-            out_bytes += in_bytes_mv[search_start_idx:idx]
-            search_start_idx = idx + 1
-        else:
-            if idx - search_start_idx == 0xFD:
-                final_zero = False
-                out_bytes.append(0xFF)
-                out_bytes += in_bytes_mv[search_start_idx:idx+1]
-                search_start_idx = idx + 1
-        idx += 1
-    if idx != search_start_idx or final_zero:
-        out_bytes.append(idx - search_start_idx + 1)
-        out_bytes += in_bytes_mv[search_start_idx:idx]
-    return bytes(out_bytes)
+    while len(chunk) >= 0xFE:
+        out_parts.append(_FULL_BLOCK_CODE)
+        out_parts.append(chunk[:0xFE])
+        chunk = chunk[0xFE:]
+        final_zero = False
+    if chunk or final_zero or followed_by_zero:
+        out_parts.append(_LENGTH_CODES[len(chunk) + 1])
+        out_parts.append(chunk)
 
 
 def decode(in_bytes):
@@ -60,27 +60,24 @@ def decode(in_bytes):
     is invalid."""
     if isinstance(in_bytes, str):
         raise TypeError('Unicode-objects are not supported; byte buffer objects only')
-    in_bytes_mv = _get_buffer_view(in_bytes)
-    out_bytes = bytearray()
+    in_bytes = bytes(_get_buffer_view(in_bytes))
+    if b'\x00' in in_bytes:
+        raise DecodeError("zero byte found in input")
+    out_parts = []
     idx = 0
+    in_len = len(in_bytes)
+
+    while idx < in_len:
+        length = in_bytes[idx]
+        end = idx + length
+        if end > in_len:
+            raise DecodeError("not enough input bytes for length code")
+        out_parts.append(in_bytes[idx + 1:end])
+        idx = end
+        if idx < in_len and length < 0xFF:
+            out_parts.append(b'\x00')
+    return b''.join(out_parts)
+
 
-    if len(in_bytes_mv) > 0:
-        while True:
-            length = ord(in_bytes_mv[idx])
-            if length == 0:
-                raise DecodeError("zero byte found in input")
-            idx += 1
-            end = idx + length - 1
-            copy_mv = in_bytes_mv[idx:end]
-            if b'\x00' in copy_mv:
-                raise DecodeError("zero byte found in input")
-            out_bytes += copy_mv
-            idx = end
-            if idx > len(in_bytes_mv):
-                raise DecodeError("not enough input bytes for length code")
-            if idx < len(in_bytes_mv):
-                if length < 0xFF:
-                    out_bytes.append(0)
-            else:
-                break
-    return bytes(out_bytes)
+_FULL_BLOCK_CODE = b'\xff'
+_LENGTH_CODES = [bytes((code,)) for code in range(0x100)]
@@ -3,6 +3,7 @@ import math as m
 
 import numpy as np
 
+from ..Util import geometry_np
 from ..Util.Position import Position
 from ..Util.Pose import Pose
 
@@ -104,20 +105,8 @@ def get_nearest(ref_position: Position, list_of_position: list, number=1):
     assert isinstance(list_of_position, list)
     assert isinstance(number, int)
 
-    dict_position_distance = {}
-    for bot_position in list_of_position:
-        dst = get_distance(ref_position, bot_position)
-
-        while dst in dict_position_distance.keys():
-            dst += 0.1
-        dict_position_distance[dst] = bot_position
-
-    list_sorted = []
-    for i, bot_dst in enumerate(sorted(dict_position_distance.keys())):
-        if i < number:
-            list_sorted.append(dict_position_distance[bot_dst])
-        else:
-            return list_sorted
+    nearest = geometry_np.get_nearest_indices(ref_position.conv_2_np(), geometry_np.to_array(list_of_position), number)
+    return [list_of_position[index] for index in nearest]
 
 
 def get_milliseconds(time_sec: float) -> int:
@@ -193,32 +182,9 @@ def get_lines_intersection(position_a1: Position, position_a2: Position,
     assert isinstance(position_b1, Position)
     assert isinstance(position_b2, Position)
 
-    delta_x_a = position_a1.x - position_a2.x
-    delta_y_a = position_a1.y - position_a2.y
-    delta_x_b = position_b1.x - position_b2.x
-    delta_y_b = position_b1.y - position_b2.y
-
-    denominator = delta_x_a * delta_y_b - delta_y_a * delta_x_b
-    if denominator == 0:
-        # Les lignes sont parallèles
-        return Position(m.inf, m.inf)
-
-    a = np.matrix([[delta_x_a, -delta_x_b], [delta_y_a, -delta_y_b]])
-    b = np.matrix([[position_b1.x - position_a1.x], [position_b1.y - position_a1.y]])
-
-    scale = np.linalg.solve(a, b)
-
-    intersection1 = np.matrix([[position_a1.x], [position_a1.y]]) + scale.item((0, 0))*np.matrix([[delta_x_a],
-                                                                                                  [delta_y_a]])
-    intersection2 = np.matrix([[position_b1.x], [position_b1.y]]) + scale.item((1, 0))*np.matrix([[delta_x_b],
-                                                                                                  [delta_y_b]])
-
-    assert np.allclose(intersection1, intersection2)
-
-    x = intersection1.item((0, 0))
-    y = intersection1.item((1, 0))
-
-    return Position(x, y)
+    intersection = geometry_np.get_lines_intersections(position_a1.conv_2_np(), position_a2.conv_2_np(),
+                                                       position_b1.conv_2_np(), position_b2.conv_2_np())
+    return Position(intersection[0], intersection[1])
 
 
 def get_closest_point_on_line(reference: Position,
@@ -241,29 +207,8 @@ def get_closest_point_on_line(reference: Position,
     assert isinstance(position1, Position)
     assert isinstance(position2, Position)
 
-    delta_x = position2.x - position1.x
-    delta_y = position2.y - position1.y
-
-    if delta_x != 0 and delta_y != 0:   # droite quelconque
-        pente = delta_y / delta_x
-        ordonnee = position1.y - pente*position1.x
-
-        pente_orthogonale = -1/pente
-        ordonnee_orthogonale = reference.y - pente_orthogonale*reference.x
-
-        # Calcul des coordonnées de la destination
-        pos_x = (ordonnee_orthogonale - ordonnee)/(pente - pente_orthogonale)
-        pos_y = pente*pos_x + ordonnee
-
-    elif delta_x == 0:  # droite verticale
-        pos_x = position1.x
-        pos_y = reference.y
-
-    elif delta_y == 0:  # droite horizontale
-        pos_x = reference.x
-        pos_y = position1.y
-
-    return Position(pos_x, pos_y)
+    closest = geometry_np.project_on_lines(reference.conv_2_np(), position1.conv_2_np(), position2.conv_2_np())
+    return Position(closest[0], closest[1])
 
 
 def get_time_to_travel(dist: float, speed: float, accel: float) -> float:
@@ -0,0 +1,142 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Version vectorisée de geometry: les fonctions prennent des tableaux (N, 2) de points et traitent tous les points,
+    segments ou cercles en une seule opération numpy. Les paramètres marqués (N, 2) acceptent aussi un seul point (2,)
+    qui est alors diffusé sur tous les autres.
+"""
+import numpy as np
+
+__author__ = 'RoboCupULaval'
+
+
+def to_array(positions) -> np.ndarray:
+    """
+        Convertit une liste de Position (ou tout ce qui a des attributs x et y) en tableau (N, 2). Les tableaux numpy
+        et les listes de coordonnées sont retournés tels quels en float64.
+    """
+    if isinstance(positions, np.ndarray):
+        return positions.astype(np.float64, copy=False)
+    if len(positions) and not hasattr(positions[0], 'x'):
+        return np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    return np.array([[position.x, position.y] for position in positions], dtype=np.float64).reshape(-1, 2)
+
+
+def get_distances(points_a: np.ndarray, points_b: np.ndarray) -> np.ndarray:
+    """ Distance entre les points a et b pris deux à deux, (N, 2) et (N, 2) -> (N,). """
+    delta = np.asarray(points_b) - np.asarray(points_a)
+    return np.hypot(delta[..., 0], delta[..., 1])
+
+
+def get_distance_matrix(points_a: np.ndarray, points_b: np.ndarray) -> np.ndarray:
+    """ Distance entre chaque point de a et chaque point de b, (N, 2) et (M, 2) -> (N, M). """
+    return get_distances(np.asarray(points_a)[:, np.newaxis, :], np.asarray(points_b)[np.newaxis, :, :])
+
+
+def get_angles(origins: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """ Angle dans [-pi, pi] entre l'axe des abscisses et chaque vecteur origine -> cible, (N, 2) -> (N,). """
+    delta = np.asarray(targets) - np.asarray(origins)
+    return np.arctan2(delta[..., 1], delta[..., 0])
+
+
+def wrap_angles(angles: np.ndarray) -> np.ndarray:
+    """ Ramène des angles en radians dans [-pi, pi[. """
+    return (np.asarray(angles) + np.pi) % (2 * np.pi) - np.pi
+
+
+def get_projection_ratios(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+        Position de la projection de chaque point sur la droite de son segment, en fraction du segment: 0 au départ,
+        1 à la fin. Un segment de longueur nulle donne 0.
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    vectors = np.asarray(ends) - starts
+    lengths_sq = (vectors ** 2).sum(axis=-1)
+    dots = ((np.asarray(points) - starts) * vectors).sum(axis=-1)
+    return np.divide(dots, lengths_sq, out=np.zeros(np.broadcast(dots, lengths_sq).shape), where=lengths_sq > 0)
+
+
+def project_on_lines(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """ Point de chaque droite (départ, fin) le plus près du point correspondant, (N, 2) -> (N, 2). """
+    starts = np.asarray(starts, dtype=np.float64)
+    ratios = get_projection_ratios(points, starts, ends)
+    return starts + ratios[..., np.newaxis] * (np.asarray(ends) - starts)
+
+
+def project_on_segments(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """ Point de chaque segment (départ, fin) le plus près du point correspondant, (N, 2) -> (N, 2). """
+    starts = np.asarray(starts, dtype=np.float64)
+    ratios = np.clip(get_projection_ratios(points, starts, ends), 0, 1)
+    return starts + ratios[..., np.newaxis] * (np.asarray(ends) - starts)
+
+
+def get_distances_to_segments(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """ Distance entre chaque point et son segment, (N, 2) -> (N,). """
+    return get_distances(points, project_on_segments(points, starts, ends))
+
+
+def get_segments_circles_intersection(starts: np.ndarray, ends: np.ndarray, centers: np.ndarray,
+                                      radii) -> np.ndarray:
+    """
+        Cherche où chaque segment entre dans chaque cercle.
+
+        :param starts: (N, 2) départs des segments
+        :param ends: (N, 2) fins des segments
+        :param centers: (M, 2) centres des cercles
+        :param radii: rayon commun ou (M,) rayons des cercles
+        :return: (N, M) fraction du segment au premier point dans le cercle, 0 si le départ est dans le cercle,
+                 inf si le segment ne touche pas le cercle
+    """
+    starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+    vectors = (np.asarray(ends, dtype=np.float64) - starts).reshape(-1, 2)
+    to_starts = starts[:, np.newaxis, :] - np.asarray(centers, dtype=np.float64).reshape(-1, 2)[np.newaxis, :, :]
+
+    # |start + t * vector - center|² = radius² -> a t² + 2 b t + c = 0
+    a = (vectors ** 2).sum(axis=1)[:, np.newaxis]
+    b = (to_starts * vectors[:, np.newaxis, :]).sum(axis=2)
+    c = (to_starts ** 2).sum(axis=2) - np.asarray(radii, dtype=np.float64) ** 2
+    discriminant = b ** 2 - a * c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first = (-b - np.sqrt(discriminant)) / a
+    hit = (discriminant >= 0) & (a > 0) & (first <= 1) & (-b + np.sqrt(np.maximum(discriminant, 0)) >= 0)
+    ratios = np.where(hit, np.maximum(first, 0), np.inf)
+    ratios[c <= 0] = 0
+    return ratios
+
+
+def get_lines_intersections(starts_a: np.ndarray, ends_a: np.ndarray,
+                            starts_b: np.ndarray, ends_b: np.ndarray) -> np.ndarray:
+    """ Intersection des droites a et b prises deux à deux, (N, 2) -> (N, 2). inf pour les droites parallèles. """
+    starts_a = np.asarray(starts_a, dtype=np.float64)
+    starts_b = np.asarray(starts_b, dtype=np.float64)
+    vectors_a = np.asarray(ends_a) - starts_a
+    vectors_b = np.asarray(ends_b) - starts_b
+    denominators = _cross(vectors_a, vectors_b)
+    parallel = denominators == 0
+    ratios = _cross(starts_b - starts_a, vectors_b) / np.where(parallel, 1, denominators)
+    intersections = starts_a + ratios[..., np.newaxis] * vectors_a
+    intersections[parallel] = np.inf
+    return intersections
+
+
+def get_nearest_indices(reference: np.ndarray, points: np.ndarray, number=1) -> np.ndarray:
+    """ Index des number points les plus près de la référence, en ordre croissant de distance. """
+    distances = get_distances(np.asarray(reference)[np.newaxis, :], points)
+    number = min(number, len(distances))
+    if number == 0:
+        return np.zeros(0, dtype=np.int64)
+    nearest = np.argpartition(distances, number - 1)[:number]
+    return nearest[np.argsort(distances[nearest], kind='stable')]
+
+
+def rotate_points(points: np.ndarray, origins: np.ndarray, angles) -> np.ndarray:
+    """ Tourne chaque point autour de son origine d'un angle en radians, (N, 2) -> (N, 2). """
+    origins = np.asarray(origins, dtype=np.float64)
+    delta = np.asarray(points) - origins
+    cosines = np.cos(angles)
+    sines = np.sin(angles)
+    return origins + np.stack((delta[..., 0] * cosines - delta[..., 1] * sines,
+                               delta[..., 0] * sines + delta[..., 1] * cosines), axis=-1)
+
+
+def _cross(vectors_a, vectors_b):
+    return vectors_a[..., 0] * vectors_b[..., 1] - vectors_a[..., 1] * vectors_b[..., 0]
@@ -1,26 +1,44 @@
 import time
-from copy import deepcopy
 
-from RULEngine.Util.Pose import Pose
-from RULEngine.Util.Position import Position
+import numpy as np
+
+from RULEngine.Util.constant import PLAYER_PER_TEAM
 from RULEngine.Util.image_transformer.image_transformer import ImageTransformer
+from RULEngine.Util.tracking import OBSERVATION_SIZE
+
+NCAMERAS = 4
+BALL_TRACK = 2 * PLAYER_PER_TEAM
 
 
 class KalmanImageTransformer(ImageTransformer):
-    def __init__(self):
+    """
+        Conserve la dernière DetectionFrame de chaque caméra sous forme de tableaux
+        d'observations et de masque directement utilisables par le
+        BatchKalmanTracker. Les pistes sont ordonnées bleus 0..5, jaunes 0..5
+        puis la balle.
+    """
+
+    def __init__(self, ncameras=NCAMERAS):
         super().__init__()
-        self.last_camera_frame = [empty_camera for _ in range(0, 4)]
-        self.last_new_packet = None
+        self.ncameras = ncameras
+        self.observations = np.zeros((BALL_TRACK + 1, ncameras, OBSERVATION_SIZE))
+        self.mask = np.zeros((BALL_TRACK + 1, ncameras), dtype=bool)
+        self.frame_numbers = np.zeros(ncameras, dtype=np.int64)
+        self.t_captures = np.zeros(ncameras)
+        self.timestamps = np.zeros(ncameras)
+        # caméras ayant reçu une nouvelle frame lors du dernier update
+        self.updated_cameras = np.zeros(ncameras, dtype=bool)
         self.new_image_flag = False
         self.time = time.time()
 
     def update(self, packets):
         self._update_camera_kalman(packets)
 
-        return self.last_camera_frame
+        return self.observations, self.mask
 
     def _update_camera_kalman(self, packets):
         self.new_image_flag = False
+        self.updated_cameras[:] = False
         if not packets:
             return
 
@@ -31,32 +49,30 @@ class KalmanImageTransformer(ImageTransformer):
                 c_id = packet.detection.camera_id
                 f_nb = packet.detection.frame_number
 
-                if f_nb > self.last_camera_frame[c_id]["frame_number"]:
-                    new_camera = deepcopy(empty_camera)
-                    new_camera["camera_id"] = c_id
-                    new_camera["frame_number"] = f_nb
-                    new_camera["t_capture"] = packet.detection.t_capture
-                    new_camera["timestamp"] = time.time()
-
-                    for ball in packet.detection.balls:
-                        new_camera["ball"] = Position(ball.x, ball.y)
+                if c_id < self.ncameras and f_nb > self.frame_numbers[c_id]:
+                    self.frame_numbers[c_id] = f_nb
+                    self.t_captures[c_id] = packet.detection.t_capture
+                    self.timestamps[c_id] = time.time()
+                    self._set_camera_observations(c_id, packet.detection)
+                    self.updated_cameras[c_id] = True
+                    self.new_image_flag = True
 
-                    for blue in packet.detection.robots_blue:
-                        new_camera["blues"][blue.robot_id] = Pose(Position(blue.x, blue.y),
-                                                                  blue.orientation)
-                    for yellow in packet.detection.robots_yellow:
-                        new_camera["yellows"][yellow.robot_id] = Pose(Position(yellow.x, yellow.y),
-                                                                      yellow.orientation)
+    def _set_camera_observations(self, c_id, detection):
+        observations = self.observations[:, c_id]
+        mask = self.mask[:, c_id]
+        mask[:] = False
 
-                    self.last_camera_frame[c_id] = new_camera
-                    self.new_image_flag = True
+        # comme avant, la dernière balle de la liste est conservée
+        balls = detection.balls
+        if len(balls):
+            observations[BALL_TRACK, 0] = balls[-1].x
+            observations[BALL_TRACK, 1] = balls[-1].y
+            mask[BALL_TRACK] = True
 
-# TODO check the max numbers of bots
-empty_camera = {"frame_number": 0,
-                "t_capture": None,
-                "camera_id": None,
-                "timestamp": 0,
-                "ball": None,
-                "blues": [None for _ in range(0, 11)],
-                "yellows": [None for __ in range(0, 11)]
-                }
+        for robots, offset in ((detection.robots_blue, 0), (detection.robots_yellow, PLAYER_PER_TEAM)):
+            robots = robots[robots.robot_id < PLAYER_PER_TEAM]
+            tracks = offset + robots.robot_id
+            observations[tracks, 0] = robots.x
+            observations[tracks, 1] = robots.y
+            observations[tracks, 2] = robots.orientation
+            mask[tracks] = True
@@ -70,7 +70,7 @@ class SingularPacketImageTransformer(ImageTransformer):
             if player[1] > 0:
                 packet_robot = packet_to_add.detection.robots_blue.add()
                 packet_robot.confidence = 0.999
-                packet_robot.robot_id = key
+                packet_robot.robot_id = int(key)
                 packet_robot.x = player[0].x
                 packet_robot.y = player[0].y
                 packet_robot.pixel_x = 0.
@@ -80,7 +80,7 @@ class SingularPacketImageTransformer(ImageTransformer):
             if player[1] > 0:
                 packet_robot = packet_to_add.detection.robots_yellow.add()
                 packet_robot.confidence = 0.999
-                packet_robot.robot_id = key
+                packet_robot.robot_id = int(key)
                 packet_robot.x = player[0].x
                 packet_robot.y = player[0].y
                 packet_robot.pixel_x = 0.
@@ -119,12 +119,12 @@ class SingularPacketImageTransformer(ImageTransformer):
                 if not self.camera_packet.get(c_id, 0):
                     if t_cp > self.last_t_capture:
                         self.last_t_capture = t_cp
-                    self.camera_packet[c_id] = packet
+                    self.camera_packet[c_id] = packet.copy()
                     self.new_image_flag = True
                 elif f_nb > self.camera_packet[c_id].detection.frame_number:
                     if t_cp > self.last_t_capture:
                         self.last_t_capture = t_cp
-                    self.camera_packet[c_id] = packet
+                    self.camera_packet[c_id] = packet.copy()
                     self.new_image_flag = True
 
     def add_ball_info_to_packet(self, packet_to_add):
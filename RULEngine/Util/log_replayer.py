@@ -0,0 +1,73 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Relecture d'un log de datagrammes dans le Framework, sans réseau.
+
+    Les datagrammes sont poussés dans des receivers de remplacement et
+    l'horloge du Framework suit l'heure de réception enregistrée. L'IA est
+    exécutée à la fréquence ai_rate en temps du log, ce qui rend la relecture
+    reproductible, qu'elle soit faite au plus vite ou à la vitesse enregistrée.
+"""
+
+import time
+
+from RULEngine.Communication.util.datagram_log import VISION, REFEREE
+
+
+class LogReplayer(object):
+
+    def __init__(self, framework, records, ai_rate, realtime=False):
+        """
+            :param framework: Framework construit avec ReplayVisionReceiver et ReplayRefereeReceiver
+            :param records: enregistrements (heure de réception, source, octets) du log
+            :param ai_rate: fréquence de l'IA en Hz, en temps du log
+            :param realtime: rejoue à la vitesse enregistrée plutôt qu'au plus vite
+        """
+        self.framework = framework
+        self.records = records
+        self.period = 1 / float(ai_rate)
+        self.realtime = realtime
+        self.log_time = records[0][0] if records else 0
+        self.vision_frames = 0
+        self.referee_packets = 0
+        self.iterations = 0
+        self.wall_time = 0
+
+        self.framework.clock = lambda: self.log_time
+        self.framework.last_time = self.log_time
+
+    def run(self):
+        """ Rejoue tout le log et retourne les statistiques de la relecture. """
+        if not self.records:
+            return self.get_stats()
+        log_start = self.records[0][0]
+        next_iteration = log_start
+        wall_start = time.perf_counter()
+        for timestamp, source, data in self.records:
+            if self.realtime:
+                delay = (timestamp - log_start) - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.log_time = timestamp
+            if source == REFEREE:
+                self.framework.referee_command_receiver.push(data)
+                self.referee_packets += 1
+            elif source == VISION:
+                self.framework.vision.push(data)
+                self.vision_frames += 1
+                if timestamp >= next_iteration:
+                    self.framework.vision_routine()
+                    self.iterations += 1
+                    while next_iteration <= timestamp:
+                        next_iteration += self.period
+        self.wall_time = time.perf_counter() - wall_start
+        return self.get_stats()
+
+    def get_stats(self):
+        wall_time = self.wall_time or float("nan")
+        return {"vision_frames": self.vision_frames,
+                "referee_packets": self.referee_packets,
+                "ai_iterations": self.iterations,
+                "log_duration": self.records[-1][0] - self.records[0][0] if self.records else 0,
+                "wall_time": self.wall_time,
+                "frames_per_second": self.vision_frames / wall_time,
+                "iterations_per_second": self.iterations / wall_time}
@@ -0,0 +1,104 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Ordonnanceur de la boucle principale du Framework.
+
+    Trois modes sont offerts:
+        - busy: l'ancienne boucle, qui tourne à vide avec time.sleep(0);
+        - tick: réveil à intervalle fixe sur une horloge monotone;
+        - vision: réveil sur l'arrivée d'une nouvelle frame de vision, sans
+          dépasser la fréquence de l'IA.
+
+    Une échéance est manquée quand une itération de l'IA se termine après le
+    début prévu de l'itération suivante.
+"""
+
+import time
+
+BUSY = "busy"
+TICK = "tick"
+VISION = "vision"
+SCHEDULER_MODES = (BUSY, TICK, VISION)
+
+
+class LoopScheduler(object):
+
+    def __init__(self, mode, ai_rate, vision_event=None, clock=time.monotonic, sleep=time.sleep):
+        """
+            :param mode: busy, tick ou vision
+            :param ai_rate: fréquence maximale de l'IA en Hz
+            :param vision_event: threading.Event levé à chaque nouvelle frame, requis en mode vision
+        """
+        if mode not in SCHEDULER_MODES:
+            raise ValueError("Mode d'ordonnancement inconnu: {}".format(mode))
+        if mode == VISION and vision_event is None:
+            raise ValueError("Le mode vision nécessite un évènement de vision.")
+        self.mode = mode
+        self.period = 1 / float(ai_rate)
+        self.vision_event = vision_event
+        self.clock = clock
+        self.sleep = sleep
+
+        self.next_deadline = None
+        self._iteration_running = False
+        self.iterations = 0
+        self.missed_deadlines = 0
+        self.last_overrun = 0.0
+        self.max_overrun = 0.0
+
+    def wait(self):
+        """
+            Bloque jusqu'à la prochaine itération de l'IA.
+
+            :return: True si l'IA doit être exécutée, False sinon (mode busy
+                     avant l'échéance, ou aucune vision reçue en mode vision)
+        """
+        now = self.clock()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        elif self._iteration_running:
+            self._iteration_running = False
+            self._check_overrun(now)
+
+        if self.mode == BUSY:
+            if now < self.next_deadline:
+                self.sleep(0)
+                return False
+        elif self.mode == VISION:
+            # le timeout permet de vérifier régulièrement la demande d'arrêt du Framework
+            if not self.vision_event.wait(max(self.period, self.next_deadline - now)):
+                return False
+            self.vision_event.clear()
+            self._sleep_until(self.next_deadline)
+        else:
+            self._sleep_until(self.next_deadline)
+
+        self._start_iteration()
+        return True
+
+    def _sleep_until(self, deadline):
+        remaining = deadline - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+
+    def _check_overrun(self, now):
+        overrun = now - self.next_deadline
+        if overrun > 0:
+            self.missed_deadlines += 1
+            self.last_overrun = overrun
+            self.max_overrun = max(self.max_overrun, overrun)
+
+    def _start_iteration(self):
+        now = self.clock()
+        if now - self.next_deadline > self.period:
+            # on a pris du retard (débordement ou attente de la vision): on se réaligne au lieu de rattraper
+            self.next_deadline = now + self.period
+        else:
+            self.next_deadline += self.period
+        self._iteration_running = True
+        self.iterations += 1
+
+    def get_stats(self):
+        return {"iterations": self.iterations,
+                "missed_deadlines": self.missed_deadlines,
+                "last_overrun": self.last_overrun,
+                "max_overrun": self.max_overrun}
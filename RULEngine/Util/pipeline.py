@@ -0,0 +1,161 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Pipeline vision -> IA -> communication.
+
+    Le tracker, l'IA et les envois sont séparés en étapes reliées par des cases
+    à valeur unique: une nouvelle valeur écrase celle qui n'a pas encore été
+    lue. Ainsi le filtrage de la frame N+1 se fait pendant que l'IA traite la
+    frame N, et un envoi lent au UI-debug ne retarde jamais les commandes des
+    robots.
+
+    Le tracker peut tourner dans un thread (THREAD) ou dans un processus séparé
+    (PROCESS); dans ce dernier cas ses états sont publiés en mémoire partagée.
+"""
+
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+
+NONE = "none"
+THREAD = "thread"
+PROCESS = "process"
+PIPELINE_MODES = (NONE, THREAD, PROCESS)
+
+STAGE_TIMEOUT = 0.1
+
+
+class LatestValueSlot(object):
+    """ Case à valeur unique entre deux threads, la dernière valeur écrite gagne. """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._value = None
+        self._version = 0
+        self._read_version = 0
+        self.overwritten = 0
+        self.new_value_event = threading.Event()
+
+    def put(self, value):
+        with self._condition:
+            if self._version != self._read_version:
+                self.overwritten += 1
+            self._value = value
+            self._version += 1
+            self._condition.notify()
+        self.new_value_event.set()
+
+    def get(self, timeout=None):
+        """ Retourne la valeur non lue, ou None si aucune n'est arrivée avant le timeout. """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._version != self._read_version, timeout):
+                return None
+            self._read_version = self._version
+            return self._value
+
+    def poll(self):
+        return self.get(0)
+
+
+class SharedStateSlot(object):
+    """
+        Case à valeur unique pour un couple (tableau de taille fixe, horodatage),
+        en mémoire partagée entre processus. L'écrivain unique protège ses
+        écritures avec un compteur de séquence (seqlock): un lecteur qui voit un
+        compteur impair ou modifié pendant sa copie recommence.
+    """
+
+    def __init__(self, shape, context=multiprocessing):
+        self.shape = tuple(shape)
+        self._size = int(np.prod(self.shape))
+        # l'horodatage est conservé dans la dernière case du tampon
+        self._buffer = context.RawArray('d', self._size + 1)
+        self._sequence = context.RawValue('Q', 0)
+        self._read_sequence = 0
+        self.new_value_event = context.Event()
+
+    def put(self, value):
+        states, timestamp = value
+        buffer = np.frombuffer(self._buffer, dtype=np.float64)
+        self._sequence.value += 1
+        buffer[:self._size] = states.ravel()
+        buffer[self._size] = timestamp
+        self._sequence.value += 1
+        self.new_value_event.set()
+
+    def poll(self):
+        """ Retourne une copie du couple (tableau, horodatage) non lu, ou None. """
+        buffer = np.frombuffer(self._buffer, dtype=np.float64)
+        while True:
+            sequence = self._sequence.value
+            if sequence == self._read_sequence:
+                return None
+            if sequence % 2:
+                continue
+            value = buffer.copy()
+            if self._sequence.value == sequence:
+                self._read_sequence = sequence
+                return value[:self._size].reshape(self.shape), float(value[self._size])
+
+
+class TrackerStage(object):
+    """
+        Étape de tracking: attend les frames de la vision, les fusionne par
+        caméra et publie les états filtrés de toutes les pistes avec le
+        t_capture de la frame la plus récente.
+    """
+
+    def __init__(self, vision, image_transformer, tracker, output_slot, stop_event):
+        self.vision = vision
+        self.image_transformer = image_transformer
+        self.tracker = tracker
+        self.output_slot = output_slot
+        self.stop_event = stop_event
+
+    def run(self):
+        last_time = time.monotonic()
+        while not self.stop_event.is_set():
+            if not self.vision.new_frame_event.wait(STAGE_TIMEOUT):
+                continue
+            self.vision.new_frame_event.clear()
+            observations, mask = self.image_transformer.update(self.vision.pop_frames())
+            if not self.image_transformer.new_image_flag:
+                continue
+            now = time.monotonic()
+            # on filtre à chaque frame, seules les caméras qui viennent d'arriver sont observées
+            mask = mask & self.image_transformer.updated_cameras
+            states = self.tracker.filter(observations, mask, now - last_time)
+            last_time = now
+            self.output_slot.put((states.copy(), self.image_transformer.t_captures.max()))
+
+
+def run_tracker_process(host, port, kalman_types, ncameras, output_slot, stop_event):
+    """ Point d'entrée du processus de tracking, construit sa propre réception de la vision. """
+    from RULEngine.Communication.receiver.vision_receiver import VisionReceiver
+    from RULEngine.Util.image_transformer.kalman_image_transformer import KalmanImageTransformer
+    from RULEngine.Util.tracking import BatchKalmanTracker
+
+    vision = VisionReceiver(host, port)
+    stage = TrackerStage(vision, KalmanImageTransformer(ncameras), BatchKalmanTracker(kalman_types, ncameras),
+                         output_slot, stop_event)
+    try:
+        stage.run()
+    finally:
+        vision.stop()
+
+
+class SlotConsumerThread(threading.Thread):
+    """ Thread qui passe chaque nouvelle valeur d'une LatestValueSlot au callback. """
+
+    def __init__(self, slot, callback, stop_event):
+        super(SlotConsumerThread, self).__init__(daemon=True)
+        self.slot = slot
+        self.callback = callback
+        self.stop_event = stop_event
+
+    def run(self):
+        while not self.stop_event.is_set():
+            value = self.slot.get(STAGE_TIMEOUT)
+            if value is not None:
+                self.callback(value)
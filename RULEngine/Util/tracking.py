@@ -198,3 +198,124 @@ class Kalman:
         if self.type == 'friend' or self.type == 'enemy':
             output_state[4] = (self.x[4] + np.pi) % (2 * np.pi) - np.pi
         return output_state
+
+
+# Paramètres de bruit par type de piste, dans l'ordre de l'état
+# [x, y, vx, vy, theta, vtheta]. La balle n'observe pas l'orientation.
+_PROCESS_NOISE = {'friend': [10 ** 0, 10 ** 0, 10 ** 1, 10 ** 1, 10 ** (-2), 10 ** (-1)],
+                  'enemy': [10 ** 0, 10 ** 0, 10 ** 0, 10 ** 0, 10 ** 2, 10 ** (-1)],
+                  'ball': [10 ** 0, 10 ** 0, 10 ** 0, 10 ** 0, 0, 0]}
+_OBSERVATION_NOISE = {'friend': [10 ** 0, 10 ** 0, 10 ** (-3)],
+                      'enemy': [10 ** 0, 10 ** 0, 10 ** (-3)],
+                      'ball': [10 ** 0, 10 ** 0, 10 ** 0]}
+_INITIAL_STATE = {'friend': [9999, 9999, 0, 0, 0, 0],
+                  'enemy': [9999, 9999, 0, 0, 0, 0],
+                  'ball': [0, 0, 0, 0, 0, 0]}
+_OBSERVED_STATES = [0, 1, 4]  # x, y, theta
+STATE_SIZE = 6
+OBSERVATION_SIZE = len(_OBSERVED_STATES)
+
+
+class BatchKalmanTracker:
+    """
+        Filtre de Kalman vectorisé pour toutes les pistes (amis, ennemis et balle).
+
+        L'état de chaque piste est [x, y, vx, vy, theta, vtheta], empilé dans des
+        tableaux (N, 6) et (N, 6, 6). Une seule mise à jour et une seule prédiction
+        sont faites par frame pour toutes les pistes. Les observations manquantes
+        d'une caméra sont masquées en annulant la ligne de H correspondante, ce qui
+        donne exactement le même résultat que de retirer cette observation.
+
+        Le modèle de contrôle de Kalman('friend') est nul, il n'est donc pas repris ici.
+    """
+
+    def __init__(self, kalman_types, ncameras=4, dt=0.05):
+        """
+            :param kalman_types: liste du type de chaque piste ('friend', 'enemy' ou 'ball')
+            :param ncameras: nombre de caméras qui peuvent observer une piste
+            :param dt: pas de temps initial du modèle de transition
+        """
+        for kalman_type in kalman_types:
+            assert kalman_type in ["enemy", "friend", "ball"]
+        self.kalman_types = list(kalman_types)
+        self.ncameras = ncameras
+        ntracks = len(self.kalman_types)
+
+        self.x = np.array([_INITIAL_STATE[t] for t in self.kalman_types], dtype=np.float64)
+        self.P = np.tile(10 ** 3 * np.eye(STATE_SIZE), (ntracks, 1, 1))
+        self.Q = np.zeros((ntracks, STATE_SIZE, STATE_SIZE))
+        for i, kalman_type in enumerate(self.kalman_types):
+            self.Q[i] = np.diag(_PROCESS_NOISE[kalman_type])
+            if kalman_type == 'ball':
+                # La balle n'a pas d'orientation: la covariance de theta reste nulle
+                self.P[i, 4:, 4:] = 0
+
+        # Observation: pour chaque caméra, (x, y, theta) dans l'ordre de la dernière dimension
+        self.H = np.zeros((ncameras * OBSERVATION_SIZE, STATE_SIZE))
+        for camera in range(ncameras):
+            for k, state_idx in enumerate(_OBSERVED_STATES):
+                self.H[camera * OBSERVATION_SIZE + k, state_idx] = 1
+        self.R = np.array([_OBSERVATION_NOISE[t] * ncameras for t in self.kalman_types], dtype=np.float64)
+        has_orientation = np.array([t != 'ball' for t in self.kalman_types])
+        self._observable = np.ones((ntracks, ncameras * OBSERVATION_SIZE), dtype=bool)
+        self._observable[:, 2::OBSERVATION_SIZE] = has_orientation[:, np.newaxis]
+
+        self.F = None
+        self._dt = None
+        self.transition_model(dt)
+
+    def transition_model(self, dt):
+        """ Reconstruit F seulement si le pas de temps a changé. """
+        if dt == self._dt:
+            return
+        self._dt = dt
+        self.F = np.eye(STATE_SIZE)
+        self.F[0, 2] = dt
+        self.F[1, 3] = dt
+        self.F[4, 5] = dt
+
+    def predict(self):
+        self.x = self.x @ self.F.T
+        self.P = self.F @ self.P @ self.F.T + self.Q
+
+    def update(self, observations, mask):
+        """
+            :param observations: tableau (N, ncameras, 3) des observations (x, y, theta), ignoré là où mask est faux
+            :param mask: tableau booléen (N, ncameras), vrai si la caméra voit la piste
+        """
+        ntracks = self.x.shape[0]
+        obs_mask = np.repeat(mask, OBSERVATION_SIZE, axis=1) & self._observable
+        active = np.flatnonzero(obs_mask.any(axis=1))
+        if active.size == 0:
+            return
+
+        obs_mask = obs_mask[active]
+        z = np.reshape(observations, (ntracks, -1))[active]
+        x = self.x[active]
+        P = self.P[active]
+
+        H = self.H * obs_mask[:, :, np.newaxis]
+        y = np.where(obs_mask, z - x @ self.H.T, 0)
+        y[:, 2::OBSERVATION_SIZE] = (y[:, 2::OBSERVATION_SIZE] + np.pi) % (2 * np.pi) - np.pi
+
+        HP = H @ P
+        S = HP @ np.transpose(H, (0, 2, 1))
+        diag = np.arange(S.shape[1])
+        S[:, diag, diag] += np.where(obs_mask, self.R[active], 1)
+
+        # K = P H^T S^-1, donc K^T = S^-1 H P puisque S et P sont symétriques
+        KT = np.linalg.solve(S, HP)
+        self.x[active] = x + np.einsum('nmi,nm->ni', KT, y)
+        self.P[active] = P - np.transpose(KT, (0, 2, 1)) @ HP
+
+    def filter(self, observations, mask, dt=0.05):
+        """
+            Fait un pas du filtre (mise à jour puis prédiction) pour toutes les pistes.
+
+            :return: le tableau (N, 6) des états, orientation ramenée dans [-pi, pi[
+        """
+        self.transition_model(dt)
+        self.update(observations, mask)
+        self.predict()
+        self.x[:, 4] = (self.x[:, 4] + np.pi) % (2 * np.pi) - np.pi
+        return self.x
@@ -0,0 +1,80 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Micro-benchmark de l'encodage des paquets série. Compare l'encodage COBS par découpage sur les zéros et les
+    paquets à struct précompilé à l'ancienne implémentation octet par octet (reproduite ici), pour une commande et
+    pour le tampon des six robots envoyé à chaque cycle.
+
+    python -m RULEngine.tests.Communication.bench_serial_protocol
+"""
+import struct
+import timeit
+
+from RULEngine.Communication.util import serial_protocol as protocol
+from RULEngine.Util.cobs import cobs
+
+__author__ = 'RoboCupULaval'
+
+NUMBER = 2000
+REPEAT = 5
+
+
+def legacy_cobs_encode(in_bytes):
+    """ L'ancien encodeur COBS en Python pur, qui parcourt chaque octet. """
+    final_zero = True
+    out_bytes = bytearray()
+    idx = 0
+    search_start_idx = 0
+    for in_char in in_bytes:
+        if in_char == 0:
+            final_zero = True
+            out_bytes.append(idx - search_start_idx + 1)
+            out_bytes += in_bytes[search_start_idx:idx]
+            search_start_idx = idx + 1
+        else:
+            if idx - search_start_idx == 0xFD:
+                final_zero = False
+                out_bytes.append(0xFF)
+                out_bytes += in_bytes[search_start_idx:idx + 1]
+                search_start_idx = idx + 1
+        idx += 1
+    if idx != search_start_idx or final_zero:
+        out_bytes.append(idx - search_start_idx + 1)
+        out_bytes += in_bytes[search_start_idx:idx]
+    return bytes(out_bytes)
+
+
+def legacy_speed_command(x, y, theta, robot_idx):
+    """ L'ancienne construction d'un paquet de vitesse: entête en liste, struct.pack non compilé et copies. """
+    packet = bytes([protocol.STM32_PROTOCOL_VERSION, protocol.STM32_ADDR_BASE_STATION, robot_idx,
+                    protocol.STM32_CMD_MOVEMENT_COMMAND, 0x00])
+    packet += struct.pack('%sf' % 3, *[x, y, theta])
+    checksum = bytes([sum(packet) & 0xff])
+    packet = packet[:4] + checksum + packet[5:]
+    return legacy_cobs_encode(bytes(packet)) + b'\0'
+
+
+def measure(statement):
+    """ Retourne le meilleur temps par appel en microsecondes. """
+    return min(timeit.repeat(statement, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e6
+
+
+def main():
+    speeds = [(player_id * 0.1, -player_id * 0.2, 0.5, player_id) for player_id in range(6)]
+    assert protocol.create_speed_commands(speeds) == b''.join(legacy_speed_command(*speed) for speed in speeds)
+    payload = bytes(range(256)) * 4
+    cases = [("COBS 1 ko", lambda: legacy_cobs_encode(payload), lambda: cobs.encode(payload)),
+             ("commande vitesse", lambda: legacy_speed_command(1.5, -2.0, 0.25, 3),
+              lambda: protocol.create_speed_command(1.5, -2.0, 0.25, 3)),
+             ("cycle 6 robots", lambda: [legacy_speed_command(*speed) for speed in speeds],
+              lambda: protocol.create_speed_commands(speeds))]
+
+    print("extension C de cobs: {}".format("oui" if cobs._using_extension else "non"))
+    print("{:<20}{:>12}{:>12}{:>10}".format("opération", "avant (us)", "après (us)", "gain"))
+    for name, before, after in cases:
+        time_before = measure(before)
+        time_after = measure(after)
+        print("{:<20}{:>12.2f}{:>12.2f}{:>9.2f}x".format(name, time_before, time_after, time_before / time_after))
+
+
+if __name__ == "__main__":
+    main()
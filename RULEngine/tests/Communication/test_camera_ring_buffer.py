@@ -0,0 +1,117 @@
+# Under MIT License, see LICENSE.txt
+
+import socket
+import threading
+import unittest
+
+from RULEngine.Communication.protobuf import messages_robocup_ssl_wrapper_pb2 as ssl_wrapper
+from RULEngine.Communication.util.camera_ring_buffer import CameraRingBuffer
+from RULEngine.Communication.util.threaded_udp_server import UDPReaderThread
+
+__author__ = 'RoboCupULaval'
+
+
+def _serialize(camera_id, frame_number):
+    packet = ssl_wrapper.SSL_WrapperPacket()
+    packet.detection.frame_number = frame_number
+    packet.detection.t_capture = 0
+    packet.detection.t_sent = 0
+    packet.detection.camera_id = camera_id
+    return packet.SerializeToString()
+
+
+class TestCameraRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = CameraRingBuffer(max_cameras=4, ring_size=4)
+
+    def test_snapshot_returns_newest_frame_per_camera(self):
+        for frame_number in range(1, 6):
+            self.buffer.push(_serialize(0, frame_number))
+        self.buffer.push(_serialize(2, 3))
+
+        frames = self.buffer.snapshot()
+
+        self.assertEqual([(f.camera_id, f.frame_number) for f in frames], [(0, 5), (2, 3)])
+        self.assertEqual(self.buffer.snapshot(), [])
+
+    def test_stale_frames_are_dropped(self):
+        self.assertTrue(self.buffer.push(_serialize(1, 10)))
+        self.assertFalse(self.buffer.push(_serialize(1, 9)))
+        self.assertFalse(self.buffer.push(_serialize(7, 1)))
+        self.assertFalse(self.buffer.push(b'\x0a\x7f\x08'))
+        self.assertEqual(self.buffer.dropped_frames, 3)
+        self.assertEqual(self.buffer.latest().frame_number, 10)
+
+    def test_wrap_around_is_detected(self):
+        self.buffer.push(_serialize(0, 1))
+        self.buffer.snapshot()
+        for frame_number in range(2, 2 + self.buffer.ring_size):
+            self.buffer.push(_serialize(0, frame_number))
+        frames = self.buffer.snapshot()
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0].frame_number, 1 + self.buffer.ring_size)
+
+    def test_latest_is_none_without_frames(self):
+        self.assertIsNone(self.buffer.latest())
+
+
+class TestUDPReaderThread(unittest.TestCase):
+
+    def test_datagrams_are_delivered_to_callback(self):
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+        probe.close()
+
+        received = []
+        done = threading.Event()
+
+        def callback(data):
+            received.append(bytes(data))
+            if len(received) == 2:
+                done.set()
+
+        reader = UDPReaderThread('127.0.0.1', port, callback, timeout=0.05)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sender.sendto(b'first', ('127.0.0.1', port))
+            sender.sendto(b'second', ('127.0.0.1', port))
+            self.assertTrue(done.wait(2))
+        finally:
+            sender.close()
+            reader.stop()
+
+        self.assertEqual(received, [b'first', b'second'])
+
+    def test_callback_error_does_not_stop_reader(self):
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+        probe.close()
+
+        received = []
+        done = threading.Event()
+
+        def callback(data):
+            if bytes(data) == b'bad':
+                raise ValueError("paquet invalide")
+            received.append(bytes(data))
+            done.set()
+
+        reader = UDPReaderThread('127.0.0.1', port, callback, timeout=0.05)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sender.sendto(b'bad', ('127.0.0.1', port))
+            sender.sendto(b'good', ('127.0.0.1', port))
+            self.assertTrue(done.wait(2))
+        finally:
+            sender.close()
+            reader.stop()
+
+        self.assertEqual(received, [b'good'])
+        self.assertEqual(reader.errors, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# Under MIT License, see LICENSE.txt
+
+import os
+import tempfile
+import unittest
+
+from RULEngine.Communication.util.datagram_log import DatagramLogWriter, DatagramLogError, read_datagram_log, \
+    VISION, REFEREE
+
+__author__ = 'RoboCupULaval'
+
+
+class TestDatagramLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, "match.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        writer = DatagramLogWriter(self.log_file)
+        writer.write(VISION, 10.5, b"\x0a\x02\x08\x01")
+        writer.write(REFEREE, 10.75, memoryview(b"referee"))
+        writer.write(VISION, 11.0, b"")
+        writer.close()
+
+        records = read_datagram_log(self.log_file)
+
+        self.assertEqual(records, [(10.5, VISION, b"\x0a\x02\x08\x01"),
+                                   (10.75, REFEREE, b"referee"),
+                                   (11.0, VISION, b"")])
+        self.assertEqual(writer.count, 3)
+
+    def test_invalid_header(self):
+        with open(self.log_file, "wb") as log_file:
+            log_file.write(b"not a log")
+        with self.assertRaises(DatagramLogError):
+            read_datagram_log(self.log_file)
+
+    def test_truncated_record(self):
+        writer = DatagramLogWriter(self.log_file)
+        writer.write(VISION, 1.0, b"abc")
+        writer.close()
+        with open(self.log_file, "ab") as log_file:
+            log_file.write(b"\x00\x01")
+        with self.assertRaises(DatagramLogError):
+            read_datagram_log(self.log_file)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+# Under MIT License, see LICENSE.txt
+
+import pickle
+import unittest
+
+import numpy as np
+
+from RULEngine.Communication.sender.uidebug_command_sender import UIDebugCommandSender, BINARY_PROTOCOL, \
+    PICKLE_PROTOCOL
+from RULEngine.Communication.util.debug_protocol import DebugPacketDecoder, DebugPacketEncoder, DebugProtocolError, \
+    BOOKS_COMMAND_TYPE, HEADER, INFLUENCE_MAP_COMMAND_TYPE, pack_value, unpack_value
+from RULEngine.Debug.debug_command import DebugCommand
+from RULEngine.Util.Position import Position
+
+__author__ = 'RoboCupULaval'
+
+
+class FakeServer(object):
+    def __init__(self):
+        self.datagrams = []
+
+    def send(self, datagram):
+        self.datagrams.append(datagram)
+
+
+def influence_map_packet(board):
+    return DebugCommand(INFLUENCE_MAP_COMMAND_TYPE, {'field_data': board, 'timeout': 2}).get_packet_repr()
+
+
+class TestDebugProtocol(unittest.TestCase):
+
+    def test_value_round_trip(self):
+        value = {'point': (1, -2), 'text': "été", 'none': None, 'flags': [True, False], 'ratio': 0.25,
+                 3: b"raw", 'array': np.arange(6, dtype=np.int16).reshape(2, 3)}
+        out = bytearray()
+        pack_value(value, out)
+        decoded, offset = unpack_value(out)
+
+        self.assertEqual(offset, len(out))
+        array = decoded.pop('array')
+        np.testing.assert_array_equal(array, value.pop('array'))
+        self.assertEqual(array.dtype, np.int16)
+        self.assertEqual(decoded, value)
+
+    def test_special_values(self):
+        out = bytearray()
+        pack_value([Position(1, 2), np.int64(3), np.float32(0.5)], out)
+        self.assertEqual(unpack_value(out)[0], [(1.0, 2.0), 3, 0.5])
+        with self.assertRaises(DebugProtocolError):
+            pack_value(object(), bytearray())
+
+    def test_frame_is_split_in_whole_commands(self):
+        packets = [DebugCommand(2, {'level': 1, 'message': "x" * 100}).get_packet_repr() for _ in range(20)]
+        encoder = DebugPacketEncoder(max_datagram_size=600)
+        datagrams = encoder.encode(packets)
+
+        self.assertGreater(len(datagrams), 1)
+        self.assertTrue(all(len(datagram) <= 600 for datagram in datagrams))
+        headers = [HEADER.unpack_from(datagram) for datagram in datagrams]
+        self.assertEqual([header[3] for header in headers], list(range(len(datagrams))))
+        self.assertTrue(all(header[4] == len(datagrams) for header in headers))
+
+        decoder = DebugPacketDecoder()
+        decoded = [packet for datagram in datagrams for packet in decoder.decode(datagram)]
+        self.assertEqual(decoded, packets)
+        self.assertEqual(encoder.encode([]), [])
+
+    def test_influence_map_deltas(self):
+        encoder = DebugPacketEncoder(keyframe_period=2)
+        decoder = DebugPacketDecoder()
+        board = np.zeros((20, 30), dtype=np.int16)
+        sizes = []
+        for step in range(4):
+            board = board.copy()
+            board[step, step] = 50 + step
+            datagram = encoder.encode([influence_map_packet(board)])[0]
+            sizes.append(len(datagram))
+            packet, = decoder.decode(datagram)
+            np.testing.assert_array_equal(packet['data']['field_data'], board)
+            self.assertEqual(packet['data']['timeout'], 2)
+        # carte complète, deux deltas, puis une carte complète à la fin de la période
+        self.assertLess(sizes[1], sizes[0] / 5)
+        self.assertLess(sizes[2], sizes[0] / 5)
+        self.assertEqual(sizes[3], sizes[0])
+
+    def test_lost_influence_map_drops_deltas_until_keyframe(self):
+        encoder = DebugPacketEncoder()
+        decoder = DebugPacketDecoder()
+        board = np.zeros((10, 10), dtype=np.int16)
+        decoder.decode(encoder.encode([influence_map_packet(board)])[0])
+        board[0, 0] = 1
+        encoder.encode([influence_map_packet(board)])  # perdu
+        board[1, 1] = 1
+        self.assertEqual(decoder.decode(encoder.encode([influence_map_packet(board)])[0]), [])
+        self.assertEqual(decoder.dropped_maps, 1)
+
+        encoder.reset()
+        packet, = decoder.decode(encoder.encode([influence_map_packet(board)])[0])
+        np.testing.assert_array_equal(packet['data']['field_data'], board)
+
+
+class TestUIDebugCommandSender(unittest.TestCase):
+
+    def setUp(self):
+        self.books = DebugCommand(BOOKS_COMMAND_TYPE, {'strategy': ["A"], 'tactic': ["B"]}).get_packet_repr()
+        self.log = DebugCommand(2, {'level': 1, 'message': "log"}).get_packet_repr()
+
+    def test_binary_sends_books_once_then_after_handshake(self):
+        server = FakeServer()
+        sender = UIDebugCommandSender(server, BINARY_PROTOCOL)
+        decoder = DebugPacketDecoder()
+
+        sender.send_command([self.books, self.log])
+        sender.send_command([self.log])
+        sender.send_command([self.books, self.log])
+        self.assertEqual(len(server.datagrams), 3)
+        types = [[packet['type'] for packet in decoder.decode(datagram)] for datagram in server.datagrams]
+        self.assertEqual(types, [[BOOKS_COMMAND_TYPE, 2], [2], [2]])
+
+        sender.on_handshake()
+        sender.send_command([self.log])
+        self.assertEqual([packet['type'] for packet in decoder.decode(server.datagrams[-1])], [BOOKS_COMMAND_TYPE, 2])
+        self.assertEqual(sender.datagrams_sent, 4)
+        self.assertEqual(sender.bytes_sent, sum(len(datagram) for datagram in server.datagrams))
+
+    def test_pickle_keeps_legacy_datagrams(self):
+        server = FakeServer()
+        sender = UIDebugCommandSender(server, PICKLE_PROTOCOL)
+        board = np.ones((2, 2), dtype=np.int16)
+
+        sender.send_command([self.books])
+        sender.send_command([self.log, influence_map_packet(board)])
+        packets = [pickle.loads(datagram) for datagram in server.datagrams]
+        self.assertEqual([packet['type'] for packet in packets], [BOOKS_COMMAND_TYPE, BOOKS_COMMAND_TYPE, 2,
+                                                                 INFLUENCE_MAP_COMMAND_TYPE])
+        self.assertEqual(packets[-1]['data']['field_data'], [[1, 1], [1, 1]])
+
+    def test_unknown_protocol(self):
+        with self.assertRaises(ValueError):
+            UIDebugCommandSender(FakeServer(), "json")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# Under MIT License, see LICENSE.txt
+
+import unittest
+
+from RULEngine.Command.command import Kick, Move, Stop
+from RULEngine.Communication.protobuf import grSim_Packet_pb2 as grSim_Packet
+from RULEngine.Communication.sender.grsim_command_sender import GrSimCommandSender
+from RULEngine.Game.Team import Team
+from RULEngine.Util.Pose import Pose
+from RULEngine.Util.Position import Position
+from RULEngine.Util.team_color_service import TeamColor
+
+__author__ = 'RoboCupULaval'
+
+
+class FakeServer(object):
+    def __init__(self):
+        self.datagrams = []
+
+    def send(self, datagram):
+        self.datagrams.append(datagram)
+
+
+def parse(datagram):
+    packet = grSim_Packet.grSim_Packet()
+    packet.ParseFromString(datagram)
+    return packet
+
+
+class TestGrSimCommandSender(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeServer()
+        self.sender = GrSimCommandSender("127.0.0.1", 20011, server=self.server)
+        self.blue = Team(TeamColor.BLUE_TEAM)
+        self.yellow = Team(TeamColor.YELLOW_TEAM)
+
+    def test_one_packet_per_team(self):
+        commands = [Move(self.blue.players[player_id], Pose(Position(player_id, -player_id), 0.5))
+                    for player_id in range(6)]
+        commands.append(Kick(self.yellow.players[2], 4))
+        self.sender.send_commands(commands)
+
+        self.assertEqual(len(self.server.datagrams), 2)
+        blue, yellow = [parse(datagram) for datagram in self.server.datagrams]
+        self.assertFalse(blue.commands.isteamyellow)
+        self.assertEqual([command.id for command in blue.commands.robot_commands], list(range(6)))
+        self.assertEqual(blue.commands.robot_commands[3].veltangent, 3)
+        self.assertEqual(blue.commands.robot_commands[3].velnormal, -3)
+        self.assertAlmostEqual(blue.commands.robot_commands[3].velangular, 0.5)
+        self.assertTrue(blue.commands.robot_commands[3].spinner)
+        self.assertTrue(yellow.commands.isteamyellow)
+        self.assertEqual(yellow.commands.robot_commands[0].kickspeedx, 4)
+
+    def test_reused_packet_shrinks(self):
+        self.sender.send_commands([Stop(self.blue.players[player_id]) for player_id in range(6)])
+        self.sender.send_command(Move(self.blue.players[1], Pose(Position(10, 20), 0)))
+
+        packet = parse(self.server.datagrams[-1])
+        self.assertEqual(len(packet.commands.robot_commands), 1)
+        self.assertEqual(packet.commands.robot_commands[0].id, 1)
+        self.assertEqual(packet.commands.robot_commands[0].veltangent, 10)
+        self.sender.send_commands([])
+        self.assertEqual(len(self.server.datagrams), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
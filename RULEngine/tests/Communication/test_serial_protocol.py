@@ -0,0 +1,77 @@
+# Under MIT License, see LICENSE.txt
+
+import random
+import unittest
+
+from RULEngine.Command.command import Move, Stop
+from RULEngine.Communication.util import serial_protocol as protocol
+from RULEngine.Game.Player import Player
+from RULEngine.Util.Pose import Pose
+from RULEngine.Util.Position import Position
+from RULEngine.Util.cobs import cobs
+
+__author__ = 'RoboCupULaval'
+
+
+class TestCobs(unittest.TestCase):
+
+    def test_known_vectors(self):
+        vectors = [(b'', b'\x01'),
+                   (b'\x00', b'\x01\x01'),
+                   (b'\x00\x00', b'\x01\x01\x01'),
+                   (b'\x11\x22\x00\x33', b'\x03\x11\x22\x02\x33'),
+                   (b'\x11\x00', b'\x02\x11\x01'),
+                   (bytes(range(1, 255)), b'\xff' + bytes(range(1, 255))),
+                   (bytes(range(1, 255)) + b'\x00', b'\xff' + bytes(range(1, 255)) + b'\x01\x01'),
+                   (bytes(range(1, 256)), b'\xff' + bytes(range(1, 255)) + b'\x02\xff')]
+        for decoded, encoded in vectors:
+            self.assertEqual(cobs.encode(decoded), encoded)
+            self.assertEqual(cobs.decode(encoded), decoded)
+
+    def test_round_trip(self):
+        rand = random.Random(0)
+        for _ in range(500):
+            length = rand.randint(0, 700)
+            data = bytes(0 if rand.random() < 0.2 else rand.randint(1, 255) for _ in range(length))
+            encoded = cobs.encode(data)
+            self.assertNotIn(b'\x00', encoded)
+            self.assertEqual(cobs.decode(encoded), data)
+            self.assertEqual(cobs.encode(bytearray(data)), encoded)
+
+    def test_invalid_input(self):
+        self.assertRaises(cobs.DecodeError, cobs.decode, b'\x05\x11')
+        self.assertRaises(cobs.DecodeError, cobs.decode, b'\x02\x00')
+        self.assertRaises(TypeError, cobs.encode, 'abc')
+
+
+class TestSerialProtocol(unittest.TestCase):
+
+    def test_packets_match_protocol_layout(self):
+        self.assertEqual(protocol.create_speed_command(1.5, -2.0, 0.25, 3),
+                         b'\x06\x01\xfe\x03\x02\x81\x01\x03\xc0?\x01\x01\x02\xc0\x01\x03\x80>\x00')
+        self.assertEqual(protocol.create_kick_command(2, 4), b'\x08\x01\xfe\x02\x03\t\x01\x04\x00')
+        self.assertEqual(protocol._stm32_pack_ping(), b'\x04\x01\xfe\xff\x02\xfe\x00')
+
+    def test_checksum(self):
+        packet = cobs.decode(protocol.create_speed_command(120.5, 33.0, -1.0, 5)[:-1])
+        self.assertEqual(packet[4], (sum(packet) - packet[4]) & 0xff)
+        self.assertEqual(packet[:4], bytes([protocol.STM32_PROTOCOL_VERSION, protocol.STM32_ADDR_BASE_STATION, 5,
+                                            protocol.STM32_CMD_MOVEMENT_COMMAND]))
+
+    def test_speed_commands_in_one_buffer(self):
+        speeds = [(player_id * 0.1, -player_id, 0.5, player_id) for player_id in range(6)]
+        buffer = protocol.create_speed_commands(speeds)
+        self.assertEqual(buffer, b''.join(protocol.create_speed_command(*speed) for speed in speeds))
+        self.assertEqual(buffer.count(b'\x00'), 6)
+        self.assertEqual(protocol.create_speed_commands([]), b'')
+
+    def test_commands_share_speed_packing(self):
+        commands = [Move(Player(None, 1), Pose(Position(1.5, -2.0), 0.25)), Stop(Player(None, 2))]
+        self.assertEqual(commands[0].get_speed_command(), (1.5, -2.0, 0.25, 1))
+        self.assertEqual(protocol.create_speed_commands([command.get_speed_command() for command in commands]),
+                         b''.join(command.package_command() for command in commands))
+        self.assertEqual(commands[1].package_command(), protocol.create_speed_command(0, 0, 0, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# Under MIT License, see LICENSE.txt
+
+import unittest
+
+import numpy as np
+
+from RULEngine.Communication.protobuf import messages_robocup_ssl_wrapper_pb2 as ssl_wrapper
+from RULEngine.Communication.util.ssl_detection_decoder import DetectionFrame, DecodeError
+from RULEngine.Util.image_transformer.kalman_image_transformer import KalmanImageTransformer, BALL_TRACK
+from RULEngine.Util.image_transformer.singular_packet_image_transformer import SingularPacketImageTransformer
+
+__author__ = 'RoboCupULaval'
+
+
+def _create_packet(camera_id=1, frame_number=42):
+    packet = ssl_wrapper.SSL_WrapperPacket()
+    packet.detection.frame_number = frame_number
+    packet.detection.t_capture = 1234.5
+    packet.detection.t_sent = 1234.75
+    packet.detection.camera_id = camera_id
+    ball = packet.detection.balls.add()
+    ball.confidence = 0.9
+    ball.area = 300
+    ball.x, ball.y, ball.z = 100.5, -200.25, 0
+    ball.pixel_x, ball.pixel_y = 10, 20
+    for robot_id in range(3):
+        for robots in (packet.detection.robots_blue, packet.detection.robots_yellow):
+            robot = robots.add()
+            robot.confidence = 0.8
+            robot.robot_id = robot_id
+            robot.x, robot.y = 1000 * robot_id, -500 * robot_id
+            robot.orientation = 0.5 * robot_id
+            robot.pixel_x, robot.pixel_y = 1, 2
+            robot.height = 140
+    packet.geometry.field.line_width = 10
+    packet.geometry.field.field_length = 9000
+    packet.geometry.field.field_width = 6000
+    packet.geometry.field.boundary_width = 250
+    packet.geometry.field.referee_width = 425
+    packet.geometry.field.goal_width = 1000
+    packet.geometry.field.goal_depth = 180
+    packet.geometry.field.goal_wall_width = 20
+    packet.geometry.field.center_circle_radius = 500
+    packet.geometry.field.defense_radius = 1000
+    packet.geometry.field.defense_stretch = 500
+    packet.geometry.field.free_kick_from_defense_dist = 200
+    packet.geometry.field.penalty_spot_from_field_line_dist = 1000
+    packet.geometry.field.penalty_line_from_spot_dist = 400
+    return packet
+
+
+class TestDetectionFrame(unittest.TestCase):
+
+    def setUp(self):
+        self.packet = _create_packet()
+        self.data = self.packet.SerializeToString()
+
+    def test_decode_matches_protobuf(self):
+        frame = DetectionFrame()
+        frame.ParseFromString(self.data)
+        expected = ssl_wrapper.SSL_WrapperPacket()
+        expected.ParseFromString(self.data)
+
+        self.assertTrue(frame.HasField("detection"))
+        self.assertEqual(frame.detection.frame_number, expected.detection.frame_number)
+        self.assertEqual(frame.detection.camera_id, expected.detection.camera_id)
+        self.assertEqual(frame.detection.t_capture, expected.detection.t_capture)
+        self.assertEqual(frame.detection.t_sent, expected.detection.t_sent)
+
+        self.assertEqual(len(frame.detection.balls), 1)
+        ball, expected_ball = frame.detection.balls[0], expected.detection.balls[0]
+        for field in ('confidence', 'area', 'x', 'y', 'z', 'pixel_x', 'pixel_y'):
+            self.assertAlmostEqual(getattr(ball, field), getattr(expected_ball, field), places=5)
+
+        for robots, expected_robots in ((frame.detection.robots_blue, expected.detection.robots_blue),
+                                        (frame.detection.robots_yellow, expected.detection.robots_yellow)):
+            self.assertEqual(len(robots), len(expected_robots))
+            for robot, expected_robot in zip(robots, expected_robots):
+                for field in ('confidence', 'robot_id', 'x', 'y', 'orientation', 'pixel_x', 'pixel_y', 'height'):
+                    self.assertAlmostEqual(getattr(robot, field), getattr(expected_robot, field), places=5)
+
+    def test_decode_reuses_arrays(self):
+        frame = DetectionFrame()
+        frame.ParseFromString(self.data)
+        balls = frame.detection.balls
+        frame.ParseFromString(_create_packet(frame_number=43).SerializeToString())
+        self.assertTrue(np.shares_memory(balls, frame.detection.balls))
+        self.assertEqual(frame.detection.frame_number, 43)
+
+    def test_copy_is_independent(self):
+        frame = DetectionFrame()
+        frame.ParseFromString(self.data)
+        copied = frame.copy()
+        frame.ParseFromString(_create_packet(frame_number=43).SerializeToString())
+        self.assertEqual(copied.detection.frame_number, 42)
+        self.assertEqual(len(copied.detection.robots_blue), 3)
+
+    def test_packet_without_detection(self):
+        packet = ssl_wrapper.SSL_WrapperPacket()
+        packet.geometry.CopyFrom(self.packet.geometry)
+        frame = DetectionFrame()
+        frame.ParseFromString(packet.SerializeToString())
+        self.assertFalse(frame.HasField("detection"))
+
+    def test_truncated_packet_raises(self):
+        frame = DetectionFrame()
+        with self.assertRaises(DecodeError):
+            frame.ParseFromString(self.data[:len(self.data) // 3])
+
+    def test_kalman_image_transformer_observations(self):
+        frame = DetectionFrame()
+        frame.ParseFromString(self.data)
+        observations, mask = KalmanImageTransformer().update([frame])
+
+        self.assertEqual(mask[:, 1].sum(), 7)
+        self.assertFalse(mask[:, 0].any())
+        np.testing.assert_allclose(observations[2, 1], (2000, -1000, 1.0))
+        np.testing.assert_allclose(observations[BALL_TRACK, 1, :2], (100.5, -200.25))
+
+    def test_singular_packet_image_transformer(self):
+        frame = DetectionFrame()
+        frame.ParseFromString(self.data)
+        packet = SingularPacketImageTransformer().update([frame])
+
+        self.assertEqual([robot.robot_id for robot in packet.detection.robots_yellow], [0, 1, 2])
+        self.assertEqual(packet.detection.robots_blue[2].x, 2000)
+        self.assertEqual(packet.detection.balls[0].x, 100.5)
+        ssl_wrapper.SSL_WrapperPacket().ParseFromString(packet.SerializeToString())
+
+
+if __name__ == "__main__":
+    unittest.main()
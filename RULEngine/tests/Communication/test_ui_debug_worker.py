@@ -0,0 +1,150 @@
+# Under MIT License, see LICENSE.txt
+
+import threading
+import unittest
+
+import numpy as np
+
+from RULEngine.Communication.protobuf import messages_robocup_ssl_wrapper_pb2 as ssl_wrapper
+from RULEngine.Communication.util.ui_debug_worker import DropOldestQueue, UIDebugWorker, DEBUG_PACKETS, \
+    HANDSHAKE, TRACKER_STATES, VISION_PACKET
+from RULEngine.Util.constant import PLAYER_PER_TEAM
+
+__author__ = 'RoboCupULaval'
+
+
+class FakeDebugSender(object):
+    def __init__(self):
+        self.frames = []
+        self.handshakes = 0
+        self.sent_event = threading.Event()
+
+    def on_handshake(self):
+        self.handshakes += 1
+
+    def send_command(self, packets):
+        self.frames.append(packets)
+        self.sent_event.set()
+
+
+class FakeVisionSender(object):
+    def __init__(self, error=None):
+        self.packets = []
+        self.error = error
+
+    def send_packet(self, packet):
+        if self.error is not None:
+            raise self.error
+        self.packets.append(packet)
+
+
+class TestDropOldestQueue(unittest.TestCase):
+
+    def test_full_queue_drops_oldest(self):
+        queue = DropOldestQueue(maxlen=2)
+        for item in range(5):
+            queue.put(item)
+        self.assertEqual(queue.dropped, 3)
+        self.assertEqual([queue.get(0), queue.get(0), queue.get(0)], [3, 4, None])
+
+    def test_non_droppable_items_are_kept(self):
+        queue = DropOldestQueue(maxlen=2)
+        queue.put("books", droppable=False)
+        for item in range(3):
+            queue.put(item)
+        queue.put("handshake", droppable=False)
+        queue.put("status", droppable=False)
+        self.assertEqual(queue.dropped, 3)
+        self.assertEqual([queue.get(0) for _ in range(4)], ["books", "handshake", "status", None])
+
+
+class TestUIDebugWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.debug_sender = FakeDebugSender()
+        self.vision_sender = FakeVisionSender()
+        self.worker = UIDebugWorker(self.debug_sender, self.vision_sender, maxlen=3)
+
+    def process_all(self):
+        while len(self.worker.queue):
+            self.worker.process(*self.worker.queue.get(0))
+
+    def test_tracker_states_are_copied_and_serialized_by_worker(self):
+        states = np.arange((2 * PLAYER_PER_TEAM + 1) * 6, dtype=np.float64).reshape(-1, 6)
+        self.worker.send_tracker_states(states)
+        states[:] = 0
+        self.process_all()
+
+        packet = ssl_wrapper.SSL_WrapperPacket()
+        packet.ParseFromString(self.vision_sender.packets[0])
+        self.assertEqual(packet.detection.frame_number, 1)
+        self.assertEqual(packet.detection.balls[0].x, 2 * PLAYER_PER_TEAM * 6)
+        self.assertEqual(packet.detection.robots_yellow[1].x, (PLAYER_PER_TEAM + 1) * 6)
+        self.assertAlmostEqual(packet.detection.robots_blue[0].orientation, 4)
+
+    def test_vision_packet_and_counters(self):
+        packet = ssl_wrapper.SSL_WrapperPacket()
+        packet.detection.frame_number = 7
+        self.worker.send_vision_packet(packet)
+        for frame in range(4):
+            self.worker.send_debug_packets([{'type': frame}])
+        self.worker.send_debug_packets([])
+        self.process_all()
+
+        self.assertEqual(self.debug_sender.frames, [[{'type': 1}], [{'type': 2}], [{'type': 3}]])
+        self.assertEqual(self.worker.get_counters(), {"queued": 0, "dropped": 2, "errors": 0,
+                                                      "sent": {DEBUG_PACKETS: 3, TRACKER_STATES: 0,
+                                                               VISION_PACKET: 0, HANDSHAKE: 0}})
+
+    def test_books_status_and_handshake_are_never_dropped(self):
+        self.worker.send_handshake()
+        self.worker.send_debug_packets([{'type': 1001}, {'type': 3001}, {'type': 1002}])
+        for frame in range(5):
+            self.worker.send_debug_packets([{'type': 3007, 'frame': frame}])
+        self.process_all()
+
+        self.assertEqual(self.debug_sender.handshakes, 1)
+        # une seule frame, envoyée en un lot
+        self.assertEqual(self.debug_sender.frames[0], [{'type': 1001}, {'type': 3001}, {'type': 1002}])
+        # les éléments non abandonnables occupent deux des trois places, seule la dernière frame reste
+        self.assertEqual(self.debug_sender.frames[1:], [[{'type': 3007, 'frame': 4}]])
+        self.assertEqual(self.worker.queue.dropped, 4)
+        self.assertEqual(self.worker.sent[HANDSHAKE], 1)
+
+    def test_send_errors_are_counted(self):
+        worker = UIDebugWorker(None, FakeVisionSender(OSError()))
+        worker.send_debug_packets([{'type': 2}])
+        worker.send_vision_packet(ssl_wrapper.SSL_WrapperPacket())
+        self.assertEqual(len(worker.queue), 1)
+        worker.process(*worker.queue.get(0))
+        self.assertEqual(worker.errors, 1)
+
+    def test_serialization_errors_do_not_stop_the_thread(self):
+        debug_sender = FakeDebugSender()
+        send_command = debug_sender.send_command
+
+        def failing_send_command(packets):
+            if packets[0]['type'] == 0:
+                raise ValueError("type non supporté")
+            send_command(packets)
+
+        debug_sender.send_command = failing_send_command
+        worker = UIDebugWorker(debug_sender, None)
+        worker.start()
+        worker.send_debug_packets([{'type': 0}])
+        worker.send_debug_packets([{'type': 2}])
+        self.assertTrue(debug_sender.sent_event.wait(1))
+        worker.stop()
+        self.assertEqual(debug_sender.frames, [[{'type': 2}]])
+        self.assertEqual(worker.errors, 1)
+
+    def test_thread(self):
+        self.worker.start()
+        self.worker.send_debug_packets([{'type': 2}])
+        self.assertTrue(self.debug_sender.sent_event.wait(1))
+        self.worker.stop()
+        self.assertFalse(self.worker.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# Under MIT License, see LICENSE.txt
+
+import unittest
+
+import numpy as np
+
+from RULEngine.Debug.debug_interface import DebugInterface, DEFAULT_CATEGORY_PERIODS, DEFAULT_FRAME_BYTE_BUDGET, \
+    INFLUENCE_MAP, LOG, MAX_HISTORY_SIZE, PATH, STATUS
+
+__author__ = 'RoboCupULaval'
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDebugInterface(unittest.TestCase):
+
+    def setUp(self):
+        self.debug = DebugInterface()
+        self.debug.pop_commands()
+        self.debug.clear_history()
+        self.debug.disabled_categories.clear()
+        self.debug.category_periods = dict(DEFAULT_CATEGORY_PERIODS)
+        self.debug.frame_byte_budget = DEFAULT_FRAME_BYTE_BUDGET
+        self.debug.dropped.clear()
+        self.clock = FakeClock()
+        self.debug.clock = self.clock
+
+    def tearDown(self):
+        self.debug.pop_commands()
+        self.debug.clear_history()
+
+    def test_newer_command_replaces_older_with_same_link(self):
+        self.debug.add_multiple_points([(0, 0)], link="path - 1", category=PATH)
+        self.debug.add_multiple_points([(1, 1)], link="path - 2", category=PATH)
+        self.debug.add_multiple_points([(5, 5)], link="path - 1", category=PATH)
+        commands = self.debug.pop_commands()
+        self.assertEqual([command.data['points'] for command in commands], [[(5, 5)], [(1, 1)]])
+
+    def test_category_rate_limit(self):
+        self.debug.add_multiple_points([(0, 0)], link="path - 1", category=PATH)
+        self.debug.pop_commands()
+        self.clock.now = 0.05
+        self.debug.add_multiple_points([(1, 1)], link="path - 1", category=PATH)
+        self.assertEqual(self.debug.pop_commands(), [])
+        self.clock.now = 0.11
+        self.debug.add_multiple_points([(2, 2)], link="path - 1", category=PATH)
+        self.assertEqual(len(self.debug.pop_commands()), 1)
+
+    def test_status_sent_on_change_only(self):
+        self.debug.send_robot_status(1, "Stop", "halt", (0, 0))
+        self.debug.send_robot_status(2, "Stop", "halt", (0, 0))
+        self.assertEqual(len(self.debug.pop_commands()), 2)
+        self.debug.send_robot_status(1, "Stop", "halt", (0, 0))
+        self.debug.send_robot_status(2, "GoKick", "halt", (0, 0))
+        commands = self.debug.pop_commands()
+        self.assertEqual([list(command.data['blue']) for command in commands], [[2]])
+
+        self.debug.clear_history()
+        self.debug.send_robot_status(1, "Stop", "halt", (0, 0))
+        self.assertEqual(len(self.debug.pop_commands()), 1)
+
+    def test_repeated_logs_are_collapsed(self):
+        for _ in range(10):
+            self.debug.add_log(1, "retrait point")
+        self.debug.add_log(1, "autre")
+        self.assertEqual(len(self.debug.pop_commands()), 2)
+        self.debug.add_log(1, "retrait point")
+        self.assertEqual(self.debug.pop_commands(), [])
+
+    def test_history_is_pruned(self):
+        for target in range(50):
+            self.debug.add_log(1, "Target feed in CinePath: {}".format(target))
+        self.debug.add_line((0, 0), (1, 1), link="ligne")
+        self.debug.pop_commands()
+        self.assertEqual(len(self.debug._last_sent), 50)
+
+        self.clock.now = 1.5
+        self.debug.add_multiple_points([(0, 0)], link="path - 1", category=PATH)
+        self.debug.pop_commands()
+        self.assertEqual(list(self.debug._last_sent), [(PATH, 3005, "path - 1")])
+
+    def test_history_size_is_capped(self):
+        self.debug.frame_byte_budget = float('inf')
+        for player_id in range(MAX_HISTORY_SIZE + 10):
+            self.debug.send_robot_status(player_id, "Stop", "halt")
+        self.debug.pop_commands()
+        self.assertEqual(len(self.debug._last_sent), MAX_HISTORY_SIZE)
+        self.assertNotIn((STATUS, 1002, 0), self.debug._last_sent)
+
+    def test_disabled_category(self):
+        self.debug.set_category_enabled(STATUS, False)
+        self.assertFalse(self.debug.is_enabled(STATUS))
+        self.debug.send_robot_status(1, "Stop", "halt")
+        self.assertEqual(self.debug.pop_commands(), [])
+        self.debug.set_category_enabled(STATUS, True)
+        self.debug.send_robot_status(1, "Stop", "halt")
+        self.assertEqual(len(self.debug.pop_commands()), 1)
+
+    def test_frame_byte_budget(self):
+        self.debug.frame_byte_budget = 2000
+        self.debug.add_influence_map(np.zeros((20, 20), dtype=np.int16))
+        self.debug.add_line((0, 0), (1, 1))
+        self.debug.add_influence_map(np.zeros((40, 40), dtype=np.int16))
+        self.debug.send_books({'strategy': ["A"]})
+        commands = self.debug.pop_commands()
+        self.assertEqual([command.type_ for command in commands], [3007, 3001, 1001])
+        self.assertEqual(commands[0].data['field_data'].shape, (20, 20))
+        self.assertEqual(self.debug.dropped, {INFLUENCE_MAP: 1})
+
+        # le budget repart à zéro à chaque frame
+        self.debug.add_log(1, "log")
+        self.assertEqual(len(self.debug.pop_commands()), 1)
+        self.assertNotIn(LOG, self.debug.dropped)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# Under MIT License, see LICENSE.txt
+
+import csv
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from RULEngine.Debug.profiler import LatencyHistogram, Profiler
+
+__author__ = 'RoboCupULaval'
+
+
+class FakeDebugInterface(object):
+    def __init__(self):
+        self.logs = []
+
+    def add_log(self, level, message):
+        self.logs.append((level, message))
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentiles_in_ms(self):
+        histogram = LatencyHistogram(window_size=100)
+        for i in range(1, 101):
+            histogram.record(i * 1000000)
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["p50"], 50.5)
+        self.assertAlmostEqual(summary["p99"], 99.01)
+        self.assertAlmostEqual(summary["max"], 100)
+
+    def test_window_keeps_latest_samples(self):
+        histogram = LatencyHistogram(window_size=4)
+        for duration in [100, 100, 100, 100, 1, 1, 1, 1]:
+            histogram.record(duration * 1000000)
+        self.assertEqual(histogram.summary()["max"], 1)
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler()
+        self.profiler.reset()
+        self.profiler.configure(0)
+
+    def test_measure(self):
+        with self.profiler.measure("stage"):
+            time.sleep(0.002)
+        summary = self.profiler.get_report()["stage"]
+        self.assertEqual(summary["count"], 1)
+        self.assertGreaterEqual(summary["p50"], 2)
+
+    def test_vision_age(self):
+        self.profiler.record_vision_age(time.time() - 0.5)
+        self.profiler.record_vision_age(None)
+        summary = self.profiler.get_report()["vision_age"]
+        self.assertEqual(summary["count"], 1)
+        self.assertAlmostEqual(summary["p50"], 500, delta=50)
+
+    def test_periodic_report_and_dump(self):
+        self.profiler.record("stage", 3000000)
+        debug = FakeDebugInterface()
+        with tempfile.TemporaryDirectory() as directory:
+            json_file = os.path.join(directory, "timing.json")
+            self.profiler.configure(1e-9, json_file)
+            self.profiler.last_report = 0
+            self.assertTrue(self.profiler.report_if_due(debug))
+            with open(json_file) as dump:
+                self.assertEqual(json.load(dump)["stage"]["p50"], 3)
+
+            csv_file = os.path.join(directory, "timing.csv")
+            self.profiler.dump(csv_file)
+            with open(csv_file) as dump:
+                rows = list(csv.DictReader(dump))
+        self.assertEqual(rows[0]["name"], "stage")
+        self.assertEqual(len(debug.logs), 1)
+        self.assertIn("stage", debug.logs[0][1])
+
+    def test_no_report_when_disabled(self):
+        self.profiler.record("stage", 1)
+        self.assertFalse(self.profiler.report_if_due(FakeDebugInterface()))
+
+
+if __name__ == "__main__":
+    unittest.main()
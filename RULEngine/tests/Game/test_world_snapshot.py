@@ -0,0 +1,67 @@
+# Under MIT License, see LICENSE.txt
+
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from RULEngine.Game.Ball import Ball
+from RULEngine.Game.Team import Team
+from RULEngine.Game.WorldSnapshot import WorldSnapshot
+from RULEngine.Util.constant import PLAYER_PER_TEAM
+from RULEngine.Util.Position import Position
+from RULEngine.Util.Pose import Pose
+from RULEngine.Util.team_color_service import TeamColor
+
+__author__ = 'RoboCupULaval'
+
+
+class TestWorldSnapshot(unittest.TestCase):
+
+    def test_from_tracker_states(self):
+        states = np.arange((2 * PLAYER_PER_TEAM + 1) * 6, dtype=np.float64).reshape(-1, 6)
+        visible = np.zeros(2 * PLAYER_PER_TEAM + 1, dtype=bool)
+        visible[PLAYER_PER_TEAM + 1] = True
+
+        snapshot = WorldSnapshot.from_tracker_states(states, visible, friends_are_blue=False)
+
+        np.testing.assert_array_equal(snapshot.friends_position, states[PLAYER_PER_TEAM:2 * PLAYER_PER_TEAM, 0:2])
+        np.testing.assert_array_equal(snapshot.friends_orientation, states[PLAYER_PER_TEAM:2 * PLAYER_PER_TEAM, 4])
+        np.testing.assert_array_equal(snapshot.enemies_velocity, states[:PLAYER_PER_TEAM][:, [2, 3, 5]])
+        self.assertEqual(np.flatnonzero(snapshot.friends_visible).tolist(), [1])
+        self.assertFalse(snapshot.enemies_visible.any())
+        np.testing.assert_array_equal(snapshot.ball_position, states[-1, 0:2])
+        np.testing.assert_array_equal(snapshot.ball_velocity, states[-1, 2:4])
+        # la photo ne change pas si les états du tracker changent ensuite
+        states[:] = 0
+        self.assertNotEqual(snapshot.ball_position[0], 0)
+
+    def test_from_game_and_distances(self):
+        game = SimpleNamespace(friends=Team(TeamColor.BLUE_TEAM), enemies=Team(TeamColor.YELLOW_TEAM), ball=Ball())
+        game.friends.players[0].pose = Pose(Position(300, 400), 1)
+        game.friends.players[0].velocity = [1, 2, 3]
+        game.enemies.players[2].pose = Pose(Position(-300, -400), 0)
+        game.ball.set_kalman_state(Position(0, 400), Position(10, 0))
+
+        snapshot = WorldSnapshot.from_game(game)
+
+        np.testing.assert_array_equal(snapshot.friends_position[0], [300, 400])
+        self.assertEqual(snapshot.friends_orientation[0], 1)
+        np.testing.assert_array_equal(snapshot.friends_velocity[0], [1, 2, 3])
+        self.assertTrue(snapshot.friends_visible.all())
+        self.assertEqual(snapshot.get_friends_to_enemies_distances()[0, 2], 1000)
+        self.assertEqual(snapshot.get_friends_to_ball_distances()[0], 300)
+        self.assertEqual(snapshot.get_enemies_distances().shape, (PLAYER_PER_TEAM, PLAYER_PER_TEAM))
+        self.assertIs(snapshot.get_friends_distances(), snapshot.get_friends_distances())
+
+    def test_arrays_are_read_only(self):
+        game = SimpleNamespace(friends=Team(TeamColor.BLUE_TEAM), enemies=Team(TeamColor.YELLOW_TEAM), ball=Ball())
+        snapshot = WorldSnapshot.from_game(game)
+        with self.assertRaises(ValueError):
+            snapshot.friends_position[0, 0] = 1
+        with self.assertRaises(ValueError):
+            snapshot.get_friends_to_ball_distances()[0] = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Micro-benchmark de Position et Pose. Compare l'implémentation à __slots__ à l'ancienne implémentation à __dict__
+    (reproduite ici) et la variante modifiable sur place dans une boucle d'accumulation.
+
+    python -m RULEngine.tests.Util.bench_position
+"""
+import timeit
+
+from RULEngine.Util.Pose import Pose
+from RULEngine.Util.Position import Position, MutablePosition, POSITION_DELTA_TOLERANCE_MAGNITUDE
+
+__author__ = 'RoboCupULaval'
+
+NUMBER = 100000
+REPEAT = 5
+
+
+class DictPosition(object):
+    """ L'ancienne Position, avec ses attributs dans un __dict__ et un passage par __init__ pour chaque résultat. """
+    def __init__(self, x=0., y=0., z=0., abs_tol=POSITION_DELTA_TOLERANCE_MAGNITUDE, delta_t=0.03):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+        self.abs_tol = abs_tol
+        self.delta_t = delta_t
+
+    def __add__(self, other):
+        if not isinstance(other, (DictPosition, int, float)):
+            return NotImplemented
+        else:
+            new_x = self.x + (other.x if isinstance(other, DictPosition) else other)
+            new_y = self.y + (other.y if isinstance(other, DictPosition) else other)
+            return DictPosition(new_x, new_y)
+
+    def __sub__(self, other):
+        return DictPosition(self.x - other.x, self.y - other.y)
+
+
+class DictPose(object):
+    def __init__(self, position=DictPosition(), orientation=0.0):
+        assert(isinstance(position, DictPosition)), 'position should be Position object.'
+        assert(isinstance(orientation, (int, float))), 'orientation should be int or float value.'
+        self.position = position
+        self.orientation = orientation
+
+
+def measure(statement):
+    """ Retourne le meilleur temps par appel en nanosecondes. """
+    return min(timeit.repeat(statement, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e9
+
+
+def accumulate(position, step, count=100):
+    for _ in range(count):
+        position = position + step
+    return position
+
+
+def accumulate_in_place(position, step, count=100):
+    for _ in range(count):
+        position += step
+    return position
+
+
+def main():
+    old_a, old_b = DictPosition(1, 2), DictPosition(3, 4)
+    new_a, new_b = Position(1, 2), Position(3, 4)
+    cases = [("construction", lambda: DictPosition(1.0, 2.0), lambda: Position(1.0, 2.0)),
+             ("addition", lambda: old_a + old_b, lambda: new_a + new_b),
+             ("soustraction", lambda: old_a - old_b, lambda: new_a - new_b),
+             ("Pose", lambda: DictPose(old_a, 1.0), lambda: Pose(new_a, 1.0)),
+             ("accumulation x100", lambda: accumulate(old_a, old_b),
+              lambda: accumulate_in_place(MutablePosition(1, 2), new_b))]
+
+    print("{:<20}{:>12}{:>12}{:>10}".format("opération", "avant (ns)", "après (ns)", "gain"))
+    for name, before, after in cases:
+        time_before = measure(before)
+        time_after = measure(after)
+        print("{:<20}{:>12.0f}{:>12.0f}{:>9.2f}x".format(name, time_before, time_after, time_before / time_after))
+
+
+if __name__ == "__main__":
+    main()
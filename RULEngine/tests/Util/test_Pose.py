@@ -41,3 +41,9 @@ class TestPose(unittest.TestCase):
         uut = Pose(Position(557, -778.5), 0)
         self.assertEqual(uut.to_tuple(), tuple((557, -778.5)))
         self.assertNotEqual(uut.to_tuple(), tuple((-42, 3897)))
+
+    def test_default_positions_are_not_shared(self):
+        pose1 = Pose()
+        pose2 = Pose()
+        pose1.position.x = 100
+        self.assertEqual(pose2.position.x, 0)
@@ -1,6 +1,6 @@
 import unittest
 
-from RULEngine.Util.Position import Position
+from RULEngine.Util.Position import Position, MutablePosition
 
 class TestPosition(unittest.TestCase):
 
@@ -36,3 +36,36 @@ class TestPosition(unittest.TestCase):
         pos11.abs_tol = 1e-1
         self.assertFalse(pos11 == pos10)
         self.assertFalse(pos10 == pos11)
+
+    def test_operators(self):
+        pos = Position(3, 4) + Position(1, 1)
+        self.assertEqual(type(pos), Position)
+        self.assertEqual((pos.x, pos.y, pos.z), (4.0, 5.0, 0.0))
+        self.assertEqual(pos.abs_tol, Position().abs_tol)
+        self.assertEqual(pos.delta_t, Position().delta_t)
+        self.assertEqual(Position(3, 4) - Position(1, 1), Position(2, 3))
+        self.assertEqual(Position(3, 4) + 1, Position(4, 5))
+        self.assertEqual(Position(3, 4) * 2, Position(6, 8))
+        self.assertEqual(Position(3, 4) / 2, Position(1.5, 2))
+        with self.assertRaises(AttributeError):
+            Position().w = 0
+
+    def test_mutable_position_in_place(self):
+        pos = MutablePosition(1, 2)
+        alias = pos
+        pos += Position(1, 1)
+        pos -= Position(0, 2)
+        pos *= 3
+        pos /= 2
+        self.assertIs(pos, alias)
+        self.assertEqual((pos.x, pos.y), (3.0, 1.5))
+        self.assertIs(pos.set(7, 8), alias)
+        self.assertEqual(pos, Position(7, 8))
+
+        # les opérateurs binaires et freeze ne touchent pas à l'original
+        total = pos + Position(1, 1)
+        frozen = pos.freeze()
+        self.assertEqual(type(total), Position)
+        self.assertEqual(type(frozen), Position)
+        frozen += Position(1, 1)
+        self.assertEqual(pos, Position(7, 8))
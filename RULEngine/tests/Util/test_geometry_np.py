@@ -0,0 +1,84 @@
+# Under MIT License, see LICENSE.txt
+
+import math as m
+import unittest
+
+import numpy as np
+
+from RULEngine.Util import geometry_np
+from RULEngine.Util.geometry import get_closest_point_on_line, get_distance, get_nearest
+from RULEngine.Util.Position import Position
+
+__author__ = 'RoboCupULaval'
+
+
+class TestGeometryNp(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+
+    def test_distances(self):
+        points_a = self.rng.uniform(-1000, 1000, (20, 2))
+        points_b = self.rng.uniform(-1000, 1000, (20, 2))
+        distances = geometry_np.get_distances(points_a, points_b)
+        for point_a, point_b, distance in zip(points_a, points_b, distances):
+            self.assertAlmostEqual(distance, get_distance(Position(*point_a), Position(*point_b)))
+        matrix = geometry_np.get_distance_matrix(points_a, points_b[:5])
+        self.assertEqual(matrix.shape, (20, 5))
+        self.assertAlmostEqual(matrix[3, 4], np.linalg.norm(points_a[3] - points_b[4]))
+
+    def test_angles(self):
+        np.testing.assert_allclose(geometry_np.get_angles([0, 0], [[0, 1], [-1, -1]]), [m.pi / 2, -3 * m.pi / 4])
+        np.testing.assert_allclose(geometry_np.wrap_angles([3 * m.pi, -m.pi / 2, 2 * m.pi]), [-m.pi, -m.pi / 2, 0])
+
+    def test_projections(self):
+        starts = np.array([[0, 0], [0, 0], [5, 5]])
+        ends = np.array([[10, 0], [10, 0], [5, 5]])
+        points = np.array([[4, 3], [15, 2], [0, 0]])
+        np.testing.assert_allclose(geometry_np.project_on_lines(points, starts, ends), [[4, 0], [15, 0], [5, 5]])
+        np.testing.assert_allclose(geometry_np.project_on_segments(points, starts, ends), [[4, 0], [10, 0], [5, 5]])
+        np.testing.assert_allclose(geometry_np.get_distances_to_segments(points, starts, ends),
+                                   [3, np.hypot(5, 2), np.hypot(5, 5)])
+
+        for _ in range(10):
+            reference, position1, position2 = [Position(*point) for point in self.rng.uniform(-1000, 1000, (3, 2))]
+            closest = get_closest_point_on_line(reference, position1, position2)
+            # la droite de la référence au point trouvé est perpendiculaire à la droite
+            self.assertAlmostEqual((reference - closest).x * (position2 - position1).x +
+                                   (reference - closest).y * (position2 - position1).y, 0, delta=1e-6)
+
+    def test_segments_circles_intersection(self):
+        starts = np.array([[-10, 0], [-10, 5], [0, 0], [-10, 20], [20, 0]])
+        ends = np.array([[10, 0], [10, 5], [10, 0], [10, 20], [30, 0]])
+        ratios = geometry_np.get_segments_circles_intersection(starts, ends, [[0, 0]], 5)
+        self.assertEqual(ratios.shape, (5, 1))
+        np.testing.assert_allclose(ratios[:, 0], [0.25, 0.5, 0, np.inf, np.inf])
+
+        ratios = geometry_np.get_segments_circles_intersection(starts[:1], ends[:1], [[0, 0], [8, 0]], [5, 1])
+        np.testing.assert_allclose(ratios, [[0.25, 0.85]])
+
+    def test_lines_intersections(self):
+        intersections = geometry_np.get_lines_intersections([[0, -1], [0, -1]], [[0, 1], [0, 1]],
+                                                            [[-1, 3], [1, -1]], [[1, 3], [1, 1]])
+        np.testing.assert_allclose(intersections, [[0, 3], [np.inf, np.inf]])
+
+    def test_nearest_indices(self):
+        points = np.array([[10, 0], [1, 0], [5, 0], [1, 0], [7, 0]])
+        np.testing.assert_array_equal(geometry_np.get_nearest_indices([0, 0], points, 3), [1, 3, 2])
+        self.assertEqual(len(geometry_np.get_nearest_indices([0, 0], points, 10)), 5)
+
+        positions = [Position(*point) for point in points]
+        self.assertEqual(get_nearest(Position(), positions, 2), [positions[1], positions[3]])
+        self.assertEqual(len(get_nearest(Position(), positions, 10)), 5)
+
+    def test_rotate_points(self):
+        rotated = geometry_np.rotate_points([[2, 1], [1, 0]], [1, 1], m.pi / 2)
+        np.testing.assert_allclose(rotated, [[1, 2], [2, 1]], atol=1e-12)
+
+    def test_to_array(self):
+        np.testing.assert_array_equal(geometry_np.to_array([Position(1, 2), Position(3, 4)]), [[1, 2], [3, 4]])
+        self.assertEqual(geometry_np.to_array([]).shape, (0, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
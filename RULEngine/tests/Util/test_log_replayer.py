@@ -0,0 +1,54 @@
+# Under MIT License, see LICENSE.txt
+
+import unittest
+
+from RULEngine.Communication.util.datagram_log import VISION, REFEREE
+from RULEngine.Util.log_replayer import LogReplayer
+
+__author__ = 'RoboCupULaval'
+
+
+class FakeReceiver(object):
+    def __init__(self):
+        self.pushed = []
+
+    def push(self, data):
+        self.pushed.append(data)
+
+
+class FakeFramework(object):
+    def __init__(self):
+        self.vision = FakeReceiver()
+        self.referee_command_receiver = FakeReceiver()
+        self.clock = None
+        self.last_time = None
+        self.iteration_times = []
+
+    def vision_routine(self):
+        self.iteration_times.append(self.clock())
+
+
+class TestLogReplayer(unittest.TestCase):
+
+    def test_ai_runs_at_rate_in_log_time(self):
+        records = [(100 + i / 100, VISION, bytes([i])) for i in range(50)]
+        records.insert(10, (100.095, REFEREE, b"ref"))
+        framework = FakeFramework()
+
+        stats = LogReplayer(framework, records, ai_rate=20).run()
+
+        self.assertEqual(len(framework.vision.pushed), 50)
+        self.assertEqual(framework.referee_command_receiver.pushed, [b"ref"])
+        for expected, actual in zip([100.0, 100.05, 100.1, 100.15, 100.2], framework.iteration_times):
+            self.assertAlmostEqual(expected, actual)
+        self.assertEqual(stats["ai_iterations"], 10)
+        self.assertEqual(stats["vision_frames"], 50)
+        self.assertEqual(framework.last_time, 100.0)
+
+    def test_empty_log(self):
+        stats = LogReplayer(FakeFramework(), [], ai_rate=20).run()
+        self.assertEqual(stats["ai_iterations"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
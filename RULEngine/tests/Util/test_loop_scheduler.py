@@ -0,0 +1,75 @@
+# Under MIT License, see LICENSE.txt
+
+import threading
+import unittest
+
+from RULEngine.Util.loop_scheduler import LoopScheduler, BUSY, TICK, VISION
+
+__author__ = 'RoboCupULaval'
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, duration):
+        self.sleeps.append(duration)
+        self.now += duration
+
+
+class TestLoopScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def _scheduler(self, mode, vision_event=None):
+        return LoopScheduler(mode, 20, vision_event, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_tick_sleeps_until_next_deadline(self):
+        scheduler = self._scheduler(TICK)
+        self.assertTrue(scheduler.wait())
+        self.clock.now += 0.01
+        self.assertTrue(scheduler.wait())
+        self.assertAlmostEqual(self.clock.sleeps[-1], 0.04)
+        self.assertAlmostEqual(self.clock.now, 100.05)
+        self.assertEqual(scheduler.missed_deadlines, 0)
+
+    def test_overrun_is_reported(self):
+        scheduler = self._scheduler(TICK)
+        scheduler.wait()
+        self.clock.now += 0.08
+        scheduler.wait()
+        self.assertEqual(scheduler.missed_deadlines, 1)
+        self.assertAlmostEqual(scheduler.last_overrun, 0.03)
+        self.assertAlmostEqual(scheduler.next_deadline, 100.10)
+
+    def test_busy_does_not_block(self):
+        scheduler = self._scheduler(BUSY)
+        self.assertTrue(scheduler.wait())
+        self.assertFalse(scheduler.wait())
+        self.clock.now += 0.05
+        self.assertTrue(scheduler.wait())
+        self.assertEqual(scheduler.iterations, 2)
+
+    def test_vision_waits_for_new_frame(self):
+        event = threading.Event()
+        scheduler = self._scheduler(VISION, event)
+        event.set()
+        self.assertTrue(scheduler.wait())
+        self.assertFalse(event.is_set())
+        self.assertFalse(scheduler.wait())
+        event.set()
+        self.assertTrue(scheduler.wait())
+        self.assertAlmostEqual(self.clock.now, 100.05)
+
+    def test_vision_mode_requires_event(self):
+        with self.assertRaises(ValueError):
+            self._scheduler(VISION)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# Under MIT License, see LICENSE.txt
+
+import multiprocessing
+import threading
+import unittest
+
+import numpy as np
+
+from RULEngine.Util.image_transformer.kalman_image_transformer import KalmanImageTransformer
+from RULEngine.Util.pipeline import LatestValueSlot, SharedStateSlot, TrackerStage, SlotConsumerThread
+from RULEngine.Util.tracking import BatchKalmanTracker
+
+__author__ = 'RoboCupULaval'
+
+
+def _put_in_child(slot):
+    slot.put((np.full(slot.shape, 7.0), 12.5))
+
+
+class FakeVision(object):
+    def __init__(self, frames):
+        self.frames = frames
+        self.new_frame_event = threading.Event()
+        self.new_frame_event.set()
+
+    def pop_frames(self):
+        frames, self.frames = self.frames, []
+        return frames
+
+
+class FakeDetection(object):
+    def __init__(self):
+        self.camera_id = 0
+        self.frame_number = 1
+        self.t_capture = 42.0
+        self.balls = np.rec.fromrecords([(10.0, 20.0)], names='x,y')
+        self.robots_blue = np.rec.fromrecords([(0, 100.0, 200.0, 0.5)], names='robot_id,x,y,orientation')
+        self.robots_yellow = np.rec.fromrecords([(9, 0.0, 0.0, 0.0)], names='robot_id,x,y,orientation')
+
+    @property
+    def detection(self):
+        return self
+
+    @staticmethod
+    def HasField(field_name):
+        return field_name == "detection"
+
+
+class TestLatestValueSlot(unittest.TestCase):
+
+    def test_latest_value_wins(self):
+        slot = LatestValueSlot()
+        slot.put(1)
+        slot.put(2)
+        self.assertEqual(slot.poll(), 2)
+        self.assertIsNone(slot.poll())
+        self.assertEqual(slot.overwritten, 1)
+        self.assertTrue(slot.new_value_event.is_set())
+
+    def test_get_blocks_until_put(self):
+        slot = LatestValueSlot()
+        timer = threading.Timer(0.01, slot.put, args=("frame",))
+        timer.start()
+        self.assertEqual(slot.get(1), "frame")
+        timer.join()
+
+    def test_consumer_thread(self):
+        slot = LatestValueSlot()
+        stop_event = threading.Event()
+        received = threading.Event()
+        consumer = SlotConsumerThread(slot, lambda value: received.set(), stop_event)
+        consumer.start()
+        slot.put("command")
+        self.assertTrue(received.wait(1))
+        stop_event.set()
+        consumer.join()
+
+
+class TestSharedStateSlot(unittest.TestCase):
+
+    def test_put_and_poll(self):
+        slot = SharedStateSlot((13, 6))
+        self.assertIsNone(slot.poll())
+        slot.put((np.arange(78).reshape(13, 6), 3.0))
+        states, timestamp = slot.poll()
+        np.testing.assert_array_equal(states, np.arange(78).reshape(13, 6))
+        self.assertEqual(timestamp, 3.0)
+        self.assertIsNone(slot.poll())
+
+    def test_put_from_other_process(self):
+        context = multiprocessing.get_context("spawn")
+        slot = SharedStateSlot((13, 6), context)
+        process = context.Process(target=_put_in_child, args=(slot,))
+        process.start()
+        process.join(10)
+        self.assertTrue(slot.new_value_event.is_set())
+        states, timestamp = slot.poll()
+        np.testing.assert_array_equal(states, np.full((13, 6), 7.0))
+        self.assertEqual(timestamp, 12.5)
+
+
+class TestTrackerStage(unittest.TestCase):
+
+    def test_publishes_filtered_states(self):
+        vision = FakeVision([FakeDetection()])
+        tracker = BatchKalmanTracker(['friend'] * 6 + ['enemy'] * 6 + ['ball'])
+        slot = LatestValueSlot()
+        stop_event = threading.Event()
+        slot.new_value_event = stop_event  # une seule frame à traiter
+        stage = TrackerStage(vision, KalmanImageTransformer(), tracker, slot, stop_event)
+
+        stage.run()
+
+        states, t_capture = slot.poll()
+        self.assertEqual(states.shape, (13, 6))
+        self.assertEqual(t_capture, 42.0)
+        np.testing.assert_allclose(states[0, :2], (100, 200), atol=20)
+        np.testing.assert_allclose(states[-1, :2], (10, 20), atol=20)
+        self.assertIsNot(states, tracker.x)
+
+
+if __name__ == "__main__":
+    unittest.main()
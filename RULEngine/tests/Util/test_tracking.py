@@ -0,0 +1,68 @@
+# Under MIT License, see LICENSE.txt
+
+import unittest
+
+import numpy as np
+
+from RULEngine.Util.Pose import Pose
+from RULEngine.Util.Position import Position
+from RULEngine.Util.tracking import Kalman, BatchKalmanTracker
+
+__author__ = 'RoboCupULaval'
+
+NCAMERAS = 4
+
+
+class TestBatchKalmanTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.types = ['friend', 'enemy', 'ball']
+        self.tracker = BatchKalmanTracker(self.types, NCAMERAS)
+        self.kalmans = [Kalman(t, ncameras=NCAMERAS) for t in self.types]
+        self.rng = np.random.RandomState(42)
+
+    def _random_frame(self):
+        observations = self.rng.uniform(-3000, 3000, (len(self.types), NCAMERAS, 3))
+        observations[:, :, 2] = self.rng.uniform(-np.pi, np.pi, (len(self.types), NCAMERAS))
+        mask = self.rng.rand(len(self.types), NCAMERAS) > 0.4
+        return observations, mask
+
+    @staticmethod
+    def _to_kalman_observation(kalman_type, observations, mask):
+        kalman_obs = []
+        for c in range(NCAMERAS):
+            if not mask[c]:
+                kalman_obs.append(None)
+            elif kalman_type == 'ball':
+                kalman_obs.append(Position(observations[c, 0], observations[c, 1]))
+            else:
+                kalman_obs.append(Pose(Position(observations[c, 0], observations[c, 1]), float(observations[c, 2])))
+        return kalman_obs
+
+    def test_filter_matches_single_track_kalman(self):
+        for _ in range(20):
+            dt = self.rng.uniform(0.01, 0.05)
+            observations, mask = self._random_frame()
+            states = self.tracker.filter(observations, mask, dt)
+            for i, (kalman_type, kalman) in enumerate(zip(self.types, self.kalmans)):
+                kalman_obs = self._to_kalman_observation(kalman_type, observations[i], mask[i])
+                expected = np.array(kalman.filter(kalman_obs, None, dt), dtype=np.float64)
+                if kalman_type == 'ball':
+                    np.testing.assert_allclose(states[i, :4], expected, rtol=1e-4, atol=1e-4)
+                else:
+                    np.testing.assert_allclose(states[i], expected, rtol=1e-4, atol=1e-4)
+
+    def test_unseen_track_is_only_predicted(self):
+        mask = np.zeros((len(self.types), NCAMERAS), dtype=bool)
+        observations = np.full((len(self.types), NCAMERAS, 3), np.nan)
+        self.tracker.x[:, 2] = 100
+        before = self.tracker.x.copy()
+
+        states = self.tracker.filter(observations, mask, 0.1)
+
+        self.assertFalse(np.isnan(states).any())
+        np.testing.assert_allclose(states[:, 0], before[:, 0] + 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
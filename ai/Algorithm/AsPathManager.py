@@ -36,6 +36,8 @@ class AsPathManager(Pathfinder):
 
         allAsPathList = []
         nbPath = len(startPosList)
+        # les obstacles communs sont estampillés une seule fois par grille
+        occupancies = {}
 
         for i in range(0, nbPath, 1):
 
@@ -53,12 +55,12 @@ class AsPathManager(Pathfinder):
                 yPos = startPos.y + ((endPos.y - startPos.y) * ratio)
                 endPos = AsPosition(xPos, yPos)
 
-            updatedObstacleList = list(obstacleList)
-            for j in range(0, nbPath, 1):
-                if (j != i):
-                    updatedObstacleList.append(AsObstacle(startPosList[j]))
+            if graph not in occupancies:
+                occupancies[graph] = graph.getOccupancy(obstacleList)
+            otherRobots = [AsObstacle(startPosList[j]) for j in range(0, nbPath, 1) if j != i]
+            occupancy = occupancies[graph] | graph.getOccupancy(otherRobots)
 
-            allAsPathList += [graph.aStarPath(startPos, endPos, updatedObstacleList)]
+            allAsPathList += [graph.aStarPath(startPos, endPos, None, occupancy)]
 
 
         return allAsPathList
@@ -1,11 +1,22 @@
 #pylint: skip-file
 
-from ai.Algorithm.Astar.AsPosition import AsPosition
-from ai.Algorithm.Astar.AsObstacle import AsObstacle
-from ai.Algorithm.Astar.AsNode import AsNode
+import heapq
 from math import sqrt, acos
 
+import numpy as np
+
+from ai.Algorithm.Astar.AsPosition import AsPosition
+
+SQRT_2 = sqrt(2)
+
+
 class AsGraph():
+    """
+        Grille de A* sur le terrain. Les cases sont des entiers qui indexent un
+        tableau numpy d'occupation, bordé d'une rangée de cases occupées pour
+        éviter de vérifier les limites. Les obstacles sont estampillés à chaque
+        requête, il n'y a donc rien à défaire après une recherche.
+    """
 
     def __init__(self, topLeftCorner, downRigthCorner, robotRadius, interval):
 
@@ -15,11 +26,6 @@ class AsGraph():
         self.topLeftLimit = AsPosition(topLeftCorner.x, topLeftCorner.y)
         # downRigthCorner should be like (100, -100)
         self.downRigthLimit = AsPosition(downRigthCorner.x, downRigthCorner.y)
-        self.graphList = []
-        self.graphHash = {}
-
-        self.buildGraph()
-        self.addneighbors()
 
         if (not ((self.downRigthLimit.x - self.topLeftLimit.x) % self.interval == 0) or not ((self.topLeftLimit.y - self.downRigthLimit.y) % self.interval == 0)):
             raise NameError("width or height doesnt fit with the interval")
@@ -27,283 +33,178 @@ class AsGraph():
         if ((self.interval**2)*2 < 4 * self.robotRadius):
             raise NameError("Interval too big for robot radius (collision may not be avoid)")
 
+        self.buildGraph()
 
     def buildGraph(self):
 
-        width = self.downRigthLimit.x - self.topLeftLimit.x + self.interval
-        height = self.topLeftLimit.y - self.downRigthLimit.y + self.interval
-
-        startPoint = AsPosition(self.topLeftLimit.x, self.downRigthLimit.y)
-
-        for x in range(0, width, self.interval):
-            for y in range(0, height, self.interval):
-                currentPos = AsPosition(startPoint.x + x, startPoint.y + y)
-                strPos = self.buildKey(currentPos)
-                currentNode = AsNode(currentPos)
-                self.graphList.append(currentNode)
-                self.graphHash[strPos] = currentNode
-
-    def buildKey(self, position):
-        return str(position.x) + str(position.y)
-
-    def addneighbors(self):
-
-        posList = [AsPosition(self.interval, 0),AsPosition(-self.interval, 0),AsPosition(0, self.interval),AsPosition(0, -self.interval),AsPosition(self.interval, self.interval),AsPosition(-self.interval, -self.interval),AsPosition(self.interval, -self.interval),AsPosition(-self.interval, self.interval)]
-        for node in self.graphList :
-            for pos in posList:
-                neighborPos = node.pos.getAddPos(pos)
-                key = self.buildKey(neighborPos)
-                if (key in self.graphHash):
-                    node.addneighbor(self.graphHash[key])
-
-    def findNearNodeKey(self, position):
-
-        pos = AsPosition(position.x, position.y)
-        if (pos.x < self.topLeftLimit.x) :
-            pos.x = self.topLeftLimit.x
-
-        if (pos.x > self.downRigthLimit.x) :
-            pos.x = self.downRigthLimit.x
-
-        if (pos.y < self.downRigthLimit.y) :
-            pos.y = self.downRigthLimit.y
-
-        if (pos.y > self.topLeftLimit.y) :
-            pos.y = self.topLeftLimit.y
-
-        x = ((self.downRigthLimit.x + pos.x) % self.interval)
-        difX = x * -1
-        y = ((self.topLeftLimit.y + pos.y) % self.interval)
-        difY = y * -1
-
-        if (x > self.interval - x):
-            difX = self.interval - x
-
-        if (y > self.interval - y):
-            difY = self.interval - y
-    
-        nearPosition = AsPosition(round(pos.x + difX), round(pos.y + difY))
-        key = self.buildKey(nearPosition)
-
-        if (not (key in self.graphHash)):
-            raise NameError('Near point outside graph')
-
-        return key
-
-    def toggleObstacle(self, obstacle, free):
-
-        topLeftKey = self.findNearNodeKey(AsPosition(obstacle.position.x - (self.robotRadius * 2), obstacle.position.y + (self.robotRadius * 2)))
-        topLeftNode = self.graphHash[topLeftKey]
-
-        for x in range(0, (self.robotRadius * 4), self.interval):
-            for y in range(0, (self.robotRadius * 4), self.interval):
-                currentKey = self.buildKey(AsPosition(topLeftNode.pos.x + x, topLeftNode.pos.y - y))
-                if (currentKey in self.graphHash):
-                    currentNode = self.graphHash[currentKey]
-                    if (self.inShape(obstacle.position, currentNode.pos)):
-                        currentNode.free = free
-
-    def inShape(self, center, position):
-
+        self.nbColumns = (self.downRigthLimit.x - self.topLeftLimit.x) // self.interval + 1
+        self.nbRows = (self.topLeftLimit.y - self.downRigthLimit.y) // self.interval + 1
+        self.xs = self.topLeftLimit.x + np.arange(self.nbColumns, dtype=np.float64) * self.interval
+        self.ys = self.downRigthLimit.y + np.arange(self.nbRows, dtype=np.float64) * self.interval
+
+        # la case (i, j) du terrain est la case (i + 1, j + 1) du tableau bordé, aplati en [i * stride + j]
+        self.stride = self.nbRows + 2
+        self.size = (self.nbColumns + 2) * self.stride
+        border = np.ones((self.nbColumns + 2, self.stride), dtype=bool)
+        border[1:-1, 1:-1] = False
+        self.border = border.ravel()
+
+        self.neighbors = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if dx or dy:
+                    self.neighbors.append((dx * self.stride + dy, self.interval * (SQRT_2 if dx and dy else 1)))
+
+    def getIndex(self, position):
+        """ Retourne l'index de la case la plus proche de la position, bornée au terrain. """
+        i = int(round((position.x - self.topLeftLimit.x) / self.interval))
+        j = int(round((position.y - self.downRigthLimit.y) / self.interval))
+        i = min(max(i, 0), self.nbColumns - 1)
+        j = min(max(j, 0), self.nbRows - 1)
+        return (i + 1) * self.stride + j + 1
+
+    def getPosition(self, index):
+        i, j = divmod(index, self.stride)
+        return AsPosition(int(self.xs[i - 1]), int(self.ys[j - 1]))
+
+    def getOccupancy(self, obstacleList):
+        """
+            Retourne le tableau aplati des cases occupées: le bord et toutes les
+            cases à moins de deux rayons de robot d'un obstacle.
+        """
+        occupancy = self.border.copy()
+        if not obstacleList:
+            return occupancy
+        positions = [getattr(obstacle, "position", obstacle) for obstacle in obstacleList]
+        centers = np.array([[position.x, position.y] for position in positions], dtype=np.float64)
         # radius * 2 to compensate for the radius of the moving robot
-        return (((position.x - center.x)**2) + ((position.y - center.y)**2)) <= ((self.robotRadius*2)**2)
-
-
-    def setAllObstacle(self, obstacleList, free):
-
-        for obstacle in obstacleList:
-            self.toggleObstacle(obstacle, free)
-
-    def aStarPath(self, startPos, endPos, obstacleList):
-
-        self.setAllObstacle(obstacleList, False)
+        dist_x = (self.xs[np.newaxis, :] - centers[:, 0, np.newaxis]) ** 2
+        dist_y = (self.ys[np.newaxis, :] - centers[:, 1, np.newaxis]) ** 2
+        disks = (dist_x[:, :, np.newaxis] + dist_y[:, np.newaxis, :] <= (self.robotRadius * 2) ** 2).any(axis=0)
+        occupancy.reshape(self.nbColumns + 2, self.stride)[1:-1, 1:-1] |= disks
+        return occupancy
 
-        startNode = self.findNearNodeTowardGoalForStart(startPos, endPos)
-        goalNode = self.findNearNodeTowardGoalForEnd(endPos, startPos)
-        goalKey = goalNode.key
-        startNode.setCost(startNode, goalNode.pos)
+    def aStarPath(self, startPos, endPos, obstacleList, occupancy=None):
 
-        startFree = self.startPosIsFree(startPos)
-        goalFree = self.endPosIsFree(endPos)
+        if occupancy is None:
+            occupancy = self.getOccupancy(obstacleList)
 
+        goalFree = self.endPosIsFree(endPos, occupancy)
         if (startPos.getDist(endPos) < self.interval):
-            self.setAllObstacle(obstacleList, True)
             if (goalFree):
                 return [endPos]
-            else:
-                return [goalNode.pos]
+            return [self.getPosition(self.findNearFreeIndex(endPos, occupancy))]
 
-        if (not startFree):
-            self.setAllObstacle(obstacleList, True)
+        if (not self.startPosIsFree(startPos, occupancy)):
             return [startPos]
 
-        openNode = [startNode]
-        openSet = set()
-        openSet.add(startNode.key)
-        closeNode = set()
-        found = False
-
-        while (not found):
-            currentNode = self.findNodeWithLowestFCost(openNode)
-            openNode.remove(currentNode)
-            openSet.remove(currentNode.key)
-            closeNode.add(currentNode.key)
-
-            if (currentNode.key == goalKey):
-                found = True
-
-            for node in currentNode.neighbors:
-                if (node.free and not (node.key in closeNode)):
-                    newFCost = node.getNewfCost(currentNode, goalNode.pos)
-                    if (not (node.key in openSet) or (newFCost < node.fCost)):
-                        node.setCost(currentNode, goalNode.pos)
-                        node.parent = currentNode
-                        if (not (node.key in openSet)):
-                            openNode.append(node)
-                            openSet.add(node.key)
-
-        self.setAllObstacle(obstacleList, True)
-        tempPath = self.getPath(goalNode, startNode, endPos, goalFree)
-        finalPath = self.mergePointToLine(tempPath)
-
-        return finalPath
-
-
-
-    def findNodeWithLowestFCost(self, nodeList):
-        
-        if (len(nodeList) <= 0):
-            raise NameError("No more node in openList")
-
-        currentNode = nodeList[0]
-        for node in nodeList:
-            if (node.fCost < currentNode.fCost):
-                currentNode = node
-
-        return currentNode
-
-    def getPath(self, goalNode, startNode, endPos, goalFree):
+        startIndex = self.findNearFreeIndex(startPos, occupancy, self.findFourNearIndex(startPos), endPos)
+        goalIndex = self.findNearFreeIndex(endPos, occupancy)
+        indexPath = self.search(startIndex, goalIndex, occupancy)
+        if indexPath is None:
+            # aucun chemin, on attend que les joueurs bougent
+            return [startPos]
 
-        path = []
+        path = [startPos] + [self.getPosition(index) for index in indexPath[1:]]
         if (goalFree):
-            path.append(endPos)
-
-        startKey = startNode.key
-        found = False
-        currentNode = goalNode
-
-        while (not found):
-            path.append(currentNode.pos)
-
-            if (currentNode.key == startKey):
-                found = True
-
-            currentNode = currentNode.parent
-
-        path.reverse()
-        return path
-
-
-    def findNearNodeTowardGoalForEnd(self, startPos, endPos):
-
-        nodeList = self.findFourNearNode(startPos)
-
-        nearNode = nodeList[0]
-        found = False
-
-        while (not found):
-
-            for node in nodeList:
-                if (node.pos.getDist(endPos) < nearNode.pos.getDist(endPos)):
-                    nearNode = node
-
-            if (nearNode.free):
-                found = True
-            
-            nodeList = nearNode.neighbors
-            
-
-        return nearNode
-
-    def findNearNodeTowardGoalForStart(self, startPos, endPos):
-
-        nodeList = self.findFourNearNode(startPos)
-
-        nearNode = nodeList[0]
-        for node in nodeList:
-            if (node.pos.getDist(endPos) > nearNode.pos.getDist(endPos)):
-                    nearNode = node
-
-        found = False
-
-        while (not found):
-
-            oldNode = nearNode
-
-            for node in nodeList:
-                if (node.pos.getDist(endPos) < nearNode.pos.getDist(endPos) and node.free):
-                    nearNode = node
-
-            # not nearNode.pos.getDist(startPos) < (self.interval / 2) -> eviter de rester sur place,
-            # oldNode == nearNode -> eviter de tourner en rond (ca marchera pas, on retourne le dernier noeud libre et on attend que les joueurs bougent)
-            if (not nearNode.pos.getDist(startPos) < (self.interval * 0.75) or oldNode == nearNode):
-                found = True
-            
-            nodeList = nearNode.neighbors
-            
-
-        return nearNode
-
-    def findFourNearNode(self, startPos):
-
-        pos = AsPosition(startPos.x, startPos.y)
-        if (pos.x < (self.topLeftLimit.x + self.interval)) :
-            pos.x = (self.topLeftLimit.x + self.interval)
-
-        if (pos.x > (self.downRigthLimit.x - self.interval)) :
-            pos.x = (self.downRigthLimit.x - self.interval)
-
-        if (pos.y < (self.downRigthLimit.y + self.interval)) :
-            pos.y = (self.downRigthLimit.y + self.interval)
-
-        if (pos.y > (self.topLeftLimit.y - self.interval)) :
-            pos.y = (self.topLeftLimit.y - self.interval)
-
-        diffX1 = ((self.downRigthLimit.x + pos.x) % self.interval)
-        diffX2 = self.interval - diffX1
-        diffY1 = ((self.topLeftLimit.y + pos.y) % self.interval)
-        diffY2 = self.interval - diffY1
-
-        nearPosList = [AsPosition(round(pos.x - diffX1), round(pos.y - diffY1))]
-        nearPosList.append(AsPosition(round(pos.x - diffX1), round(pos.y + diffY2)))
-        nearPosList.append(AsPosition(round(pos.x + diffX2), round(pos.y - diffY1)))
-        nearPosList.append(AsPosition(round(pos.x + diffX2), round(pos.y + diffY2)))
-
-        nodeList = []
-        for position in nearPosList:
-            nodeList.append(self.graphHash[self.buildKey(position)])
-
-        return nodeList
-
-    def endPosIsFree(self, pos):
-
-        nearList = self.findFourNearNode(pos)
+            path[-1] = endPos
+        return self.smoothPath(path, occupancy)[1:]
+
+    def search(self, startIndex, goalIndex, occupancy):
+        """ A* sur les index des cases, la liste ouverte est un tas binaire. Retourne les index du chemin ou None. """
+        gCost = np.full(self.size, np.inf)
+        parent = np.full(self.size, -1, dtype=np.int64)
+        closed = occupancy.copy()
+        goalI, goalJ = divmod(goalIndex, self.stride)
+        heuristic = self.heuristic
+
+        gCost[startIndex] = 0
+        openHeap = [(heuristic(startIndex, goalI, goalJ), 0, startIndex)]
+        while openHeap:
+            _, currentG, current = heapq.heappop(openHeap)
+            if closed[current]:
+                continue
+            if current == goalIndex:
+                path = [current]
+                while current != startIndex:
+                    current = int(parent[current])
+                    path.append(current)
+                path.reverse()
+                return path
+            closed[current] = True
+            for offset, cost in self.neighbors:
+                neighbor = current + offset
+                if closed[neighbor]:
+                    continue
+                newG = currentG + cost
+                if newG < gCost[neighbor]:
+                    gCost[neighbor] = newG
+                    parent[neighbor] = current
+                    heapq.heappush(openHeap, (newG + heuristic(neighbor, goalI, goalJ), newG, neighbor))
+        return None
+
+    def heuristic(self, index, goalI, goalJ):
+        """ Distance octile entre une case et la cible. """
+        i, j = divmod(index, self.stride)
+        dx = abs(i - goalI)
+        dy = abs(j - goalJ)
+        return self.interval * (dx + dy + (SQRT_2 - 2) * min(dx, dy))
+
+    def isSegmentFree(self, startPos, endPos, occupancy):
+        """ Vérifie que les cases traversées par le segment, échantillonné au demi-intervalle, sont libres. """
+        nbSamples = int(startPos.getDist(endPos) / (self.interval / 2)) + 2
+        ratios = np.linspace(0, 1, nbSamples)
+        i = np.rint((startPos.x + (endPos.x - startPos.x) * ratios - self.topLeftLimit.x) / self.interval)
+        j = np.rint((startPos.y + (endPos.y - startPos.y) * ratios - self.downRigthLimit.y) / self.interval)
+        i = np.clip(i, 0, self.nbColumns - 1).astype(np.int64)
+        j = np.clip(j, 0, self.nbRows - 1).astype(np.int64)
+        # le départ et l'arrivée peuvent être dans une case voisine d'un obstacle
+        return not occupancy[(i[1:-1] + 1) * self.stride + j[1:-1] + 1].any()
+
+    def smoothPath(self, path, occupancy):
+        """ Ne garde que les points nécessaires: chaque point rejoint le plus loin qu'il voit en ligne droite. """
+        smoothed = [path[0]]
+        current = 0
+        while current < len(path) - 1:
+            following = len(path) - 1
+            while following > current + 1 and not self.isSegmentFree(path[current], path[following], occupancy):
+                following -= 1
+            smoothed.append(path[following])
+            current = following
+        return smoothed
+
+    def findNearFreeIndex(self, position, occupancy, candidates=None, towardPos=None):
+        """
+            Retourne la case libre la plus proche de la position parmi les
+            candidates (toutes les cases par défaut). Si towardPos est donné,
+            départage par la distance à cette position.
+        """
+        if candidates is None:
+            free = np.flatnonzero(~occupancy)
+        else:
+            free = np.array([index for index in candidates if not occupancy[index]], dtype=np.int64)
+        i, j = np.divmod(free, self.stride)
+        xs = self.xs[i - 1]
+        ys = self.ys[j - 1]
+        reference = towardPos if towardPos is not None else position
+        return int(free[np.argmin((xs - reference.x) ** 2 + (ys - reference.y) ** 2)])
 
-        free = True
-        for node in nearList:
-            free = free and node.free
+    def findFourNearIndex(self, position):
 
-        return free
+        i = int((position.x - self.topLeftLimit.x) // self.interval)
+        j = int((position.y - self.downRigthLimit.y) // self.interval)
+        i = min(max(i, 0), self.nbColumns - 2)
+        j = min(max(j, 0), self.nbRows - 2)
+        index = (i + 1) * self.stride + j + 1
+        return [index, index + 1, index + self.stride, index + self.stride + 1]
 
-    def startPosIsFree(self, pos):
+    def endPosIsFree(self, pos, occupancy):
 
-        nearList = self.findFourNearNode(pos)
+        return not any(occupancy[index] for index in self.findFourNearIndex(pos))
 
-        free = False
-        for node in nearList:
-            free = free or node.free
+    def startPosIsFree(self, pos, occupancy):
 
-        return free
+        return not all(occupancy[index] for index in self.findFourNearIndex(pos))
 
     def mergePointToLine(self, path):
 
@@ -364,11 +265,3 @@ class AsGraph():
         angle = acos(result)
 
         return (angle < 0.01 and angle > -0.01)
-
-
-
-
-
-
-
-
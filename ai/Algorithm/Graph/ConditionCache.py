@@ -0,0 +1,118 @@
+# Under MIT license, see LICENSE.txt
+
+import time
+from functools import partial
+
+__author__ = 'RoboCupULaval'
+
+
+class ConditionStats:
+    """
+    ConditionStats: Statistiques de temps d'une condition.
+    Attributs:
+        calls: Le nombre de fois où la condition a été demandée.
+        evaluations: Le nombre de fois où la condition a réellement été évaluée, soit les appels sans résultat en cache.
+        total_time: Le temps total passé à évaluer la condition, en secondes.
+        max_time: Le temps de la plus longue évaluation, en secondes.
+    """
+    __slots__ = ('calls', 'evaluations', 'total_time', 'max_time')
+
+    def __init__(self):
+        self.calls = 0
+        self.evaluations = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def get_mean_time(self):
+        """
+        :return: Le temps moyen d'une évaluation, en secondes.
+        """
+        return self.total_time / self.evaluations if self.evaluations else 0.0
+
+    def __str__(self):
+        return "calls: {} evaluations: {} total: {:.3f} ms mean: {:.3f} ms max: {:.3f} ms".format(
+            self.calls, self.evaluations, self.total_time * 1000, self.get_mean_time() * 1000, self.max_time * 1000)
+
+
+class ConditionCache:
+    """
+    ConditionCache: Garde le résultat des conditions des vertices pour la frame en cours. Une même condition (la même
+                    fonction avec les mêmes arguments) demandée par plusieurs vertices, ou par plusieurs graphes d'une
+                    stratégie, n'est évaluée qu'une seule fois par frame.
+    Méthodes:
+        new_frame: Oublie les résultats de la frame précédente.
+        evaluate: Retourne le résultat d'une fonction pour la frame en cours, en l'évaluant au besoin.
+        get_stats: Retourne les statistiques de temps des conditions, de la plus coûteuse à la moins coûteuse.
+        reset_stats: Remet les statistiques de temps à zéro.
+    Attributs:
+        frame: Le nombre de frames depuis la création de la cache.
+        stats: Un dict des statistiques de temps, indexé par le nom de la condition.
+    """
+    def __init__(self):
+        self.frame = 0
+        self.stats = {}
+        self._results = {}
+
+    def new_frame(self):
+        """
+        Oublie les résultats de la frame précédente. Doit être appelée une fois par frame, avant l'exécution des
+        graphes.
+        """
+        self.frame += 1
+        self._results.clear()
+
+    def evaluate(self, function, *args):
+        """
+        Retourne le résultat de function(*args) pour la frame en cours. Une functools.partial est équivalente à sa
+        fonction appelée avec ses arguments, ainsi partial(f, 1) et f(1) partagent le même résultat. Les appels dont
+        les arguments ne peuvent pas servir de clé sont évalués à chaque fois.
+        :param function: La fonction à évaluer.
+        :param args: Les arguments de la fonction.
+        :return: Le résultat de la fonction.
+        """
+        function, args = _unwrap(function, args)
+        key = (function, args)
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+
+        stats = self._get_condition_stats(function, args)
+        stats.calls += 1
+        if key in self._results:
+            return self._results[key]
+
+        stats.evaluations += 1
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        stats.total_time += elapsed
+        stats.max_time = max(stats.max_time, elapsed)
+
+        if key is not None:
+            self._results[key] = result
+        return result
+
+    def get_stats(self):
+        """
+        :return: Une liste de tuples (nom, ConditionStats), de la condition la plus coûteuse à la moins coûteuse.
+        """
+        return sorted(self.stats.items(), key=lambda item: item[1].total_time, reverse=True)
+
+    def reset_stats(self):
+        """ Remet les statistiques de temps à zéro. """
+        self.stats.clear()
+
+    def _get_condition_stats(self, function, args):
+        name = getattr(function, '__qualname__', str(function)) + str(args)
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = ConditionStats()
+        return stats
+
+
+def _unwrap(function, args):
+    while isinstance(function, partial) and not function.keywords:
+        args = function.args + args
+        function = function.func
+    return function, args
@@ -1,5 +1,6 @@
 # Under MIT license, see LICENSE.txt
 
+from ai.Algorithm.Graph.ConditionCache import ConditionCache
 from ai.Algorithm.Graph.Node import Node
 from ai.Algorithm.Graph.Vertex import Vertex
 from ai.STA.Tactic.tactic_constants import Flags
@@ -24,10 +25,19 @@ class Graph:
     Attributs:
         nodes: Une liste des noeuds du graphe.
         current_node: L'index du noeud courant dans la liste des noeuds.
+        condition_cache: La ConditionCache gardant le résultat des conditions pour la frame en cours.
     """
-    def __init__(self):
+    def __init__(self, p_condition_cache=None):
+        """
+        :param p_condition_cache: Une ConditionCache partagée avec d'autres graphes. Son propriétaire doit appeler
+                                  new_frame à chaque frame. Sans cache partagée, le graphe crée la sienne et l'efface à
+                                  chaque appel de exec.
+        """
+        assert p_condition_cache is None or isinstance(p_condition_cache, ConditionCache)
         self.nodes = []
         self.current_node = 0
+        self._owns_condition_cache = p_condition_cache is None
+        self.condition_cache = ConditionCache() if p_condition_cache is None else p_condition_cache
 
     def get_current_tactic_name(self):
         """
@@ -66,20 +76,21 @@ class Graph:
             self.remove_vertex(i, p_node_index)
         self.nodes.pop(p_node_index)
 
-    def add_vertex(self, p_starting_node, p_ending_node, p_condition):
+    def add_vertex(self, p_starting_node, p_ending_node, p_condition, p_priority=0):
         """
         Ajoute un vertex entre deux noeuds du graphe. Il ne peut y avoir qu'un seul vertex entre deux noeuds donnés dans
         un certain sens. Si on en ajoute un autre, celui-ci remplacera l'ancien.
         :param p_starting_node: L'index du noeud de départ dans la liste de noeuds.
         :param p_ending_node: L'index du noeud d'arrivée dans la liste de noeuds.
         :param p_condition: Une fonction retournant un booléen indiquant si on peut passer au noeud suivant.
+        :param p_priority: Un entier, les vertices de plus haute priorité sont évalués en premier.
         """
         assert isinstance(p_starting_node, int)
         assert 0 <= p_starting_node < len(self.nodes)
         assert isinstance(p_ending_node, int)
         assert 0 <= p_ending_node < len(self.nodes)
         assert callable(p_condition)
-        self.nodes[p_starting_node].add_vertex(Vertex(p_ending_node, p_condition))
+        self.nodes[p_starting_node].add_vertex(Vertex(p_ending_node, p_condition, p_priority))
 
     def remove_vertex(self, p_starting_node, p_ending_node):
         """
@@ -99,7 +110,9 @@ class Graph:
         est remplie, ce qui a pour effet de changer la tactique en cours.
         """
         if len(self.nodes) > 0:
-            next_ai_command, next_node = self.nodes[self.current_node].exec()
+            if self._owns_condition_cache:
+                self.condition_cache.new_frame()
+            next_ai_command, next_node = self.nodes[self.current_node].exec(self.condition_cache)
             if next_node != -1:
                 self.set_current_node(next_node)
 
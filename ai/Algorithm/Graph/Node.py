@@ -32,15 +32,18 @@ class Node:
     def add_vertex(self, p_vertex):
         """
         Ajoute un vertex au noeud. Comme il ne peut y avoir qu'un seul vertex entre deux noeuds donnés dans un certain
-        sens, si on ajoute un autre vertex, il remplacera l'ancien.
+        sens, si on ajoute un autre vertex, il remplacera l'ancien. Les vertices restent triés par priorité décroissante,
+        puis par ordre d'ajout.
         :param p_vertex: Le vertex à ajouter.
         """
         assert isinstance(p_vertex, Vertex)
         for i in range(len(self.vertices)):
             if self.vertices[i].next_node == p_vertex.next_node:
                 self.vertices[i] = p_vertex
-                return
-        self.vertices.append(p_vertex)
+                break
+        else:
+            self.vertices.append(p_vertex)
+        self.vertices.sort(key=lambda vertex: -vertex.priority)
 
     def remove_vertex(self, p_ending):
         """
@@ -54,16 +57,18 @@ class Node:
             if self.vertices[i].next_node == p_ending:
                 self.vertices.pop(i)
 
-    def exec(self):
+    def exec(self, p_condition_cache=None):
         """
         Fait avancer la machine d'état de la tactique d'une itération et évalue la condition de chacun des vertices du
-        noeud afin de déterminer si on peut passer à un noeud suivant.
+        noeud afin de déterminer si on peut passer à un noeud suivant. Les conditions sont évaluées en ordre de priorité
+        et l'évaluation s'arrête à la première condition remplie.
+        :param p_condition_cache: Une ConditionCache optionnelle partageant le résultat des conditions pour la frame.
         :return: Un tuple contenant la prochaine commande à envoyer au robot et le numéro du noeud pointé par le vertex
         dont la condition est remplie, sous forme de int. Ce numéro vaut -1 si aucune condition n'est remplie.
         """
         next_ai_command = self.tactic.exec()
         for vertex in self.vertices:
-            if vertex.evaluate_condition():
+            if vertex.evaluate_condition(p_condition_cache):
                 return next_ai_command, vertex.next_node
         return next_ai_command, -1
 
@@ -15,25 +15,32 @@ class Vertex:
     Attributs:
         next_node: Le numéro du noeud suivant, pointé par l'extrémité du vertex.
         condition: Une fonction retournant un booléen indiquant si on peut passer au noeud suivant.
+        priority: Les vertices d'un noeud sont évalués en ordre décroissant de priorité.
     """
-    def __init__(self, p_next_node, p_condition):
+    def __init__(self, p_next_node, p_condition, p_priority=0):
         """
         :param p_next_node: Un entier positif représentant le numéro du noeud suivant, pointé par l'extrémité du vertex.
         :param p_condition: Une fonction retournant un booléen indiquant si on peut passer au noeud suivant.
+        :param p_priority: Un entier, les vertices de plus haute priorité sont évalués en premier.
         """
         assert isinstance(p_next_node, int)
         assert p_next_node >= 0
         assert callable(p_condition)
+        assert isinstance(p_priority, int)
 
         self.next_node = p_next_node
         self.condition = p_condition
+        self.priority = p_priority
 
-    def evaluate_condition(self):
+    def evaluate_condition(self, p_condition_cache=None):
         """
         Évalue si la condition pour passer au noeud suivant est respectée. Cette méthode appelle la fonction de
         condition et retourne son résultat.
+        :param p_condition_cache: Une ConditionCache optionnelle gardant le résultat de la condition pour la frame.
         :return: Un booléen indiquant si la condition pour passer au noeud suivant est remplie.
         """
+        if p_condition_cache is not None:
+            return p_condition_cache.evaluate(self.condition)
         return self.condition()
 
     def __str__(self):
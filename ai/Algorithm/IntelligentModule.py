@@ -6,6 +6,7 @@ from abc import abstractmethod, ABCMeta
 from typing import List
 
 from RULEngine.Debug.debug_interface import DebugInterface
+from RULEngine.Debug.profiler import Profiler, PATHFINDER_ROBOT_STAGE
 from RULEngine.Util.Pose import Pose
 
 __author__ = 'RoboCupULaval'
@@ -86,6 +87,32 @@ class Pathfinder(IntelligentModule, metaclass=ABCMeta):
             :return: [Pose, Pose, ...]
         """
 
+    def get_paths(self, pose_targets):
+        """
+            Calcule les chemins de plusieurs robots. Les pathfinders capables
+            de planifier tous les robots ensemble redéfinissent cette méthode.
+
+            :param pose_targets: dictionnaire {id du robot: Pose cible}
+            :return: {id : chemin retourné par get_path, ... }
+        """
+        paths = {}
+        for robot_id, target in pose_targets.items():
+            with Profiler().measure(PATHFINDER_ROBOT_STAGE.format(robot_id)):
+                paths[robot_id] = self.get_path(robot_id, target)
+        return paths
+
+    def is_path_blocked(self, start, points, obstacles):
+        """
+            Indique si un chemin déjà calculé passe trop près d'obstacles.
+            Par défaut, le chemin ne peut pas être vérifié et doit être recalculé.
+
+            :param start: position (x, y) actuelle du robot
+            :param points: [Position, Position, ...] points restants du chemin
+            :param obstacles: tableau numpy (M, 2) des positions à vérifier
+            :return: True si le chemin doit être recalculé
+        """
+        return True
+
     @abstractmethod
     def get_next_point(self, robot_id=None):
         """
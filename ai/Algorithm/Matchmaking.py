@@ -1,102 +1,180 @@
 #pylint: skip-file
 
-from ai.Algorithm.Astar.AsPosition import AsPosition
+import numpy as np
+
 from ai.Algorithm.MatchmakingCell.Cell import Cell
 from ai.Algorithm.MatchmakingCell.CellPermute import CellPermute
 
-def matchmakingBestSolution(startPosList, endPosList):
-
-    if (not (len(startPosList) == len(endPosList))):
-        raise NameError("startPosList and endPosList length are not equals")
-
-    cellList = []
-
-    length = len(startPosList)
-    for i in range(0, length, 1):
-        fakeId = str(i)
-        cellList.append(CellPermute(fakeId, startPosList[i]))
-    
-    allPermutations = permutation(cellList)
-
-    currentBestPermutation = allPermutations[0]
-    currentMinDist = getTotalDist(allPermutations[0], endPosList)
-
-    for permute in allPermutations:
-        tempDist = getTotalDist(permute, endPosList)
-        if (tempDist < currentMinDist):
-            currentMinDist = tempDist
-            currentBestPermutation = permute
-
-    for i in range(0, length, 1):
-        currentBestPermutation[i].endPos = endPosList[i]
-
-    return currentBestPermutation
-
-def getTotalDist(cellList, endPosList):
-
-    totalDist = 0
-    length = len(cellList)
-    for i in range(0, length, 1):
-        totalDist += cellList[i].robotPos.getQuickDist(endPosList[i])
+# coût d'une paire robot-rôle interdite
+FORBIDDEN = np.inf
+
+
+def solveAssignment(cost):
+    """
+        Résout le problème d'affectation de coût minimal (algorithme hongrois
+        par chemins augmentants, O(n³)). La matrice peut être rectangulaire et
+        contenir FORBIDDEN pour les paires interdites.
+
+        :param cost: matrice (n, m) du coût d'affecter la rangée i à la colonne j
+        :return: np.array de n index de colonne, -1 pour une rangée sans colonne
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.shape[0] > cost.shape[1]:
+        columnToRow = solveAssignment(cost.T)
+        rowToColumn = np.full(cost.shape[0], -1, dtype=np.int64)
+        assigned = columnToRow >= 0
+        rowToColumn[columnToRow[assigned]] = np.flatnonzero(assigned)
+        return rowToColumn
+
+    nbRows, nbColumns = cost.shape
+    forbidden = ~np.isfinite(cost)
+    if forbidden.any():
+        # les coûts permis sont ramenés à des valeurs positives (ce qui ne change pas l'affectation optimale, chaque
+        # rangée en reçoit une), puis une paire interdite coûte plus que n'importe quelle affectation permise
+        allowed = cost[~forbidden]
+        if allowed.size:
+            cost = cost - allowed.min()
+            allowed = allowed - allowed.min()
+        cost = np.where(forbidden, (allowed.max() if allowed.size else 0) * nbRows + 1, cost)
+
+    # potentiels et affectation indexés à partir de 1, la colonne 0 est fictive
+    rowPotential = np.zeros(nbRows + 1)
+    columnPotential = np.zeros(nbColumns + 1)
+    columnRow = np.zeros(nbColumns + 1, dtype=np.int64)
+    way = np.zeros(nbColumns + 1, dtype=np.int64)
+    for row in range(1, nbRows + 1):
+        columnRow[0] = row
+        column = 0
+        minReduced = np.full(nbColumns + 1, np.inf)
+        used = np.zeros(nbColumns + 1, dtype=bool)
+        while True:
+            used[column] = True
+            currentRow = columnRow[column]
+            reduced = cost[currentRow - 1] - rowPotential[currentRow] - columnPotential[1:]
+            free = ~used[1:]
+            improved = free & (reduced < minReduced[1:])
+            minReduced[1:][improved] = reduced[improved]
+            way[1:][improved] = column
+            candidates = np.where(free, minReduced[1:], np.inf)
+            nextColumn = int(np.argmin(candidates)) + 1
+            delta = candidates[nextColumn - 1]
+            rowPotential[columnRow[used]] += delta
+            columnPotential[used] -= delta
+            minReduced[1:][free] -= delta
+            column = nextColumn
+            if columnRow[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            columnRow[column] = columnRow[previous]
+            column = previous
+
+    rowToColumn = np.full(nbRows, -1, dtype=np.int64)
+    assigned = np.flatnonzero(columnRow[1:])
+    rowToColumn[columnRow[1:][assigned] - 1] = assigned
+    rowToColumn[forbidden[np.arange(nbRows), rowToColumn]] = -1
+    return rowToColumn
+
+
+def buildCostMatrix(startPositions, endPositions, velocities=None, acceleration=None):
+    """
+        Construit la matrice (robots, cibles) des distances. Si les vitesses et
+        l'accélération sont données, le coût est plutôt le temps de parcours,
+        avec le même modèle que geometry.get_time_to_travel et la vitesse du
+        robot projetée vers la cible.
+    """
+    starts = np.array([[position.x, position.y] for position in startPositions], dtype=np.float64).reshape(-1, 2)
+    ends = np.array([[position.x, position.y] for position in endPositions], dtype=np.float64).reshape(-1, 2)
+    toEnds = ends[np.newaxis, :, :] - starts[:, np.newaxis, :]
+    distances = np.hypot(toEnds[..., 0], toEnds[..., 1])
+    if velocities is None or acceleration is None:
+        return distances
+
+    velocities = np.array(velocities, dtype=np.float64).reshape(-1, 2)
+    directions = toEnds / np.maximum(distances, 1e-9)[..., np.newaxis]
+    speeds = (directions * velocities[:, np.newaxis, :]).sum(axis=2)
+    return (-speeds + np.sqrt(speeds ** 2 + 4 * acceleration * distances)) / (2 * acceleration)
+
+
+class Matchmaker():
+    """
+        Affecte des robots à des rôles en minimisant le coût total. Les paires
+        de la dernière affectation reçoivent un bonus de stickiness pour que les
+        rôles ne s'échangent pas sur une différence de coût négligeable.
+    """
+
+    def __init__(self, stickiness=0):
+
+        self.stickiness = stickiness
+        self.previousAssignment = {}
+
+    def assign(self, robotPositions, rolePositions, velocities=None, acceleration=None, forbidden=(), pinned=None):
+        """
+            :param robotPositions: dictionnaire {id du robot: position}
+            :param rolePositions: dictionnaire {rôle: position cible}
+            :param velocities: dictionnaire {id du robot: (vx, vy)}, pour un coût en temps de parcours
+            :param acceleration: accélération des robots, pour un coût en temps de parcours
+            :param forbidden: paires (id du robot, rôle) interdites
+            :param pinned: dictionnaire {rôle: id du robot} imposé, par exemple le gardien
+            :return: dictionnaire {rôle: id du robot}, les rôles sans robot sont absents
+        """
+        robotIds = list(robotPositions.keys())
+        roles = list(rolePositions.keys())
+        if velocities is not None:
+            velocities = [velocities[robotId] for robotId in robotIds]
+        cost = buildCostMatrix([robotPositions[robotId] for robotId in robotIds],
+                               [rolePositions[role] for role in roles], velocities, acceleration)
+
+        robotIndex = {robotId: i for i, robotId in enumerate(robotIds)}
+        roleIndex = {role: j for j, role in enumerate(roles)}
+        for robotId, role in self.previousAssignment.items():
+            if robotId in robotIndex and role in roleIndex:
+                cost[robotIndex[robotId], roleIndex[role]] -= self.stickiness
+        for robotId, role in forbidden:
+            if robotId in robotIndex and role in roleIndex:
+                cost[robotIndex[robotId], roleIndex[role]] = FORBIDDEN
+        for role, robotId in (pinned or {}).items():
+            row, column = robotIndex[robotId], roleIndex[role]
+            pinnedCost = cost[row, column]
+            cost[row, :] = FORBIDDEN
+            cost[:, column] = FORBIDDEN
+            cost[row, column] = pinnedCost
+
+        rowToColumn = solveAssignment(cost)
+        assignment = {roles[column]: robotIds[row] for row, column in enumerate(rowToColumn) if column >= 0}
+        self.previousAssignment = {robotId: role for role, robotId in assignment.items()}
+        return assignment
 
-    return totalDist
 
-def permutation(paths):
-
-    result = []
-
-    if (len(paths) > 1):
-        for i in range(0, len(paths), 1):
-            liste = list(paths)
-            liste.remove(paths[i])
-            permute = permutation(liste)
-            temp = []
-
-            length = len(permute)
-            for j in range(0, length, 1):
-                if (isinstance(permute[j], list)):
-                    temp.append([paths[i]] + list(permute[j]))
-                else:
-                    temp.append([paths[i]] + list([permute[j]]))
+#------------------------------------------------------------------------------------------
 
-            result.extend(temp)
 
-    else:
-        result = list(paths)
+def matchmakingBestSolution(startPosList, endPosList):
 
-    return result
+    if (not (len(startPosList) == len(endPosList))):
+        raise NameError("startPosList and endPosList length are not equals")
 
+    rowToColumn = solveAssignment(getQuickDistMatrix(startPosList, endPosList))
 
+    bestSolution = [None] * len(endPosList)
+    for i, column in enumerate(rowToColumn):
+        cell = CellPermute(str(i), startPosList[i])
+        cell.endPos = endPosList[column]
+        bestSolution[column] = cell
 
-#------------------------------------------------------------------------------------------
+    return bestSolution
 
 
 def matchmakingOptimalSolution(startPosList, endPosList):
+
     if (not (len(startPosList) == len(endPosList))):
         raise NameError("startPosList and endPosList length are not equals")
 
-    distList = []
-
-    length = len(startPosList)
-    for i in range(0, length, 1):
-        for j in range(0, length, 1):
-            fakeId = str(i)
-            distList.append(Cell(fakeId, startPosList[i], endPosList[j]))
-
-    distList.sort(key=lambda x : x.metric)
-
-    count = 0
-    optimalAssoc = []
-    foundRobotId = set()
-    foundEndId = set()
+    rowToColumn = solveAssignment(getQuickDistMatrix(startPosList, endPosList))
 
-    while (len(optimalAssoc) < length):
+    return [Cell(str(i), startPosList[i], endPosList[column]) for i, column in enumerate(rowToColumn)]
 
-        if (not (distList[count].robotId in foundRobotId or distList[count].endPos in foundEndId)):
-            optimalAssoc.append(distList[count])
-            foundRobotId.add(distList[count].robotId)
-            foundEndId.add(distList[count].endPos)
 
-        count += 1
+def getQuickDistMatrix(startPosList, endPosList):
 
-    return optimalAssoc
\ No newline at end of file
+    return buildCostMatrix(startPosList, endPosList) ** 2
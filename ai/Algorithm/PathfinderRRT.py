@@ -7,19 +7,22 @@
     /entry/2016/03/23/092002
 
 """
-# FIXME IMPORT!
-import copy
 import math
-import random
 import time
 
-from RULEngine.Debug.debug_interface import COLOR_ID_MAP, DEFAULT_PATH_TIMEOUT
+import numpy as np
+
+from RULEngine.Debug.debug_interface import COLOR_ID_MAP, DEFAULT_PATH_TIMEOUT, PATH
+from RULEngine.Debug.profiler import Profiler, PATHFINDER_ROBOT_STAGE
 from RULEngine.Util.Pose import Pose
 from RULEngine.Util.Position import Position
 from ai.Algorithm.IntelligentModule import Pathfinder
+from config.config_service import ConfigService
 
 OBSTACLE_DEAD_ZONE = 700
-TIME_TO_UPDATE = 1
+FIELD_AREA = ((-4500, 4500), (-3000, 3000))
+NEAREST_CELL_SIZE = 1000
+INITIAL_CAPACITY = 256
 
 
 class PathfinderRRT(Pathfinder):
@@ -30,6 +33,8 @@ class PathfinderRRT(Pathfinder):
         GameState.
 
         Une méthode permet de récupérer la trajectoire d'un robot spécifique.
+        Le calcul de toutes les trajectoires d'une frame respecte un budget
+        de temps (rrt_budget_ms dans la section STRATEGY de la configuration).
     """
 
     def __init__(self, p_worldstate):
@@ -45,6 +50,7 @@ class PathfinderRRT(Pathfinder):
             self.paths[i] = []
 
         self.last_timestamp = self.ws.game_state.get_timestamp()
+        self.budget = float(ConfigService().config_dict["STRATEGY"]["rrt_budget_ms"]) / 1000
 
     # Pour être conforme à la nouvelle interface à être changé
     # éventuellement mgl 2016/12/23
@@ -62,7 +68,7 @@ class PathfinderRRT(Pathfinder):
             y = path_element.position.y
             points.append((x,y))
         self.debug_interface.add_multiple_points(points, COLOR_ID_MAP[pid], width=5, link="path - " + str(pid),
-                                                    timeout=DEFAULT_PATH_TIMEOUT)
+                                                 timeout=DEFAULT_PATH_TIMEOUT, category=PATH)
 
     def get_path(self, pid=None, target=None):
         """
@@ -74,15 +80,25 @@ class PathfinderRRT(Pathfinder):
 
         assert(isinstance(pid, int)), "Un pid doit être passé"
         assert(isinstance(target, Pose)), "La cible doit être une Pose"
-        return self._compute_path(pid, target)
-
-
-    def _compute_path(self, pid, target):
+        return self._compute_path(pid, target, self.budget)
+
+    def get_paths(self, pose_targets):
+        """ Calcule les trajectoires de plusieurs robots, le budget de la frame est partagé entre les robots restants. """
+        deadline = time.perf_counter() + self.budget
+        paths = {}
+        for count, (pid, target) in enumerate(pose_targets.items()):
+            remaining = max(deadline - time.perf_counter(), 0) / (len(pose_targets) - count)
+            with Profiler().measure(PATHFINDER_ROBOT_STAGE.format(pid)):
+                paths[pid] = self._compute_path(pid, target, remaining)
+        return paths
+
+    def _compute_path(self, pid, target, budget):
         """
             Cette méthode calcul la trajectoire pour un robot.
 
             :param pid: L'identifiant du robot, 0 à 5.
-            :return: None
+            :param budget: Temps de calcul permis, en secondes.
+            :return: Une liste de Pose, [Pose]
         """
 
         # TODO mettre les buts dans les obstacles
@@ -98,40 +114,27 @@ class PathfinderRRT(Pathfinder):
 
         initial_position_of_main_player = self.ws.game_state.get_player_pose(pid).position
 
-        for pid in list_of_other_team_pid:
-            position = self.ws.game_state.get_player_pose(pid,False).position
+        for other_pid in list_of_other_team_pid:
+            position = self.ws.game_state.get_player_pose(other_pid, False).position
             obstacleList.append([position.x, position.y, OBSTACLE_DEAD_ZONE])
 
         target_position_of_player = target.position
         target_orientation_of_player = target.orientation
         assert(isinstance(target_position_of_player, Position)), "La cible du joueur doit être une Position"
-        try :
-            target_position_of_player.x
-            target_position_of_player.y
-        except AttributeError:
-            target_position_of_player = self.ws.game_state.get_player_pose(pid).position
 
-
-        rrt = RRT(start=[initial_position_of_main_player.x,
-                         initial_position_of_main_player.y],
-                  goal=[target_position_of_player.x, target_position_of_player.y],
+        start = [initial_position_of_main_player.x, initial_position_of_main_player.y]
+        goal = [target_position_of_player.x, target_position_of_player.y]
+        rrt = RRT(start=start,
+                  goal=goal,
                   obstacleList=obstacleList,
                   # TODO Vérifier si le robot peut sortir du terrain
-                  rand_area=[-4500, 4500],
-                  expand_dis=get_expand_dis([initial_position_of_main_player.x,
-                                             initial_position_of_main_player.y],
-                                            [target_position_of_player.x, target_position_of_player.y]),
-                  goal_sample_rate=get_goal_sample_rate([initial_position_of_main_player.x,
-                                                         initial_position_of_main_player.y],
-                                                        [target_position_of_player.x, target_position_of_player.y]))
-
-        not_smoothed_path = rrt.planning(obstacleList)
-
-        # Path smoothing
-        maxIter = 100
-        # Il faut inverser la liste du chemin lissé tout en retirant le point de départ
-        smoothed_path = path_smoothing(not_smoothed_path, maxIter, obstacleList)
-        smoothed_path = list(reversed(smoothed_path[:-1]))
+                  rand_area=FIELD_AREA,
+                  expand_dis=get_expand_dis(start, goal),
+                  goal_sample_rate=get_goal_sample_rate(start, goal))
+
+        path = rrt.planning(budget)
+        # on retire le point de départ
+        smoothed_path = rrt.path_smoothing(path)[1:]
 
         return self._smoothed_path_to_pose_list(smoothed_path, target_orientation_of_player)
 
@@ -143,113 +146,204 @@ class PathfinderRRT(Pathfinder):
         return smoothed_poses
 
 
+class NodeTree():
+    """
+        Arbre du RRT: les noeuds sont rangés dans des tableaux numpy et indexés
+        dans une grille de cases pour trouver rapidement le plus proche voisin.
+    """
+
+    def __init__(self, root, cell_size=NEAREST_CELL_SIZE):
+        self.cell_size = cell_size
+        self.nodes = np.empty((INITIAL_CAPACITY, 2))
+        self.parents = np.empty(INITIAL_CAPACITY, dtype=np.int64)
+        self.count = 0
+        self.grid = {}
+        self.min_cell = None
+        self.max_cell = None
+        self.add(root, -1)
+
+    def _get_cell(self, position):
+        return int(position[0] // self.cell_size), int(position[1] // self.cell_size)
+
+    def add(self, position, parent):
+        if self.count == len(self.nodes):
+            self.nodes = np.concatenate((self.nodes, np.empty_like(self.nodes)))
+            self.parents = np.concatenate((self.parents, np.empty_like(self.parents)))
+        index = self.count
+        self.nodes[index] = position
+        self.parents[index] = parent
+        self.count += 1
+
+        cell = self._get_cell(position)
+        self.grid.setdefault(cell, []).append(index)
+        if self.min_cell is None:
+            self.min_cell = self.max_cell = cell
+        else:
+            self.min_cell = (min(self.min_cell[0], cell[0]), min(self.min_cell[1], cell[1]))
+            self.max_cell = (max(self.max_cell[0], cell[0]), max(self.max_cell[1], cell[1]))
+        return index
+
+    def nearest(self, position):
+        """ Retourne l'index du noeud le plus proche, en parcourant les cases en anneaux autour de la position. """
+        cx, cy = self._get_cell(position)
+        last_ring = max(cx - self.min_cell[0], self.max_cell[0] - cx, cy - self.min_cell[1], self.max_cell[1] - cy)
+        best_index = -1
+        best_dist = np.inf
+        for ring in range(last_ring + 1):
+            # seules les cases de l'anneau qui touchent la zone occupée par l'arbre sont parcourues
+            candidates = []
+            min_y = max(cy - ring, self.min_cell[1])
+            max_y = min(cy + ring, self.max_cell[1])
+            for x in range(max(cx - ring, self.min_cell[0]), min(cx + ring, self.max_cell[0]) + 1):
+                if x in (cx - ring, cx + ring):
+                    ys = range(min_y, max_y + 1)
+                else:
+                    ys = [y for y in (cy - ring, cy + ring) if min_y <= y <= max_y]
+                for y in ys:
+                    candidates += self.grid.get((x, y), [])
+            if candidates:
+                diff = self.nodes[candidates] - position
+                dists = diff[:, 0] ** 2 + diff[:, 1] ** 2
+                closest = int(np.argmin(dists))
+                if dists[closest] < best_dist:
+                    best_dist = dists[closest]
+                    best_index = candidates[closest]
+            # les noeuds des anneaux suivants sont au moins à ring cases de distance
+            if best_index >= 0 and best_dist <= (ring * self.cell_size) ** 2:
+                break
+        return best_index
+
+    def path_to(self, index):
+        """ Retourne les positions de la racine jusqu'au noeud. """
+        path = []
+        while index >= 0:
+            path.append(self.nodes[index].tolist())
+            index = int(self.parents[index])
+        path.reverse()
+        return path
+
+
 class RRT():
     """
     Classe principale du pathfinder, contient les fonctions principales
-    permettant de générer le path.
+    permettant de générer le path. Implémente RRT-Connect: un arbre pousse
+    depuis le départ, un autre depuis le but, et chacun tente de rejoindre
+    le dernier noeud ajouté à l'autre.
     """
 
-    def __init__(self, start, goal, obstacleList, rand_area, expand_dis, goal_sample_rate, max_iteration=50):
+    def __init__(self, start, goal, obstacleList, rand_area, expand_dis, goal_sample_rate, rng=None):
         """
         Setting Parameter
 
         start: Position de départ [x,y]
         goal:  Destination [x,y]
         obstacleList: Position et taille des obstacles [[x,y,size],...]
-        randArea: Ramdom Samping Area [min,max]
+        rand_area: Zone d'échantillonnage ((xmin, xmax), (ymin, ymax))
         expand_dis : Longueur des arêtes
-        goal_sample_rate : Probabilité d'obtenir directement le goal comme position.
-        Améliore la vitesse du RRT
-
-        max_iteration : Nombre d'itération du path smoother
-
+        goal_sample_rate : Probabilité (en %) d'échantillonner directement la racine de l'autre arbre.
+        rng : Générateur numpy, pour rendre la planification reproductible
         """
-        self.start = Node(start[0], start[1])
-        self.end = Node(goal[0], goal[1])
-        self.minrand = rand_area[0]
-        self.maxrand = rand_area[1]
+        self.start = np.array(start, dtype=np.float64)
+        self.end = np.array(goal, dtype=np.float64)
+        self.obstacles = np.array(obstacleList, dtype=np.float64).reshape(-1, 3)
+        self.rand_area = np.array(rand_area, dtype=np.float64)
         self.expand_dis = expand_dis
         self.goal_sample_rate = goal_sample_rate
-        self.max_iteration = max_iteration
-
-    def planning(self, obstacleList):
-        """Fonction qui s'occupe de faire le path"""
-        initial_time = time.time()
-        self.node_list = [self.start]
-        #TODO changer le gros hack degueux pour la gestion de la loop infinie
-        while True and time.time()-initial_time < TIME_TO_UPDATE:
-            # Random Sampling
-
-            if random.randint(0, 100) > self.goal_sample_rate:
-                random_coordinates = [random.uniform(self.minrand, self.maxrand), random.uniform(self.minrand, self.maxrand)]
-            else:
-                random_coordinates = [self.end.x, self.end.y]
-
-            # Find nearest node
-            nind = self.get_nearest_list_index(self.node_list, random_coordinates)
-            # print(nind)
-
-            # expand tree
-            nearest_node = self.node_list[nind]
-            theta = math.atan2(random_coordinates[1] - nearest_node.y, random_coordinates[0] - nearest_node.x)
-
-            new_node = copy.deepcopy(nearest_node)
-            new_node.x += self.expand_dis * math.cos(theta)
-            new_node.y += self.expand_dis * math.sin(theta)
-            new_node.parent = nind
-
-            if not self.__collision_check(new_node, obstacleList):
-                continue
-
-            self.node_list.append(new_node)
+        self.rng = rng if rng is not None else np.random.default_rng()
 
-            # check goal
-            dx = new_node.x - self.end.x
-            dy = new_node.y - self.end.y
-            d = math.sqrt(dx * dx + dy * dy)
-            if d <= self.expand_dis:
-                break
-
-        path = [[self.end.x, self.end.y]]
-        last_index = len(self.node_list) - 1
-        while self.node_list[last_index].parent is not None:
-            node = self.node_list[last_index]
-            path.append([node.x, node.y])
-            last_index = node.parent
-        path.append([self.start.x, self.start.y])
-
-        # TODO fix gros hack sale
-        if time.time()-initial_time >=1 :
-            path = [[self.start.x, self.start.y],[self.start.x, self.start.y]]
+    def planning(self, budget):
+        """
+            Retourne le chemin [[x, y], ...] du départ au but. Si le budget
+            (en secondes) est écoulé avant que les arbres se rejoignent, retourne
+            le chemin vers le noeud le plus proche du but, ou [départ, départ]
+            (garder sa position) si l'arbre n'a pas quitté le départ. Le chemin
+            contient donc toujours au moins deux points.
+        """
+        if self.expand_dis <= 0 or self.segments_free(self.start, self.end)[0]:
+            return [self.start.tolist(), self.end.tolist()]
+
+        deadline = time.perf_counter() + budget
+        start_tree = NodeTree(self.start)
+        goal_tree = NodeTree(self.end)
+        tree, other_tree = start_tree, goal_tree
+        while time.perf_counter() < deadline:
+            if self.rng.uniform(0, 100) < self.goal_sample_rate:
+                random_coordinates = other_tree.nodes[0]
+            else:
+                random_coordinates = self.rng.uniform(self.rand_area[:, 0], self.rand_area[:, 1])
+
+            new_index, _ = self.extend(tree, random_coordinates)
+            if new_index >= 0:
+                other_index, reached = self.connect(other_tree, tree.nodes[new_index], deadline)
+                if reached:
+                    if tree is start_tree:
+                        start_index, goal_index = new_index, other_index
+                    else:
+                        start_index, goal_index = other_index, new_index
+                    return start_tree.path_to(start_index) + list(reversed(goal_tree.path_to(goal_index)))[1:]
+            tree, other_tree = other_tree, tree
+
+        diff = start_tree.nodes[:start_tree.count] - self.end
+        path = start_tree.path_to(int(np.argmin(diff[:, 0] ** 2 + diff[:, 1] ** 2)))
+        if len(path) < 2:
+            path.append(self.start.tolist())
         return path
 
-    def get_nearest_list_index(self, node_list, rnd):
-        dlist = [(node.x - rnd[0]) ** 2 + (node.y - rnd[1]) ** 2 for node in node_list]
-        minind = dlist.index(min(dlist))
-        return minind
-
-    def __collision_check(self, node, obstacleList):
-        """ Permet de vérifier si le chemin passe à travers un obstacle"""
-
-        for (ox, oy, size) in obstacleList:
-            dx = ox - node.x
-            dy = oy - node.y
-            d = math.sqrt(dx * dx + dy * dy)
-            if d <= size:
-                return False  # collision
-
-        return True  # safe
-
-
-class Node():
-    """
-    RRT Node
-    """
-
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.parent = None
+    def extend(self, tree, target):
+        """ Ajoute un noeud à au plus expand_dis du plus proche voisin, vers la cible. Retourne (index, cible atteinte). """
+        nearest_index = tree.nearest(target)
+        nearest = tree.nodes[nearest_index]
+        dist = math.hypot(target[0] - nearest[0], target[1] - nearest[1])
+        if dist <= self.expand_dis:
+            new_node = np.array(target, dtype=np.float64)
+        else:
+            new_node = nearest + (target - nearest) * (self.expand_dis / dist)
+        if not self.segments_free(nearest, new_node)[0]:
+            return -1, False
+        return tree.add(new_node, nearest_index), dist <= self.expand_dis
+
+    def connect(self, tree, target, deadline=math.inf):
+        """ Étend l'arbre vers la cible jusqu'à l'atteindre, frapper un obstacle ou dépasser l'échéance. """
+        last_index = -1
+        while time.perf_counter() < deadline:
+            index, reached = self.extend(tree, target)
+            if index < 0:
+                return last_index, False
+            if reached:
+                return index, True
+            last_index = index
+        return last_index, False
+
+    def segments_free(self, starts, ends):
+        """
+            Vérifie, pour chaque segment, qu'il n'entre dans aucun obstacle. Un
+            obstacle qui contient déjà le début du segment est ignoré pour
+            permettre au robot d'en sortir.
+        """
+        starts = np.atleast_2d(starts)[:, np.newaxis, :]
+        vectors = np.atleast_2d(ends)[:, np.newaxis, :] - starts
+        to_obstacles = self.obstacles[np.newaxis, :, :2] - starts
+        lengths_sq = np.maximum((vectors ** 2).sum(axis=2), 1e-9)
+        ratio = np.clip((to_obstacles * vectors).sum(axis=2) / lengths_sq, 0, 1)
+        vec_closest_2_obs = to_obstacles - ratio[..., np.newaxis] * vectors
+        sizes_sq = self.obstacles[np.newaxis, :, 2] ** 2
+        blocked = ((vec_closest_2_obs ** 2).sum(axis=2) <= sizes_sq) & ((to_obstacles ** 2).sum(axis=2) > sizes_sq)
+        return ~blocked.any(axis=1)
+
+    def path_smoothing(self, path):
+        """ Raccourcit le chemin: chaque point rejoint directement le point le plus loin qu'il voit. """
+        points = np.array(path, dtype=np.float64)
+        smoothed = [path[0]]
+        current = 0
+        while current < len(points) - 1:
+            following = np.arange(current + 1, len(points))
+            free = self.segments_free(np.repeat(points[current:current + 1], len(following), axis=0),
+                                      points[following])
+            # le point suivant est toujours atteignable puisqu'il vient de l'arbre
+            free[0] = True
+            current = int(following[np.flatnonzero(free)[-1]])
+            smoothed.append(path[current])
+        return smoothed
 
 
 def get_expand_dis(start, goal):
@@ -306,33 +400,6 @@ def get_path_length(path):
     return path_length
 
 
-def get_target_point(path, targetL):
-    l = 0
-    ti = 0
-    last_pair_len = 0
-    for i in range(len(path) - 1):
-        dx = path[i + 1][0] - path[i][0]
-        dy = path[i + 1][1] - path[i][1]
-        d = math.sqrt(dx * dx + dy * dy)
-        l += d
-        if l >= targetL:
-            ti = i-1
-            last_pair_len = d
-            break
-    try :
-        partRatio = (l - targetL) / last_pair_len
-    except ZeroDivisionError:
-        partRatio = 0
-    #  print(partRatio)
-    #  print((ti,len(path),path[ti],path[ti+1]))
-
-    x = path[ti][0] + (path[ti + 1][0] - path[ti][0]) * partRatio
-    y = path[ti][1] + (path[ti + 1][1] - path[ti][1]) * partRatio
-    #  print((x,y))
-
-    return [x, y, ti]
-
-
 def line_collision_check(first, second, obstacleList):
     """
     Vérifie si la ligne entre 2 noeuds entre en collision avec un obstacle.
@@ -367,48 +434,6 @@ def line_collision_check(first, second, obstacleList):
     return True  # OK
 
 
-def path_smoothing(path, maxIter, obstacleList):
-    # Elle ralentit légèrement  le tout, voir si améliorable
-    """Permet de rendre le trajet obtenu avec le RRT plus lisse"""
-
-    #  print("PathSmoothing")
-
-    path_length = get_path_length(path)
-
-    for i in range(maxIter):
-        # Sample two points
-        pick_points = [random.uniform(0, path_length), random.uniform(0, path_length)]
-        pick_points.sort()
-        #  print(pick_points)
-        first = get_target_point(path, pick_points[0])
-        #  print(first)
-        second = get_target_point(path, pick_points[1])
-        #  print(second)
-
-        if first[2] <= 0 or second[2] <= 0:
-            continue
-
-        if (second[2]+1) > len(path):
-            continue
-
-        if second[2] == first[2]:
-            continue
-
-        # collision check
-        if not line_collision_check(first, second, obstacleList):
-            continue
-
-        #Create New path
-        new_path = []
-        new_path.extend(path[:first[2]+1])
-        new_path.append([first[0], first[1]])
-        new_path.append([second[0], second[1]])
-        new_path.extend(path[second[2]+1:])
-        path = new_path
-        path_length = get_path_length(path)
-
-    return path
-
 # taille terrain = 9000 x 6000
 
 
@@ -1,6 +1,8 @@
 # Under MIT License, see LICENSE.txt
 
-from math import ceil, sqrt
+from math import ceil
+import time
+
 import numpy
 
 from RULEngine.Util.constant import *
@@ -10,6 +12,12 @@ from ai.Algorithm.IntelligentModule import IntelligentModule
 
 __author__ = 'RoboCupULaval'
 
+DEBUG_EXPORT_PERIOD = 1
+# en mode incrémental, nombre de mises à jour entre deux reconstructions complètes du tableau
+FULL_REBUILD_PERIOD = 100
+# nombre de masques de polygone gardés en cache avant de vider le cache
+MAX_CACHED_POLYGONS = 64
+
 
 class InfluenceMap(IntelligentModule):
     """
@@ -26,19 +34,32 @@ class InfluenceMap(IntelligentModule):
 
     L'algorithm de propagation de l'influence est:
     (force appliqué à la case) = (force du point d'origine de l'influence) * ((facteur de réduction) ** (distance))
-    transfomé en int arrondie vers 0.
+    transfomé en int arrondie vers 0 (sauf en mode float32).
+
+    L'influence d'un point est un noyau précalculé une seule fois par force, qui est additionné d'un coup à la fenêtre
+    du tableau autour du point.
+
+    En mode incrémental, les influences des robots sont accumulées sans clamp dans un tableau de travail et la case de
+    chaque robot est retenue. À chaque mise à jour, seuls les robots qui ont changé de case sont retirés puis reposés,
+    et seules les fenêtres touchées sont reclampées dans le tableau principal. Le tableau est reconstruit au complet
+    toutes les full_rebuild_period mises à jour pour borner la dérive des calculs en float32.
     """
 
-    def __init__(self, game_state, resolution=100, strength_decay=0.90, strength_peak=100, effect_radius=40,
-                 have_static=False, have_it_executed=False):
+    def __init__(self, world_state, resolution=100, strength_decay=0.90, strength_peak=100, effect_radius=40,
+                 have_static=False, have_it_executed=False, board_dtype=numpy.int16, update_period=0,
+                 incremental=False, full_rebuild_period=FULL_REBUILD_PERIOD):
         """
             Constructeur de la classe InfluenceMap
 
-            :param game_state:  référence vers le game state
+            :param world_state:  référence vers le world state, peut être None pour un tableau hors jeu
             :param resolution:    résolution des cases (défaut = 100)
             :param strength_decay: facteur de réduction de l'influence par la distance (défaut = 0.8)
             :param strength_peak:  maximum de la force appliquable par un point (est aussi le min) (défaut = 100)
             :param effect_radius:  distance qui borne la propagation de l'influence autour de l'origine (défaut = 40)
+            :param board_dtype: numpy.int16 (défaut) ou numpy.float32 pour garder les influences sans arrondi
+            :param update_period: temps minimal en secondes entre deux mises à jour, 0 pour chaque frame (défaut = 0)
+            :param incremental: ne repose que les robots qui ont changé de case à chaque mise à jour (défaut = False)
+            :param full_rebuild_period: nombre de mises à jour incrémentales entre deux reconstructions complètes
         """
         assert isinstance(resolution, int), "Creation InfluenceMap avec param resolution autre que int"
         assert isinstance(strength_decay, float), "Creation InfluenceMap avec param strength_decay autre que int"
@@ -46,12 +67,15 @@ class InfluenceMap(IntelligentModule):
         assert isinstance(strength_peak, int), "Creation InfluenceMap avec param strength_peak autre que int"
         assert isinstance(have_static, bool), "Creation InfluenceMap avec param have_static autre que bool"
         assert isinstance(have_it_executed, bool), "Creation InfluenceMap avec param have_it_executed autre que bool"
+        assert board_dtype in (numpy.int16, numpy.float32), "Creation InfluenceMap avec param board_dtype non supporté"
         assert 0 < resolution, "Creation InfluenceMap avec param resolution <= 0"
         assert 0 < strength_decay < 1, "Creation InfluenceMap avec param strength_decay pas dans intervalle ]0, 1["
         assert 0 < strength_peak, "Creation InfluenceMap avec param strength_decay <= à 0"
         assert 0 < effect_radius, "Creation InfluenceMap avec param effect_radius <= 0"
+        assert isinstance(incremental, bool), "Creation InfluenceMap avec param incremental autre que bool"
+        assert 0 < full_rebuild_period, "Creation InfluenceMap avec param full_rebuild_period <= 0"
 
-        super().__init__(game_state)
+        super().__init__(world_state)
 
         # board parameters
         self._resolution = resolution
@@ -59,18 +83,39 @@ class InfluenceMap(IntelligentModule):
         self._strength_peak = strength_peak
         self._effect_radius = effect_radius
         self._border_strength = - strength_peak * 0.03  # TODO change this variable for something not out of thin air!
+        self._dtype = numpy.dtype(board_dtype)
+        self._kernels = {}
 
         # things on the baord parameters
         self._ball_position_on_board = ()
 
         self._number_of_rows, self._number_of_columns = self._calculate_rows_and_columns()
 
-        if self.state is not None:
-            self.have_it_executed = have_it_executed
-            self._last_updated = self.state.get_timestamp()
+        self.have_it_executed = have_it_executed and self.ws is not None
+        self.update_period = update_period
+        self.clock = time.time
+        self._last_updated = 0
+        self._last_exported = 0
+
+        # état du mode incrémental: tableau sans clamp et dernière case posée par robot
+        self.incremental = incremental
+        self.full_rebuild_period = full_rebuild_period
+        self._raw_board = None
+        self._robot_cells = {}
+        self._updates_since_rebuild = 0
+        self.moved_robots = 0
 
         self._adjust_effect_radius()
 
+        # coordonnées sur le terrain du centre des cases et structures précalculées pour les requêtes
+        self._rows_y = (numpy.arange(self._number_of_rows) + 0.5) * self._resolution - \
+            (abs(FIELD_Y_BOTTOM) + FIELD_Y_TOP) / 2
+        self._columns_x = (abs(FIELD_X_LEFT) + FIELD_X_RIGHT) / 2 - \
+            (numpy.arange(self._number_of_columns) + 0.5) * self._resolution
+        self._circle_offsets = {}
+        self._polygon_cells = {}
+        self._summed_area_table = None
+
         # different tableau pour enregistrer les différentes représentation
         self._static_boards = None
         self._starterboard = self._create_standard_influence_board()
@@ -86,67 +131,58 @@ class InfluenceMap(IntelligentModule):
 
     def update(self):
         if self.have_it_executed:
-            if self.state.get_timestamp() - self._last_updated > 1:
-                # purge the board with a new one (static or not)
-                if self._static_boards is not None:
-                    self._board = numpy.copy(self._static_boards)
+            now = self.clock()
+            if now - self._last_updated >= self.update_period:
+                if self.incremental and self._raw_board is not None and \
+                        self._updates_since_rebuild < self.full_rebuild_period:
+                    self._update_moved_robot_position()
+                    self._updates_since_rebuild += 1
                 else:
-                    self._board = self._create_standard_influence_board()
-
-                self._update_and_draw_robot_position()
+                    self._update_and_draw_robot_position()
+                    self._updates_since_rebuild = 0
                 self._update_ball_position()
-                self.state.debug_manager.add_influence_map(self.export_board())
-                self._last_updated = self.state.timestamp
+                self._summed_area_table = None
+                self._last_updated = now
+                # l'envoi du tableau au UI-debug reste à une fois par seconde
+                if now - self._last_exported > DEBUG_EXPORT_PERIOD:
+                    self.debug_interface.add_influence_map(self.export_board())
+                    self._last_exported = now
 
     def export_board(self):
-        return self._board.tolist()
+        """ Copie int16 du tableau, envoyée telle quelle au UI-debug. """
+        if self._dtype.kind == 'f':
+            return numpy.rint(self._board).astype(numpy.int16)
+        return self._board.astype(numpy.int16)
 
     def find_points_over_strength_square(self, top_left_position, bottom_right_position, strength):
         """
         Retourne les points qui se trouve au-dessus ou égale à la force demandé dans le tableau principal(_board)
 
-        :param Positon top_left_position: la rangé supérieure
-        :param Position bottom_right_position: la rangé inférieure
+        :param Positon top_left_position: un coin du rectangle
+        :param Position bottom_right_position: le coin opposé du rectangle
         :param int strength: le force à trouvé qui est égale ou au dessus.
 
         :return: un liste de point qui se trouve au dessus ou égale à la force demandé
+        :rtype: une liste de tuple rangée * colonne (int * int) list
         """
-        assert isinstance(top_left_position, Position), "Cette méthode requiert un object Position"
-        assert isinstance(bottom_right_position, Position), "Cette méthode requiert un object Position"
-
-        top_row, left_column = self._transform_field_to_board_position(top_left_position)
-        bot_row, right_column = self._transform_field_to_board_position(bottom_right_position)
-        ind_x, ind_y = numpy.where(self._board[top_row:bot_row, left_column:right_column] >= strength)
-        ind_x = ind_x.tolist()
-        ind_x = [x+top_row for x in ind_x]
-        ind_y = ind_y.tolist()
-        ind_y = [x+left_column for x in ind_y]
-        indices = zip(ind_x, ind_y)
-        return list(indices)
+        window = self._get_region_window(top_left_position, bottom_right_position)
+        rows, columns = numpy.nonzero(self._board[window] >= strength)
+        return list(zip((rows + window[0].start).tolist(), (columns + window[1].start).tolist()))
 
     def find_points_under_strength_square(self, top_left_position, bottom_right_position, strength):
         """
         Retourne les points qui se trouve au-dessous ou égale à la force demandé dans le tableau principal(_board)
 
-        :param Positon top_left_position: la rangé supérieure
-        :param Position bottom_right_position: la rangé inférieure
+        :param Positon top_left_position: un coin du rectangle
+        :param Position bottom_right_position: le coin opposé du rectangle
         :param int strength: le force à trouvé qui est égale ou au dessous.
 
         :return: un liste de point qui se trouve au-dessous ou égale à la force demandé
         :rtype: une liste de tuple rangée * colonne (int * int) list
         """
-        assert isinstance(top_left_position, Position), "Cette méthode requiert un object Position"
-        assert isinstance(bottom_right_position, Position), "Cette méthode requiert un object Position"
-
-        top_row, left_column = self._transform_field_to_board_position(top_left_position)
-        bot_row, right_column = self._transform_field_to_board_position(bottom_right_position)
-        ind_x, ind_y = numpy.where(self._board[top_row:bot_row, left_column:right_column] <= strength)
-        ind_x = ind_x.tolist()
-        ind_x = [x+top_row for x in ind_x]
-        ind_y = ind_y.tolist()
-        ind_y = [x+left_column for x in ind_y]
-        indices = zip(ind_x, ind_y)
-        return list(indices)
+        window = self._get_region_window(top_left_position, bottom_right_position)
+        rows, columns = numpy.nonzero(self._board[window] <= strength)
+        return list(zip((rows + window[0].start).tolist(), (columns + window[1].start).tolist()))
 
     def find_max_value_in_board(self):
         """
@@ -155,13 +191,9 @@ class InfluenceMap(IntelligentModule):
         :return: la valeur maximale du tableau et la liste de point (rangée * colonne) des point qui ont la valeur max
         :rtype: tuple (int * (int * int) list)
         """
-        uniques = numpy.unique(self._board)
-        max_in_board = uniques[-1]
-        x, y = numpy.where(self._board >= max_in_board)
-        x = x.tolist()
-        y = y.tolist()
-        indices = zip(x, y)
-        return max_in_board, indices
+        max_in_board = self._board.max()
+        rows, columns = numpy.nonzero(self._board == max_in_board)
+        return max_in_board, list(zip(rows.tolist(), columns.tolist()))
 
     def find_min_value_in_board(self):
         """
@@ -170,16 +202,125 @@ class InfluenceMap(IntelligentModule):
         :return: la valeur minimale du tableau et la liste de point (rangée * colonne) des point qui ont la valeur min
         :rtype: tuple (int * (int * int) list)
         """
-        uniques = numpy.unique(self._board)
-        min_in_board = uniques[0]
-        x, y = numpy.where(self._board <= min_in_board)
-        x = x.tolist()
-        y = y.tolist()
-        indices = zip(x, y)
-        return min_in_board, indices
+        min_in_board = self._board.min()
+        rows, columns = numpy.nonzero(self._board == min_in_board)
+        return min_in_board, list(zip(rows.tolist(), columns.tolist()))
 
     def find_max_value_in_circle(self, center, radius):
-        pass
+        """
+        Retourne la plus grande valeur du tableau dans un cercle et la position de la case correspondante.
+
+        :rtype: tuple (int * Position)
+        """
+        values, positions = self.find_best_positions_in_circle(center, radius)
+        return values[0], positions[0]
+
+    def find_best_position_in_square(self, top_left_position, bottom_right_position, minimum=False):
+        """
+        Retourne la meilleure valeur (la plus grande, ou la plus petite si minimum) d'un rectangle du terrain et la
+        position de la case correspondante.
+
+        :rtype: tuple (int * Position)
+        """
+        window = self._get_region_window(top_left_position, bottom_right_position)
+        region = self._board[window]
+        row, column = numpy.unravel_index(region.argmin() if minimum else region.argmax(), region.shape)
+        return region[row, column], self._transform_board_to_field_positions(row + window[0].start,
+                                                                              column + window[1].start)[0]
+
+    def find_best_positions_in_circle(self, center, radius, number=1, minimum=False):
+        """
+        Retourne les number meilleures cases dont le centre est dans un cercle du terrain.
+
+        :param Position center: le centre du cercle
+        :param radius: le rayon du cercle en mm
+        :param int number: le nombre de cases à retourner
+        :param bool minimum: cherche les plus petites valeurs plutôt que les plus grandes
+        :return: les valeurs (numpy.ndarray) et les positions (liste de Position) des cases, de la meilleure à la pire
+        """
+        row, column = self._transform_field_to_board_position(self._clamp_to_field(center))
+        offsets = self._get_circle_offsets(radius)
+        rows = offsets[0] + row
+        columns = offsets[1] + column
+        on_board = (0 <= rows) & (rows < self._number_of_rows) & (0 <= columns) & (columns < self._number_of_columns)
+        return self._select_best_cells(rows[on_board], columns[on_board], number, minimum)
+
+    def find_best_positions_in_polygon(self, vertices, number=1, minimum=False):
+        """
+        Retourne les number meilleures cases dont le centre est dans un polygone du terrain.
+
+        :param vertices: les sommets (Position) du polygone, dans l'ordre
+        :param int number: le nombre de cases à retourner
+        :param bool minimum: cherche les plus petites valeurs plutôt que les plus grandes
+        :return: les valeurs (numpy.ndarray) et les positions (liste de Position) des cases, de la meilleure à la pire
+        """
+        rows, columns = self._get_polygon_cells(vertices)
+        return self._select_best_cells(rows, columns, number, minimum)
+
+    def find_best_position_along_ray(self, origin, target, minimum=False):
+        """
+        Retourne la meilleure case traversée par le segment origin -> target, coupé au bord du terrain. À valeur égale,
+        la case la plus proche de l'origine est retournée.
+
+        :rtype: tuple (int * Position)
+        """
+        length = numpy.hypot(target.x - origin.x, target.y - origin.y)
+        ratios = numpy.linspace(0, 1, int(length / (self._resolution / 2)) + 2)
+        xs = origin.x + (target.x - origin.x) * ratios
+        ys = origin.y + (target.y - origin.y) * ratios
+        on_field = (FIELD_X_LEFT <= xs) & (xs <= FIELD_X_RIGHT) & (FIELD_Y_BOTTOM <= ys) & (ys <= FIELD_Y_TOP)
+        # le rayon s'arrête au premier point qui sort du terrain
+        outside = numpy.flatnonzero(~on_field)
+        end = outside[0] if len(outside) else len(ratios)
+        assert end > 0, "le rayon doit partir d'un point du terrain"
+        rows, columns = self._transform_field_to_board_positions(xs[:end], ys[:end])
+        values = self._board[rows, columns]
+        best = values.argmin() if minimum else values.argmax()
+        return values[best], self._transform_board_to_field_positions(rows[best], columns[best])[0]
+
+    def find_best_square(self, size, minimum=False):
+        """
+        Cherche sur tout le terrain le carré de size mm de côté dont l'influence moyenne est la meilleure, à l'aide de la
+        table des sommes cumulées.
+
+        :return: la moyenne et la position du centre du carré
+        :rtype: tuple (float * Position)
+        """
+        side = max(1, min(int(round(size / self._resolution)), self._number_of_rows, self._number_of_columns))
+        table = self._get_summed_area_table()
+        sums = table[side:, side:] - table[:-side, side:] - table[side:, :-side] + table[:-side, :-side]
+        row, column = numpy.unravel_index(sums.argmin() if minimum else sums.argmax(), sums.shape)
+        x = self._columns_x[column] + (self._columns_x[column + side - 1] - self._columns_x[column]) / 2
+        y = self._rows_y[row] + (self._rows_y[row + side - 1] - self._rows_y[row]) / 2
+        return sums[row, column] / side ** 2, Position(x, y)
+
+    def get_influences_at_positions(self, positions):
+        """
+        Retourne l'influence de plusieurs positions du terrain d'un coup, les positions hors terrain vont au bord.
+
+        :rtype: numpy.ndarray
+        """
+        xs, ys = self._positions_to_arrays(positions)
+        rows, columns = self._transform_field_to_board_positions(xs, ys)
+        return self._board[rows, columns]
+
+    def get_mean_influences_around_positions(self, positions, half_size):
+        """
+        Retourne l'influence moyenne des carrés de 2 * half_size mm de côté centrés sur chaque position, calculée en
+        temps constant par carré avec la table des sommes cumulées.
+
+        :rtype: numpy.ndarray
+        """
+        xs, ys = self._positions_to_arrays(positions)
+        rows, columns = self._transform_field_to_board_positions(xs, ys)
+        half_cells = int(round(half_size / self._resolution))
+        top = numpy.maximum(rows - half_cells, 0)
+        bottom = numpy.minimum(rows + half_cells + 1, self._number_of_rows)
+        left = numpy.maximum(columns - half_cells, 0)
+        right = numpy.minimum(columns + half_cells + 1, self._number_of_columns)
+        table = self._get_summed_area_table()
+        sums = table[bottom, right] - table[top, right] - table[bottom, left] + table[top, left]
+        return sums / ((bottom - top) * (right - left))
 
     def get_influence_at_position(self, position):
         assert isinstance(position, Position), "accessing this function require a Position object"
@@ -208,27 +349,72 @@ class InfluenceMap(IntelligentModule):
 
     def _update_and_draw_robot_position(self):
         """
-        Fetch la position des robots dans le gamestate et les applique sur le tableau principal
-        """
-        robots_position = []
-        for i in range(self.state.get_count_player()):
-            try:
-                friend_position = self._transform_field_to_board_position(self.state.get_player_position(i))
-                robots_position.append(friend_position)
-                self._add_point_and_propagate_influence(friend_position[0], friend_position[1], self._board, 100)
-            except:
-                pass
-
-            try:
-                enemy_position = self._transform_field_to_board_position(self.state.get_enemy_position(i))
-                robots_position.append(enemy_position)
-                self._add_point_and_propagate_influence(enemy_position[0], enemy_position[1], self._board, -100)
-            except:
-                pass
+        Fetch la position des robots dans le gamestate et reconstruit le tableau principal à partir du tableau statique
+        """
+        # purge the board with a new one (static or not)
+        if self._static_boards is not None:
+            self._raw_board = self._static_boards.astype(self._get_raw_dtype())
+        else:
+            self._raw_board = numpy.zeros((self._number_of_rows, self._number_of_columns), self._get_raw_dtype())
+
+        self._robot_cells = self._get_robot_cells()
+        for row, column, strength in self._robot_cells.values():
+            self._add_point_and_propagate_influence(row, column, self._raw_board, strength)
+        self.moved_robots = len(self._robot_cells)
+
+        self._board = self._raw_board.astype(self._dtype)
         self._clamp_board(self._board)
 
+    def _update_moved_robot_position(self):
+        """
+        Retire puis repose l'influence des robots qui ont changé de case depuis la dernière mise à jour et reclampe
+        seulement les fenêtres touchées du tableau principal
+        """
+        robot_cells = self._get_robot_cells()
+        touched_cells = []
+        for key in set(self._robot_cells) | set(robot_cells):
+            old_cell = self._robot_cells.get(key)
+            new_cell = robot_cells.get(key)
+            if old_cell == new_cell:
+                continue
+            if old_cell is not None:
+                self._add_point_and_propagate_influence(old_cell[0], old_cell[1], self._raw_board, -old_cell[2])
+                touched_cells.append(old_cell)
+            if new_cell is not None:
+                self._add_point_and_propagate_influence(new_cell[0], new_cell[1], self._raw_board, new_cell[2])
+                touched_cells.append(new_cell)
+        self._robot_cells = robot_cells
+        self.moved_robots = len(touched_cells)
+
+        for row, column, _ in touched_cells:
+            window = self._get_window(row, column)[0]
+            self._board[window] = numpy.clip(self._raw_board[window], -self._strength_peak, self._strength_peak)
+
+    def _get_robot_cells(self):
+        """
+        Retourne la case et la force de chaque robot sur le terrain, les robots hors du terrain n'ont pas d'influence
+
+        :return: dictionnaire {(est allié, id du robot): (rangée, colonne, force)}
+        """
+        game_state = self.ws.game_state
+        players = [((True, player_id), player.pose.position, 100)
+                   for player_id, player in game_state.my_team.players.items()]
+        players += [((False, player_id), player.pose.position, -100)
+                    for player_id, player in game_state.other_team.players.items()]
+        robot_cells = {}
+        for key, position, strength in players:
+            if self._is_on_field(position):
+                robot_cells[key] = self._transform_field_to_board_position(position) + (strength,)
+        return robot_cells
+
+    def _get_raw_dtype(self):
+        """ Le tableau sans clamp des robots doit contenir la somme de toutes les influences sans déborder. """
+        return numpy.int32 if self._dtype == numpy.int16 else numpy.float32
+
     def _update_ball_position(self):
-        self._ball_position_on_board = self._transform_field_to_board_position(self.state.get_ball_position())
+        ball_position = self.ws.game_state.get_ball_position()
+        if self._is_on_field(ball_position):
+            self._ball_position_on_board = self._transform_field_to_board_position(ball_position)
 
     def _calculate_rows_and_columns(self):
         """
@@ -244,12 +430,13 @@ class InfluenceMap(IntelligentModule):
 
     def _create_standard_influence_board(self):
         """
-        Crée un objet numpy.ndarray, une liste à 2 dimenson de self._number_of_rows par self._number_of_columns d'int16.
+        Crée un objet numpy.ndarray, une liste à 2 dimenson de self._number_of_rows par self._number_of_columns du
+        type du tableau (int16 par défaut).
 
-        :return: Un numpy.ndarray d'int16 de self._number_of_rows par self._number_of_columns.
-        :rtype: numpy.ndarray dtype=numpy.int16
+        :return: Un numpy.ndarray de self._number_of_rows par self._number_of_columns.
+        :rtype: numpy.ndarray dtype=numpy.int16 ou numpy.float32
         """
-        return numpy.zeros((self._number_of_rows, self._number_of_columns), numpy.int16)
+        return numpy.zeros((self._number_of_rows, self._number_of_columns), self._dtype)
 
     def _adjust_effect_radius(self):
         """
@@ -295,7 +482,7 @@ class InfluenceMap(IntelligentModule):
         assert(isinstance(board_to_apply, numpy.ndarray))
         assert(board_to_apply.shape[0] == self._number_of_rows)
         assert(board_to_apply.shape[1] == self._number_of_columns)
-        assert(board_to_apply.dtype == numpy.int16)
+        assert(board_to_apply.dtype == self._dtype)
 
         board_to_apply[0] = self._border_strength
         board_to_apply[:, 0] = self._border_strength
@@ -306,37 +493,45 @@ class InfluenceMap(IntelligentModule):
         border_variance = 2
         temp_effectradius = int(ceil(ROBOT_RADIUS / self._resolution)) + border_variance
 
-        # TODO make sure this does what you think it does.
         # Top border
-        for border in range(0, self._number_of_columns):
-            # only for the rows affected by the change.
-            for x in range(0, temp_effectradius):
-
-                columnmin = max(0, (border - temp_effectradius - 1))
-                columnmax = min(self._number_of_columns, (border + temp_effectradius + 1))
-
-                # for every columns affected
-                for y in range(columnmin, columnmax):
-                    decay = self._compute_value_by_distance(self._border_strength, self._distance(0, border, x, y))
-                    board_to_apply[x, y] += decay
-
+        board_to_apply[:temp_effectradius, :] += self._compute_border_profile(self._number_of_columns,
+                                                                              temp_effectradius)
         # left border
-        for border in range(0, self._number_of_rows):
-
-            for y in range(0, temp_effectradius):
-
-                rowmin = max(0, (border - temp_effectradius - 1))
-                rowmax = min(self._number_of_rows, border + temp_effectradius + 1)
-
-                for x in range(rowmin, rowmax):
-                    decay = self._compute_value_by_distance(self._border_strength, self._distance(border, 0, x, y))
-                    board_to_apply[x, y] += decay
+        board_to_apply[:, :temp_effectradius] += self._compute_border_profile(self._number_of_rows,
+                                                                              temp_effectradius).T
 
         # Prend l'image créer et la flip l-r et u-d puis additionne
         temp_inverse_board = numpy.copy(board_to_apply)
         temp_inverse_board = temp_inverse_board[::-1, ::-1]
         board_to_apply += temp_inverse_board
 
+    def _compute_border_profile(self, length, depth):
+        """
+        Calcule l'influence d'une bordure de length cases sur les depth premières rangées qui la longent. Chaque case de
+        la bordure influence les cases dont la colonne est entre -depth - 1 et depth de la sienne.
+
+        La contribution d'une case de la bordure ne dépend que du décalage entre les colonnes: le profil est donc la
+        somme, par des sommes cumulatives, du noyau des décalages qui restent dans la bordure, sans tableau de
+        length par length.
+
+        :return: un numpy.ndarray de depth par length
+        """
+        depths = numpy.arange(depth)[:, numpy.newaxis]
+        offsets = numpy.arange(-depth - 1, depth + 1)[numpy.newaxis, :]
+        kernel = self._compute_values_by_distance(self._border_strength, numpy.sqrt(depths ** 2 + offsets ** 2))
+        # chaque contribution est convertie dans le type du board avant la somme, comme une somme de ce type
+        kernel = kernel.astype(self._dtype)
+        accumulator = numpy.int64 if numpy.issubdtype(self._dtype, numpy.integer) else numpy.float64
+        cumulative = numpy.zeros((depth, kernel.shape[1] + 1), dtype=accumulator)
+        numpy.cumsum(kernel, axis=1, dtype=accumulator, out=cumulative[:, 1:])
+
+        # la colonne j reçoit les décalages o = j - k des cases k de la bordure, 0 <= k < length
+        columns = numpy.arange(length)
+        first_offset = numpy.maximum(columns - length + 1, -depth - 1)
+        last_offset = numpy.minimum(columns, depth)
+        profile = cumulative[:, last_offset + depth + 2] - cumulative[:, first_offset + depth + 1]
+        return profile.astype(self._dtype)
+
     def _initialize_goals_board(self, v_h_goal_offset):
         """
         Mets des buts sur le starterboard et le board
@@ -415,6 +610,31 @@ class InfluenceMap(IntelligentModule):
         """
         return int(strength * (self._strength_decay ** distance))
 
+    def _compute_values_by_distance(self, strength, distances):
+        """
+        Version vectorisée de _compute_value_by_distance pour un tableau de distances. Les valeurs sont tronquées vers 0
+        sauf en mode float32.
+
+        :rtype: numpy.ndarray du type du tableau
+        """
+        values = strength * (self._strength_decay ** distances)
+        if self._dtype.kind in "iu":
+            values = numpy.trunc(values)
+        return values.astype(self._dtype)
+
+    def _get_kernel(self, strength):
+        """
+        Retourne le noyau carré de 2 * effect_radius + 1 cases de l'influence d'un point de force strength, calculé une
+        seule fois par force.
+        """
+        kernel = self._kernels.get(strength)
+        if kernel is None:
+            offsets = numpy.arange(-self._effect_radius, self._effect_radius + 1)
+            distances = numpy.sqrt(offsets[:, numpy.newaxis] ** 2 + offsets[numpy.newaxis, :] ** 2)
+            kernel = self._compute_values_by_distance(strength, distances)
+            self._kernels[strength] = kernel
+        return kernel
+
     def _clamp_board(self, board_to_clamp):
         """
         Arrondis toutes les cellules du tableau pour qu'ils soient dans [-self._strength_peak, self._strength_peak].
@@ -436,34 +656,117 @@ class InfluenceMap(IntelligentModule):
         :type board_to_apply: numpy.ndarray dtype=numpy.int16
         :param int strength: la force du point à appliquer
         """
-        assert (isinstance(row, int))
-        assert (isinstance(column, int))
         assert (0 <= row < self._number_of_rows)
         assert (0 <= column < self._number_of_columns)
-        assert (isinstance(board_to_apply, numpy.ndarray))
-        assert (board_to_apply.shape[0] == self._number_of_rows)
-        assert (board_to_apply.shape[1] == self._number_of_columns)
-        assert (isinstance(strength, int))
         assert (-self._strength_peak <= strength <= self._strength_peak)
 
-        rowmin = max(0, (row - self._effect_radius))
-        rowmax = min((self._number_of_rows - 1), (row + self._effect_radius))
-
-        columnmin = max(0, (column - self._effect_radius))
-        columnmax = min((column + self._effect_radius), self._number_of_columns)
-
-        cases_iterator = numpy.nditer(board_to_apply[rowmin:(rowmax + 1), columnmin:(columnmax + 1)],
-                                      flags=['multi_index'], op_flags=['readwrite'])
-
-        while not cases_iterator.finished:
-            to_put = self._compute_value_by_distance(strength, self._distance(cases_iterator.multi_index[0],
-                                                                              cases_iterator.multi_index[1],
-                                                                              (row - rowmin),
-                                                                              (column - columnmin)))
-            influence_already_in_case = cases_iterator[0]
-            influence_to_put_instead = to_put + influence_already_in_case
-            cases_iterator[0] = influence_to_put_instead
-            cases_iterator.iternext()
+        window, kernel_window = self._get_window(row, column)
+        board_to_apply[window] += self._get_kernel(strength)[kernel_window]
+
+    def _get_window(self, row, column):
+        """
+        Retourne la fenêtre du tableau autour d'une case qui est touchée par son influence et la partie correspondante
+        du noyau, coupées aux bords du tableau.
+
+        :return: tuple (slice * slice) du tableau, tuple (slice * slice) du noyau
+        """
+        radius = self._effect_radius
+        rowmin = max(0, row - radius)
+        rowmax = min(self._number_of_rows, row + radius + 1)
+        columnmin = max(0, column - radius)
+        columnmax = min(self._number_of_columns, column + radius + 1)
+
+        return (slice(rowmin, rowmax), slice(columnmin, columnmax)), \
+               (slice(rowmin - row + radius, rowmax - row + radius),
+                slice(columnmin - column + radius, columnmax - column + radius))
+
+    def _get_region_window(self, position_a, position_b):
+        """ Retourne la fenêtre du tableau qui couvre le rectangle entre deux coins opposés, bornée au terrain. """
+        assert isinstance(position_a, Position), "Cette méthode requiert un object Position"
+        assert isinstance(position_b, Position), "Cette méthode requiert un object Position"
+
+        row_a, column_a = self._transform_field_to_board_position(self._clamp_to_field(position_a))
+        row_b, column_b = self._transform_field_to_board_position(self._clamp_to_field(position_b))
+        return slice(min(row_a, row_b), max(row_a, row_b) + 1), \
+            slice(min(column_a, column_b), max(column_a, column_b) + 1)
+
+    def _get_circle_offsets(self, radius):
+        """ Retourne les décalages (rangées, colonnes) des cases d'un cercle de rayon radius mm, calculés une fois. """
+        offsets = self._circle_offsets.get(radius)
+        if offsets is None:
+            radius_in_cells = radius / self._resolution
+            reach = int(radius_in_cells)
+            rows, columns = numpy.indices((2 * reach + 1, 2 * reach + 1)) - reach
+            inside = rows ** 2 + columns ** 2 <= radius_in_cells ** 2
+            offsets = (rows[inside], columns[inside])
+            self._circle_offsets[radius] = offsets
+        return offsets
+
+    def _get_polygon_cells(self, vertices):
+        """ Retourne les cases (rangées, colonnes) dont le centre est dans le polygone, gardées en cache. """
+        key = tuple((vertex.x, vertex.y) for vertex in vertices)
+        cells = self._polygon_cells.get(key)
+        if cells is None:
+            polygon = numpy.array(key, dtype=numpy.float64)
+            xs = self._columns_x[numpy.newaxis, :]
+            ys = self._rows_y[:, numpy.newaxis]
+            inside = numpy.zeros((self._number_of_rows, self._number_of_columns), dtype=bool)
+            # test pair-impair: on compte les arêtes traversées par une demi-droite horizontale partant de chaque case
+            for (x1, y1), (x2, y2) in zip(polygon, numpy.roll(polygon, -1, axis=0)):
+                if y1 == y2:
+                    continue
+                crossing = ((y1 > ys) != (y2 > ys)) & (xs < x1 + (ys - y1) * (x2 - x1) / (y2 - y1))
+                inside ^= crossing
+            cells = numpy.nonzero(inside)
+            if len(self._polygon_cells) > MAX_CACHED_POLYGONS:
+                self._polygon_cells.clear()
+            self._polygon_cells[key] = cells
+        return cells
+
+    def _select_best_cells(self, rows, columns, number, minimum):
+        """ Garde les number meilleures cases parmi les cases données, triées de la meilleure à la pire. """
+        assert len(rows) > 0, "la région demandée ne contient aucune case"
+        values = self._board[rows, columns]
+        scores = values if minimum else -values.astype(numpy.float64)
+        number = min(number, len(values))
+        best = numpy.argpartition(scores, number - 1)[:number]
+        best = best[numpy.argsort(scores[best], kind="stable")]
+        return values[best], self._transform_board_to_field_positions(rows[best], columns[best])
+
+    def _get_summed_area_table(self):
+        """ Table des sommes cumulées du tableau bordée d'un zéro, recalculée au plus une fois par mise à jour. """
+        if self._summed_area_table is None:
+            table = numpy.zeros((self._number_of_rows + 1, self._number_of_columns + 1), dtype=numpy.float64)
+            numpy.cumsum(numpy.cumsum(self._board, axis=0, dtype=numpy.float64), axis=1, out=table[1:, 1:])
+            self._summed_area_table = table
+        return self._summed_area_table
+
+    @staticmethod
+    def _positions_to_arrays(positions):
+        xs = numpy.array([position.x for position in positions], dtype=numpy.float64)
+        ys = numpy.array([position.y for position in positions], dtype=numpy.float64)
+        return xs, ys
+
+    @staticmethod
+    def _clamp_to_field(position):
+        return Position(min(max(position.x, FIELD_X_LEFT), FIELD_X_RIGHT),
+                        min(max(position.y, FIELD_Y_BOTTOM), FIELD_Y_TOP))
+
+    def _transform_field_to_board_positions(self, xs, ys):
+        """ Version vectorisée de _transform_field_to_board_position, les positions hors terrain vont au bord. """
+        columns = ((abs(FIELD_X_LEFT) + FIELD_X_RIGHT) / 2 - xs) // self._resolution
+        rows = (ys + (abs(FIELD_Y_BOTTOM) + FIELD_Y_TOP) / 2) // self._resolution
+        return numpy.clip(rows, 0, self._number_of_rows - 1).astype(numpy.int64), \
+            numpy.clip(columns, 0, self._number_of_columns - 1).astype(numpy.int64)
+
+    def _transform_board_to_field_positions(self, rows, columns):
+        """ Retourne la liste des Position du centre des cases données. """
+        xs = numpy.atleast_1d(self._columns_x[columns])
+        ys = numpy.atleast_1d(self._rows_y[rows])
+        return [Position(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+
+    def _is_on_field(self, position):
+        return FIELD_X_LEFT <= position.x <= FIELD_X_RIGHT and FIELD_Y_BOTTOM <= position.y <= FIELD_Y_TOP
 
     def _transform_field_to_board_position(self, position):
         assert(isinstance(position, Position))
@@ -490,20 +793,12 @@ class InfluenceMap(IntelligentModule):
         assert(0 <= row <= self._number_of_rows)
         assert(0 <= column <= self._number_of_columns)
 
-        # This should hold up
+        # l'axe des colonnes est inversé par rapport à l'axe X du terrain, voir _transform_field_to_board_position
         ypos = row * self._resolution
         xpos = column * self._resolution
 
         ypos = (ypos - ((abs(FIELD_Y_BOTTOM) + FIELD_Y_TOP) / 2)) + (self._resolution / 2)
-        xpos = (xpos - ((abs(FIELD_X_LEFT) + FIELD_X_RIGHT) / 2)) + (self._resolution / 2)
+        xpos = ((abs(FIELD_X_LEFT) + FIELD_X_RIGHT) / 2) - xpos - (self._resolution / 2)
 
         tempposition = Position(xpos, ypos)
         return tempposition
-
-    def _distance(self, x1, y1, x2, y2):
-        assert (isinstance(x1, int or float))
-        assert (isinstance(x2, int))
-        assert (isinstance(y1, int))
-        assert (isinstance(y2, int))
-
-        return sqrt(((x2 - x1) ** 2) + ((y2 - y1) ** 2))
\ No newline at end of file
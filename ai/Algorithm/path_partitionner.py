@@ -1,11 +1,10 @@
-import time
+import numpy as np
 
+from RULEngine.Util import geometry_np
 from RULEngine.Util.Pose import Pose
 from RULEngine.Util.Position import Position
-from RULEngine.Util.geometry import get_distance, conv_position_2_list
 from ai.Algorithm.IntelligentModule import Pathfinder
 from ai.states.world_state import WorldState
-import numpy as np
 
 
 class Path:
@@ -24,6 +23,13 @@ class Path:
 
 
 class PathPartitionner(Pathfinder):
+    """
+        Divise le segment départ-cible d'un robot en sous-segments qui
+        contournent les autres robots. Les chemins de tous les robots sont
+        planifiés ensemble: les positions et vitesses des obstacles sont lues
+        une seule fois par frame et chaque niveau de subdivision teste tous les
+        segments contre tous les obstacles en une opération numpy.
+    """
     def __init__(self, p_worldstate: WorldState):
         super().__init__(p_worldstate)
         self.p_worldstate = p_worldstate
@@ -32,168 +38,169 @@ class PathPartitionner(Pathfinder):
         self.res = 200
         self.gap_proxy = 200
         self.max_recurs = 5
-        self.players_obstacles = []
-        self.pose_obstacle = None
-
-    def fastpathplanner(self, path, depth=0, avoid_dir=None):
-        if self.is_path_collide(path) and depth < self.max_recurs:
-
-            [sub_target, avoid_dir] = self.search_point(path, avoid_dir)
-
-            path_1 = Path(path.start, sub_target)
-
-            path_1 = self.fastpathplanner(path_1, depth + 1, avoid_dir)
-
-            path_2 = Path(sub_target, path.goal)
-            path_2 = self.fastpathplanner(path_2, depth + 1, avoid_dir)
-
-            path = path_1.join_segments(path_2)
-
-        return path
+        self.obstacles_position = np.zeros((0, 2))
+        self.obstacles_velocity = np.zeros((0, 2))
+        self.friend_index = {}
+
+    def update_obstacles(self):
+        """ Construit les tableaux (M, 2) des positions et vitesses de tous les robots, alliés puis ennemis. """
+        friends = list(self.game_state.game.friends.players.values())
+        players = friends + list(self.game_state.game.enemies.players.values())
+        self.obstacles_position = np.array([[player.pose.position.x, player.pose.position.y] for player in players],
+                                           dtype=np.float64).reshape(-1, 2)
+        self.obstacles_velocity = np.array([player.velocity[0:2] for player in players],
+                                           dtype=np.float64).reshape(-1, 2)
+        self.friend_index = {player.id: idx for idx, player in enumerate(friends)}
 
     def get_path(self, player_id=0, pose_target=Pose()):
-        self.player = self.game_state.game.friends.players[player_id]
-        objects = []
-        i = 0
-
-        self.pose_obstacle = np.zeros((len(self.game_state.game.friends.players.values())+len(self.game_state.game.enemies.players.values()) - 1, 2))
-        for d1, d2 in zip(self.game_state.game.friends.players.values(), self.game_state.game.enemies.players.values()):
-            if d1.id != player_id:
-                self.players_obstacles += [d1]
-                self.players_obstacles += [d2]
-                self.pose_obstacle[i, :] = d1.pose.position.conv_2_np()
-                self.pose_obstacle[i+1, :] = d2.pose.position.conv_2_np()
-                i += 2
-            else:
-                self.players_obstacles += [d2]
-                self.pose_obstacle[i, :] = d2.pose.position.conv_2_np()
-                i += 1
-
-        self.path = Path(self.game_state.get_player_pose(player_id).position, pose_target.position)
-
-        return self.fastpathplanner(self.path)
-
-    def is_path_collide(self, path):
-        dist = get_distance(path.goal, path.start)
-        if dist < 0.001:
-            return False
-        pose_start = path.start.conv_2_np()
-        direction = (path.goal.conv_2_np() - pose_start) / dist
-        for pose_obs in self.pose_obstacle:
-            vec_robot_2_obs_temp = pose_obs - pose_start
-            len_along_path_temp = np.dot(vec_robot_2_obs_temp, direction)
-            dist_from_path_temp = np.sqrt(np.linalg.norm(vec_robot_2_obs_temp)**2 - len_along_path_temp**2)
-            if self.gap_proxy > dist_from_path_temp and len_along_path_temp > 0:
-                return True
-        return False
-
-    def find_closest_obstacle(self, point, path):
-
-        dist_point_obs = np.inf
-        closest_obs = None
-        closest_player = self.players_obstacles[0].pose.position.conv_2_np()
-        if get_distance(path.start, path.goal) < 0.001:
-            return [closest_obs, dist_point_obs, closest_player]
-        pose_start = path.start.conv_2_np()
-        direction = (point.conv_2_np() - pose_start) / get_distance(point, path.start)
-
-        for idx, pose_obs in enumerate(self.pose_obstacle):
-            vec_robot_2_obs_temp = pose_obs - pose_start
-            len_along_path_temp = np.dot(vec_robot_2_obs_temp, direction)
-            dist_from_path_temp = np.sqrt(np.linalg.norm(vec_robot_2_obs_temp) ** 2 - len_along_path_temp ** 2)
-            if self.gap_proxy > dist_from_path_temp and len_along_path_temp > 0:
-                obstacle_pos = Position.from_np(pose_obs)
-                dist = get_distance(path.start, obstacle_pos)
-                if dist < dist_point_obs:
-                    dist_point_obs = dist
-                    closest_obs = obstacle_pos
-                    closest_player = self.players_obstacles[idx]
-        return [closest_obs, dist_point_obs, closest_player]
-
-    def verify_sub_target(self, sub_target):
-        for pose_obs in self.pose_obstacle:
-            dist_sub_2_obs = get_distance(Position.from_np(pose_obs), sub_target)
-            if dist_sub_2_obs < self.gap_proxy:
-                return True
-        return False
-
-    def search_point(self, path, avoid_dir=None):
-        pose_robot = path.start
-        pose_target = path.goal
-        [pose_obstacle_closest, dist_point_obs, closest_player] = self.find_closest_obstacle(pose_target, path)
-        if pose_obstacle_closest is None:
-            sub_target = pose_target
-            return sub_target
-
-
-        direction = np.array(conv_position_2_list(pose_target - pose_robot)) / get_distance(pose_target, pose_robot)
-        vec_robot_2_obs = np.array(conv_position_2_list(pose_obstacle_closest - pose_robot))
-        len_along_path = np.dot(vec_robot_2_obs, np.transpose(direction))
-
-        if len_along_path > 0 and len_along_path < get_distance(pose_target, pose_robot):
-            vec_perp = np.cross(np.append(direction, 0), np.array([0, 0, 1]))
-            vec_perp = vec_perp[0:2]
-            #print(self.player.velocity)
-            robot_speed = np.array(self.player.velocity[0:2])
-            obs_speed = np.array(closest_player.velocity[0:2])
-            avoid_dir = np.dot(obs_speed-robot_speed, vec_perp)*vec_perp
-            #print(robot_speed)
-            #print(vec_perp)
-            if avoid_dir is None:
-
-                sub_target_1 = np.array(conv_position_2_list(pose_robot)) + direction * len_along_path + vec_perp * self.res
-                sub_target_2 = np.array(conv_position_2_list(pose_robot)) + direction * len_along_path - vec_perp * self.res
-                bool_sub_target_1 = self.verify_sub_target(Position(sub_target_1[0], sub_target_1[1]))
-                bool_sub_target_2 = self.verify_sub_target(Position(sub_target_2[0], sub_target_2[1]))
-
-                while bool_sub_target_1:
-                    sub_target_1 += vec_perp * self.res
-                    bool_sub_target_1 = self.verify_sub_target(Position(sub_target_1[0], sub_target_1[1]))
-
-                sub_target_1 += vec_perp * 0.01 * self.res
-                while bool_sub_target_2:
-
-                    sub_target_2 -= vec_perp * self.res
-                    bool_sub_target_2 = self.verify_sub_target(Position(sub_target_2[0], sub_target_2[1]))
-
-                sub_target_2 -= vec_perp * 0.01 * self.res
-
-                if abs(get_distance(path.start, Position(sub_target_1[0], sub_target_1[1])) - get_distance(path.start, Position(sub_target_2[0], sub_target_2[1]))) < 300:
-
-                    sub_target = sub_target_1
-                    avoid_dir = -vec_perp
-
-                else:
-                    if get_distance(path.start, Position(sub_target_1[0], sub_target_1[1])) < get_distance(path.start, Position(sub_target_2[0], sub_target_2[1])):
-                        sub_target = sub_target_1
-                        avoid_dir = -vec_perp
-
+        return self.get_paths({player_id: pose_target})[player_id]
+
+    def get_paths(self, pose_targets):
+        """
+            Planifie en un seul appel les chemins de plusieurs robots alliés.
+
+            :param pose_targets: dictionnaire {id du robot: Pose cible}
+            :return: dictionnaire {id du robot: Path}
+        """
+        self.update_obstacles()
+        player_ids = list(pose_targets.keys())
+        robots = np.array([self.friend_index[player_id] for player_id in player_ids], dtype=np.int64)
+        starts = self.obstacles_position[robots]
+        goals = np.array([[pose_targets[player_id].position.x, pose_targets[player_id].position.y]
+                          for player_id in player_ids], dtype=np.float64).reshape(-1, 2)
+        # un robot n'est pas un obstacle pour lui-même
+        masks = np.ones((len(player_ids), len(self.obstacles_position)), dtype=bool)
+        masks[np.arange(len(player_ids)), robots] = False
+
+        all_points = self.fastpathplanner(starts, goals, masks, self.obstacles_velocity[robots])
+
+        paths = {}
+        for player_id, points in zip(player_ids, all_points):
+            path = Path(self.game_state.get_player_pose(player_id).position, pose_targets[player_id].position)
+            path.points = [path.start] + [Position(point[0], point[1]) for point in points[1:-1]] + [path.goal]
+            paths[player_id] = path
+        if len(player_ids) == 1:
+            self.path = paths[player_ids[0]]
+        return paths
+
+    def fastpathplanner(self, starts, goals, masks, robots_velocity):
+        """
+            Subdivise les segments (départ, cible) niveau par niveau. À chaque
+            niveau, tous les segments encore en collision, tous robots
+            confondus, sont testés ensemble contre les obstacles.
+
+            :return: liste, par robot, des points (np.array) du chemin
+        """
+        all_points = [[start, goal] for start, goal in zip(starts, goals)]
+        # indique pour chaque segment s'il doit encore être vérifié
+        all_open = [[True] for _ in all_points]
+
+        for _ in range(self.max_recurs):
+            segments = [(robot, idx) for robot, is_open in enumerate(all_open)
+                        for idx, segment_open in enumerate(is_open) if segment_open]
+            if not segments:
+                break
+            segment_robots = np.array([robot for robot, _ in segments], dtype=np.int64)
+            segment_starts = np.array([all_points[robot][idx] for robot, idx in segments])
+            segment_goals = np.array([all_points[robot][idx + 1] for robot, idx in segments])
+            closest_obstacles = self.find_closest_obstacle(segment_starts, segment_goals, masks[segment_robots])
+
+            sub_targets = {}
+            for segment, robot, start, goal, obstacle in zip(segments, segment_robots, segment_starts,
+                                                             segment_goals, closest_obstacles):
+                if obstacle >= 0:
+                    sub_target = self.search_point(start, goal, obstacle, robots_velocity[robot], masks[robot])
+                    if sub_target is not None:
+                        sub_targets[segment] = sub_target
+
+            for robot in set(segment_robots.tolist()):
+                points = all_points[robot]
+                new_points = [points[0]]
+                new_open = []
+                for idx, point in enumerate(points[1:]):
+                    sub_target = sub_targets.get((robot, idx))
+                    if sub_target is not None:
+                        new_points += [sub_target, point]
+                        new_open += [True, True]
                     else:
-                        sub_target = sub_target_2
-                        avoid_dir = vec_perp
-
-            else:
-                # if np.dot(avoid_dir, np.transpose(vec_perp)) < 0:
-                #     vec_perp = -vec_perp
-                if np.linalg.norm(avoid_dir) > 0.001:
-                    avoid_dir = avoid_dir/np.linalg.norm(avoid_dir)
-                elif np.dot(avoid_dir, np.transpose(vec_perp)) < 0:
-                    avoid_dir = -vec_perp
-                else:
-                    avoid_dir = vec_perp
-                sub_target = np.array(conv_position_2_list(pose_robot)) + direction * len_along_path + vec_perp * self.res
-
-                bool_sub_target = self.verify_sub_target(Position(sub_target[0], sub_target[1]))
-                while bool_sub_target:
-                    sub_target -= avoid_dir * self.res
-                    bool_sub_target = self.verify_sub_target(Position(sub_target[0], sub_target[1]))
-
-                sub_target -= avoid_dir * 0.01 * self.res
-                avoid_dir = vec_perp
-            sub_target = Position(sub_target[0], sub_target[1])
+                        new_points.append(point)
+                        new_open.append(False)
+                all_points[robot] = new_points
+                all_open[robot] = new_open
+
+        return all_points
+
+    def is_path_collide(self, starts, goals, masks):
+        """ Retourne, pour chaque segment (K, 2), s'il passe trop près d'un des obstacles permis par masks (K, M). """
+        return self.find_closest_obstacle(starts, goals, masks) >= 0
+
+    def find_closest_obstacle(self, starts, goals, masks):
+        """
+            Pour chaque segment, cherche l'obstacle le plus proche du départ
+            parmi ceux qui sont devant le robot et à moins de gap_proxy de la
+            droite départ-cible.
+
+            :return: index de l'obstacle pour chaque segment, -1 s'il n'y en a aucun
+        """
+        vectors = goals - starts
+        lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+        directions = vectors / np.where(lengths < 0.001, 1, lengths)[:, np.newaxis]
+        to_obstacles = self.obstacles_position[np.newaxis, :, :] - starts[:, np.newaxis, :]
+        len_along_path = to_obstacles[..., 0] * directions[:, 0, np.newaxis] + \
+            to_obstacles[..., 1] * directions[:, 1, np.newaxis]
+        dist_from_path = np.abs(to_obstacles[..., 1] * directions[:, 0, np.newaxis] -
+                                to_obstacles[..., 0] * directions[:, 1, np.newaxis])
+        in_path = masks & (len_along_path > 0) & (dist_from_path < self.gap_proxy) & \
+            (lengths >= 0.001)[:, np.newaxis]
+
+        dist_start_obs = np.where(in_path, np.hypot(to_obstacles[..., 0], to_obstacles[..., 1]), np.inf)
+        closest_obstacles = np.argmin(dist_start_obs, axis=1)
+        closest_obstacles[~in_path.any(axis=1)] = -1
+        return closest_obstacles
+
+    def is_path_blocked(self, start, points, obstacles):
+        """ Indique si un des segments start -> points passe à moins de gap_proxy d'un des obstacles (M, 2). """
+        path = np.array([start] + [[point.x, point.y] for point in points], dtype=np.float64)
+        distances = geometry_np.get_distances_to_segments(obstacles[np.newaxis, :, :], path[:-1, np.newaxis, :],
+                                                          path[1:, np.newaxis, :])
+        return bool((distances < self.gap_proxy).any())
+
+    def verify_sub_target(self, sub_targets, mask):
+        """ Retourne, pour chaque point (C, 2), s'il est à moins de gap_proxy d'un des obstacles permis par mask. """
+        vec_obs_2_sub = sub_targets[:, np.newaxis, :] - self.obstacles_position[np.newaxis, mask, :]
+        return (np.hypot(vec_obs_2_sub[..., 0], vec_obs_2_sub[..., 1]) < self.gap_proxy).any(axis=1)
+
+    def find_free_point(self, point, step, mask):
+        """ Retourne le premier point libre de la suite point, point + step, point + 2 * step, ... """
+        # un obstacle bloque au plus deux points consécutifs, la suite contient donc toujours un point libre
+        candidates = point + np.arange(2 * np.count_nonzero(mask) + 1)[:, np.newaxis] * step
+        return candidates[np.argmin(self.verify_sub_target(candidates, mask))]
+
+    def search_point(self, start, goal, obstacle, robot_velocity, mask):
+        """
+            Cherche un point intermédiaire qui contourne l'obstacle, du côté
+            indiqué par la vitesse relative de l'obstacle.
+
+            :return: le point (np.array), ou None si l'obstacle n'est pas entre le départ et la cible
+        """
+        dist_path = np.linalg.norm(goal - start)
+        direction = (goal - start) / dist_path
+        len_along_path = np.dot(self.obstacles_position[obstacle] - start, direction)
+        if not 0 < len_along_path < dist_path:
+            return None
+
+        vec_perp = np.array([direction[1], -direction[0]])
+        avoid_dir = np.dot(self.obstacles_velocity[obstacle] - robot_velocity, vec_perp) * vec_perp
+        if np.linalg.norm(avoid_dir) > 0.001:
+            avoid_dir = avoid_dir / np.linalg.norm(avoid_dir)
+        elif np.dot(avoid_dir, vec_perp) < 0:
+            avoid_dir = -vec_perp
         else:
-            sub_target = pose_target
-        return [sub_target, avoid_dir]
+            avoid_dir = vec_perp
+
+        sub_target = start + direction * len_along_path + vec_perp * self.res
+        sub_target = self.find_free_point(sub_target, -avoid_dir * self.res, mask)
+        return sub_target - avoid_dir * 0.01 * self.res
 
     def get_next_point(self, robot_id=None):
         pass
@@ -4,6 +4,7 @@ from abc import ABCMeta
 from typing import List, Tuple, Callable, Dict
 
 from RULEngine.Util.constant import PLAYER_PER_TEAM
+from ai.Algorithm.Graph.ConditionCache import ConditionCache
 from ai.Algorithm.Graph.Graph import Graph
 from ai.Algorithm.Graph.Node import Node
 from ai.STA.Tactic.Tactic import Tactic
@@ -17,14 +18,16 @@ class Strategy(metaclass=ABCMeta):
     """ Définie l'interface commune aux stratégies. """
     def __init__(self, p_game_state: GameState):
         """
-        Initialise la stratégie en créant un graph vide pour chaque robot de l'équipe.
+        Initialise la stratégie en créant un graph vide pour chaque robot de l'équipe. Les graphes partagent une même
+        cache de conditions, remise à zéro au début de chaque exec.
         :param p_game_state: L'état courant du jeu.
         """
         assert isinstance(p_game_state, GameState)
         self.game_state = p_game_state
+        self.condition_cache = ConditionCache()
         self.graphs = []
         for i in range(PLAYER_PER_TEAM):
-            self.graphs.append(Graph())
+            self.graphs.append(Graph(self.condition_cache))
 
     def add_tactic(self, robot_id: int, tactic: Tactic) -> None:
         """
@@ -35,17 +38,19 @@ class Strategy(metaclass=ABCMeta):
         assert(isinstance(robot_id, int))
         self.graphs[robot_id].add_node(Node(tactic))
 
-    def add_condition(self, robot_id: int, start_node: int, end_node: int, condition: Callable[..., bool]):
+    def add_condition(self, robot_id: int, start_node: int, end_node: int, condition: Callable[..., bool],
+                      priority: int=0):
         """
         Ajoute une condition permettant de gérer la transition entre deux tactiques d'un robot.
         :param robot_id: L'id du robot.
         :param start_node: Le noeud de départ du vertex.
         :param end_node: Le noeud d'arrivée du vertex.
         :param condition: Une fonction retournant un booléen permettant de déterminer si on peut effectuer la transition
-        du noeud de départ vers le noeud d'arrivé.
+        du noeud de départ vers le noeud d'arrivé. Son résultat est gardé pour la frame en cours.
+        :param priority: Les conditions de plus haute priorité d'un même noeud sont évaluées en premier.
         """
         assert(isinstance(robot_id, int))
-        self.graphs[robot_id].add_vertex(start_node, end_node, condition)
+        self.graphs[robot_id].add_vertex(start_node, end_node, condition, priority)
 
     def get_current_state(self) -> List[Tuple[int, str, str, str]]:
         """
@@ -72,6 +77,7 @@ class Strategy(metaclass=ABCMeta):
         :return: Un dict des 6 AICommand à envoyer aux robots. La commande située à l'indice i de la liste doit être
         envoyée au robot i.
         """
+        self.condition_cache.new_frame()
         commands = {}
         for i in range(PLAYER_PER_TEAM):
             commands[i] = self.graphs[i].exec()
@@ -14,6 +14,7 @@ from ai.STA.Tactic.Stop import Stop
 from ai.STA.Tactic.go_kick import GoKick
 from ai.STA.Tactic.pass_to_player import PassToPlayer
 from ai.STA.Tactic.tactic_constants import Flags
+from ai.Util.Raycast import RaycastEngine
 
 
 class PassesWithDecisions(Strategy):
@@ -45,64 +46,39 @@ class PassesWithDecisions(Strategy):
                 self.add_tactic(i, Stop(self.game_state, i))
 
     def condition(self, i):
-        print(i)
-        print(self.graphs[self.passing_ID].get_current_tactic())
         return self.graphs[i].get_current_tactic().status_flag == Flags.SUCCESS
 
     def is_best_receiver(self, receiver_id):
         if self.condition(receiver_id):
-            if self.evaluate_best_receiver(self.passing_ID) == receiver_id:
+            # Le meilleur receveur est calculé une seule fois par frame pour toutes les transitions
+            if self.condition_cache.evaluate(self.evaluate_best_receiver, self.passing_ID) == receiver_id:
                 return True
         return False
 
     def evaluate_best_receiver(self, passing_id):
-        passing = self.game_state.get_player_position(passing_id).conv_2_np()
+        snapshot = self.game_state.get_snapshot()
+        passing = snapshot.friends_position[passing_id]
+        goal = self.goal.position.conv_2_np()
+        receivers = [self.player_ID_no1, self.player_ID_no2]
+
+        # Tous les rayons sont lancés d'un coup: passeur vers chaque receveur, chaque receveur vers but,
+        # puis passeur vers but. Le passeur et le receveur du rayon ne sont pas des obstacles.
+        starts = [passing] * len(receivers) + [goal] * len(receivers) + [passing]
+        ends = [snapshot.friends_position[i] for i in receivers] * 2 + [goal]
+        ignored = np.zeros((len(starts), PLAYER_PER_TEAM), dtype=bool)
+        ignored[:, passing_id] = True
+        for lane, i in enumerate(receivers):
+            ignored[lane, i] = True
+            ignored[lane + len(receivers), i] = True
+        detours = RaycastEngine(self.game_state).cast(np.array(starts), np.array(ends), 0, ignored).detours.sum(axis=1)
+
+        scores = {i: detours[lane] + detours[lane + len(receivers)] for lane, i in enumerate(receivers)}
+        # Doubler pour considerer le receveur vers but absent
+        scores[passing_id] = 2 * detours[-1]
+
         score_max = 0
         for i in range(PLAYER_PER_TEAM):
-            score = 0
-            if i == self.player_ID_no1 or i == self.player_ID_no2:
-                # Calcul du score pour passeur vers receveur
-                receiver = self.game_state.get_player_position(i, True).conv_2_np()
-                passing_to_receiver = np.linalg.norm(receiver - passing)
-                for j in range(PLAYER_PER_TEAM):
-                    # Obstacle : les players friends
-                    if not (j == i or j == passing_id):
-                        obstacle = self.game_state.get_player_position(j, True).conv_2_np()
-                        score += np.linalg.norm(obstacle - passing) + np.linalg.norm(receiver - obstacle) - passing_to_receiver
-                for j in range(PLAYER_PER_TEAM):
-                    # Obstacle : les players ennemis
-                    obstacle = self.game_state.get_player_position(j, False).conv_2_np()
-                    score += np.linalg.norm(obstacle - passing) + np.linalg.norm(receiver - obstacle) - passing_to_receiver
-                # Calcul du score pour receveur vers but
-                goal = self.goal.position.conv_2_np()
-                goal_to_receiver = np.linalg.norm(receiver - goal)
-                for j in range(PLAYER_PER_TEAM):
-                    # Obstacle : les players friends
-                    if not (j == i or j == passing_id):
-                        obstacle = self.game_state.get_player_position(j, True).conv_2_np()
-                        score += np.linalg.norm(obstacle - goal) + np.linalg.norm(receiver - obstacle) - goal_to_receiver
-                for j in range(PLAYER_PER_TEAM):
-                    # Obstacle : les players ennemis
-                    obstacle = self.game_state.get_player_position(j, False).conv_2_np()
-                    score += np.linalg.norm(obstacle - goal) + np.linalg.norm(receiver - obstacle) - goal_to_receiver
-                if score_max < score:
-                    score_max = score
-                    receiver_id = i
-
-            elif i == passing_id:
-                # Calcul du score pour passeur vers but
-                receiver = self.goal.position.conv_2_np()
-                passing_to_receiver = np.linalg.norm(receiver - passing)
-                for j in range(PLAYER_PER_TEAM):
-                    if not (j == passing_id):
-                        obstacle = self.game_state.get_player_position(j, True).conv_2_np()
-                        score += np.linalg.norm(obstacle - passing) + np.linalg.norm(receiver - obstacle) - passing_to_receiver
-                for j in range(PLAYER_PER_TEAM):
-                    obstacle = self.game_state.get_player_position(j, False).conv_2_np()
-                    score += np.linalg.norm(obstacle - passing) + np.linalg.norm(receiver - obstacle) - passing_to_receiver
-                # Doubler pour considerer le receveur vers but absent
-                score *= 2
-                if score_max < score:
-                    score_max = score
-                    receiver_id = None
-        return receiver_id
\ No newline at end of file
+            if i in scores and score_max < scores[i]:
+                score_max = scores[i]
+                receiver_id = None if i == passing_id else i
+        return receiver_id
@@ -2,13 +2,103 @@
 
 from math import cos, sin
 
+import numpy as np
+
+from RULEngine.Game.WorldSnapshot import WorldSnapshot
+from RULEngine.Util import geometry_np
 from RULEngine.Util.Position import Position
 from RULEngine.Util.constant import PLAYER_PER_TEAM, ROBOT_RADIUS, BALL_RADIUS
-from RULEngine.Util.geometry import get_closest_point_on_line, get_distance
 from ai.states.game_state import GameState
 __author__ = 'RoboCupULaval'
 
 
+class RaycastResult:
+    """
+        Résultat d'un lancer de K rayons contre les M obstacles, dans l'ordre: alliés par id, ennemis par id, balle.
+            - hits (K, M): vrai si le rayon touche l'obstacle
+            - hit (K,): vrai si le rayon touche au moins un obstacle
+            - first_hit_distance (K,): distance du départ au premier contact, inf sans contact
+            - clearance (K,): plus petit espace libre entre le rayon élargi et un obstacle, négatif s'il y a contact
+            - detours (K, M): allongement du trajet s'il passait par l'obstacle, 0 pour les obstacles ignorés
+    """
+
+    def __init__(self, hits, first_hit_distance, clearance, detours):
+        self.hits = hits
+        self.hit = hits.any(axis=1)
+        self.first_hit_distance = first_hit_distance
+        self.clearance = clearance
+        self.detours = detours
+
+
+class RaycastEngine:
+    """
+        Lance plusieurs rayons (segments élargis) d'un coup contre tous les robots et la balle de la photo du monde,
+        en une seule diffusion numpy.
+    """
+
+    def __init__(self, game_state):
+        self.game_state = game_state
+
+    def cast(self, starts, ends, width, friends_ignored=None, enemies_ignored=None, is_ball_ignored=True):
+        """
+            Args:
+                `starts`: (K, 2) départs des rayons, ou liste de Position
+                `ends`: (K, 2) fins des rayons, ou liste de Position
+                `width`: largeur des rayons, commune ou (K,)
+                `friends_ignored`: ids des alliés ignorés par tous les rayons, ou masque (K, PLAYER_PER_TEAM)
+                `enemies_ignored`: ids des ennemis ignorés par tous les rayons, ou masque (K, PLAYER_PER_TEAM)
+                `is_ball_ignored`: (default: True) vrai s'il faut ignorer la balle
+            Returns:
+                RaycastResult
+        """
+        starts = geometry_np.to_array(starts)
+        ends = geometry_np.to_array(ends)
+        nb_rays = len(starts)
+        snapshot = self._get_snapshot()
+        obstacles = np.concatenate((snapshot.friends_position, snapshot.enemies_position,
+                                    snapshot.ball_position[np.newaxis, :]))
+        radii = np.array([ROBOT_RADIUS] * (2 * PLAYER_PER_TEAM) + [BALL_RADIUS], dtype=np.float64)
+        active = np.concatenate((~_get_ignored_mask(friends_ignored, nb_rays),
+                                 ~_get_ignored_mask(enemies_ignored, nb_rays),
+                                 np.full((nb_rays, 1), not is_ball_ignored)), axis=1)
+
+        widths = np.broadcast_to(np.asarray(width, dtype=np.float64), (nb_rays,))[:, np.newaxis]
+        margins = geometry_np.get_distances_to_segments(obstacles[np.newaxis, :, :], starts[:, np.newaxis, :],
+                                                        ends[:, np.newaxis, :]) - radii - widths
+        margins = np.where(active, margins, np.inf)
+        hits = margins <= 0
+
+        ratios = geometry_np.get_segments_circles_intersection(starts, ends, obstacles, radii + widths)
+        ratios = np.where(hits, ratios, np.inf).min(axis=1)
+        first_hit_distance = ratios * geometry_np.get_distances(starts, ends)
+        first_hit_distance[np.isinf(ratios)] = np.inf
+
+        detours = geometry_np.get_distances(starts[:, np.newaxis, :], obstacles[np.newaxis, :, :]) + \
+            geometry_np.get_distances(obstacles[np.newaxis, :, :], ends[:, np.newaxis, :]) - \
+            geometry_np.get_distances(starts, ends)[:, np.newaxis]
+        detours = np.where(active, detours, 0)
+
+        return RaycastResult(hits, first_hit_distance, margins.min(axis=1), detours)
+
+    def _get_snapshot(self):
+        snapshot = self.game_state.get_snapshot()
+        if snapshot is None:
+            # aucune frame de vision encore, on prend les joueurs tels quels
+            snapshot = WorldSnapshot.from_game(self.game_state.game)
+        return snapshot
+
+
+def _get_ignored_mask(ignored, nb_rays):
+    """ Retourne le masque (K, PLAYER_PER_TEAM) des joueurs ignorés à partir d'une liste d'ids ou d'un masque. """
+    if ignored is None:
+        return np.zeros((nb_rays, PLAYER_PER_TEAM), dtype=bool)
+    if isinstance(ignored, np.ndarray) and ignored.dtype == bool:
+        return np.broadcast_to(ignored, (nb_rays, PLAYER_PER_TEAM))
+    mask = np.zeros(PLAYER_PER_TEAM, dtype=bool)
+    mask[list(ignored)] = True
+    return np.broadcast_to(mask, (nb_rays, PLAYER_PER_TEAM))
+
+
 def raycast(game_state, initial_position, length, direction, width,
             blue_players_ignored, yellow_players_ignored,
             is_ball_ignored=True):
@@ -45,7 +135,8 @@ def raycast2(game_state, initial_position, final_position, width,
              is_ball_ignored=True):
     """
         Retourne si le rayon tracé d'une position initiale à une position
-        finale provoque une collision.
+        finale provoque une collision. Seul le segment entre les deux positions
+        est vérifié.
         Args:
             `game_state`: L'état du jeu
             `initial_position`: Position de départ du rayon
@@ -63,26 +154,6 @@ def raycast2(game_state, initial_position, final_position, width,
     assert isinstance(yellow_players_ignored, list)
     assert isinstance(is_ball_ignored, bool)
 
-    for i in range(0, PLAYER_PER_TEAM):
-        if i not in blue_players_ignored:
-            player_position = game_state.get_player_pose(i).position
-            pos = get_closest_point_on_line(player_position, initial_position,
-                                            final_position)
-            if get_distance(player_position, pos) <= width + ROBOT_RADIUS:
-                return True
-
-        if i not in yellow_players_ignored:
-            enemy_position = game_state.get_player_pose(i, False).position
-            pos = get_closest_point_on_line(enemy_position, initial_position,
-                                            final_position)
-            if get_distance(enemy_position, pos) <= width + ROBOT_RADIUS:
-                return True
-
-    if not is_ball_ignored:
-        ball_position = game_state.get_ball_position()
-        pos = get_closest_point_on_line(ball_position, initial_position,
-                                        final_position)
-        if get_distance(ball_position, pos) <= width + BALL_RADIUS:
-            return True
-
-    return False
+    result = RaycastEngine(game_state).cast([initial_position], [final_position], width,
+                                            blue_players_ignored, yellow_players_ignored, is_ball_ignored)
+    return bool(result.hit[0])
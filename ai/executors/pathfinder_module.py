@@ -1,16 +1,34 @@
 import time
 
-from RULEngine.Debug.debug_interface import COLOR_ID_MAP, DEFAULT_PATH_TIMEOUT
+import numpy as np
+
+from RULEngine.Debug.debug_interface import COLOR_ID_MAP, DEFAULT_PATH_TIMEOUT, PATH
+from RULEngine.Debug.profiler import Profiler, PATHFINDER_ROBOT_STAGE
 from RULEngine.Util.geometry import get_distance
 from ai.Algorithm.AsPathManager import AsPathManager
 from ai.Algorithm.CinePath.CinePath import CinePath
 from ai.Algorithm.PathfinderRRT import PathfinderRRT
 from ai.Algorithm.path_partitionner import PathPartitionner
 from ai.executors.executor import Executor
+from ai.executors.movement_executor import PATHFINDER_DEADZONE
 from ai.states.world_state import WorldState
 from config.config_service import ConfigService
 
 INTERMEDIATE_DISTANCE_THRESHOLD = 540
+PATH_GOAL_TOLERANCE = 50
+PATH_OBSTACLE_TOLERANCE = 20
+PATH_MAX_AGE = 0.5
+
+
+class PathCacheEntry(object):
+    """ Chemin déjà calculé pour un robot, avec la cible et la position des obstacles au moment du calcul. """
+
+    def __init__(self, path, goal, obstacles, time_planned):
+        self.path = path
+        self.points = path.points[1:]
+        self.goal = goal
+        self.obstacles = obstacles
+        self.time_planned = time_planned
 
 
 class PathfinderModule(Executor):
@@ -22,6 +40,12 @@ class PathfinderModule(Executor):
         self.last_time_pathfinding_for_robot = {}
         self.last_frame = time.time()
         self.cinematic_pathfinder = CinePath(p_world_state)
+        self.profiler = Profiler()
+        self.clock = time.time
+        self.path_cache = {}
+        self.cache_hits = 0
+        self.cache_rechecks = 0
+        self.cache_replans = 0
 
     def exec(self):
         ai_commands = self._get_aicommand_that_need_path()
@@ -46,16 +70,87 @@ class PathfinderModule(Executor):
             ai_commands_to_adjust.clear()
 
     def _pathfind_ai_commands(self, ai_commands):
+        if not ai_commands:
+            return
+        if self.type_of_pathfinder.lower() != "path_part":
+            # ces pathfinders planifient un robot à la fois et mesurent eux-mêmes l'étape de chaque robot
+            with self.profiler.measure("pathfinder"):
+                paths = self.pathfinder.get_paths({ai_c.robot_id: ai_c.pose_goal for ai_c in ai_commands})
+            for ai_c in ai_commands:
+                # le rrt retourne des Pose, le MovementExecutor suit des Position
+                ai_c.path = [getattr(point, "position", point) for point in paths[ai_c.robot_id]]
+            return
+
+        now = self.clock()
+        obstacles, friend_index = self._get_obstacles_position()
+        to_plan = {}
         for ai_c in ai_commands:
-            self.time = time.time()
-            path = self.pathfinder.get_path(ai_c.robot_id, ai_c.pose_goal)
-            # print(self.time - time.time())
-            if self.type_of_pathfinder.lower() == "path_part":
-
-                self.draw_path(path)
-                ai_c.path = path.points[1:]
+            if self._reuse_cached_path(ai_c, obstacles, friend_index[ai_c.robot_id], now):
+                self.cache_hits += 1
             else:
-                ai_c.path = path
+                to_plan[ai_c.robot_id] = ai_c.pose_goal
+
+        if to_plan:
+            self.cache_replans += len(to_plan)
+            start = time.perf_counter_ns()
+            paths = self.pathfinder.get_paths(to_plan)
+            if self.profiler.enabled:
+                duration = time.perf_counter_ns() - start
+                self.profiler.record("pathfinder", duration)
+                # tous les robots sont planifiés ensemble, chacun se voit attribuer sa part du calcul
+                for robot_id in to_plan:
+                    self.profiler.record(PATHFINDER_ROBOT_STAGE.format(robot_id), duration // len(to_plan))
+            for robot_id, path in paths.items():
+                goal = np.array([path.goal.x, path.goal.y])
+                self.path_cache[robot_id] = PathCacheEntry(path, goal, obstacles, now)
+                self.draw_path(path, robot_id)
+
+        for ai_c in ai_commands:
+            ai_c.path = list(self.path_cache[ai_c.robot_id].points)
+
+    def _get_obstacles_position(self):
+        """ Retourne les positions (M, 2) de tous les robots, alliés puis ennemis, et l'index de chaque allié. """
+        friends = list(self.ws.game_state.my_team.players.values())
+        players = friends + list(self.ws.game_state.other_team.players.values())
+        obstacles = np.array([[player.pose.position.x, player.pose.position.y] for player in players])
+        return obstacles, {player.id: idx for idx, player in enumerate(friends)}
+
+    def _reuse_cached_path(self, ai_command, obstacles, robot_index, now):
+        """
+            Indique si le chemin en cache du robot peut encore servir: la cible
+            n'a pas bougé, le chemin n'est pas trop vieux et les obstacles qui se
+            sont déplacés depuis le calcul ne le bloquent pas.
+        """
+        entry = self.path_cache.get(ai_command.robot_id)
+        if entry is None or now - entry.time_planned > PATH_MAX_AGE:
+            return False
+        goal = ai_command.pose_goal.position
+        if np.hypot(goal.x - entry.goal[0], goal.y - entry.goal[1]) > PATH_GOAL_TOLERANCE:
+            return False
+
+        # on retire les points déjà atteints, comme le MovementExecutor
+        robot_position = obstacles[robot_index]
+        while len(entry.points) > 1 and \
+                np.hypot(entry.points[0].x - robot_position[0], entry.points[0].y - robot_position[1]) < \
+                PATHFINDER_DEADZONE:
+            entry.points = entry.points[1:]
+
+        moved = np.hypot(*(obstacles - entry.obstacles).T) > PATH_OBSTACLE_TOLERANCE
+        moved[robot_index] = False
+        if moved.any():
+            self.cache_rechecks += 1
+            if self.pathfinder.is_path_blocked(robot_position, entry.points, obstacles[moved]):
+                return False
+            entry.obstacles = obstacles
+        return True
+
+    def get_cache_stats(self):
+        """ Retourne les compteurs du cache de chemins et la proportion de chemins réutilisés. """
+        total = self.cache_hits + self.cache_replans
+        return {"hits": self.cache_hits,
+                "rechecks": self.cache_rechecks,
+                "replans": self.cache_replans,
+                "hit_rate": self.cache_hits / total if total else 0.0}
 
     def _modify_path_for_cinematic_constraints(self, ai_commandes: list):
         for cmd in ai_commandes:
@@ -92,6 +187,9 @@ class PathfinderModule(Executor):
                             type_of_pathfinder, "!")
 
     def draw_path(self, path, pid=0):
+        if not self.ws.debug_interface.is_enabled(PATH):
+            return
+        link = "path - " + str(pid)
         points = []
         for idx, path_element in enumerate(path.points):
             x = path_element.x
@@ -101,8 +199,9 @@ class PathfinderModule(Executor):
                 if idx == 0:
                     pass
                 else:
-                    self.ws.debug_interface.add_line(points[idx - 1], points[idx])
+                    self.ws.debug_interface.add_line(points[idx - 1], points[idx], link=link + " - " + str(idx),
+                                                     category=PATH)
 
         #    print(points)
-        self.ws.debug_interface.add_multiple_points(points[1:], COLOR_ID_MAP[pid], width=5, link="path - " + str(pid),
-                                                    timeout=DEFAULT_PATH_TIMEOUT)
+        self.ws.debug_interface.add_multiple_points(points[1:], COLOR_ID_MAP[pid], width=5, link=link,
+                                                    timeout=DEFAULT_PATH_TIMEOUT, category=PATH)
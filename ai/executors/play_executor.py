@@ -1,5 +1,6 @@
 # Under MIT License, see LICENSE.txt
 
+from RULEngine.Debug.debug_interface import STATUS
 from ai.executors.executor import Executor
 from ai.states.world_state import WorldState
 
@@ -13,15 +14,18 @@ class PlayExecutor(Executor):
         :param p_world_state: (WorldState) instance du worldstate
         """
         super().__init__(p_world_state)
+        self.books_sent = False
 
     def exec(self) -> None:
         """
-        Execute la stratégie courante et envoie le status des robots et les livres de tactiques et stratégies
+        Execute la stratégie courante et envoie le status des robots. Les livres de tactiques et stratégies ne sont
+        envoyés qu'une fois, le UIDebugCommandSender les renvoie lui-même après une poignée de main du UI-debug.
 
         :return: None
         """
-        # TODO use handshake with the UI-DEBUG to stop sending it every frame! MGL 2017/03/16
-        self._send_books()
+        if not self.books_sent:
+            self._send_books()
+            self.books_sent = True
 
         self._execute_strategy()
         # TODO reduce the frequency at which we send it maybe? MGL 2017/03/16
@@ -49,6 +53,8 @@ class PlayExecutor(Executor):
 
         :return: None
         """
+        if not self.ws.debug_interface.is_enabled(STATUS):
+            return
         states = self.ws.play_state.get_current_tactical_state()
         for state in states:
             player_id = state[0]
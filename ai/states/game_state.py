@@ -5,6 +5,7 @@
     Ce module garde en mémoire l'état du jeu
 """
 from RULEngine.Game.Player import Player
+from RULEngine.Game.WorldSnapshot import WorldSnapshot
 from RULEngine.Util.game_world import GameWorld
 from RULEngine.Util.constant import TeamColor
 from RULEngine.Util.singleton import Singleton
@@ -81,6 +82,15 @@ class GameState(object, metaclass=Singleton):
         """
         return self.field.ball.position
 
+    def get_snapshot(self) -> WorldSnapshot:
+        """
+            Retourne la photo du monde de la frame courante, avec les positions, vitesses et distances des joueurs et
+            de la balle dans des tableaux numpy.
+
+            :return: L'instance WorldSnapshot de la frame
+        """
+        return self.game.snapshot
+
     def get_ball_velocity(self):
         """
         Retourne le vecteur vélocité de la balle.
@@ -0,0 +1,118 @@
+# Under MIT License, see LICENSE.txt
+"""
+    Enregistre la vision et l'arbitre dans un log, ou rejoue un log dans l'IA
+    sans réseau ni robots pour mesurer ses performances.
+
+    python benchmark.py record match.log config/sim_standard.cfg --duration 60
+    python benchmark.py replay match.log config/sim_kalman_redirect.cfg --strategy SimpleOffense
+"""
+
+import argparse
+import time
+
+from config.config_service import ConfigService
+
+__author__ = 'RoboCupULaval'
+
+
+def set_arg_parser():
+    prog_desc = "Enregistrement et relecture de logs de vision pour mesurer les performances de l'IA."
+    arg_parser = argparse.ArgumentParser(prog="RobocupULaval's Team ULtron AI benchmark", description=prog_desc)
+    subparsers = arg_parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    record_parser = subparsers.add_parser("record", help="enregistre la vision et l'arbitre dans un log")
+    record_parser.add_argument("log_file", help="fichier de log à créer")
+    record_parser.add_argument('config_file', nargs='?', help="load a configuration file(.ini/cfg style)",
+                               default="config/sim_standard.cfg")
+    record_parser.add_argument("--duration", type=float, default=None,
+                               help="durée de l'enregistrement en secondes, jusqu'à Ctrl-C par défaut")
+
+    replay_parser = subparsers.add_parser("replay", help="rejoue un log dans l'IA et mesure ses performances")
+    replay_parser.add_argument("log_file", help="fichier de log à rejouer")
+    replay_parser.add_argument('config_file', nargs='?', help="load a configuration file(.ini/cfg style)",
+                               default="config/sim_standard.cfg")
+    replay_parser.add_argument("--strategy", default="DoNothing", help="stratégie du StrategyBook à exécuter")
+    replay_parser.add_argument("--realtime", action="store_true",
+                               help="rejoue à la vitesse enregistrée plutôt qu'au plus vite")
+    replay_parser.add_argument("--dump", default=None, help="fichier .csv ou .json où écrire les temps par étape")
+
+    return arg_parser
+
+
+def record(args):
+    from RULEngine.Communication.util.datagram_log import DatagramRecorder
+
+    cfg = ConfigService().config_dict["COMMUNICATION"]
+    recorder = DatagramRecorder(args.log_file, cfg["udp_address"], int(cfg["vision_port"]), int(cfg["referee_port"]))
+    start = time.time()
+    print("Enregistrement dans", args.log_file)
+    try:
+        while args.duration is None or time.time() - start < args.duration:
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    recorder.stop()
+    print("{} datagrammes enregistrés en {:.1f} s".format(recorder.writer.count, time.time() - start))
+
+
+def replay(args):
+    from RULEngine.Communication.receiver.referee_receiver import ReplayRefereeReceiver
+    from RULEngine.Communication.receiver.vision_receiver import ReplayVisionReceiver
+    from RULEngine.Communication.sender.stub_command_sender import StubCommandSender
+    from RULEngine.Communication.util.datagram_log import read_datagram_log
+    from RULEngine.Debug.profiler import Profiler
+    from RULEngine.Framework import Framework
+    from RULEngine.Util.log_replayer import LogReplayer
+    from coach import Coach
+
+    cfg = ConfigService().config_dict
+    # la relecture est synchrone pour être reproductible
+    cfg["GAME"]["pipeline"] = "none"
+
+    records = read_datagram_log(args.log_file)
+    robot_command_sender = StubCommandSender()
+    ai_coach = Coach()
+    framework = Framework(ReplayVisionReceiver(), ReplayRefereeReceiver(), robot_command_sender)
+    framework.initialize_ai(ai_coach.main_loop, ai_coach.set_reference)
+
+    play_state = ai_coach.world_state.play_state
+    play_state.set_strategy(play_state.get_new_strategy(args.strategy)(ai_coach.world_state.game_state))
+
+    profiler = Profiler()
+    profiler.configure(0)
+    profiler.reset()
+    replayer = LogReplayer(framework, records, float(cfg["GAME"]["ai_rate"]), args.realtime)
+    pathfinder_module = ai_coach.world_state.module_state.pathfinder_module
+    pathfinder_module.clock = framework.clock
+    stats = replayer.run()
+
+    print("Stratégie {}: {} frames de vision, {} itérations de l'IA, {} commandes"
+          .format(args.strategy, stats["vision_frames"], stats["ai_iterations"], robot_command_sender.command_count))
+    print("Log de {:.1f} s rejoué en {:.2f} s: {:.1f} frames/s, {:.1f} itérations/s"
+          .format(stats["log_duration"], stats["wall_time"], stats["frames_per_second"],
+                  stats["iterations_per_second"]))
+    cache_stats = pathfinder_module.get_cache_stats()
+    print("Cache de chemins: {} réutilisés ({} revérifiés), {} recalculés, {:.0%} de réutilisation"
+          .format(cache_stats["hits"], cache_stats["rechecks"], cache_stats["replans"], cache_stats["hit_rate"]))
+    print(profiler.format_report(profiler.get_report()))
+    if args.dump is not None:
+        profiler.dump(args.dump)
+
+
+if __name__ == '__main__':
+    # parser for command line arguments
+    parser = set_arg_parser()
+    args = parser.parse_args()
+
+    ConfigService().load_file(args.config_file)
+    if args.command == "record":
+        record(args)
+    else:
+        from ai.STA.Strategy.StrategyBook import StrategyBook
+        # une stratégie inconnue serait remplacée par DoNothing et fausserait les mesures
+        strategy_book = StrategyBook()
+        if not strategy_book.check_existance_strategy(args.strategy):
+            parser.error("stratégie inconnue {}, choisir parmi: {}"
+                         .format(args.strategy, ", ".join(strategy_book.get_strategies_name_list())))
+        replay(args)
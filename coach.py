@@ -2,6 +2,7 @@
 from typing import List
 
 from RULEngine.Debug.debug_interface import DebugInterface
+from RULEngine.Debug.profiler import Profiler
 from RULEngine.Util.game_world import GameWorld
 from ai.executors.regulator import PositionRegulator
 from ai.states.world_state import WorldState
@@ -38,6 +39,9 @@ class Coach(object):
         self.regulator_executor = PositionRegulator(self.world_state)
         self.robot_command_executor = CommandExecutor(self.world_state)
 
+        # profiling
+        self.profiler = Profiler()
+
         # logging
         DebugInterface().add_log(1, "\nCoach initialized with \nmode_debug_active = "+str(self.mode_debug_active) +
                                  "\nis_simulation = "+str(self.is_simulation))
@@ -49,15 +53,21 @@ class Coach(object):
         :return: List(_Command) les commandes des robots
         """
         # main loop de l'IA
-        self.debug_executor.exec()
-        self.play_executor.exec()
-        self.module_executor.exec()
-        self.movement_executor.exec()
-        self.regulator_executor.exec()
-        robot_commands = self.robot_command_executor.exec()
+        with self.profiler.measure("Coach.main_loop"):
+            self._timed_exec(self.debug_executor)
+            self._timed_exec(self.play_executor)
+            self._timed_exec(self.module_executor)
+            self._timed_exec(self.movement_executor)
+            self._timed_exec(self.regulator_executor)
+            robot_commands = self._timed_exec(self.robot_command_executor)
 
         return robot_commands
 
+    def _timed_exec(self, executor):
+        """ Exécute un executor en mesurant sa durée sous le nom de sa classe. """
+        with self.profiler.measure(type(executor).__name__):
+            return executor.exec()
+
     def set_reference(self, world_reference: GameWorld) -> None:
         """
         Permet de mettre les références dans le worldstate et le debugexecutor.
@@ -0,0 +1,63 @@
+# Under MIT license, see LICENSE.txt
+
+import unittest
+
+import numpy as np
+
+from ai.Algorithm.Astar.AsGraph import AsGraph
+from ai.Algorithm.Astar.AsObstacle import AsObstacle
+from ai.Algorithm.Astar.AsPosition import AsPosition
+
+__author__ = 'RoboCupULaval'
+
+
+def distance_to_segment(point, start, end):
+    segment = np.array([end.x - start.x, end.y - start.y])
+    to_point = np.array([point.x - start.x, point.y - start.y])
+    ratio = np.clip(np.dot(to_point, segment) / max(np.dot(segment, segment), 1e-9), 0, 1)
+    return np.linalg.norm(to_point - ratio * segment)
+
+
+class TestAsGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = AsGraph(AsPosition(-5000, 3500), AsPosition(5000, -3500), 250, 125)
+
+    def test_occupancy_is_a_disk(self):
+        occupancy = self.graph.getOccupancy([AsObstacle(AsPosition(0, 0))])
+        occupied = [self.graph.getPosition(index) for index in np.flatnonzero(occupancy & ~self.graph.border)]
+        distances = [AsPosition(0, 0).getDist(position) for position in occupied]
+        self.assertLessEqual(max(distances), 500)
+        self.assertEqual(len(occupied), np.sum((np.arange(-4, 5)[:, None] ** 2 + np.arange(-4, 5) ** 2) <= 16))
+
+    def test_free_field_gives_straight_path(self):
+        end = AsPosition(2010.5, 1033.2)
+        self.assertEqual(self.graph.aStarPath(AsPosition(-2000, -1000), end, []), [end])
+
+    def test_path_avoids_obstacles(self):
+        start = AsPosition(-2000, 0)
+        end = AsPosition(2000, 0)
+        obstacles = [AsObstacle(AsPosition(0, y)) for y in range(-1500, 1501, 500)]
+        path = self.graph.aStarPath(start, end, obstacles)
+
+        self.assertIs(path[-1], end)
+        self.assertGreater(len(path), 1)
+        for segment_start, segment_end in zip([start] + path[:-1], path):
+            for obstacle in obstacles:
+                self.assertGreater(distance_to_segment(obstacle.position, segment_start, segment_end), 400)
+
+    def test_occupancy_is_not_kept_between_queries(self):
+        obstacles = [AsObstacle(AsPosition(0, 0))]
+        self.graph.aStarPath(AsPosition(-2000, 0), AsPosition(2000, 0), obstacles)
+        end = AsPosition(2000, 0)
+        self.assertEqual(self.graph.aStarPath(AsPosition(-2000, 0), end, []), [end])
+
+    def test_blocked_start_stays_in_place(self):
+        start = AsPosition(0, 0)
+        path = self.graph.aStarPath(start, AsPosition(2000, 0), [AsObstacle(AsPosition(10, 10))])
+        self.assertEqual(path, [start])
+
+    def test_enclosed_goal_stays_in_place(self):
+        start = AsPosition(-2000, 0)
+        ring = [AsObstacle(AsPosition(2000 + 700 * np.cos(angle), 700 * np.sin(angle)))
+                for angle in np.linspace(0, 2 * np.pi, 16, endpoint=False)]
+        self.assertEqual(self.graph.aStarPath(start, AsPosition(2000, 0), ring), [start])
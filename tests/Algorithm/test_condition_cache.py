@@ -0,0 +1,108 @@
+# Under MIT licence, see LICENCE.txt
+
+import unittest
+from functools import partial
+
+from ai.Algorithm.Graph.ConditionCache import ConditionCache
+from ai.Algorithm.Graph.Graph import Graph
+from ai.Algorithm.Graph.Node import Node
+from ai.STA.Tactic.Tactic import Tactic
+from ai.states.game_state import GameState
+
+__author__ = 'RoboCupULaval'
+
+
+class CountingCondition:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        return self.result
+
+
+class TestConditionCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ConditionCache()
+
+    def test_evaluate_once_per_frame(self):
+        condition = CountingCondition(True)
+        self.assertTrue(self.cache.evaluate(partial(condition, 1)))
+        self.assertTrue(self.cache.evaluate(partial(condition, 1)))
+        self.assertTrue(self.cache.evaluate(condition, 1))
+        self.cache.evaluate(condition, 2)
+        self.assertEqual(condition.calls, [(1,), (2,)])
+
+        self.cache.new_frame()
+        self.cache.evaluate(partial(condition, 1))
+        self.assertEqual(condition.calls, [(1,), (2,), (1,)])
+
+    def test_unhashable_arguments_are_not_cached(self):
+        condition = CountingCondition(False)
+        self.cache.evaluate(condition, [1])
+        self.cache.evaluate(condition, [1])
+        self.assertEqual(len(condition.calls), 2)
+
+    def test_stats(self):
+        condition = CountingCondition(True)
+        for _ in range(3):
+            self.cache.evaluate(condition, 1)
+        name, stats = self.cache.get_stats()[0]
+        self.assertTrue(name.endswith("(1,)"))
+        self.assertEqual(stats.calls, 3)
+        self.assertEqual(stats.evaluations, 1)
+        self.assertGreaterEqual(stats.max_time, 0)
+
+        self.cache.reset_stats()
+        self.assertEqual(self.cache.get_stats(), [])
+
+
+class TestGraphConditions(unittest.TestCase):
+    def setUp(self):
+        self.cache = ConditionCache()
+        self.graph = Graph(self.cache)
+        for _ in range(3):
+            self.graph.add_node(Node(Tactic(GameState(), 0)))
+
+    def test_priority_and_lazy_evaluation(self):
+        low = CountingCondition(True)
+        high = CountingCondition(True)
+        self.graph.add_vertex(0, 1, low)
+        self.graph.add_vertex(0, 2, high, 1)
+        self.graph.exec()
+        self.assertEqual(self.graph.current_node, 2)
+        self.assertEqual(len(high.calls), 1)
+        self.assertEqual(low.calls, [])
+
+    def test_shared_condition_evaluated_once(self):
+        shared = CountingCondition(False)
+        self.graph.add_vertex(0, 1, partial(shared, 4))
+        self.graph.add_vertex(0, 2, partial(shared, 4))
+        other_graph = Graph(self.cache)
+        other_graph.add_node(Node(Tactic(GameState(), 1)))
+        other_graph.add_node(Node(Tactic(GameState(), 1)))
+        other_graph.add_vertex(0, 1, partial(shared, 4))
+
+        self.cache.new_frame()
+        self.graph.exec()
+        other_graph.exec()
+        self.assertEqual(len(shared.calls), 1)
+
+        self.cache.new_frame()
+        self.graph.exec()
+        self.assertEqual(len(shared.calls), 2)
+
+    def test_graph_without_shared_cache(self):
+        condition = CountingCondition(False)
+        graph = Graph()
+        graph.add_node(Node(Tactic(GameState(), 0)))
+        graph.add_node(Node(Tactic(GameState(), 0)))
+        graph.add_vertex(0, 1, condition)
+        graph.exec()
+        graph.exec()
+        self.assertEqual(len(condition.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
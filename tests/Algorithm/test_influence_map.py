@@ -0,0 +1,227 @@
+# Under MIT license, see LICENSE.txt
+
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from RULEngine.Util.Pose import Pose
+from RULEngine.Util.Position import Position
+from RULEngine.Util.geometry import get_distance
+from ai.Algorithm.influence_map import InfluenceMap
+
+__author__ = 'RoboCupULaval'
+
+
+class FakeDebugInterface(object):
+    def __init__(self):
+        self.influence_maps = []
+
+    def add_influence_map(self, influence_map):
+        self.influence_maps.append(influence_map)
+
+
+def create_world_state(friends_positions, enemies_positions, ball_position=Position(0, 0)):
+    def create_team(positions):
+        return SimpleNamespace(players={idx: SimpleNamespace(pose=Pose(position, 0))
+                                        for idx, position in enumerate(positions)})
+
+    game_state = SimpleNamespace(my_team=create_team(friends_positions), other_team=create_team(enemies_positions),
+                                 get_ball_position=lambda: ball_position)
+    return SimpleNamespace(game_state=game_state)
+
+
+def expected_influence(influence_map, row, column, strength):
+    rows, columns = np.indices(influence_map._board.shape)
+    distances = np.sqrt((rows - row) ** 2 + (columns - column) ** 2)
+    influence = np.trunc(strength * influence_map._strength_decay ** distances)
+    influence[(np.abs(rows - row) > influence_map._effect_radius) |
+              (np.abs(columns - column) > influence_map._effect_radius)] = 0
+    return influence
+
+
+class TestInfluenceMap(unittest.TestCase):
+    def test_point_matches_decay_formula(self):
+        influence_map = InfluenceMap(None, effect_radius=10)
+        board = influence_map._create_standard_influence_board()
+        influence_map._add_point_and_propagate_influence(1, 30, board, 100)
+        np.testing.assert_array_equal(board, expected_influence(influence_map, 1, 30, 100))
+
+    def test_kernel_is_computed_once_per_strength(self):
+        influence_map = InfluenceMap(None)
+        board = influence_map._create_standard_influence_board()
+        influence_map._add_point_and_propagate_influence(5, 5, board, 100)
+        influence_map._add_point_and_propagate_influence(10, 10, board, 100)
+        influence_map._add_point_and_propagate_influence(10, 20, board, -100)
+        self.assertEqual(sorted(influence_map._kernels.keys()), [-100, 100])
+
+    def test_float32_mode_keeps_fractions(self):
+        influence_map = InfluenceMap(None, board_dtype=np.float32)
+        board = influence_map._create_standard_influence_board()
+        influence_map._add_point_and_propagate_influence(10, 10, board, 100)
+        self.assertEqual(board.dtype, np.float32)
+        self.assertAlmostEqual(board[10, 11], 90.0, places=4)
+        self.assertAlmostEqual(board[11, 11], 100 * 0.9 ** np.sqrt(2), places=4)
+
+    def test_border_profile_matches_direct_sum(self):
+        for board_dtype in (np.int16, np.float32):
+            influence_map = InfluenceMap(None, board_dtype=board_dtype)
+            for length, depth in ((30, 4), (3, 6)):
+                expected = np.zeros((depth, length), dtype=board_dtype)
+                for row in range(depth):
+                    for column in range(length):
+                        for border_column in range(max(column - depth, 0), min(column + depth + 2, length)):
+                            distance = np.sqrt(row ** 2 + (column - border_column) ** 2)
+                            expected[row, column] += board_dtype(influence_map._compute_values_by_distance(
+                                influence_map._border_strength, distance))
+                profile = influence_map._compute_border_profile(length, depth)
+                self.assertEqual(profile.dtype, board_dtype)
+                np.testing.assert_allclose(profile, expected, rtol=1e-5)
+
+    def test_static_board_is_symmetric(self):
+        influence_map = InfluenceMap(None, have_static=True)
+        borders = influence_map._borders_board
+        np.testing.assert_array_equal(borders, borders[::-1, ::-1])
+        self.assertTrue(np.all(borders <= 0))
+        goals = influence_map._goals_board
+        np.testing.assert_array_equal(goals, -goals[:, ::-1])
+
+    def test_update_every_frame(self):
+        world_state = create_world_state([Position(-1000, 0)], [Position(1000, 500), Position(99999, 0)])
+        influence_map = InfluenceMap(world_state, have_it_executed=True)
+        influence_map.debug_interface = FakeDebugInterface()
+        influence_map.clock = lambda: 100.0
+        influence_map.update()
+
+        self.assertGreater(influence_map.get_influence_at_position(Position(-1000, 0)), 70)
+        self.assertLess(influence_map.get_influence_at_position(Position(1000, 500)), -70)
+        self.assertEqual(len(influence_map.debug_interface.influence_maps), 1)
+
+        world_state.game_state.my_team.players[0].pose = Pose(Position(0, -500), 0)
+        influence_map.update()
+        self.assertGreater(influence_map.get_influence_at_position(Position(0, -500)), 70)
+        # le tableau n'est envoyé au UI-debug qu'une fois par seconde
+        self.assertEqual(len(influence_map.debug_interface.influence_maps), 1)
+
+    def test_incremental_update_matches_full_rebuild(self):
+        rng = np.random.RandomState(0)
+        for board_dtype in (np.int16, np.float32):
+            world_state = create_world_state([Position(-300 * i, 200 * i) for i in range(6)],
+                                             [Position(300 * i, -200 * i) for i in range(6)])
+            incremental_map = InfluenceMap(world_state, have_static=True, have_it_executed=True,
+                                           board_dtype=board_dtype, incremental=True)
+            full_map = InfluenceMap(world_state, have_static=True, have_it_executed=True, board_dtype=board_dtype)
+            for influence_map in (incremental_map, full_map):
+                influence_map.debug_interface = FakeDebugInterface()
+                influence_map.clock = lambda: 100.0
+
+            for _ in range(20):
+                for team in (world_state.game_state.my_team, world_state.game_state.other_team):
+                    for player in team.players.values():
+                        # la plupart des robots restent dans la même case, certains sortent du terrain
+                        if rng.rand() < 0.3:
+                            player.pose = Pose(Position(rng.uniform(-2000, 2000), rng.uniform(-1300, 1300)), 0)
+                incremental_map.update()
+                full_map.update()
+                np.testing.assert_allclose(incremental_map._board, full_map._board, atol=1e-3)
+
+    def test_incremental_update_only_moves_robots_that_changed_cell(self):
+        world_state = create_world_state([Position(-1050, 50), Position(0, 1000)], [Position(1000, 500)])
+        influence_map = InfluenceMap(world_state, have_it_executed=True, incremental=True, full_rebuild_period=3)
+        influence_map.debug_interface = FakeDebugInterface()
+        influence_map.clock = lambda: 100.0
+        influence_map.update()
+        self.assertEqual(influence_map.moved_robots, 3)
+
+        # un déplacement à l'intérieur de la case ne touche pas au tableau
+        world_state.game_state.my_team.players[0].pose = Pose(Position(-1060, 40), 0)
+        influence_map.update()
+        self.assertEqual(influence_map.moved_robots, 0)
+
+        # l'ancienne et la nouvelle case du robot qui change de case sont touchées
+        world_state.game_state.other_team.players[0].pose = Pose(Position(1400, -500), 0)
+        influence_map.update()
+        self.assertEqual(influence_map.moved_robots, 2)
+        self.assertLess(influence_map.get_influence_at_position(Position(1400, -500)), -70)
+
+        influence_map.update()
+        influence_map.update()
+        # reconstruction complète périodique
+        self.assertEqual(influence_map.moved_robots, 3)
+
+    def test_board_and_field_positions_are_inverse(self):
+        influence_map = InfluenceMap(None)
+        for row, column in [(0, 0), (3, 17), (influence_map._number_of_rows - 1, influence_map._number_of_columns - 1)]:
+            position = influence_map._transform_board_to_field_position(row, column)
+            self.assertEqual(influence_map._transform_field_to_board_position(position), (row, column))
+
+    def test_max_and_min_in_board(self):
+        influence_map = InfluenceMap(None)
+        influence_map._board[3, 4] = 50
+        influence_map._board[5, 6] = 50
+        influence_map._board[7, 8] = -20
+        self.assertEqual(influence_map.find_max_value_in_board(), (50, [(3, 4), (5, 6)]))
+        self.assertEqual(influence_map.find_min_value_in_board(), (-20, [(7, 8)]))
+
+    def test_points_over_strength_in_square(self):
+        influence_map = InfluenceMap(None)
+        influence_map._board[10, 10] = 60
+        influence_map._board[0, 0] = 60
+        corner_a = influence_map._transform_board_to_field_position(8, 8)
+        corner_b = influence_map._transform_board_to_field_position(12, 12)
+        self.assertEqual(influence_map.find_points_over_strength_square(corner_a, corner_b, 50), [(10, 10)])
+        self.assertEqual(len(influence_map.find_points_under_strength_square(corner_a, corner_b, 0)), 24)
+
+    def test_best_positions_in_circle(self):
+        influence_map = InfluenceMap(None)
+        influence_map._add_point_and_propagate_influence(10, 10, influence_map._board, 100)
+        influence_map._add_point_and_propagate_influence(10, 20, influence_map._board, 60)
+        center = influence_map._transform_board_to_field_position(10, 17)
+
+        rows, columns = np.indices(influence_map._board.shape)
+        in_circle = (rows - 10) ** 2 + (columns - 17) ** 2 <= 5 ** 2
+
+        value, position = influence_map.find_max_value_in_circle(center, 500)
+        self.assertEqual(value, influence_map._board[in_circle].max())
+        self.assertEqual(influence_map._board[influence_map._transform_field_to_board_position(position)], value)
+
+        values, positions = influence_map.find_best_positions_in_circle(center, 500, number=3, minimum=True)
+        np.testing.assert_array_equal(values, np.sort(influence_map._board[in_circle])[:3])
+        for position in positions:
+            self.assertLessEqual(get_distance(position, center), 500 + 1e-6)
+
+    def test_best_positions_in_polygon(self):
+        influence_map = InfluenceMap(None)
+        influence_map._add_point_and_propagate_influence(15, 5, influence_map._board, -100)
+        triangle = [influence_map._transform_board_to_field_position(*cell) for cell in [(10, 0), (20, 0), (15, 10)]]
+        values, positions = influence_map.find_best_positions_in_polygon(triangle, number=2, minimum=True)
+        self.assertEqual(values[0], -100)
+        self.assertEqual(influence_map._transform_field_to_board_position(positions[0]), (15, 5))
+        self.assertEqual(len(influence_map._polygon_cells), 1)
+
+    def test_best_position_along_ray_stops_at_field_border(self):
+        influence_map = InfluenceMap(None)
+        influence_map._board[10, 30] = 90
+        influence_map._board[10, 5] = 80
+        origin = influence_map._transform_board_to_field_position(10, 0)
+        target = influence_map._transform_board_to_field_position(10, 12)
+        value, position = influence_map.find_best_position_along_ray(origin, target)
+        self.assertEqual(value, 80)
+        self.assertEqual(influence_map._transform_field_to_board_position(position), (10, 5))
+
+        far_target = Position(origin.x + 10 * (target.x - origin.x), origin.y)
+        value, _ = influence_map.find_best_position_along_ray(origin, far_target)
+        self.assertEqual(value, 90)
+
+    def test_summed_area_queries(self):
+        influence_map = InfluenceMap(None)
+        influence_map._add_point_and_propagate_influence(8, 20, influence_map._board, 100)
+        mean, center = influence_map.find_best_square(300)
+        self.assertEqual(influence_map._transform_field_to_board_position(center), (8, 20))
+        self.assertAlmostEqual(mean, influence_map._board[7:10, 19:22].mean())
+
+        positions = [influence_map._transform_board_to_field_position(8, 20), Position(-99999, 0)]
+        means = influence_map.get_mean_influences_around_positions(positions, 100)
+        self.assertAlmostEqual(means[0], influence_map._board[7:10, 19:22].mean())
+        np.testing.assert_array_equal(influence_map.get_influences_at_positions(positions),
+                                      [100, influence_map._board[10, -1]])
@@ -0,0 +1,97 @@
+# Under MIT license, see LICENSE.txt
+
+import itertools
+import unittest
+
+import numpy as np
+
+from RULEngine.Util.Position import Position
+from ai.Algorithm.Astar.AsPosition import AsPosition
+from ai.Algorithm.Matchmaking import FORBIDDEN, Matchmaker, buildCostMatrix, matchmakingBestSolution, \
+    matchmakingOptimalSolution, solveAssignment
+
+__author__ = 'RoboCupULaval'
+
+
+def brute_force_cost(cost):
+    nb_rows, nb_columns = cost.shape
+    if nb_rows <= nb_columns:
+        return min(cost[np.arange(nb_rows), list(columns)].sum()
+                   for columns in itertools.permutations(range(nb_columns), nb_rows))
+    return brute_force_cost(cost.T)
+
+
+class TestMatchmaking(unittest.TestCase):
+    def test_assignment_is_optimal(self):
+        rng = np.random.RandomState(0)
+        for shape in [(1, 1), (4, 4), (6, 6), (3, 6), (6, 4)]:
+            for _ in range(10):
+                cost = rng.randint(0, 1000, shape).astype(np.float64)
+                row_to_column = solveAssignment(cost)
+                assigned = row_to_column >= 0
+                self.assertEqual(np.count_nonzero(assigned), min(shape))
+                self.assertEqual(len(set(row_to_column[assigned])), min(shape))
+                self.assertEqual(cost[np.flatnonzero(assigned), row_to_column[assigned]].sum(),
+                                 brute_force_cost(cost))
+
+    def test_forbidden_pairs(self):
+        cost = np.array([[1, 100], [2, 100]], dtype=np.float64)
+        cost[0, 0] = FORBIDDEN
+        np.testing.assert_array_equal(solveAssignment(cost), [1, 0])
+
+        cost[1, 0] = FORBIDDEN
+        # aucune affectation possible pour la première colonne
+        self.assertEqual(sorted(solveAssignment(cost).tolist()), [-1, 1])
+
+    def test_forbidden_pairs_with_negative_costs(self):
+        rng = np.random.RandomState(1)
+        for _ in range(2000):
+            cost = rng.choice([-10., 9., 10.], (3, 3))
+            cost[rng.rand(3, 3) < 0.3] = FORBIDDEN
+            row_to_column = solveAssignment(cost)
+            assigned = row_to_column >= 0
+            feasible = [columns for columns in itertools.permutations(range(3))
+                        if np.isfinite(cost[np.arange(3), list(columns)]).all()]
+            if feasible:
+                self.assertTrue(assigned.all())
+                self.assertEqual(cost[np.arange(3), row_to_column].sum(), brute_force_cost(cost))
+            self.assertTrue(np.isfinite(cost[np.flatnonzero(assigned), row_to_column[assigned]]).all())
+
+    def test_legacy_functions_match_permutations(self):
+        starts = [AsPosition(51.6, 51.0), AsPosition(61.5, 61.0), AsPosition(71.5, 71.0), AsPosition(81.5, 81.0),
+                  AsPosition(91.5, 91.0)]
+        ends = [AsPosition(10.5, 22.0), AsPosition(34.5, 18.0), AsPosition(25.5, 67.0), AsPosition(26.6, 27.0),
+                AsPosition(50.5, 15.0)]
+        best = matchmakingBestSolution(starts, ends)
+        self.assertEqual([cell.endPos for cell in best], ends)
+        total = sum(cell.robotPos.getQuickDist(cell.endPos) for cell in best)
+        self.assertAlmostEqual(total, brute_force_cost(buildCostMatrix(starts, ends) ** 2))
+
+        optimal = matchmakingOptimalSolution(starts, ends)
+        self.assertAlmostEqual(sum(cell.metric for cell in optimal), total)
+
+    def test_travel_time_prefers_robot_moving_toward_target(self):
+        cost = buildCostMatrix([Position(0, 0), Position(0, 0)], [Position(1000, 0)],
+                               velocities=[(-1000, 0), (1000, 0)], acceleration=2000)
+        self.assertLess(cost[1, 0], cost[0, 0])
+        self.assertAlmostEqual(cost[1, 0] * 1000 + 2000 * cost[1, 0] ** 2, 1000)
+
+    def test_matchmaker_pins_goalkeeper_and_keeps_previous_roles(self):
+        matchmaker = Matchmaker(stickiness=100)
+        robots = {0: Position(-1000, 0), 1: Position(0, 0), 2: Position(1000, 0)}
+        roles = {'goal': Position(-1500, 0), 'left': Position(500, 500), 'right': Position(500, -500)}
+        assignment = matchmaker.assign(robots, roles, pinned={'goal': 2})
+        self.assertEqual(assignment['goal'], 2)
+        self.assertEqual(sorted(assignment.values()), [0, 1, 2])
+
+        # une différence de coût sous la stickiness ne change pas les rôles
+        left_robot = assignment['left']
+        roles = {'goal': Position(-1500, 0), 'left': Position(500, -450), 'right': Position(500, 450)}
+        self.assertEqual(matchmaker.assign(robots, roles, pinned={'goal': 2})['left'], left_robot)
+
+        assignment = matchmaker.assign(robots, roles, forbidden=[(0, 'goal'), (1, 'goal')])
+        self.assertEqual(assignment['goal'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
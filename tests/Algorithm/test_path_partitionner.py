@@ -0,0 +1,68 @@
+# Under MIT license, see LICENSE.txt
+
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from RULEngine.Util.Pose import Pose
+from RULEngine.Util.Position import Position
+from ai.Algorithm.path_partitionner import PathPartitionner
+
+__author__ = 'RoboCupULaval'
+
+
+def create_world_state(friends_positions, enemies_positions):
+    def create_players(positions):
+        return {idx: SimpleNamespace(id=idx, pose=Pose(Position(x, y), 0), velocity=[0, 0, 0])
+                for idx, (x, y) in enumerate(positions)}
+
+    friends = create_players(friends_positions)
+    enemies = create_players(enemies_positions)
+    game = SimpleNamespace(friends=SimpleNamespace(players=friends), enemies=SimpleNamespace(players=enemies))
+    game_state = SimpleNamespace(game=game, get_player_pose=lambda player_id: friends[player_id].pose)
+    return SimpleNamespace(game_state=game_state)
+
+
+class TestPathPartitionner(unittest.TestCase):
+    def setUp(self):
+        self.world_state = create_world_state([(0, 0), (0, 1000)], [(1000, 0), (3000, 3000)])
+        self.pathfinder = PathPartitionner(self.world_state)
+
+    def test_free_path_is_straight(self):
+        path = self.pathfinder.get_path(1, Pose(Position(2000, 1000)))
+        self.assertEqual([(point.x, point.y) for point in path.points], [(0, 1000), (2000, 1000)])
+
+    def test_path_avoids_obstacle(self):
+        path = self.pathfinder.get_path(0, Pose(Position(2000, 0)))
+        self.assertGreater(len(path.points), 2)
+        self.assertEqual((path.points[-1].x, path.points[-1].y), (2000, 0))
+        points = np.array([(point.x, point.y) for point in path.points[1:-1]])
+        distances = np.hypot(*(points - np.array([1000, 0])).T)
+        self.assertTrue(np.all(distances > 0.9 * self.pathfinder.gap_proxy))
+
+    def test_robot_is_not_its_own_obstacle(self):
+        # le robot 1 est derrière le robot 0, mais ne doit pas se voir lui-même
+        path = self.pathfinder.get_path(1, Pose(Position(0, 3000)))
+        self.assertEqual(len(path.points), 2)
+
+    def test_get_paths_matches_get_path(self):
+        targets = {0: Pose(Position(2000, 0)), 1: Pose(Position(2000, 1000))}
+        paths = self.pathfinder.get_paths(targets)
+        for player_id, target in targets.items():
+            expected = self.pathfinder.get_path(player_id, target)
+            self.assertEqual([(point.x, point.y) for point in paths[player_id].points],
+                             [(point.x, point.y) for point in expected.points])
+
+    def test_obstacles_do_not_accumulate(self):
+        for _ in range(3):
+            self.pathfinder.get_paths({0: Pose(Position(2000, 0)), 1: Pose(Position(2000, 1000))})
+        self.assertEqual(self.pathfinder.obstacles_position.shape, (4, 2))
+
+    def test_is_path_collide(self):
+        starts = np.array([[0, 0], [0, 1000], [0, 0]], dtype=np.float64)
+        goals = np.array([[2000, 0], [2000, 1000], [-2000, 0]], dtype=np.float64)
+        self.pathfinder.update_obstacles()
+        masks = np.ones((3, 4), dtype=bool)
+        masks[:, 0] = False
+        np.testing.assert_array_equal(self.pathfinder.is_path_collide(starts, goals, masks), [True, False, False])
@@ -1,8 +1,12 @@
 # Under MIT license, see LICENSE.txt
 
+import time
 import unittest
 
-from ai.Algorithm.PathfinderRRT import get_expand_dis, get_goal_sample_rate, get_path_length, line_collision_check
+import numpy as np
+
+from ai.Algorithm.PathfinderRRT import get_expand_dis, get_goal_sample_rate, get_path_length, line_collision_check, \
+    NodeTree, RRT, FIELD_AREA
 from ai.states.game_state import GameState
 
 __author__ = 'RoboCupULaval'
@@ -62,5 +66,73 @@ class TestPathinderRRT(unittest.TestCase):
         self.assertFalse(line_collision_check(first, second, obstacleList))
 
 
+class TestNodeTree(unittest.TestCase):
+    def test_nearest_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        tree = NodeTree(np.array([0.0, 0.0]))
+        for _ in range(300):
+            tree.add(rng.uniform(-3000, 3000, 2), 0)
+        for query in rng.uniform(-4500, 4500, (200, 2)):
+            dists = ((tree.nodes[:tree.count] - query) ** 2).sum(axis=1)
+            self.assertEqual(dists[tree.nearest(query)], dists.min())
+
+    def test_path_to(self):
+        tree = NodeTree(np.array([0.0, 0.0]))
+        first = tree.add(np.array([100.0, 0.0]), 0)
+        tree.add(np.array([0.0, 100.0]), 0)
+        last = tree.add(np.array([200.0, 0.0]), first)
+        self.assertEqual(tree.path_to(last), [[0, 0], [100, 0], [200, 0]])
+
+
+class TestRRT(unittest.TestCase):
+    def create_rrt(self, start, goal, obstacles):
+        return RRT(start, goal, obstacles, FIELD_AREA, get_expand_dis(start, goal),
+                   get_goal_sample_rate(start, goal), rng=np.random.default_rng(1))
+
+    def test_free_path_is_straight(self):
+        rrt = self.create_rrt([0, 0], [2000, 0], [[1000, 1000, 300]])
+        self.assertEqual(rrt.planning(0.1), [[0, 0], [2000, 0]])
+
+    def test_segments_free(self):
+        rrt = self.create_rrt([0, 0], [2000, 0], [[1000, 0, 300]])
+        starts = np.array([[0, 0], [0, 500], [1000, 100]])
+        ends = np.array([[2000, 0], [2000, 500], [1000, 1000]])
+        # un segment qui part de l'intérieur d'un obstacle peut en sortir
+        np.testing.assert_array_equal(rrt.segments_free(starts, ends), [False, True, True])
+
+    def test_path_avoids_wall(self):
+        wall = [[1000, y, 300] for y in range(-1500, 1501, 300)]
+        rrt = self.create_rrt([0, 0], [2000, 0], wall)
+        path = rrt.path_smoothing(rrt.planning(1))
+        self.assertEqual(path[0], [0, 0])
+        self.assertEqual(path[-1], [2000, 0])
+        points = np.array(path)
+        self.assertTrue(rrt.segments_free(points[:-1], points[1:]).all())
+
+    def test_planning_respects_budget(self):
+        # le but est encerclé, les arbres ne peuvent pas se rejoindre
+        ring = [[2000 + 1000 * np.cos(angle), 1000 * np.sin(angle), 400]
+                for angle in np.linspace(0, 2 * np.pi, 16, endpoint=False)]
+        rrt = self.create_rrt([-2000, 0], [2000, 0], ring)
+        start = time.perf_counter()
+        path = rrt.planning(0.02)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(path[0], [-2000, 0])
+        self.assertNotEqual(path[-1], [2000, 0])
+
+    def test_exhausted_budget_holds_position(self):
+        wall = [[1000, y, 300] for y in range(-1500, 1501, 300)]
+        rrt = self.create_rrt([0, 0], [2000, 0], wall)
+        path = rrt.planning(0)
+        self.assertEqual(path, [[0, 0], [0, 0]])
+        self.assertEqual(rrt.path_smoothing(path)[1:], [[0, 0]])
+
+    def test_connect_respects_deadline(self):
+        rrt = self.create_rrt([0, 0], [2000, 0], [])
+        tree = NodeTree(rrt.start)
+        self.assertEqual(rrt.connect(tree, np.array([4000., 0.]), deadline=0), (-1, False))
+        self.assertEqual(tree.count, 1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -26,6 +26,9 @@ class TestVertex(unittest.TestCase):
         self.assertRaises(AssertionError, Vertex, 1.2, foo)
         self.assertRaises(AssertionError, Vertex, -4, foo)
         self.assertRaises(AssertionError, Vertex, 2, "not a function")
+        self.assertEqual(self.vertex1.priority, 0)
+        self.assertEqual(Vertex(1, foo, 3).priority, 3)
+        self.assertRaises(AssertionError, Vertex, 1, foo, 1.5)
 
     def test_evaluate_condition(self):
         self.assertTrue(self.vertex1.evaluate_condition())
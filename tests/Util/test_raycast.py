@@ -2,6 +2,9 @@
 
 import unittest
 from math import pi
+from types import SimpleNamespace
+
+import numpy as np
 
 from ai.Util.Raycast import *
 from ai.states.game_state import GameState
@@ -11,6 +14,7 @@ from RULEngine.Game.Referee import Referee
 from RULEngine.Util.team_color_service import TeamColorService, TeamColor
 from RULEngine.Game.Game import Game
 from RULEngine.Game.Ball import Ball
+from RULEngine.Game.WorldSnapshot import WorldSnapshot
 
 __author__ = 'RoboCupULaval'
 
@@ -34,5 +38,54 @@ class TestRaycast(unittest.TestCase):
     def test_raycast2(self):
         pass
 
+
+
+def create_game_state(friends_positions, enemies_positions, ball_position):
+    def create_team(positions):
+        pose = np.zeros((PLAYER_PER_TEAM, 3))
+        # les joueurs absents sont loin du terrain
+        pose[:, 0:2] = 100000
+        pose[:len(positions), 0:2] = positions
+        return pose, np.zeros((PLAYER_PER_TEAM, 3)), np.ones(PLAYER_PER_TEAM, dtype=bool)
+
+    snapshot = WorldSnapshot(*create_team(friends_positions), *create_team(enemies_positions), ball_position, (0, 0))
+    return SimpleNamespace(get_snapshot=lambda: snapshot)
+
+
+class TestRaycastEngine(unittest.TestCase):
+    def setUp(self):
+        self.game_state = create_game_state([(0, 0), (1000, 0)], [(500, 300)], (2000, 0))
+        self.engine = RaycastEngine(self.game_state)
+
+    def test_cast_many_rays(self):
+        starts = np.array([[-500, 0], [-500, 1000], [1500, 0], [1500, -500]])
+        ends = np.array([[-100, 0], [1500, 1000], [2500, 0], [2500, 500]])
+        result = self.engine.cast(starts, ends, 10, is_ball_ignored=False)
+
+        np.testing.assert_array_equal(result.hit, [True, False, True, True])
+        self.assertTrue(result.hits[0, 0])
+        self.assertAlmostEqual(result.first_hit_distance[0], 500 - ROBOT_RADIUS - 10)
+        self.assertEqual(result.first_hit_distance[1], np.inf)
+        self.assertAlmostEqual(result.first_hit_distance[2], 500 - BALL_RADIUS - 10)
+        self.assertAlmostEqual(result.clearance[1], 700 - ROBOT_RADIUS - 10)
+        self.assertEqual(result.hits.shape, (4, 2 * PLAYER_PER_TEAM + 1))
+
+    def test_segments_not_lines(self):
+        # le robot est sur la droite du rayon mais derrière son départ
+        result = self.engine.cast([[200, 0]], [[600, 0]], 0, friends_ignored=[1])
+        self.assertFalse(result.hit[0])
+        self.assertAlmostEqual(result.clearance[0], 200 - ROBOT_RADIUS)
+
+    def test_ignored_players_per_ray(self):
+        ignored = np.zeros((2, PLAYER_PER_TEAM), dtype=bool)
+        ignored[0, 0] = True
+        result = self.engine.cast([[-500, 0], [-500, 0]], [[500, 0], [500, 0]], 0, friends_ignored=ignored)
+        np.testing.assert_array_equal(result.hit, [False, True])
+        self.assertEqual(result.detours[0, 0], 0)
+        self.assertGreater(result.detours[0, PLAYER_PER_TEAM], 0)
+        self.assertAlmostEqual(result.detours[1, 0], 0)
+
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,105 @@
+# Under MIT license, see LICENSE.txt
+
+import unittest
+from types import SimpleNamespace
+
+from RULEngine.Debug.profiler import Profiler
+from RULEngine.Util.Pose import Pose
+from RULEngine.Util.Position import Position
+from ai.Util.ai_command import AICommand, AICommandType
+from ai.executors.pathfinder_module import PathfinderModule, PATH_MAX_AGE
+from config.config_service import ConfigService
+
+__author__ = 'RoboCupULaval'
+
+
+class FakeDebugInterface(object):
+    def is_enabled(self, category):
+        return True
+
+    def add_line(self, *args, **kwargs):
+        pass
+
+    def add_multiple_points(self, *args, **kwargs):
+        pass
+
+
+def create_players(positions):
+    return {idx: SimpleNamespace(id=idx, pose=Pose(Position(x, y), 0), velocity=[0, 0, 0])
+            for idx, (x, y) in enumerate(positions)}
+
+
+class TestPathfinderModule(unittest.TestCase):
+    def setUp(self):
+        self.config_dict = ConfigService().config_dict
+        ConfigService().config_dict = {"STRATEGY": {"pathfinder": "path_part"}, "GAME": {"type": "sim"}}
+
+        self.friends = create_players([(0, 0), (0, 1000)])
+        self.enemies = create_players([(1000, 0), (3000, 3000)])
+        game = SimpleNamespace(friends=SimpleNamespace(players=self.friends),
+                               enemies=SimpleNamespace(players=self.enemies))
+        game_state = SimpleNamespace(game=game, my_team=game.friends, other_team=game.enemies,
+                                     get_player_pose=lambda player_id: self.friends[player_id].pose)
+        self.ai_commands = {0: AICommand(0, AICommandType.MOVE, pose_goal=Pose(Position(2000, 0)), pathfinder_on=True)}
+        world_state = SimpleNamespace(game_state=game_state, debug_interface=FakeDebugInterface(),
+                                      play_state=SimpleNamespace(current_ai_commands=self.ai_commands))
+
+        self.time = 10.0
+        self.module = PathfinderModule(world_state)
+        self.module.clock = lambda: self.time
+
+    def tearDown(self):
+        ConfigService().config_dict = self.config_dict
+
+    def _exec(self):
+        self.module.exec()
+        return self.module.get_cache_stats()
+
+    def test_each_planned_robot_is_profiled(self):
+        Profiler().reset()
+        self._exec()
+        self.assertEqual(Profiler().histograms["pathfinder robot 0"].count, 1)
+        self.assertEqual(Profiler().histograms["pathfinder"].count, 1)
+        # un chemin réutilisé n'est pas recalculé
+        self._exec()
+        self.assertEqual(Profiler().histograms["pathfinder robot 0"].count, 1)
+
+    def test_path_is_reused(self):
+        self._exec()
+        path = self.ai_commands[0].path
+        self.assertGreater(len(path), 1)
+        self.time += 0.1
+        stats = self._exec()
+        self.assertEqual(stats["replans"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(self.ai_commands[0].path, path)
+
+    def test_goal_moved_replans(self):
+        self._exec()
+        self.ai_commands[0].pose_goal = Pose(Position(2000, 500))
+        self.assertEqual(self._exec()["replans"], 2)
+
+    def test_old_path_replans(self):
+        self._exec()
+        self.time += PATH_MAX_AGE + 0.1
+        self.assertEqual(self._exec()["replans"], 2)
+
+    def test_moved_obstacle_is_rechecked(self):
+        self._exec()
+        # l'obstacle s'éloigne du chemin, le chemin reste valide
+        self.enemies[1].pose = Pose(Position(3000, 2500), 0)
+        stats = self._exec()
+        self.assertEqual((stats["hits"], stats["rechecks"], stats["replans"]), (1, 1, 1))
+
+        # l'obstacle se place sur la fin du chemin, le chemin est recalculé
+        self.enemies[1].pose = Pose(Position(1500, 0), 0)
+        stats = self._exec()
+        self.assertEqual((stats["hits"], stats["rechecks"], stats["replans"]), (1, 2, 2))
+
+    def test_reached_points_are_removed(self):
+        self._exec()
+        first_point = self.ai_commands[0].path[0]
+        self.friends[0].pose = Pose(Position(first_point.x, first_point.y), 0)
+        self._exec()
+        self.assertNotEqual(self.ai_commands[0].path[0], first_point)
+        self.assertEqual(self.module.get_cache_stats()["hits"], 1)